@@ -0,0 +1,52 @@
+"""
+Compare the quick check with the structural check on large booklets.
+
+    python -m benchmarks.bench_validation --booklets 50 --pages 40 --page-kb 256
+"""
+from argparse import ArgumentParser
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, List
+
+from benchmarks.synthetic import truncate_and_pad, write_booklet
+from tum_exam_scripts.logic.validation import is_full_pdf
+from tum_exam_scripts.utils.pdf_reader import verify_structure
+
+
+def _measure(name: str, check: Callable[[Path], bool], pdf_files: List[Path]) -> None:
+    start = perf_counter()
+    detected = sum(1 for f in pdf_files if not check(f))
+    elapsed = perf_counter() - start
+    megabytes = sum(f.stat().st_size for f in pdf_files) / 2**20
+    print(
+        f"{name:10} {elapsed * 1000 / len(pdf_files):8.2f} ms/booklet "
+        f"{megabytes / elapsed:10.1f} MB/s {detected:5} invalid"
+    )
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--booklets", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--page-kb", type=int, default=256)
+    parser.add_argument("--broken", type=int, default=5)
+    arguments = parser.parse_args()
+    with TemporaryDirectory() as directory:
+        pdf_files = []
+        for i in range(arguments.booklets):
+            pdf_file = Path(directory, f"E{i:04}-book.pdf")
+            write_booklet(pdf_file, arguments.pages, arguments.page_kb * 1024, i)
+            if i < arguments.broken:
+                truncate_and_pad(pdf_file)
+            pdf_files.append(pdf_file)
+        print(
+            f"{arguments.booklets} booklets with {arguments.pages} pages, "
+            f"{arguments.broken} truncated and padded"
+        )
+        _measure("quick", is_full_pdf, pdf_files)
+        _measure("structure", lambda f: verify_structure(f).valid, pdf_files)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Compare two benchmark results.
+
+    python -m benchmarks.compare old.json new.json
+"""
+from argparse import ArgumentParser
+from json import loads
+from pathlib import Path
+from typing import Any, Dict
+
+# For these metrics, lower is better.
+_LOWER_IS_BETTER = ("seconds", "p50_ms", "p99_ms", "_mb", "attempts", "failed")
+
+
+def _flatten(metrics: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    for key, value in metrics.items():
+        if key == "parameters":
+            continue
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + key] = value
+    return flat
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    arguments = parser.parse_args()
+    old = _flatten(loads(arguments.old.read_text()))
+    new = _flatten(loads(arguments.new.read_text()))
+    width = max(len(k) for k in new)
+    for key in sorted(new):
+        if key not in old:
+            continue
+        change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+        better = (change < 0) == key.endswith(_LOWER_IS_BETTER)
+        marker = "" if abs(change) < 5 else (" better" if better else " WORSE")
+        print(
+            f"{key:{width}} {old[key]:12.2f} {new[key]:12.2f} {change:+7.1f}%{marker}"
+        )
+
+
+if __name__ == "__main__":
+    main()
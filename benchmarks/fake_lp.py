@@ -0,0 +1,44 @@
+"""
+A fake `lp` for the benchmarks.
+install() writes an `lp` script into a directory that we put in front of the PATH.
+The script sleeps for FAKE_LP_LATENCY seconds, fails with the probability FAKE_LP_FAILURE_RATE,
+and otherwise answers like `lp` does.
+"""
+import os
+import sys
+from pathlib import Path
+
+LATENCY_VARIABLE = "FAKE_LP_LATENCY"
+FAILURE_RATE_VARIABLE = "FAKE_LP_FAILURE_RATE"
+
+_SCRIPT = """#!{python} -S
+import os, random, sys, time
+time.sleep(float(os.environ.get("{latency}", "0")))
+if random.random() < float(os.environ.get("{failure_rate}", "0")):
+    sys.exit("lp: Unable to connect to server: Connection refused")
+queue = next((a[2:] for a in sys.argv[1:] if a.startswith("-d")), "default")
+print(f"request id is {{queue}}-{{os.getpid()}} (1 file(s))")
+"""
+
+
+def install(bin_directory: Path, latency: float, failure_rate: float) -> None:
+    """
+    Install the fake `lp` and configure it through the environment of this process.
+    :param bin_directory:
+    :param latency: Seconds per call.
+    :param failure_rate: The share of calls that fail.
+    :return:
+    """
+    bin_directory.mkdir(parents=True, exist_ok=True)
+    script = bin_directory.joinpath("lp")
+    script.write_text(
+        _SCRIPT.format(
+            python=sys.executable,
+            latency=LATENCY_VARIABLE,
+            failure_rate=FAILURE_RATE_VARIABLE,
+        )
+    )
+    script.chmod(0o755)
+    os.environ["PATH"] = f"{bin_directory}{os.pathsep}{os.environ.get('PATH', '')}"
+    os.environ[LATENCY_VARIABLE] = str(latency)
+    os.environ[FAILURE_RATE_VARIABLE] = str(failure_rate)
@@ -0,0 +1,239 @@
+"""
+End-to-end benchmark of a print run against a fake spooler.
+We discover the booklets and send them with print_pdf_files(), which validates, counts, and submits them
+in overlapping stages like the commands do; the events tell us when each stage made progress.
+
+    python -m benchmarks.run --booklets 2000 --backend ipp --latency-ms 20 --output results.json
+
+The results are written as JSON; compare two runs with `python -m benchmarks.compare old.json new.json`.
+"""
+import sys
+from argparse import ArgumentParser, Namespace
+from contextlib import ExitStack
+from json import dumps
+from logging import ERROR, basicConfig
+from pathlib import Path
+from platform import python_version
+from resource import RUSAGE_CHILDREN, RUSAGE_SELF, getrusage
+from statistics import quantiles
+from tempfile import TemporaryDirectory
+from threading import Lock
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from benchmarks import fake_lp
+from benchmarks.synthetic import generate_exam_directory
+from tests.ipp_stub import IppStub
+from tum_exam_scripts.enums import ValidationLevel
+from tum_exam_scripts.logic.backends import (
+    BOOKLET_OPTIONS,
+    IppBackend,
+    LpBackend,
+    PrintOptions,
+    SubmissionBackend,
+)
+from tum_exam_scripts.logic.discovery import discover_booklets
+from tum_exam_scripts.logic.events import BookletValidated, JobQueued, PrintEvent
+from tum_exam_scripts.logic.pdf_printing import print_pdf_files
+from tum_exam_scripts.logic.submission import RetryPolicy
+
+QUEUE = "benchmark"
+
+
+class TimedBackend(SubmissionBackend):
+    """
+    Measures the latency of every submission attempt of the wrapped backend.
+    """
+
+    def __init__(self, backend: SubmissionBackend) -> None:
+        self._backend = backend
+        self._lock = Lock()
+        self.latencies: List[float] = []
+
+    def submit(
+        self, pdf_file: Path, queue: str, options: PrintOptions
+    ) -> Optional[str]:
+        start = perf_counter()
+        try:
+            return self._backend.submit(pdf_file, queue, options)
+        finally:
+            with self._lock:
+                self.latencies.append(perf_counter() - start)
+
+    def close(self) -> None:
+        self._backend.close()
+
+
+class Timeline:
+    """
+    Listens to a print run and records when the last booklet was validated and when the first job was queued.
+    """
+
+    def __init__(self) -> None:
+        self.start = perf_counter()
+        self.validated: Optional[float] = None
+        self.first_job: Optional[float] = None
+        self.pages: Dict[Path, Optional[int]] = {}
+
+    def __call__(self, event: PrintEvent) -> None:
+        if isinstance(event, BookletValidated):
+            self.validated = perf_counter() - self.start
+            self.pages[event.result.pdf_file] = event.result.pages
+        elif isinstance(event, JobQueued) and self.first_job is None:
+            self.first_job = perf_counter() - self.start
+
+
+def _rates(seconds: float, files: int, pages: int, size: int) -> Dict[str, float]:
+    seconds = max(seconds, 1e-9)
+    return {
+        "files": files,
+        "seconds": round(seconds, 4),
+        "files_per_second": round(files / seconds, 2),
+        "pages_per_second": round(pages / seconds, 2),
+        "megabytes_per_second": round(size / 2**20 / seconds, 2),
+    }
+
+
+def _peak_rss_megabytes() -> Dict[str, float]:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    # The peak of the children is the largest single child, e.g., one lp call, so we do not add it to ours.
+    divisor = 2**20 if sys.platform == "darwin" else 2**10
+    return {
+        "self_mb": round(getrusage(RUSAGE_SELF).ru_maxrss / divisor, 1),
+        "children_mb": round(getrusage(RUSAGE_CHILDREN).ru_maxrss / divisor, 1),
+    }
+
+
+def run(arguments: Namespace, directory: Path) -> Dict[str, Any]:
+    """
+    Run all stages on a generated exam directory.
+    :param arguments:
+    :param directory:
+    :return: The metrics.
+    """
+    start = perf_counter()
+    generated = generate_exam_directory(
+        directory,
+        arguments.booklets,
+        (arguments.min_pages, arguments.max_pages),
+        arguments.page_kb * 1024,
+        arguments.corruption_rate,
+        arguments.seed,
+    )
+    metrics: Dict[str, Any] = {
+        "python": python_version(),
+        "parameters": {
+            k: str(v) if isinstance(v, Path) else v for k, v in vars(arguments).items()
+        },
+        "generated": {
+            "seconds": round(perf_counter() - start, 4),
+            "corrupt": len(generated.corrupt),
+        },
+        "stages": {},
+    }
+    stages = metrics["stages"]
+
+    start = perf_counter()
+    pdf_files = discover_booklets(directory)
+    total_size = sum(f.stat().st_size for f in pdf_files)
+    stages["discovery"] = _rates(perf_counter() - start, len(pdf_files), 0, 0)
+
+    with ExitStack() as stack:
+        if arguments.backend == "ipp":
+            stub = stack.enter_context(
+                IppStub(
+                    latency=arguments.latency_ms / 1000,
+                    failure_rate=arguments.failure_rate,
+                    keep_documents=False,
+                )
+            )
+            backend: SubmissionBackend = IppBackend(stub.uri)
+        else:
+            fake_lp.install(
+                directory.joinpath(".bin"),
+                arguments.latency_ms / 1000,
+                arguments.failure_rate,
+            )
+            backend = LpBackend()
+        timed = TimedBackend(backend)
+        stack.enter_context(timed)
+        timeline = Timeline()
+        report = print_pdf_files(
+            QUEUE,
+            pdf_files,
+            validation_workers=arguments.validation_workers,
+            backend=timed,
+            max_in_flight=arguments.jobs,
+            retry_policy=RetryPolicy(arguments.retries, arguments.retry_delay),
+            validation_level=ValidationLevel(arguments.validation_level),
+            listener=timeline,
+        )
+        seconds = perf_counter() - timeline.start
+    pages = timeline.pages
+    total_pages = sum(p or 0 for p in pages.values())
+    stages["validation"] = _rates(
+        timeline.validated or 0.0, len(pdf_files), total_pages, total_size
+    )
+    stages["validation"]["invalid"] = len(report.invalid)
+    results = report.results
+    sent_pages = sum(pages.get(r.pdf_file) or 0 for r in results if r.ok)
+    sent_size = sum(r.pdf_file.stat().st_size for r in results if r.ok)
+    # The submission overlaps with the validation, so it takes as long as the whole print run.
+    stages["submission"] = _rates(seconds, len(results), sent_pages, sent_size)
+    if timeline.first_job is not None:
+        stages["submission"]["first_job_seconds"] = round(timeline.first_job, 4)
+    latencies = sorted(timed.latencies)
+    if len(latencies) >= 2:
+        percentiles = quantiles(latencies, n=100, method="inclusive")
+        stages["submission"]["p50_ms"] = round(percentiles[49] * 1000, 2)
+        stages["submission"]["p99_ms"] = round(percentiles[98] * 1000, 2)
+    stages["submission"]["attempts"] = sum(r.attempts for r in results)
+    stages["submission"]["failed"] = sum(1 for r in results if not r.ok)
+    metrics["peak_rss"] = _peak_rss_megabytes()
+    return metrics
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> Namespace:
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--booklets", type=int, default=100)
+    parser.add_argument("--min-pages", type=int, default=8)
+    parser.add_argument("--max-pages", type=int, default=24)
+    parser.add_argument("--page-kb", type=int, default=4)
+    parser.add_argument("--corruption-rate", type=float, default=0.01)
+    parser.add_argument("--backend", choices=("lp", "ipp"), default="lp")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--retry-delay", type=float, default=0.01)
+    parser.add_argument("--validation-workers", type=int, default=8)
+    parser.add_argument(
+        "--validation-level",
+        choices=[level.value for level in ValidationLevel],
+        default=ValidationLevel.QUICK.value,
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--directory",
+        type=Path,
+        default=None,
+        help="Generate the exam directory here instead of in a temporary directory.",
+    )
+    parser.add_argument("--output", type=Path, default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    arguments = parse_arguments(argv)
+    basicConfig(level=ERROR)
+    with TemporaryDirectory() as temporary_directory:
+        directory = arguments.directory or Path(temporary_directory)
+        metrics = run(arguments, directory)
+    report = dumps(metrics, indent=2)
+    if arguments.output is not None:
+        arguments.output.write_text(report + "\n")
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Synthetic booklets for the benchmarks.
+"""
+from pathlib import Path
+from random import Random
+from shutil import copyfile
+from typing import Dict, List, NamedTuple, Tuple
+
+from tum_exam_scripts.utils.pdf_objects import Name, Stream
+from tum_exam_scripts.utils.pdf_writer import PdfWriter
+
+
+def write_booklet(
+    pdf_file: Path, pages: int, page_bytes: int = 16 * 1024, seed: int = 0
+) -> None:
+    """
+    Write a booklet with one incompressible content stream of page_bytes per page, like a scanned exam.
+    :param pdf_file:
+    :param pages:
+    :param page_bytes:
+    :param seed:
+    :return:
+    """
+    random = Random(seed)
+    with pdf_file.open("wb") as fout:
+        writer = PdfWriter(fout, xref_stream=True)
+        catalog, tree = writer.allocate(), writer.allocate()
+        kids = []
+        for _ in range(pages):
+            data = random.getrandbits(page_bytes * 8).to_bytes(page_bytes, "little")
+            content = writer.write(Stream({}, data))
+            kids.append(
+                writer.write(
+                    {
+                        "Type": Name("Page"),
+                        "Parent": tree,
+                        "MediaBox": [0, 0, 595, 842],
+                        "Contents": content,
+                    }
+                )
+            )
+        writer.write({"Type": Name("Pages"), "Kids": kids, "Count": pages}, tree)
+        writer.write({"Type": Name("Catalog"), "Pages": tree}, catalog)
+        writer.finish(catalog)
+
+
+def truncate_and_pad(pdf_file: Path) -> None:
+    """
+    Cut the second half of the file and pad it with NUL bytes, as an interrupted download does.
+    :param pdf_file:
+    :return:
+    """
+    data = pdf_file.read_bytes()
+    pdf_file.write_bytes(data[: len(data) // 2] + bytes(len(data) - len(data) // 2))
+
+
+def break_header(pdf_file: Path) -> None:
+    """
+    Overwrite the PDF header, as a file that is not a PDF at all.
+    :param pdf_file:
+    :return:
+    """
+    with pdf_file.open("r+b") as fout:
+        fout.write(b"<html>")
+
+
+CORRUPTIONS = (truncate_and_pad, break_header)
+
+
+class ExamDirectory(NamedTuple):
+    """
+    What we generated.
+    """
+
+    booklets: List[Path]
+    pages: Dict[Path, int]
+    corrupt: List[Path]
+
+
+def generate_exam_directory(
+    directory: Path,
+    booklets: int,
+    pages: Tuple[int, int] = (8, 24),
+    page_bytes: int = 4 * 1024,
+    corruption_rate: float = 0.0,
+    seed: int = 0,
+) -> ExamDirectory:
+    """
+    Write an exam directory like the TUMExam export.
+    We write one template per page count and copy it, so large directories are quick to generate.
+    :param directory:
+    :param booklets: The number of booklets.
+    :param pages: The smallest and the largest number of pages of a booklet.
+    :param page_bytes: The size of the content of a page.
+    :param corruption_rate: The share of booklets we break.
+    :param seed:
+    :return:
+    """
+    random = Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    templates = directory.joinpath(".templates")
+    templates.mkdir(exist_ok=True)
+    result = ExamDirectory([], {}, [])
+    for i in range(1, booklets + 1):
+        page_count = random.randint(*pages)
+        template = templates.joinpath(f"{page_count}.pdf")
+        if not template.exists():
+            write_booklet(template, page_count, page_bytes, seed + page_count)
+        pdf_file = directory.joinpath(f"E{i:04}-book.pdf")
+        copyfile(template, pdf_file)
+        result.booklets.append(pdf_file)
+        result.pages[pdf_file] = page_count
+        if random.random() < corruption_rate:
+            random.choice(CORRUPTIONS)(pdf_file)
+            result.corrupt.append(pdf_file)
+    return result
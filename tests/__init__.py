@@ -0,0 +1,7 @@
+from os import environ
+from tempfile import mkdtemp
+
+from tum_exam_scripts.utils.files import CACHE_DIRECTORY_VARIABLE
+
+# The tests must not touch the cache of the user.
+environ[CACHE_DIRECTORY_VARIABLE] = mkdtemp(prefix="tum-exam-scripts-tests-")
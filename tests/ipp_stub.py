@@ -0,0 +1,220 @@
+"""
+An in-process IPP server that stands in for CUPS in the tests.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from random import random
+from threading import Lock, Thread
+from time import sleep
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from tum_exam_scripts.utils.ipp import (
+    BOOLEAN,
+    ENUM,
+    GET_JOBS,
+    GET_PRINTER_ATTRIBUTES,
+    INTEGER,
+    IPP_VERSION,
+    JOB_ATTRIBUTES_TAG,
+    OPERATION_ATTRIBUTES_TAG,
+    PRINT_JOB,
+    PRINTER_ATTRIBUTES_TAG,
+    Attribute,
+    AttributeGroup,
+    IppMessage,
+    attributes_to_dict,
+    decode_message,
+    encode_message,
+)
+
+SERVICE_UNAVAILABLE = 0x0502
+# job-state
+PENDING = 3
+ABORTED = 8
+COMPLETED = 9
+
+
+class ReceivedJob(NamedTuple):
+    """
+    A Print-Job request the stub received.
+    """
+
+    path: str
+    operation: Dict[str, Tuple[Any, ...]]
+    job: Dict[str, Tuple[Any, ...]]
+    document: bytes
+    client: Tuple[str, int]
+
+
+class IppStub:
+    """
+    Accepts Print-Job requests, records them, and answers with increasing job IDs.
+    Get-Jobs lists the received jobs until complete_jobs() marks them as printed, or all jobs with their state.
+    The jobs in aborted fail.
+    Get-Printer-Attributes reports whether the printer finishes sets of pages, see pages_per_set.
+    Use it as a context manager; `uri` points to the printers of the stub.
+    The benchmarks use latency and failure_rate to mimic a slow or flaky CUPS server
+    and turn off keep_documents to save memory.
+    With drop_jobs, the stub accepts that many Print-Job requests but closes the connection instead of answering;
+    with close_idle, it closes the connection after every response without telling the client;
+    with stall, it waits that many seconds after it accepted a Print-Job before it answers.
+    """
+
+    def __init__(
+        self,
+        fail_with: Optional[int] = None,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        keep_documents: bool = True,
+        drop_jobs: int = 0,
+        close_idle: bool = False,
+        stall: float = 0.0,
+    ) -> None:
+        self.jobs: List[ReceivedJob] = []
+        self.clients: Set[Tuple[str, int]] = set()
+        self.fail_with = fail_with
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.keep_documents = keep_documents
+        self.drop_jobs = drop_jobs
+        self.close_idle = close_idle
+        self.stall = stall
+        self.completed = 0
+        self.aborted: Set[int] = set()
+        self.get_jobs = 0
+        self.pages_per_set = False
+        self._job_ids = count(1)
+        self._lock = Lock()
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self) -> None:
+                data = self.rfile.read(int(self.headers["Content-Length"]))
+                response = stub.handle(self.path, data, self.client_address)
+                if stub.close_idle or response is None:
+                    self.close_connection = True
+                if response is not None:
+                    self.send_ipp(response)
+
+            def send_ipp(self, body: bytes) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/ipp")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._thread = Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def uri(self) -> str:
+        return f"ipp://127.0.0.1:{self._server.server_address[1]}/printers/{{queue}}"
+
+    def handle(
+        self, path: str, data: bytes, client: Tuple[str, int]
+    ) -> Optional[bytes]:
+        request, offset = decode_message(data)
+        if self.latency > 0:
+            sleep(self.latency)
+        operation = request.group(OPERATION_ATTRIBUTES_TAG)
+        job = request.group(JOB_ATTRIBUTES_TAG)
+        status = 0x0000
+        accepted = False
+        groups = [
+            AttributeGroup(
+                OPERATION_ATTRIBUTES_TAG,
+                [
+                    Attribute(0x47, "attributes-charset", ("utf-8",)),
+                    Attribute(0x48, "attributes-natural-language", ("en",)),
+                ],
+            )
+        ]
+        with self._lock:
+            self.clients.add(client)
+            if self.fail_with is not None:
+                status = self.fail_with
+            elif random() < self.failure_rate:
+                status = SERVICE_UNAVAILABLE
+            elif request.operation_or_status == PRINT_JOB:
+                job_id = next(self._job_ids)
+                self.jobs.append(
+                    ReceivedJob(
+                        path,
+                        attributes_to_dict(operation) if operation else {},
+                        attributes_to_dict(job) if job else {},
+                        data[offset:] if self.keep_documents else b"",
+                        client,
+                    )
+                )
+                if self.drop_jobs > 0:
+                    self.drop_jobs -= 1
+                    return None
+                accepted = True
+                groups.append(
+                    AttributeGroup(
+                        JOB_ATTRIBUTES_TAG, [Attribute(INTEGER, "job-id", (job_id,))]
+                    )
+                )
+            elif request.operation_or_status == GET_JOBS:
+                self.get_jobs += 1
+                which = operation.get("which-jobs") if operation else None
+                everything = which is not None and which.values == ("all",)
+                for job_id in range(1, len(self.jobs) + 1):
+                    state = self._job_state(job_id)
+                    if state == PENDING or everything:
+                        groups.append(
+                            AttributeGroup(
+                                JOB_ATTRIBUTES_TAG,
+                                [
+                                    Attribute(INTEGER, "job-id", (job_id,)),
+                                    Attribute(ENUM, "job-state", (state,)),
+                                    Attribute(INTEGER, "job-k-octets", (1,)),
+                                ],
+                            )
+                        )
+            elif request.operation_or_status == GET_PRINTER_ATTRIBUTES:
+                groups.append(
+                    AttributeGroup(
+                        PRINTER_ATTRIBUTES_TAG,
+                        [
+                            Attribute(
+                                BOOLEAN,
+                                "job-pages-per-set-supported",
+                                (self.pages_per_set,),
+                            )
+                        ],
+                    )
+                )
+        if accepted and self.stall > 0:
+            sleep(self.stall)
+        return encode_message(
+            IppMessage(IPP_VERSION, status, request.request_id, groups)
+        )
+
+    def _job_state(self, job_id: int) -> int:
+        if job_id in self.aborted:
+            return ABORTED
+        return COMPLETED if job_id <= self.completed else PENDING
+
+    def complete_jobs(self) -> None:
+        """
+        Print all received jobs.
+        """
+        with self._lock:
+            self.completed = len(self.jobs)
+
+    def __enter__(self) -> "IppStub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
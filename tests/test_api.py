@@ -0,0 +1,201 @@
+"""
+Test.
+"""
+import asyncio
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+from os.path import join
+from pathlib import Path
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from typing import Dict, List, Sequence
+from unittest import TestCase, main
+
+import pytest
+
+from tests.ipp_stub import IppStub
+from tum_exam_scripts import api
+from tum_exam_scripts.enums import Backend
+from tum_exam_scripts.logic.backends import BOOKLET_OPTIONS, IppBackend
+from tum_exam_scripts.logic.backpressure import (
+    Backpressure,
+    QueueDepth,
+    QueueMonitor,
+    QueueMonitorError,
+)
+from tum_exam_scripts.logic.events import (
+    BookletFinished,
+    BookletValidated,
+    JobQueued,
+    PrintEvent,
+    PrintFinished,
+    QueueDrained,
+    QueueHeld,
+    QueuesUnwatched,
+    RenewalFailed,
+    StageStarted,
+)
+from tum_exam_scripts.logic.keep_alive import EnablementKeeper
+from tum_exam_scripts.logic.merging import StaplingUnsupportedError, create_merger
+from tum_exam_scripts.logic.spool import open_spool_area
+from tum_exam_scripts.utils.enablement import EnablementError
+from tum_exam_scripts.utils.profiling import Profiler
+from tum_exam_scripts.logic.job_status import PENDING, create_status_source
+from tum_exam_scripts.logic.journal import SubmissionJournal
+
+
+class _FullOnceMonitor(QueueMonitor):
+    """
+    Reports a full queue once, an empty one next, and then fails.
+    """
+
+    def __init__(self) -> None:
+        self.jobs = [10, 0]
+
+    def depths(self, queues: Sequence[str]) -> Dict[str, QueueDepth]:
+        if not self.jobs:
+            raise QueueMonitorError("lpstat failed")
+        jobs = self.jobs.pop(0)
+        return {queue: QueueDepth(jobs, 0) for queue in queues}
+
+
+def _failed_renewal() -> bool:
+    raise EnablementError("The printing page is down")
+
+
+class ApiTest(TestCase):
+    """
+    API Test
+    """
+
+    @pytest.fixture(autouse=True)
+    def _capture(self, capsys: pytest.CaptureFixture) -> None:
+        self.capsys = capsys
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.exams = Path(self.tmp.name, "exams")
+        self.broken = Path(self.tmp.name, "exams_broken")
+        copytree(join("tests", "rsc", "exams"), self.exams)
+        copytree(join("tests", "rsc", "exams_broken"), self.broken)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_print_run(self):
+        events: List[PrintEvent] = []
+
+        async def _run(ipp: IppStub) -> api.PrintReport:
+            booklets = await api.discover(self.exams)
+            print_plan = await api.plan(booklets, ["room1", "room2"])
+            self.assertEqual([len(p.booklets) for p in print_plan.printers], [1, 1])
+            with IppBackend(ipp.uri) as backend:
+                return await api.submit(print_plan, backend, on_event=events.append)
+
+        output = StringIO()
+        with IppStub() as ipp, redirect_stdout(output), redirect_stderr(output):
+            report = asyncio.run(_run(ipp))
+        self.assertEqual(output.getvalue(), "")
+        self.assertTrue(report.ok)
+        self.assertEqual(
+            sorted(p.name for p in report.sent), ["E0001-book.pdf", "E0002-book.pdf"]
+        )
+        self.assertEqual(
+            sorted(j.path for j in ipp.jobs), ["/printers/room1", "/printers/room2"]
+        )
+        self.assertIsInstance(events[0], StageStarted)
+        self.assertEqual(sum(isinstance(e, JobQueued) for e in events), 2)
+        self.assertEqual(sum(isinstance(e, BookletFinished) for e in events), 2)
+
+    def test_logic_does_not_print(self):
+        events: List[PrintEvent] = []
+
+        async def _run(ipp: IppStub) -> api.PrintReport:
+            print_plan = await api.plan(await api.discover(self.exams), ["room1"])
+            with IppBackend(ipp.uri) as backend:
+                return await api.submit(
+                    print_plan,
+                    backend,
+                    max_in_flight=1,
+                    backpressure=Backpressure(
+                        _FullOnceMonitor(), max_jobs=1, max_bytes=0, poll_interval=0.0
+                    ),
+                    enablement=EnablementKeeper(
+                        _failed_renewal, interval=0.01, retry_interval=0.01
+                    ),
+                    on_event=events.append,
+                )
+
+        with IppStub(latency=0.05) as ipp:
+            report = asyncio.run(_run(ipp))
+            with self.assertRaises(StaplingUnsupportedError), open_spool_area(
+                True
+            ) as spool:
+                create_merger(2, BOOKLET_OPTIONS, ["room1"], spool, ipp.uri)
+        profiler = Profiler(Path(self.tmp.name))
+        profiler.start()
+        profiler.stop()
+        self.assertTrue(report.ok)
+        for kind in (QueueHeld, QueueDrained, QueuesUnwatched, RenewalFailed):
+            self.assertTrue(any(isinstance(e, kind) for e in events), kind)
+        captured = self.capsys.readouterr()
+        self.assertEqual(captured.out, "")
+        self.assertEqual(captured.err, "")
+
+    def test_events(self):
+        async def _run(ipp: IppStub) -> List[PrintEvent]:
+            print_plan = await api.plan(await api.discover(self.broken))
+            with IppBackend(ipp.uri) as backend:
+                return [e async for e in api.events(print_plan, backend)]
+
+        with IppStub() as ipp:
+            events = asyncio.run(_run(ipp))
+        self.assertIsInstance(events[-1], PrintFinished)
+        report = events[-1].report
+        self.assertFalse(report.ok)
+        self.assertEqual([r.pdf_file.name for r in report.invalid], ["E0003-book.pdf"])
+        self.assertEqual(len(report.sent), 2)
+        self.assertEqual(len(ipp.jobs), 2)
+
+    def test_validate(self):
+        validated: List[BookletValidated] = []
+
+        async def _run() -> List[api.ValidationResult]:
+            booklets = await api.discover(self.broken)
+            return await api.validate(booklets, on_event=validated.append)
+
+        results = asyncio.run(_run())
+        self.assertEqual([r.valid for r in results], [True, True, False])
+        self.assertEqual([e.result for e in validated], results)
+
+    def test_plans_in_one_process(self):
+        async def _run(ipp: IppStub, directory: Path) -> api.PrintReport:
+            print_plan = await api.plan(await api.discover(directory), ["room"])
+            with IppBackend(ipp.uri) as backend, SubmissionJournal(
+                directory
+            ) as journal:
+                return await api.submit(print_plan, backend, journal=journal)
+
+        async def _both(ipp: IppStub) -> List[api.PrintReport]:
+            return list(
+                await asyncio.gather(_run(ipp, self.exams), _run(ipp, self.broken))
+            )
+
+        with IppStub() as ipp:
+            first, second = asyncio.run(_both(ipp))
+            with create_status_source(Backend.IPP, ipp.uri) as source:
+                status = asyncio.run(api.status(self.exams, source))
+        self.assertTrue(first.ok)
+        self.assertEqual(len(second.invalid), 1)
+        self.assertEqual(len(ipp.jobs), 4)
+        self.assertEqual(len(status.jobs), 2)
+        self.assertEqual(status.summary.count(PENDING), 2)
+        self.assertEqual(status.failed, [])
+
+    def test_status_without_journal(self):
+        status = asyncio.run(api.status(self.exams))
+        self.assertEqual(status.jobs, [])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Test.
+"""
+import subprocess
+from os.path import join
+from pathlib import Path
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from time import sleep
+from unittest import TestCase, main, mock
+
+from tests.ipp_stub import IppStub
+from tum_exam_scripts.logic.backends import (
+    BOOKLET_OPTIONS,
+    SEAT_PLAN_OPTIONS,
+    IppBackend,
+    LpBackend,
+    SubmissionError,
+    lp_command,
+)
+from tum_exam_scripts.logic.submission import RetryPolicy, SubmissionEngine
+from tum_exam_scripts.pdf_commands import app
+from tum_exam_scripts.utils.ipp import IppClient
+from typer.testing import CliRunner
+
+_BOOKLET = Path("tests", "rsc", "exams", "E0001-book.pdf")
+
+
+class LpBackendTest(TestCase):
+    """
+    lp Backend Test
+    """
+
+    def test_booklet_command(self):
+        self.assertEqual(
+            lp_command(_BOOKLET, "followmeppd", BOOKLET_OPTIONS),
+            [
+                "lp",
+                "-dfollowmeppd",
+                "-o",
+                "PageSize=A3",
+                "-o",
+                "JCLBanner=False",
+                "-o",
+                "JCLColorCorrection=BlackWhite",
+                "-o",
+                "Duplex=DuplexNoTumble",
+                "-o",
+                "XRFold=BiFoldStaple",
+                "-o",
+                "landscape",
+                "-o",
+                "JCLPrintQuality=Enhanced",
+                str(_BOOKLET),
+            ],
+        )
+
+    def test_copies_come_first(self):
+        command = lp_command(
+            _BOOKLET, "followmeppd", SEAT_PLAN_OPTIONS._replace(copies=3)
+        )
+        self.assertEqual(command[:4], ["lp", "-dfollowmeppd", "-n", "3"])
+
+    @mock.patch("subprocess.check_output")
+    def test_submit(self, mock_check_output):
+        mock_check_output.return_value = b"request id is followmeppd-42 (1 file(s))\n"
+        job_id = LpBackend().submit(_BOOKLET, "followmeppd", BOOKLET_OPTIONS)
+        mock_check_output.assert_called_once_with(
+            lp_command(_BOOKLET, "followmeppd", BOOKLET_OPTIONS),
+            stderr=subprocess.STDOUT,
+        )
+        self.assertEqual(job_id, "followmeppd-42")
+
+    @mock.patch("subprocess.check_output")
+    def test_submit_without_job_id(self, mock_check_output):
+        mock_check_output.return_value = b""
+        job_id = LpBackend().submit(_BOOKLET, "followmeppd", BOOKLET_OPTIONS)
+        self.assertIsNone(job_id)
+
+    @mock.patch("subprocess.check_output")
+    def test_submit_to_unknown_queue_is_not_retried(self, mock_check_output):
+        mock_check_output.side_effect = subprocess.CalledProcessError(
+            1, "lp", b"lp: The printer or class does not exist.\n"
+        )
+        with self.assertRaises(SubmissionError) as context:
+            LpBackend().submit(_BOOKLET, "nonexistent", BOOKLET_OPTIONS)
+        self.assertFalse(context.exception.transient)
+        self.assertIn("does not exist", str(context.exception))
+
+    @mock.patch("subprocess.check_output")
+    def test_submit_without_scheduler_is_retried(self, mock_check_output):
+        mock_check_output.side_effect = subprocess.CalledProcessError(
+            1, "lp", b"lp: Unable to connect to server: Connection refused\n"
+        )
+        with self.assertRaises(SubmissionError) as context:
+            LpBackend().submit(_BOOKLET, "followmeppd", BOOKLET_OPTIONS)
+        self.assertTrue(context.exception.transient)
+
+
+class IppBackendTest(TestCase):
+    """
+    IPP Backend Test
+    """
+
+    def test_submit_over_one_connection(self):
+        with IppStub() as stub, IppBackend(stub.uri, "tester") as backend:
+            job_ids = [
+                backend.submit(_BOOKLET, "followmeppd", BOOKLET_OPTIONS)
+                for _ in range(3)
+            ]
+        self.assertEqual(job_ids, ["followmeppd-1", "followmeppd-2", "followmeppd-3"])
+        self.assertEqual(len(stub.clients), 1)
+        job = stub.jobs[0]
+        self.assertEqual(job.path, "/printers/followmeppd")
+        self.assertEqual(job.document, _BOOKLET.read_bytes())
+        self.assertEqual(job.operation["requesting-user-name"], ("tester",))
+        self.assertEqual(job.operation["document-format"], ("application/pdf",))
+        self.assertEqual(job.job["PageSize"], ("A3",))
+        self.assertEqual(job.job["XRFold"], ("BiFoldStaple",))
+        self.assertEqual(job.job["orientation-requested"], (4,))
+
+    def test_copies(self):
+        with IppStub() as stub, IppBackend(stub.uri, "tester") as backend:
+            backend.submit(
+                _BOOKLET, "followmeppd", SEAT_PLAN_OPTIONS._replace(copies=3)
+            )
+        self.assertEqual(stub.jobs[0].job["copies"], (3,))
+
+    def test_server_error_is_transient(self):
+        with IppStub(fail_with=0x0507) as stub, IppBackend(stub.uri) as backend:
+            with self.assertRaises(SubmissionError) as context:
+                backend.submit(_BOOKLET, "followmeppd", BOOKLET_OPTIONS)
+        self.assertTrue(context.exception.transient)
+
+    def test_client_error_is_permanent(self):
+        with IppStub(fail_with=0x0400) as stub, IppBackend(stub.uri) as backend:
+            with self.assertRaises(SubmissionError) as context:
+                backend.submit(_BOOKLET, "followmeppd", BOOKLET_OPTIONS)
+        self.assertFalse(context.exception.transient)
+
+    def test_lost_response_is_not_sent_again(self):
+        with IppStub(drop_jobs=1) as stub, IppBackend(stub.uri) as backend:
+            with self.assertRaises(SubmissionError) as context:
+                backend.submit(_BOOKLET, "followmeppd", BOOKLET_OPTIONS)
+            self.assertFalse(context.exception.transient)
+            self.assertIsNotNone(context.exception.hint)
+            self.assertEqual(len(stub.jobs), 1)
+            # The next job gets a new connection.
+            self.assertEqual(
+                backend.submit(_BOOKLET, "followmeppd", BOOKLET_OPTIONS),
+                "followmeppd-2",
+            )
+        self.assertEqual(len(stub.jobs), 2)
+
+    def test_lost_response_is_not_retried_by_the_engine(self):
+        with IppStub(drop_jobs=1) as stub, IppBackend(stub.uri) as backend:
+            engine = SubmissionEngine(backend, retry_policy=RetryPolicy(base_delay=0.0))
+            engine.submit(_BOOKLET, "followmeppd", BOOKLET_OPTIONS)
+            results = engine.join()
+        self.assertFalse(results[0].ok)
+        self.assertEqual(results[0].attempts, 1)
+        self.assertEqual(len(stub.jobs), 1)
+
+    def test_timeout_after_accepted_job_is_not_retried(self):
+        with IppStub(stall=0.5) as stub, IppBackend(stub.uri, timeout=0.1) as backend:
+            engine = SubmissionEngine(backend, retry_policy=RetryPolicy(base_delay=0.0))
+            engine.submit(_BOOKLET, "followmeppd", BOOKLET_OPTIONS)
+            results = engine.join()
+        self.assertFalse(results[0].ok)
+        self.assertEqual(results[0].attempts, 1)
+        self.assertIn("may have been printed", str(results[0].error))
+        self.assertEqual(len(stub.jobs), 1)
+
+    def test_reconnect_after_idle_close(self):
+        job_ids = []
+        with IppStub(close_idle=True) as stub, IppBackend(stub.uri) as backend:
+            for _ in range(3):
+                job_ids.append(backend.submit(_BOOKLET, "followmeppd", BOOKLET_OPTIONS))
+                # The connection is idle long enough for the close to arrive.
+                sleep(0.1)
+        self.assertEqual(job_ids, ["followmeppd-1", "followmeppd-2", "followmeppd-3"])
+        self.assertEqual(len(stub.jobs), 3)
+        self.assertEqual(len(stub.clients), 3)
+
+    def test_default_ports(self):
+        for uri, port in [
+            ("ipp://localhost/printers/followmeppd", 631),
+            ("ipps://print.in.tum.de/printers/followme", 631),
+            ("http://localhost/printers/followmeppd", 80),
+            ("https://print.in.tum.de/printers/followme", 443),
+            ("https://print.in.tum.de:8443/printers/followme", 8443),
+        ]:
+            with self.subTest(uri=uri):
+                self.assertEqual(IppClient(uri)._port, port)
+
+    @mock.patch("typer.confirm")
+    def test_send_all(self, mock_typer):
+        mock_typer.return_value = True
+        with IppStub() as stub, TemporaryDirectory() as tmp:
+            exams = join(tmp, "exams")
+            copytree(join("tests", "rsc", "exams"), exams)
+            result = CliRunner().invoke(
+                app,
+                [
+                    "send-all-booklets",
+                    "--backend",
+                    "ipp",
+                    "--ipp-uri",
+                    stub.uri,
+                    exams,
+                ],
+            )
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Done!", result.stdout)
+        self.assertEqual(len(stub.jobs), 2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Test.
+"""
+from os.path import join
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from typing import Dict, List, Sequence
+from unittest import TestCase, main, mock
+
+from tests.ipp_stub import IppStub
+from tum_exam_scripts.logic.backpressure import (
+    Backpressure,
+    IppMonitor,
+    QueueDepth,
+    QueueMonitor,
+    QueueMonitorError,
+    QueueStalledError,
+    parse_lpstat,
+)
+from tum_exam_scripts.logic.events import (
+    PrintEvent,
+    QueueDrained,
+    QueueHeld,
+    QueuesUnwatched,
+)
+from tum_exam_scripts.pdf_commands import app
+from typer.testing import CliRunner
+
+_LPSTAT = """\
+followmeppd-41          agent           1048576   Sat 18 Oct 2026 09:12:01 CEST
+followmeppd-42          agent            524288   Sat 18 Oct 2026 09:12:02 CEST
+second-queue-7          agent              1000   Sat 18 Oct 2026 09:12:03 CEST
+other-3                 someone            2000   Sat 18 Oct 2026 09:12:04 CEST
+"""
+
+
+class _ScriptedMonitor(QueueMonitor):
+    """
+    Answers every poll with the next depth of the script and records the polls.
+    """
+
+    def __init__(self, jobs: List[int]) -> None:
+        self.jobs = jobs
+        self.polls: List[Sequence[str]] = []
+
+    def depths(self, queues: Sequence[str]) -> Dict[str, QueueDepth]:
+        self.polls.append(list(queues))
+        jobs = self.jobs.pop(0) if len(self.jobs) > 1 else self.jobs[0]
+        return {queue: QueueDepth(jobs, 0) for queue in queues}
+
+
+class _BrokenMonitor(QueueMonitor):
+    def __init__(self) -> None:
+        self.polls = 0
+
+    def depths(self, queues: Sequence[str]) -> Dict[str, QueueDepth]:
+        self.polls += 1
+        raise QueueMonitorError("lpstat failed")
+
+
+class BackpressureTest(TestCase):
+    """
+    Backpressure Test
+    """
+
+    def test_parse_lpstat(self):
+        depths = parse_lpstat(_LPSTAT, ["followmeppd", "second-queue"])
+        self.assertEqual(
+            depths,
+            {
+                "followmeppd": QueueDepth(2, 1572864),
+                "second-queue": QueueDepth(1, 1000),
+            },
+        )
+
+    @mock.patch("tum_exam_scripts.logic.backpressure.sleep")
+    def test_polls_only_at_the_limit(self, mock_sleep):
+        monitor = _ScriptedMonitor([0])
+        backpressure = Backpressure(monitor, max_jobs=10, max_bytes=0)
+        for _ in range(25):
+            backpressure.wait("followmeppd", 100)
+        # The first poll and one whenever our estimate reaches the limit
+        self.assertEqual(len(monitor.polls), 3)
+        mock_sleep.assert_not_called()
+
+    @mock.patch("tum_exam_scripts.logic.backpressure.sleep")
+    def test_holds_until_drained(self, mock_sleep):
+        monitor = _ScriptedMonitor([10, 9, 6, 5, 5])
+        backpressure = Backpressure(monitor, max_jobs=10, max_bytes=0)
+        backpressure.wait("followmeppd", 100)
+        # 10 is over the limit, 9 and 6 are not drained to half of it, 5 is
+        self.assertEqual(len(monitor.polls), 4)
+        self.assertEqual(mock_sleep.call_count, 3)
+
+    @mock.patch("tum_exam_scripts.logic.backpressure.sleep")
+    def test_hold_is_reported(self, mock_sleep):
+        events: List[PrintEvent] = []
+        backpressure = Backpressure(_ScriptedMonitor([10, 5]), max_jobs=10, max_bytes=0)
+        with backpressure.reporting(events.append):
+            backpressure.wait("followmeppd", 100)
+        self.assertEqual(events[0], QueueHeld("followmeppd", 10, 0))
+        self.assertIsInstance(events[1], QueueDrained)
+
+    @mock.patch("tum_exam_scripts.logic.backpressure.monotonic")
+    @mock.patch("tum_exam_scripts.logic.backpressure.sleep")
+    def test_gives_up_on_a_stalled_queue(self, mock_sleep, mock_monotonic):
+        mock_monotonic.side_effect = [0.0, 30.0, 61.0]
+        monitor = _ScriptedMonitor([10])
+        backpressure = Backpressure(monitor, max_jobs=10, max_bytes=0, max_wait=60.0)
+        with self.assertRaises(QueueStalledError) as context:
+            backpressure.wait("followmeppd", 100)
+        self.assertIn("followmeppd still has 10 pending jobs", str(context.exception))
+        self.assertEqual(mock_sleep.call_count, 1)
+
+    @mock.patch("tum_exam_scripts.logic.backpressure.sleep")
+    def test_bytes_limit(self, mock_sleep):
+        monitor = _ScriptedMonitor([0])
+        backpressure = Backpressure(monitor, max_jobs=0, max_bytes=1000)
+        for _ in range(4):
+            backpressure.wait("followmeppd", 400)
+        self.assertEqual(len(monitor.polls), 2)
+
+    def test_one_poll_for_all_queues(self):
+        monitor = _ScriptedMonitor([0])
+        backpressure = Backpressure(monitor, max_jobs=10, max_bytes=0)
+        backpressure.wait("a", 100)
+        backpressure.wait("b", 100)
+        for _ in range(10):
+            backpressure.wait("b", 100)
+        self.assertEqual(monitor.polls, [["a"], ["a", "b"], ["a", "b"]])
+
+    def test_stops_watching_on_errors(self):
+        monitor = _BrokenMonitor()
+        backpressure = Backpressure(monitor, max_jobs=1, max_bytes=0)
+        events: List[PrintEvent] = []
+        with backpressure.reporting(events.append):
+            for _ in range(3):
+                backpressure.wait("followmeppd", 100)
+        self.assertEqual(monitor.polls, 1)
+        self.assertEqual(events, [QueuesUnwatched("lpstat failed")])
+
+    def test_no_limits(self):
+        monitor = _BrokenMonitor()
+        backpressure = Backpressure(monitor, max_jobs=0, max_bytes=0)
+        backpressure.wait("followmeppd", 100)
+        self.assertEqual(monitor.polls, 0)
+
+    def test_ipp_get_jobs(self):
+        with IppStub() as stub:
+            stub.jobs.extend([mock.Mock(), mock.Mock(), mock.Mock()])
+            stub.completed = 1
+            with IppMonitor(stub.uri, "tester") as monitor:
+                depths = monitor.depths(["followmeppd"])
+        self.assertEqual(depths, {"followmeppd": QueueDepth(2, 2048)})
+
+    @mock.patch("tum_exam_scripts.logic.backpressure.sleep")
+    @mock.patch("typer.confirm")
+    def test_send_all_ipp(self, mock_typer, mock_sleep):
+        mock_typer.return_value = True
+        with IppStub() as stub, TemporaryDirectory() as tmp:
+            mock_sleep.side_effect = lambda _: stub.complete_jobs()
+            exams = join(tmp, "exams")
+            copytree(join("tests", "rsc", "exams"), exams)
+            result = CliRunner().invoke(
+                app,
+                [
+                    "send-all-booklets",
+                    "--backend",
+                    "ipp",
+                    "--ipp-uri",
+                    stub.uri,
+                    "--jobs",
+                    "1",
+                    "--max-queued-jobs",
+                    "1",
+                    exams,
+                ],
+            )
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(len(stub.jobs), 2)
+        # The second booklet waited until the first one was printed
+        self.assertEqual(mock_sleep.call_count, 1)
+        self.assertEqual(stub.get_jobs, 3)
+
+    @mock.patch("tum_exam_scripts.logic.backpressure.monotonic")
+    @mock.patch("tum_exam_scripts.logic.backpressure.sleep")
+    @mock.patch("typer.confirm")
+    def test_send_all_stops_at_a_stalled_queue(
+        self, mock_typer, mock_sleep, mock_monotonic
+    ):
+        mock_typer.return_value = True
+        # Every look at the clock is ten minutes later.
+        mock_monotonic.side_effect = (600.0 * i for i in range(100))
+        with IppStub() as stub, TemporaryDirectory() as tmp:
+            exams = join(tmp, "exams")
+            copytree(join("tests", "rsc", "exams"), exams)
+            result = CliRunner().invoke(
+                app,
+                [
+                    "send-all-booklets",
+                    "--backend",
+                    "ipp",
+                    "--ipp-uri",
+                    stub.uri,
+                    "--jobs",
+                    "1",
+                    "--max-queued-jobs",
+                    "1",
+                    "--max-queue-wait",
+                    "20",
+                    exams,
+                ],
+            )
+        self.assertEqual(result.exit_code, 1)
+        self.assertEqual(len(stub.jobs), 1)
+        self.assertIn("followmeppd has 1 pending jobs, we wait", result.stdout)
+        self.assertIn(
+            "followmeppd still has 1 pending jobs after 20 minutes", result.stdout
+        )
+        self.assertEqual(mock_sleep.call_count, 1)
+
+    @mock.patch("subprocess.run")
+    @mock.patch("subprocess.check_output")
+    @mock.patch("typer.confirm")
+    def test_send_all_without_lpstat(self, mock_typer, mock_check_output, mock_run):
+        mock_typer.return_value = True
+        mock_check_output.return_value = b""
+        mock_run.side_effect = FileNotFoundError("lpstat")
+        with TemporaryDirectory() as tmp:
+            exams = join(tmp, "exams")
+            copytree(join("tests", "rsc", "exams"), exams)
+            result = CliRunner().invoke(app, ["send-all-booklets", exams])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("we send all jobs at once", result.stdout)
+        self.assertEqual(mock_run.call_count, 1)
+        self.assertEqual(mock_check_output.call_count, 2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Test.
+"""
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main, mock
+
+from benchmarks.run import parse_arguments, run
+from benchmarks.synthetic import generate_exam_directory
+
+
+class BenchmarkTest(TestCase):
+    """
+    Benchmark Test
+    """
+
+    def setUp(self) -> None:
+        self._temporary_directory = TemporaryDirectory()
+        self.directory = Path(self._temporary_directory.name)
+
+    def tearDown(self) -> None:
+        self._temporary_directory.cleanup()
+
+    def test_generate_exam_directory(self):
+        generated = generate_exam_directory(
+            self.directory, 30, (2, 4), 512, corruption_rate=0.2, seed=1
+        )
+        self.assertEqual(len(generated.booklets), 30)
+        self.assertEqual(sorted(self.directory.glob("*-book.pdf")), generated.booklets)
+        self.assertTrue(0 < len(generated.corrupt) < 30)
+        self.assertTrue(all(2 <= p <= 4 for p in generated.pages.values()))
+
+    def test_run_with_ipp(self):
+        metrics = run(
+            parse_arguments(
+                ["--booklets", "20", "--backend", "ipp", "--failure-rate", "0.2"]
+            ),
+            self.directory,
+        )
+        submission = metrics["stages"]["submission"]
+        self.assertEqual(submission["failed"], 0)
+        self.assertGreaterEqual(submission["attempts"], 20)
+        self.assertIn("p99_ms", submission)
+        self.assertGreater(metrics["peak_rss"]["self_mb"], 0)
+        self.assertLessEqual(submission["first_job_seconds"], submission["seconds"])
+
+    @mock.patch.dict(os.environ)
+    def test_run_with_fake_lp(self):
+        metrics = run(
+            parse_arguments(
+                [
+                    "--booklets",
+                    "10",
+                    "--corruption-rate",
+                    "0.5",
+                    "--validation-level",
+                    "structure",
+                ]
+            ),
+            self.directory,
+        )
+        validation = metrics["stages"]["validation"]
+        self.assertEqual(validation["invalid"], metrics["generated"]["corrupt"])
+        self.assertGreater(validation["invalid"], 0)
+        self.assertEqual(
+            metrics["stages"]["submission"]["files"], 10 - validation["invalid"]
+        )
+
+
+if __name__ == "__main__":
+    main()
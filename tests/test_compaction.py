@@ -0,0 +1,155 @@
+"""
+Test.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main, mock
+
+from tests.ipp_stub import IppStub
+from tum_exam_scripts.logic.compaction import Compactor, compact_booklet
+from tum_exam_scripts.logic.journal import SubmissionJournal
+from tum_exam_scripts.logic.spool import SpoolArea
+from tum_exam_scripts.pdf_commands import app
+from tum_exam_scripts.utils.pdf_merge import compact_pdf
+from tum_exam_scripts.utils.pdf_objects import Name, Stream
+from tum_exam_scripts.utils.pdf_reader import PdfDocument, verify_structure
+from tum_exam_scripts.utils.pdf_writer import PdfWriter
+from typer.testing import CliRunner
+
+_CONTENT = b"BT /F1 12 Tf (Answer the question in the box below.) Tj ET\n" * 200
+
+
+def write_bloated_pdf(pdf_file: Path, pages: int) -> None:
+    """
+    A PDF with uncompressed content streams and the same font embedded on every page.
+    """
+    with pdf_file.open("wb") as fout:
+        writer = PdfWriter(fout)
+        catalog, tree = writer.allocate(), writer.allocate()
+        kids = []
+        for i in range(pages):
+            font_file = writer.write(Stream({"Length1": 4000}, bytes(range(256)) * 16))
+            font = writer.write(
+                {
+                    "Type": Name("Font"),
+                    "BaseFont": Name("Embedded"),
+                    "FontDescriptor": {"FontFile2": font_file},
+                }
+            )
+            content = writer.write(Stream({}, _CONTENT + b"%% page %d" % i))
+            kids.append(
+                writer.write(
+                    {
+                        "Type": Name("Page"),
+                        "Parent": tree,
+                        "MediaBox": [0, 0, 595, 842],
+                        "Resources": {"Font": {"F1": font}},
+                        "Contents": content,
+                    }
+                )
+            )
+        writer.write({"Type": Name("Pages"), "Kids": kids, "Count": pages}, tree)
+        writer.write({"Type": Name("Catalog"), "Pages": tree}, catalog)
+        writer.finish(catalog)
+
+
+class CompactPdfTest(TestCase):
+    """
+    Compact PDF Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_compact(self):
+        source = self.directory.joinpath("E0001-book.pdf")
+        write_bloated_pdf(source, 4)
+        compacted = self.directory.joinpath("compacted.pdf")
+        compact_pdf(source, compacted)
+        self.assertLess(compacted.stat().st_size, source.stat().st_size // 4)
+        report = verify_structure(compacted)
+        self.assertTrue(report.valid, report.problems)
+        self.assertEqual(report.pages, 4)
+        with PdfDocument.open(compacted) as document:
+            pages = [page for _, page in document.iter_pages()]
+            fonts = {page["Resources"]["Font"]["F1"] for page in pages}
+            self.assertEqual(len(fonts), 1)
+            content = document.resolve(pages[3]["Contents"])
+            self.assertEqual(content.dictionary["Filter"], "FlateDecode")
+            self.assertEqual(content.decoded(), _CONTENT + b"% page 3")
+
+    def test_compact_booklet_below_threshold(self):
+        source = Path("tests", "rsc", "exams", "E0001-book.pdf")
+        copy = self.directory.joinpath("copy.pdf")
+        result = compact_booklet(source, copy, 0.99)
+        self.assertIsNone(result.copy)
+        self.assertEqual(result.saved_bytes, 0)
+        self.assertFalse(copy.exists())
+
+    def test_compact_broken_booklet(self):
+        source = self.directory.joinpath("E0001-book.pdf")
+        source.write_bytes(b"%PDF-1.7\nnot a pdf")
+        copy = self.directory.joinpath("copy.pdf")
+        result = compact_booklet(source, copy, 0.1)
+        self.assertIsNone(result.copy)
+        self.assertIsNotNone(result.problem)
+        self.assertFalse(copy.exists())
+
+    def test_compactor(self):
+        booklets = []
+        for i in (1, 2):
+            booklets.append(self.directory.joinpath(f"E000{i}-book.pdf"))
+            write_bloated_pdf(booklets[-1], 2)
+        booklets.append(Path("tests", "rsc", "exams", "E0001-book.pdf"))
+        spool_directory = self.directory.joinpath("spool")
+        spool_directory.mkdir()
+        spool = SpoolArea(spool_directory)
+        with ThreadPoolExecutor() as processes:
+            compactor = Compactor(spool, processes, 2, 50)
+            self.assertEqual(list(compactor.compact(booklets)), booklets)
+        self.assertEqual((compactor.compacted, compactor.skipped), (2, 1))
+        self.assertEqual(spool.source(booklets[0]).parent, spool_directory)
+        self.assertEqual(spool.source(booklets[2]), booklets[2])
+        self.assertIn("2 of 3 booklets", compactor.summary())
+
+
+class CompressCommandTest(TestCase):
+    """
+    Compress Command Test
+    """
+
+    @mock.patch("typer.confirm")
+    def test_send_compressed(self, mock_typer):
+        mock_typer.return_value = True
+        with TemporaryDirectory() as tmp, IppStub() as stub:
+            booklets = [Path(tmp, f"E000{i}-book.pdf") for i in (1, 2)]
+            for booklet in booklets:
+                write_bloated_pdf(booklet, 2)
+            result = CliRunner().invoke(
+                app,
+                [
+                    "send-all-booklets",
+                    "--backend",
+                    "ipp",
+                    "--ipp-uri",
+                    stub.uri,
+                    "--compress",
+                    tmp,
+                ],
+            )
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn("We compressed 2 of 2 booklets", result.stdout)
+            self.assertEqual(len(stub.jobs), 2)
+            for job in stub.jobs:
+                self.assertLess(len(job.document), booklets[0].stat().st_size // 2)
+            entries = SubmissionJournal(Path(tmp)).load()
+            self.assertEqual(set(entries), {b.name for b in booklets})
+
+
+if __name__ == "__main__":
+    main()
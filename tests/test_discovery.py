@@ -0,0 +1,173 @@
+"""
+Test.
+"""
+from os.path import join
+from pathlib import Path
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main, mock
+
+from tum_exam_scripts.logic.discovery import (
+    ExamRange,
+    discover_booklets,
+    exam_number,
+    iter_booklets,
+    parse_exam_ranges,
+)
+from tum_exam_scripts.pdf_commands import app
+from typer.testing import CliRunner
+
+
+class DiscoveryTest(TestCase):
+    """
+    Discovery Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _touch(self, *names: str) -> None:
+        for name in names:
+            path = self.directory.joinpath(name)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.touch()
+
+    def _names(self, pdf_files):
+        return [str(p.relative_to(self.directory)) for p in pdf_files]
+
+    def test_natural_order(self):
+        self._touch("E10000-book.pdf", "E2000-book.pdf", "E0999-book.pdf", "notes.pdf")
+        self.assertEqual(
+            self._names(discover_booklets(self.directory)),
+            ["E0999-book.pdf", "E2000-book.pdf", "E10000-book.pdf"],
+        )
+
+    def test_recursive_rooms(self):
+        self._touch(
+            "Room10/E0003-book.pdf",
+            "Room2/E0002-book.pdf",
+            "Room2/E0001-book.pdf",
+            ".templates/E0000-book.pdf",
+            ".hidden-book.pdf",
+        )
+        self.assertEqual(discover_booklets(self.directory), [])
+        self.assertEqual(
+            self._names(discover_booklets(self.directory, recursive=True)),
+            ["Room2/E0001-book.pdf", "Room2/E0002-book.pdf", "Room10/E0003-book.pdf"],
+        )
+
+    def test_ranges(self):
+        self.assertEqual(
+            parse_exam_ranges("1-120, E0250,300-,-5"),
+            [
+                ExamRange(1, 120),
+                ExamRange(250, 250),
+                ExamRange(300, None),
+                ExamRange(None, 5),
+            ],
+        )
+        for text in ("", "a", "5-3", "1,,2"):
+            with self.assertRaises(ValueError):
+                parse_exam_ranges(text)
+        self.assertEqual(exam_number(Path("room1", "E0012-book.pdf")), 12)
+        self._touch(*(f"E{i:04}-book.pdf" for i in range(1, 11)))
+        self.assertEqual(
+            [
+                exam_number(p)
+                for p in discover_booklets(
+                    self.directory,
+                    include=parse_exam_ranges("2-6,9-"),
+                    exclude=parse_exam_ranges("4"),
+                )
+            ],
+            [2, 3, 5, 6, 9, 10],
+        )
+
+    def test_streaming(self):
+        self._touch("E0001-book.pdf", "E0002-book.pdf")
+        booklets = iter_booklets(self.directory)
+        # The generator yields in the order of the file system.
+        first = next(booklets)
+        self.assertIn(first.name, ("E0001-book.pdf", "E0002-book.pdf"))
+        self.assertEqual(len(list(booklets)), 1)
+
+
+class SendAllDiscoveryTest(TestCase):
+    """
+    Send All Discovery Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.exams = join(self.tmp.name, "exams")
+        copytree(join("tests", "rsc", "exams"), join(self.exams, "Room1"))
+        copytree(join("tests", "rsc", "exams_broken"), join(self.exams, "Room2"))
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _sent(self, mock_check_output):
+        return sorted(
+            str(Path(c.args[0][-1]).relative_to(self.exams))
+            for c in mock_check_output.call_args_list
+        )
+
+    @mock.patch("typer.confirm")
+    @mock.patch("subprocess.check_output")
+    def test_recursive_with_ranges(self, mock_check_output, mock_typer):
+        mock_typer.return_value = True
+        mock_check_output.return_value = b""
+        result = CliRunner().invoke(
+            app,
+            [
+                "send-all-booklets",
+                "--recursive",
+                "--exams",
+                "1-2",
+                "--exclude-exams",
+                "E0002",
+                self.exams,
+            ],
+        )
+        self.assertEqual(result.exit_code, 0, result.stdout)
+        self.assertEqual(
+            self._sent(mock_check_output),
+            ["Room1/E0001-book.pdf", "Room2/E0001-book.pdf"],
+        )
+
+    @mock.patch("typer.confirm")
+    @mock.patch("subprocess.check_output")
+    def test_stream(self, mock_check_output, mock_typer):
+        mock_typer.return_value = True
+        mock_check_output.return_value = b""
+        result = CliRunner().invoke(
+            app, ["send-all-booklets", "--stream", "-r", self.exams]
+        )
+        self.assertEqual(result.exit_code, 1, result.stdout)
+        self.assertIn("0003-book.pdf is not a valid PDF", result.stdout)
+        self.assertEqual(
+            self._sent(mock_check_output),
+            [
+                "Room1/E0001-book.pdf",
+                "Room1/E0002-book.pdf",
+                "Room2/E0001-book.pdf",
+                "Room2/E0002-book.pdf",
+            ],
+        )
+
+    @mock.patch("typer.confirm")
+    def test_invalid_options(self, mock_typer):
+        mock_typer.return_value = True
+        for arguments in (["--exams", "x"], ["--stream", "--strict"]):
+            result = CliRunner().invoke(
+                app, ["send-all-booklets", *arguments, self.exams]
+            )
+            self.assertEqual(result.exit_code, 1, arguments)
+
+
+if __name__ == "__main__":
+    main()
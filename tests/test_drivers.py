@@ -0,0 +1,191 @@
+"""
+Test.
+"""
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List
+from unittest import TestCase, main, mock
+
+from tum_exam_scripts.logic.drivers import (
+    FOLLOWME_URI,
+    DriverError,
+    PpdCache,
+    parse_lpstat_queues,
+    provision_queues,
+)
+from tum_exam_scripts.main import app
+from tum_exam_scripts.utils.files import file_hash
+from typer.testing import CliRunner
+
+_PPD = b'*PPD-Adobe: "4.3"\n*ModelName: "Xerox Universal"\n'
+
+_LPSTAT = f"""\
+printer followmeppd is idle.  enabled since Sat 18 Oct 2026 09:00:00 CEST
+printer room1 disabled since Sat 18 Oct 2026 09:00:00 CEST -
+\treason unknown
+printer other is idle.  enabled since Sat 18 Oct 2026 09:00:00 CEST
+device for followmeppd: {FOLLOWME_URI}
+device for room1: {FOLLOWME_URI}
+device for other: ipp://localhost:631/printers/other
+followmeppd accepting requests since Sat 18 Oct 2026 09:00:00 CEST
+room1 not accepting requests since Sat 18 Oct 2026 09:00:00 CEST -
+\treason unknown
+other accepting requests since Sat 18 Oct 2026 09:00:00 CEST
+"""
+
+
+class PpdCacheTest(TestCase):
+    """
+    PPD Cache Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.source = Path(self.tmp.name).joinpath("source.ppd")
+        self.source.write_bytes(_PPD)
+        self.cache = PpdCache(Path(self.tmp.name, "cache"), self.source.as_uri())
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_download_once(self):
+        ppd_file = self.cache.get()
+        self.assertEqual(ppd_file.read_bytes(), _PPD)
+        self.source.unlink()
+        self.assertEqual(self.cache.get(), ppd_file)
+        self.assertEqual(self.cache.get(offline=True), ppd_file)
+        with self.assertRaises(DriverError):
+            self.cache.get(refresh=True)
+        self.assertEqual(self.cache.get(), ppd_file)
+
+    def test_corrupted_cache(self):
+        ppd_file = self.cache.get()
+        ppd_file.write_bytes(_PPD[:10])
+        with self.assertRaises(DriverError):
+            self.cache.get(offline=True)
+        self.assertEqual(self.cache.get().read_bytes(), _PPD)
+
+    def test_expected_checksum(self):
+        with self.assertRaisesRegex(DriverError, "SHA-256"):
+            self.cache.get(expected="0" * 64)
+        self.assertIsNone(self.cache.cached())
+        self.assertEqual(
+            self.cache.get(expected=file_hash(self.source)).name, "x2UNIV.ppd"
+        )
+
+    def test_not_a_ppd(self):
+        self.source.write_bytes(b"<html>Not found</html>")
+        with self.assertRaisesRegex(DriverError, "not a PPD file"):
+            self.cache.get()
+        self.assertIsNone(self.cache.cached())
+
+    def test_offline_without_cache(self):
+        with self.assertRaisesRegex(DriverError, "online"):
+            self.cache.get(offline=True)
+
+
+class InstallLinuxDriverTest(TestCase):
+    """
+    Install Linux Driver Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.cache = Path(self.tmp.name)
+        self.cache.joinpath("x2UNIV.ppd").write_bytes(_PPD)
+        self.cache.joinpath("x2UNIV.ppd.sha256").write_text(
+            file_hash(self.cache.joinpath("x2UNIV.ppd"))
+        )
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_parse_lpstat(self):
+        queues = parse_lpstat_queues(_LPSTAT)
+        self.assertEqual(set(queues), {"followmeppd", "room1", "other"})
+        self.assertTrue(queues["followmeppd"].configured())
+        self.assertEqual(
+            (queues["room1"].enabled, queues["room1"].accepting), (False, False)
+        )
+        self.assertFalse(queues["other"].configured())
+
+    def _invoke(self, args: List[str], lpstat: str = _LPSTAT):
+        with mock.patch(
+            "tum_exam_scripts.logic.drivers.query_command", return_value=lpstat
+        ), mock.patch(
+            "tum_exam_scripts.logic.drivers.sudo_run", return_value=0
+        ) as sudo:
+            result = CliRunner().invoke(
+                app,
+                ["install-linux-driver", "--offline"] + args,
+                env={"TUM_EXAM_SCRIPTS_CACHE_DIR": str(self.cache)},
+            )
+        return result, sudo
+
+    def test_single_batch(self):
+        result, sudo = self._invoke(
+            ["-d", "followmeppd", "-d", "room1", "-d", "room2", "-p", "secret"]
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        sudo.assert_called_once()
+        command, password = sudo.call_args[0]
+        self.assertEqual(password, "secret")
+        self.assertEqual(command[:2], ["sh", "-c"])
+        self.assertNotIn("followmeppd", command[2])
+        self.assertEqual(command[2].count("lpadmin"), 2)
+        self.assertIn("cupsaccept room2", command[2])
+        self.assertIn(str(self.cache.joinpath("x2UNIV.ppd")), command[2])
+
+    def test_already_configured(self):
+        result, sudo = self._invoke([])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("already available under followmeppd", result.stdout)
+        sudo.assert_not_called()
+
+    def test_force(self):
+        result, sudo = self._invoke(["--force", "-p", "secret"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        sudo.assert_called_once()
+
+    def test_provision_without_console(self):
+        ask_password = mock.Mock(return_value="secret")
+        with mock.patch(
+            "tum_exam_scripts.logic.drivers.query_command", return_value=_LPSTAT
+        ), mock.patch(
+            "tum_exam_scripts.logic.drivers.sudo_run", return_value=0
+        ) as sudo:
+            result = provision_queues(
+                ["followmeppd"], ask_password, cache=PpdCache(self.cache)
+            )
+            self.assertEqual(
+                (result.configured, result.available), ([], ["followmeppd"])
+            )
+            ask_password.assert_not_called()
+            sudo.return_value = 1
+            with self.assertRaisesRegex(DriverError, "sudo exited with code 1"):
+                provision_queues(
+                    ["room1"], ask_password, offline=True, cache=PpdCache(self.cache)
+                )
+        ask_password.assert_called_once_with()
+
+    def test_sudo_fails(self):
+        with mock.patch(
+            "tum_exam_scripts.logic.drivers.query_command", return_value=""
+        ), mock.patch("tum_exam_scripts.logic.drivers.sudo_run", return_value=1):
+            result = CliRunner().invoke(
+                app,
+                ["install-linux-driver", "--offline", "-p", "secret"],
+                env={"TUM_EXAM_SCRIPTS_CACHE_DIR": str(self.cache)},
+            )
+        self.assertEqual(result.exit_code, 1, result.output)
+        self.assertIn("Installation went wrong.", result.output)
+
+    def test_offline_without_cache(self):
+        self.cache.joinpath("x2UNIV.ppd").unlink()
+        result, sudo = self._invoke(["-d", "room2", "-p", "secret"], lpstat="")
+        self.assertEqual(result.exit_code, 1, result.output)
+        sudo.assert_not_called()
+
+
+if __name__ == "__main__":
+    main()
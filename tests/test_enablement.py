@@ -0,0 +1,123 @@
+"""
+Test.
+"""
+from unittest import TestCase, main, mock
+
+from tests.ucentral_stub import UcentralStub
+from tum_exam_scripts.enums import Browser
+from tum_exam_scripts.main import app
+from tum_exam_scripts.utils.enablement import EnablementError, Page, enable_printing
+from typer.testing import CliRunner
+
+
+class PageTest(TestCase):
+    """
+    Page Test
+    """
+
+    def test_forms_and_links(self):
+        page = Page(
+            "https://example.org/cgi-bin/index.cgi",
+            '<a href="?page=x">Xerox &amp; <b>Printing</b></a>'
+            '<form action="post.cgi" method="POST"><input type="hidden" name="a" value="1">'
+            '<input name="user"><input type="checkbox" name="c">'
+            '<button name="go" value="yes" disabled>Go</button></form>',
+        )
+        link = page.require("Xerox & Printing")
+        self.assertEqual(link.href, "?page=x")
+        button = page.require("Go", in_form=True)
+        self.assertTrue(button.disabled)
+        self.assertEqual((button.name, button.value), ("go", "yes"))
+        form = page.forms[button.form]
+        self.assertEqual(form.action, "https://example.org/cgi-bin/post.cgi")
+        self.assertEqual(form.method, "post")
+        self.assertEqual(form.fields, [("a", "1"), ("user", "")])
+        self.assertIsNone(page.find("Xerox & Printing", in_form=True))
+        with self.assertRaises(EnablementError):
+            page.require("Logout")
+
+
+class EnablePrintingTest(TestCase):
+    """
+    Enable Printing Test
+    """
+
+    def test_enable(self):
+        with UcentralStub() as stub:
+            self.assertTrue(enable_printing("ga12abc", "secret", stub.url))
+            self.assertTrue(stub.enabled)
+            # start page, login form, login, start page, Xerox page, button
+            self.assertEqual(len(stub.requests), 6)
+            self.assertFalse(enable_printing("ga12abc", "secret", stub.url))
+        self.assertEqual(stub.presses, 1)
+
+    def test_press_twice(self):
+        with UcentralStub() as stub:
+            stub.presses_needed = 2
+            self.assertTrue(enable_printing("ga12abc", "secret", stub.url))
+        self.assertEqual(stub.presses, 2)
+
+    def test_button_stays_enabled(self):
+        with UcentralStub() as stub:
+            stub.presses_needed = 3
+            with self.assertRaises(EnablementError):
+                enable_printing("ga12abc", "secret", stub.url)
+
+    def test_wrong_password(self):
+        with UcentralStub() as stub:
+            with self.assertRaisesRegex(EnablementError, "login failed"):
+                enable_printing("ga12abc", "wrong", stub.url)
+        self.assertFalse(stub.enabled)
+
+    def test_unreachable(self):
+        with UcentralStub() as stub:
+            url = stub.url
+        with self.assertRaisesRegex(EnablementError, "cannot reach"):
+            enable_printing("ga12abc", "secret", url, timeout=1)
+
+
+class OpenPrintingPageTest(TestCase):
+    """
+    Open Printing Page Test
+    """
+
+    def _invoke(self, url: str, mode: str, password: str = "secret"):
+        return CliRunner().invoke(
+            app,
+            [
+                "open-printing-page",
+                "--password",
+                password,
+                "--mode",
+                mode,
+                "--url",
+                url,
+                "ga12abc",
+            ],
+        )
+
+    def test_http(self):
+        with UcentralStub() as stub:
+            result = self._invoke(stub.url, "http")
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("This machine can print now.", result.stdout)
+        self.assertTrue(stub.enabled)
+
+    def test_http_fails(self):
+        with UcentralStub() as stub:
+            result = self._invoke(stub.url, "http", "wrong")
+        self.assertEqual(result.exit_code, 1, result.output)
+
+    @mock.patch("tum_exam_scripts.utils.website.open_website_internal")
+    def test_browser_fallback(self, mock_website):
+        with UcentralStub() as stub:
+            result = self._invoke(stub.url, "auto", "wrong")
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("so we start firefox", result.stdout)
+        mock_website.assert_called_once_with(
+            "ga12abc", "wrong", Browser.FIREFOX, stub.url
+        )
+
+
+if __name__ == "__main__":
+    main()
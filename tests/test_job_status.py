@@ -0,0 +1,173 @@
+"""
+Test.
+"""
+from datetime import datetime, timedelta
+from os.path import join
+from pathlib import Path
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from typing import Dict, List, Sequence
+from unittest import TestCase, main, mock
+
+from tests.ipp_stub import IppStub
+from tum_exam_scripts.logic.job_status import (
+    COMPLETED,
+    FAILED,
+    PENDING,
+    PROCESSING,
+    JobStatusSource,
+    TrackedJob,
+    parse_lpstat_states,
+    summarize,
+    watch_jobs,
+)
+from tum_exam_scripts.pdf_commands import app
+from typer.testing import CliRunner
+
+_LPSTAT = """\
+followmeppd-41          agent           1048576   Sat 18 Oct 2026 09:12:01 CEST
+followmeppd-42          agent            524288   Sat 18 Oct 2026 09:12:02 CEST
+printer followmeppd now printing followmeppd-41.  enabled since Sat 18 Oct 2026 09:00:00 CEST
+printer second is idle.  enabled since Sat 18 Oct 2026 09:00:00 CEST
+"""
+
+
+class _ScriptedSource(JobStatusSource):
+    """
+    Answers every poll with the next states of the script and records the polls.
+    """
+
+    def __init__(self, script: List[Dict[str, str]]) -> None:
+        self.script = script
+        self.polls = 0
+
+    def states(self, job_ids: Sequence[str]) -> Dict[str, str]:
+        self.polls += 1
+        return self.script.pop(0) if len(self.script) > 1 else self.script[0]
+
+
+class JobStatusTest(TestCase):
+    """
+    Job Status Test
+    """
+
+    def setUp(self) -> None:
+        start = datetime.now() - timedelta(minutes=2)
+        self.jobs = [
+            TrackedJob("followmeppd-41", Path("E0001-book.pdf"), start),
+            TrackedJob("followmeppd-42", Path("E0002-book.pdf"), start),
+            TrackedJob("followmeppd-43", Path("E0003-book.pdf"), start),
+        ]
+        self.pages = {j.pdf_file: 60 for j in self.jobs}
+
+    def test_parse_lpstat(self):
+        self.assertEqual(
+            parse_lpstat_states(_LPSTAT, [j.job_id for j in self.jobs]),
+            {
+                "followmeppd-41": PROCESSING,
+                "followmeppd-42": PENDING,
+                "followmeppd-43": COMPLETED,
+            },
+        )
+
+    def test_summary(self):
+        summary = summarize(
+            self.jobs,
+            {
+                "followmeppd-41": COMPLETED,
+                "followmeppd-42": COMPLETED,
+                "followmeppd-43": FAILED,
+            },
+            self.pages,
+            self.jobs[0].submitted + timedelta(minutes=2),
+        )
+        self.assertTrue(summary.done)
+        self.assertEqual(summary.pages_per_minute, 60)
+        self.assertEqual(
+            str(summary), "0 pending  0 processing  2 completed  1 failed  60 pages/min"
+        )
+
+    @mock.patch("tum_exam_scripts.logic.job_status.sleep")
+    def test_wait_until_done(self, mock_sleep):
+        source = _ScriptedSource(
+            [
+                {"followmeppd-41": PROCESSING, "followmeppd-42": PENDING},
+                {"followmeppd-41": COMPLETED, "followmeppd-42": PROCESSING},
+                {"followmeppd-41": COMPLETED, "followmeppd-42": COMPLETED},
+            ]
+        )
+        summaries = []
+        summary = watch_jobs(
+            source, self.jobs[:2], self.pages, True, 1.0, None, summaries.append
+        )
+        self.assertTrue(summary.done)
+        self.assertEqual(source.polls, 3)
+        self.assertEqual(len(summaries), 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_poll_once(self):
+        source = _ScriptedSource([{"followmeppd-41": PENDING}])
+        summary = watch_jobs(source, self.jobs[:1], self.pages)
+        self.assertFalse(summary.done)
+        self.assertEqual(source.polls, 1)
+
+
+class StatusCommandTest(TestCase):
+    """
+    Status Command Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.exams = join(self.tmp.name, "exams")
+        copytree(join("tests", "rsc", "exams"), self.exams)
+        self.runner = CliRunner()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _invoke(self, stub: IppStub, *arguments: str):
+        return self.runner.invoke(
+            app, [*arguments, "--backend", "ipp", "--ipp-uri", stub.uri, self.exams]
+        )
+
+    @mock.patch("typer.confirm")
+    def test_status(self, mock_typer):
+        mock_typer.return_value = True
+        with IppStub() as stub:
+            result = self._invoke(stub, "send-all-booklets", "-j", "1")
+            self.assertEqual(result.exit_code, 0, result.output)
+
+            result = self._invoke(stub, "status")
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn("2 pending  0 processing  0 completed", result.stdout)
+            get_jobs = stub.get_jobs
+
+            stub.aborted.add(2)
+            stub.complete_jobs()
+            result = self._invoke(stub, "status", "--wait")
+            # One Get-Jobs for both jobs
+            self.assertEqual(stub.get_jobs, get_jobs + 1)
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("1 completed  1 failed", result.stdout)
+        self.assertIn("The job followmeppd-2 of", result.stdout)
+        self.assertIn("E0002-book.pdf failed.", result.stdout)
+
+    @mock.patch("typer.confirm")
+    def test_timeout(self, mock_typer):
+        mock_typer.return_value = True
+        with IppStub() as stub:
+            self._invoke(stub, "send-all-booklets", "-j", "1")
+            result = self._invoke(stub, "status", "--wait", "--timeout", "0")
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("We stopped waiting after 0 seconds.", result.stdout)
+
+    def test_no_jobs(self):
+        with IppStub() as stub:
+            result = self._invoke(stub, "status")
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("We did not find any job IDs", result.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Test.
+"""
+from os import utime
+from pathlib import Path
+from shutil import copy
+from tempfile import TemporaryDirectory
+from threading import current_thread
+from unittest import TestCase, main, mock
+
+from tum_exam_scripts.logic.backends import SubmissionError
+from tum_exam_scripts.logic.journal import (
+    JOURNAL_FILE_NAME,
+    STATUS_FAILED,
+    STATUS_SENT,
+    SubmissionJournal,
+)
+from tum_exam_scripts.logic.submission import SubmissionResult
+
+_EXAMS = Path("tests", "rsc", "exams")
+
+
+class JournalTest(TestCase):
+    """
+    Journal Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+        self.pdf_files = []
+        for pdf_file in sorted(_EXAMS.glob("*-book.pdf")):
+            copy(pdf_file, self.directory)
+            self.pdf_files.append(self.directory.joinpath(pdf_file.name))
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _record(self, *results: SubmissionResult) -> None:
+        with SubmissionJournal(self.directory) as journal:
+            for result in results:
+                journal.record(result)
+
+    def test_record_and_load(self):
+        self._record(
+            SubmissionResult(self.pdf_files[0], "followmeppd", "followmeppd-1", 1),
+            SubmissionResult(
+                self.pdf_files[1],
+                "followmeppd",
+                None,
+                4,
+                SubmissionError("Busy", transient=True),
+            ),
+        )
+        entries = SubmissionJournal(self.directory).load()
+        self.assertEqual(entries["E0001-book.pdf"].status, STATUS_SENT)
+        self.assertEqual(entries["E0001-book.pdf"].job_id, "followmeppd-1")
+        self.assertEqual(len(entries["E0001-book.pdf"].sha256), 64)
+        self.assertEqual(entries["E0002-book.pdf"].status, STATUS_FAILED)
+        self.assertEqual(
+            SubmissionJournal(self.directory).already_sent(self.pdf_files),
+            self.pdf_files[:1],
+        )
+
+    def test_touched_but_unchanged_booklet_counts_as_sent(self):
+        self._record(SubmissionResult(self.pdf_files[0], "followmeppd", None, 1))
+        utime(self.pdf_files[0], (0, 0))
+        self.assertEqual(
+            SubmissionJournal(self.directory).already_sent(self.pdf_files),
+            self.pdf_files[:1],
+        )
+
+    def test_changed_booklet_is_sent_again(self):
+        self._record(SubmissionResult(self.pdf_files[0], "followmeppd", None, 1))
+        data = bytearray(self.pdf_files[0].read_bytes())
+        data[100] ^= 0xFF
+        self.pdf_files[0].write_bytes(bytes(data))
+        self.assertEqual(
+            SubmissionJournal(self.directory).already_sent(self.pdf_files), []
+        )
+
+    def test_torn_line_is_ignored(self):
+        self._record(SubmissionResult(self.pdf_files[0], "followmeppd", None, 1))
+        with self.directory.joinpath(JOURNAL_FILE_NAME).open("a") as fout:
+            fout.write('{"path": "E0002-book.pdf", "si')
+        self._record(SubmissionResult(self.pdf_files[1], "followmeppd", None, 1))
+        self.assertEqual(
+            SubmissionJournal(self.directory).already_sent(self.pdf_files),
+            self.pdf_files,
+        )
+
+    def test_record_does_not_hash_on_the_calling_thread(self):
+        threads = []
+
+        def _hash(current_file: Path) -> str:
+            threads.append(current_thread())
+            return "0" * 64
+
+        with mock.patch("tum_exam_scripts.logic.journal.file_hash", _hash):
+            self._record(SubmissionResult(self.pdf_files[0], "followmeppd", None, 1))
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], current_thread())
+        entries = SubmissionJournal(self.directory).load()
+        self.assertEqual(entries["E0001-book.pdf"].sha256, "0" * 64)
+
+    def test_missing_booklet_is_recorded_but_not_confirmed(self):
+        missing = self.directory.joinpath("E0099-book.pdf")
+        self._record(SubmissionResult(missing, "followmeppd", "followmeppd-7", 1))
+        entries = SubmissionJournal(self.directory).load()
+        self.assertEqual(entries["E0099-book.pdf"].job_id, "followmeppd-7")
+        self.assertIsNone(entries["E0099-book.pdf"].sha256)
+        copy(self.pdf_files[0], missing)
+        self.assertEqual(SubmissionJournal(self.directory).already_sent([missing]), [])
+
+
+if __name__ == "__main__":
+    main()
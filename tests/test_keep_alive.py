@@ -0,0 +1,157 @@
+"""
+Test.
+"""
+from os.path import join
+from pathlib import Path
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from threading import Event, Thread
+from time import sleep
+from unittest import TestCase, main, mock
+
+from tests.ipp_stub import IppStub
+from tests.test_submission import _FlakyBackend
+from tests.ucentral_stub import UcentralStub
+from tum_exam_scripts.logic.backends import BOOKLET_OPTIONS
+from tum_exam_scripts.logic.keep_alive import (
+    EnablementKeeper,
+    create_enablement_keeper,
+)
+from tum_exam_scripts.logic.submission import SubmissionEngine
+from tum_exam_scripts.pdf_commands import app
+from tum_exam_scripts.utils.enablement import EnablementError
+from typer.testing import CliRunner
+
+
+class EnablementKeeperTest(TestCase):
+    """
+    Enablement Keeper Test
+    """
+
+    def test_renews_on_schedule(self):
+        keeper = EnablementKeeper(lambda: False, interval=0.02)
+        with keeper:
+            sleep(0.2)
+        renewals = keeper.renewals
+        self.assertGreaterEqual(renewals, 3)
+        sleep(0.05)
+        self.assertEqual(keeper.renewals, renewals)
+
+    def test_failures_are_retried(self):
+        calls = []
+
+        def _renew() -> bool:
+            calls.append(1)
+            if len(calls) <= 2:
+                raise EnablementError("ucentral is down")
+            return True
+
+        keeper = EnablementKeeper(_renew, interval=0.02, retry_interval=0.02)
+        with keeper:
+            for _ in range(100):
+                if keeper.renewals > 0:
+                    break
+                sleep(0.01)
+        self.assertEqual(keeper.failures, 2)
+        self.assertEqual(keeper.renewals, 1)
+
+    def test_submission_waits_for_renewal(self):
+        release = Event()
+        renewing = Event()
+
+        def _renew() -> bool:
+            renewing.set()
+            release.wait()
+            return True
+
+        keeper = EnablementKeeper(_renew)
+        renewal = Thread(target=keeper.renew)
+        renewal.start()
+        renewing.wait()
+        backend = _FlakyBackend()
+        with SubmissionEngine(backend, enablement=keeper) as engine:
+            engine.submit(Path("E0001-book.pdf"), "followmeppd", BOOKLET_OPTIONS)
+            sleep(0.05)
+            self.assertEqual(backend.attempts, {})
+            release.set()
+            results = engine.join()
+        renewal.join()
+        self.assertTrue(results[0].ok)
+        self.assertEqual(backend.attempts, {Path("E0001-book.pdf"): 1})
+
+
+class CreateEnablementKeeperTest(TestCase):
+    """
+    Create Enablement Keeper Test
+    """
+
+    def test_password_from_environment(self):
+        with UcentralStub() as ucentral, mock.patch.dict(
+            "os.environ", {"TUM_EXAM_SCRIPTS_PASSWORD": "secret"}
+        ):
+            keeper = create_enablement_keeper("ga12abc", ucentral.url)
+            self.assertTrue(keeper.renew())
+        self.assertTrue(ucentral.enabled)
+
+    def test_wrong_password_raises(self):
+        with UcentralStub() as ucentral, mock.patch.dict(
+            "os.environ", {"TUM_EXAM_SCRIPTS_PASSWORD": "wrong"}
+        ):
+            keeper = create_enablement_keeper("ga12abc", ucentral.url)
+            with self.assertRaises(EnablementError):
+                keeper.renew()
+
+
+class EnableAsCommandTest(TestCase):
+    """
+    Enable As Command Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.exams = join(self.tmp.name, "exams")
+        copytree(join("tests", "rsc", "exams"), self.exams)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _invoke(self, ipp: IppStub, ucentral: UcentralStub, password: str):
+        return CliRunner().invoke(
+            app,
+            [
+                "send-all-booklets",
+                "--backend",
+                "ipp",
+                "--ipp-uri",
+                ipp.uri,
+                "--enable-as",
+                "ga12abc",
+                self.exams,
+            ],
+            env={
+                "TUM_EXAM_SCRIPTS_PASSWORD": password,
+                "TUM_EXAM_SCRIPTS_UCENTRAL_URL": ucentral.url,
+            },
+        )
+
+    @mock.patch("typer.confirm")
+    def test_enable_instead_of_prompt(self, mock_typer):
+        with IppStub() as ipp, UcentralStub() as ucentral:
+            result = self._invoke(ipp, ucentral, "secret")
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("We enabled printing from this machine.", result.stdout)
+        self.assertTrue(ucentral.enabled)
+        self.assertEqual(len(ipp.jobs), 2)
+        mock_typer.assert_not_called()
+
+    @mock.patch("typer.confirm")
+    def test_enablement_fails(self, mock_typer):
+        with IppStub() as ipp, UcentralStub() as ucentral:
+            result = self._invoke(ipp, ucentral, "wrong")
+        self.assertEqual(result.exit_code, 1, result.output)
+        self.assertEqual(len(ipp.jobs), 0)
+        mock_typer.assert_not_called()
+
+
+if __name__ == "__main__":
+    main()
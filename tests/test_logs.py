@@ -0,0 +1,105 @@
+"""
+Test.
+"""
+import json
+from logging import getLogger
+from os.path import join
+from pathlib import Path
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from threading import Thread
+from unittest import TestCase, main, mock
+
+from tum_exam_scripts.main import app
+from tum_exam_scripts.utils.logs import configure_logging, stop_logging
+from typer.testing import CliRunner
+
+_LOGGER = getLogger("tests.test_logs")
+
+
+class LogsTest(TestCase):
+    """
+    Logs Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.log_file = Path(self.tmp.name, "logs", "tum-exam-scripts.log")
+
+    def tearDown(self) -> None:
+        stop_logging()
+        self.tmp.cleanup()
+
+    def _records(self, log_file=None):
+        log_file = log_file or self.log_file
+        return [json.loads(line) for line in log_file.read_text().splitlines()]
+
+    def test_json_records_from_threads(self):
+        configure_logging(self.log_file)
+        self.assertFalse(self.log_file.parent.exists())
+        arguments = ["E0001-book.pdf"]
+
+        def _log() -> None:
+            _LOGGER.info("%s is job %s", *arguments, "q-1", extra={"job_id": "q-1"})
+
+        thread = Thread(target=_log, name="submission_0")
+        thread.start()
+        thread.join()
+        # The listener formats the record later, so changes after the call must not show up.
+        arguments[0] = "changed"
+        try:
+            raise ValueError("broken")
+        except ValueError:
+            _LOGGER.exception("Failed", extra={"file": Path("E0002-book.pdf")})
+        stop_logging()
+
+        first, second = self._records()
+        self.assertEqual(first["message"], "E0001-book.pdf is job q-1")
+        self.assertEqual(first["job_id"], "q-1")
+        self.assertEqual(first["thread"], "submission_0")
+        self.assertEqual(first["level"], "INFO")
+        self.assertEqual(second["file"], "E0002-book.pdf")
+        self.assertIn("ValueError: broken", second["exception"])
+
+    def test_rotation(self):
+        configure_logging(self.log_file, max_megabytes=1, backups=2)
+        for _ in range(3 * 1024):
+            _LOGGER.info("x" * 1024)
+        stop_logging()
+        self.assertEqual(
+            sorted(p.name for p in self.log_file.parent.iterdir()),
+            [
+                "tum-exam-scripts.log",
+                "tum-exam-scripts.log.1",
+                "tum-exam-scripts.log.2",
+            ],
+        )
+
+    @mock.patch("typer.confirm")
+    @mock.patch("subprocess.check_output")
+    def test_send_all(self, mock_check_output, mock_typer):
+        mock_typer.return_value = True
+        mock_check_output.return_value = b""
+        exams = join(self.tmp.name, "exams")
+        copytree(join("tests", "rsc", "exams"), exams)
+
+        result = CliRunner().invoke(
+            app,
+            ["--log-file", str(self.log_file), "pdf", "send-all-booklets", exams],
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+
+        jobs = [r for r in self._records() if "outcome" in r]
+        self.assertEqual(
+            sorted(Path(r["file"]).name for r in jobs),
+            ["E0001-book.pdf", "E0002-book.pdf"],
+        )
+        for record in jobs:
+            self.assertEqual(record["outcome"], "sent")
+            self.assertEqual(record["attempts"], 1)
+            self.assertIn("duration", record)
+            self.assertIn("job_id", record)
+
+
+if __name__ == "__main__":
+    main()
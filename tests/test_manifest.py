@@ -0,0 +1,163 @@
+"""
+Test.
+"""
+from hashlib import blake2b
+from os.path import join
+from pathlib import Path
+from shutil import copy, copytree
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main, mock
+
+from tests.ipp_stub import IppStub
+from tests.test_pdf_reader import write_pdf
+from tum_exam_scripts.logic.manifest import (
+    Manifest,
+    compare,
+    find_duplicates,
+    hash_booklets,
+    skip_unchanged_booklets,
+)
+from tum_exam_scripts.pdf_commands import app
+from tum_exam_scripts.utils.files import fast_file_hash
+from typer.testing import CliRunner
+
+
+class ManifestTest(TestCase):
+    """
+    Manifest Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.exams = Path(self.tmp.name, "exams")
+        copytree(join("tests", "rsc", "exams"), self.exams)
+        self.booklets = sorted(self.exams.glob("*-book.pdf"))
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_fast_file_hash(self):
+        big = Path(self.tmp.name, "big.bin")
+        big.write_bytes(bytes(range(256)) * 10000)
+        self.assertEqual(fast_file_hash(big), blake2b(big.read_bytes()).hexdigest())
+
+    def test_changes(self):
+        manifest = Manifest(self.exams)
+        for pdf_file, entry in hash_booklets(self.booklets).items():
+            manifest.put(pdf_file, entry)
+        manifest.save()
+        write_pdf(self.booklets[1], 3)
+        added = self.exams.joinpath("E0003-book.pdf")
+        write_pdf(added, 2)
+        manifest = Manifest(self.exams)
+        entries = hash_booklets(self.booklets + [added], manifest)
+        changes = compare(manifest, entries)
+        self.assertEqual(changes.unchanged, self.booklets[:1])
+        self.assertEqual(changes.changed, self.booklets[1:])
+        self.assertEqual(changes.added, [added])
+        self.assertEqual(changes.removed, [])
+
+    def test_reuse_hash(self):
+        manifest = Manifest(self.exams)
+        for pdf_file, entry in hash_booklets(self.booklets).items():
+            manifest.put(pdf_file, entry)
+        with mock.patch("tum_exam_scripts.logic.manifest.fast_file_hash") as hashed:
+            hash_booklets(self.booklets, manifest)
+        hashed.assert_not_called()
+
+    def test_duplicates(self):
+        duplicate = self.exams.joinpath("room", "E0001-book.pdf")
+        duplicate.parent.mkdir()
+        copy(self.booklets[0], duplicate)
+        entries = hash_booklets(self.booklets + [duplicate])
+        self.assertEqual(find_duplicates(entries), [[self.booklets[0], duplicate]])
+
+    def test_skip_unchanged_booklets(self):
+        duplicate = self.exams.joinpath("room", "E0001-book.pdf")
+        duplicate.parent.mkdir()
+        copy(self.booklets[0], duplicate)
+        manifest = Manifest(self.exams)
+        manifest.put(
+            self.booklets[0], hash_booklets(self.booklets[:1])[self.booklets[0]]
+        )
+        manifest.save()
+        write_pdf(self.booklets[1], 3)
+        selection = skip_unchanged_booklets(
+            Manifest(self.exams), self.booklets + [duplicate]
+        )
+        self.assertEqual(selection.duplicates, [[self.booklets[0], duplicate]])
+        self.assertEqual(selection.unchanged, self.booklets[:1])
+        self.assertEqual(selection.pdf_files, self.booklets[1:])
+        self.assertEqual(len(selection.entries), 3)
+
+    def test_broken_manifest(self):
+        self.exams.joinpath(".tum-exam-scripts-manifest.json").write_text("{")
+        self.assertEqual(Manifest(self.exams).entries, {})
+
+
+class ManifestCommandTest(TestCase):
+    """
+    Manifest Command Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.exams = join(self.tmp.name, "exams")
+        copytree(join("tests", "rsc", "exams"), self.exams)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_check(self):
+        runner = CliRunner()
+        result = runner.invoke(app, ["manifest", self.exams])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("hashes of 2 booklets", result.stdout)
+        result = runner.invoke(app, ["manifest", "--check", self.exams])
+        self.assertEqual(result.exit_code, 0, result.output)
+        write_pdf(Path(self.exams, "E0002-book.pdf"), 5)
+        result = runner.invoke(app, ["manifest", "--check", self.exams])
+        self.assertEqual(result.exit_code, 1, result.output)
+        self.assertIn("E0002-book.pdf changed.", result.stdout)
+
+    def test_duplicates(self):
+        copy(join(self.exams, "E0001-book.pdf"), join(self.exams, "E0003-book.pdf"))
+        result = CliRunner().invoke(app, ["manifest", self.exams])
+        self.assertEqual(result.exit_code, 1, result.output)
+        self.assertIn("are identical", result.output)
+
+    def _send(self, stub: IppStub):
+        return CliRunner().invoke(
+            app,
+            [
+                "send-all-booklets",
+                "--backend",
+                "ipp",
+                "--ipp-uri",
+                stub.uri,
+                "--manifest",
+                self.exams,
+            ],
+        )
+
+    @mock.patch("typer.confirm")
+    def test_send_changed(self, mock_typer):
+        mock_typer.return_value = True
+        copy(join(self.exams, "E0001-book.pdf"), join(self.exams, "E0003-book.pdf"))
+        with IppStub() as stub:
+            result = self._send(stub)
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn("skip 1", result.stdout)
+            self.assertEqual(len(stub.jobs), 2)
+            result = self._send(stub)
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertEqual(len(stub.jobs), 2)
+            write_pdf(Path(self.exams, "E0002-book.pdf"), 5)
+            result = self._send(stub)
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertIn("E0002-book.pdf changed", result.stdout)
+            self.assertEqual(len(stub.jobs), 3)
+
+
+if __name__ == "__main__":
+    main()
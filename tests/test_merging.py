@@ -0,0 +1,230 @@
+"""
+Test.
+"""
+from os.path import join
+from pathlib import Path
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main, mock
+
+from tests.ipp_stub import IppStub
+from tests.test_pdf_reader import write_pdf
+from tum_exam_scripts.logic.backends import BOOKLET_OPTIONS, PrintOptions
+from tum_exam_scripts.logic.journal import SubmissionJournal
+from tum_exam_scripts.logic.merging import (
+    BookletMerger,
+    sheet_pages,
+    supports_pages_per_set,
+)
+from tum_exam_scripts.logic.spool import SpoolArea
+from tum_exam_scripts.logic.submission import SubmissionResult
+from tum_exam_scripts.pdf_commands import app
+from tum_exam_scripts.utils.pdf_merge import merge_pdfs
+from tum_exam_scripts.utils.pdf_objects import Name, Stream
+from tum_exam_scripts.utils.pdf_reader import PdfDocument, verify_structure
+from tum_exam_scripts.utils.pdf_writer import PdfWriter
+from typer.testing import CliRunner
+
+
+def _write_inheriting_pdf(pdf_file: Path) -> None:
+    """
+    A PDF whose page inherits the media box and the resources from the page tree.
+    """
+    with pdf_file.open("wb") as fout:
+        writer = PdfWriter(fout, xref_stream=True)
+        catalog, tree = writer.allocate(), writer.allocate()
+        font = writer.write({"Type": Name("Font"), "BaseFont": Name("Helvetica")})
+        content = writer.write(Stream({}, b"BT /F1 12 Tf (Inherited) Tj ET"))
+        page = writer.write({"Type": Name("Page"), "Parent": tree, "Contents": content})
+        writer.write(
+            {
+                "Type": Name("Pages"),
+                "Kids": [page],
+                "Count": 1,
+                "MediaBox": [0, 0, 1191, 842],
+                "Resources": {"Font": {"F1": font}},
+            },
+            tree,
+        )
+        writer.write({"Type": Name("Catalog"), "Pages": tree}, catalog)
+        writer.finish(catalog)
+
+
+class PdfMergeTest(TestCase):
+    """
+    PDF Merge Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_merge_with_fresh_sheets(self):
+        pdf_files = []
+        for name, pages in (("a.pdf", 3), ("b.pdf", 4), ("c.pdf", 1)):
+            pdf_files.append(self.directory.joinpath(name))
+            write_pdf(pdf_files[-1], pages)
+        merged = self.directory.joinpath("merged.pdf")
+        self.assertEqual(merge_pdfs(pdf_files, merged, 2), [4, 4, 2])
+        report = verify_structure(merged)
+        self.assertTrue(report.valid, report.problems)
+        self.assertEqual(report.pages, 10)
+        with PdfDocument.open(merged) as document:
+            texts = [
+                document.resolve(page["Contents"]).raw() if "Contents" in page else None
+                for _, page in document.iter_pages()
+            ]
+        self.assertEqual(
+            texts,
+            [
+                b"BT /F1 12 Tf (Page 0) Tj ET",
+                b"BT /F1 12 Tf (Page 1) Tj ET",
+                b"BT /F1 12 Tf (Page 2) Tj ET",
+                None,
+                b"BT /F1 12 Tf (Page 0) Tj ET",
+                b"BT /F1 12 Tf (Page 1) Tj ET",
+                b"BT /F1 12 Tf (Page 2) Tj ET",
+                b"BT /F1 12 Tf (Page 3) Tj ET",
+                b"BT /F1 12 Tf (Page 0) Tj ET",
+                None,
+            ],
+        )
+
+    def test_inherited_attributes(self):
+        source = self.directory.joinpath("inheriting.pdf")
+        _write_inheriting_pdf(source)
+        merged = self.directory.joinpath("merged.pdf")
+        merge_pdfs([source, source], merged)
+        with PdfDocument.open(merged) as document:
+            pages = [page for _, page in document.iter_pages()]
+            self.assertEqual(len(pages), 2)
+            for page in pages:
+                self.assertEqual(page["MediaBox"], [0, 0, 1191, 842])
+                resources = document.resolve(page["Resources"])
+                font = document.resolve(resources["Font"]["F1"])
+                self.assertEqual(font["BaseFont"], "Helvetica")
+
+    def test_object_streams(self):
+        source = Path("tests", "rsc", "exams_broken", "E0001-book.pdf")
+        merged = self.directory.joinpath("merged.pdf")
+        self.assertEqual(merge_pdfs([source, source], merged, 2), [2, 2])
+        self.assertEqual(verify_structure(merged).pages, 4)
+
+
+class BookletMergerTest(TestCase):
+    """
+    Booklet Merger Test
+    """
+
+    def test_sheet_pages(self):
+        self.assertEqual(sheet_pages(BOOKLET_OPTIONS), 2)
+        self.assertEqual(sheet_pages(PrintOptions(("Duplex=None",))), 1)
+        self.assertEqual(sheet_pages(PrintOptions(())), 1)
+
+    def test_groups(self):
+        merger = BookletMerger(3, BOOKLET_OPTIONS, SpoolArea(Path(".")))
+        files = [Path(f"E{i:04}-book.pdf") for i in range(1, 9)]
+        # 11 and 12 pages need the same number of sheets
+        counts = [12, 11, 12, 12, 16, None, 12, 12]
+        groups = merger.groups(files, dict(zip(files, counts)), lambda f: "followmeppd")
+        self.assertEqual(
+            [[f.name[:5] for f in g] for g in groups],
+            [
+                ["E0001", "E0002", "E0003"],
+                ["E0004"],
+                ["E0005"],
+                ["E0006"],
+                ["E0007", "E0008"],
+            ],
+        )
+
+    def test_groups_per_queue(self):
+        merger = BookletMerger(4, BOOKLET_OPTIONS, SpoolArea(Path(".")))
+        files = [Path(f"E{i:04}-book.pdf") for i in range(1, 5)]
+        queues = dict(zip(files, ["a", "a", "b", "b"]))
+        groups = merger.groups(files, dict.fromkeys(files, 4), queues.__getitem__)
+        self.assertEqual([len(g) for g in groups], [2, 2])
+
+    def test_expand(self):
+        with TemporaryDirectory() as tmp:
+            spool = SpoolArea(Path(tmp))
+            merger = BookletMerger(2, BOOKLET_OPTIONS, spool)
+            booklets = [
+                Path("tests", "rsc", "exams", f"E000{i}-book.pdf") for i in (1, 2)
+            ]
+            merged, pages = merger.merge(booklets)
+            self.assertEqual(pages, 2)
+            results = spool.expand(
+                SubmissionResult(merged, "followmeppd", "followmeppd-7", 1)
+            )
+            self.assertEqual([r.pdf_file for r in results], booklets)
+            self.assertEqual({r.job_id for r in results}, {"followmeppd-7"})
+            spool.release(merged)
+            self.assertFalse(merged.exists())
+
+    def test_supports_pages_per_set(self):
+        with IppStub() as stub:
+            self.assertFalse(supports_pages_per_set("followmeppd", stub.uri))
+            stub.pages_per_set = True
+            self.assertTrue(supports_pages_per_set("followmeppd", stub.uri))
+        self.assertFalse(supports_pages_per_set("followmeppd", stub.uri))
+
+
+class MergeCommandTest(TestCase):
+    """
+    Merge Command Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.exams = join(self.tmp.name, "exams")
+        copytree(join("tests", "rsc", "exams"), self.exams)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _invoke(self, stub: IppStub):
+        return CliRunner().invoke(
+            app,
+            [
+                "send-all-booklets",
+                "--backend",
+                "ipp",
+                "--ipp-uri",
+                stub.uri,
+                "--merge",
+                "2",
+                self.exams,
+            ],
+        )
+
+    @mock.patch("typer.confirm")
+    def test_merged_job(self, mock_typer):
+        mock_typer.return_value = True
+        with IppStub() as stub:
+            stub.pages_per_set = True
+            result = self._invoke(stub)
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(stub.jobs), 1)
+        self.assertEqual(stub.jobs[0].job["job-pages-per-set"], (2,))
+        self.assertEqual(stub.jobs[0].job["XRFold"], ("BiFoldStaple",))
+        entries = SubmissionJournal(Path(self.exams)).load()
+        self.assertEqual({e.job_id for e in entries.values()}, {"followmeppd-1"})
+        self.assertEqual(len(entries), 2)
+
+    @mock.patch("typer.confirm")
+    def test_fallback_without_pages_per_set(self, mock_typer):
+        mock_typer.return_value = True
+        with IppStub() as stub:
+            result = self._invoke(stub)
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("cannot staple every booklet", result.stdout)
+        self.assertEqual(len(stub.jobs), 2)
+        self.assertNotIn("job-pages-per-set", stub.jobs[0].job)
+
+
+if __name__ == "__main__":
+    main()
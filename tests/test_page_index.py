@@ -0,0 +1,130 @@
+"""
+Test.
+"""
+from pathlib import Path
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from typing import Dict, List, Optional
+from unittest import TestCase, main, mock
+
+from tests.ipp_stub import IppStub
+from tum_exam_scripts.logic.backends import IppBackend
+from tum_exam_scripts.logic.events import BookletValidated, PrintEvent, StageStarted
+from tum_exam_scripts.logic.page_index import (
+    PAGE_INDEX_FILE_NAME,
+    PageCounter,
+    count_pages,
+)
+from tum_exam_scripts.logic.pdf_printing import print_pdf_files
+from tum_exam_scripts.logic.validation import validate_pipelined
+from tum_exam_scripts.utils.pdf_reader import fast_page_count
+
+
+class PageIndexTest(TestCase):
+    """
+    Page Index Test
+    """
+
+    def setUp(self) -> None:
+        self._temporary_directory = TemporaryDirectory()
+        self.directory = Path(self._temporary_directory.name, "exams_broken")
+        copytree(Path("tests", "rsc", "exams_broken"), self.directory)
+        self.pdf_files = sorted(self.directory.glob("*-book.pdf"))
+
+    def tearDown(self) -> None:
+        self._temporary_directory.cleanup()
+
+    def test_count_pages(self):
+        self.assertEqual(count_pages(self.pdf_files, 2), [1, 1, None])
+        self.assertTrue(self.directory.joinpath(PAGE_INDEX_FILE_NAME).exists())
+
+    def test_index_is_used(self):
+        count_pages(self.pdf_files)
+        with mock.patch(
+            "tum_exam_scripts.logic.page_index.fast_page_count"
+        ) as fast_count:
+            fast_count.return_value = 7
+            pages = count_pages(self.pdf_files)
+        # Only the broken booklet is not in the index.
+        self.assertEqual(pages, [1, 1, 7])
+        fast_count.assert_called_once_with(self.pdf_files[2])
+
+    def test_changed_booklet_is_counted_again(self):
+        count_pages(self.pdf_files)
+        self.pdf_files[0].write_bytes(self.pdf_files[0].read_bytes() + b"\n")
+        with mock.patch(
+            "tum_exam_scripts.logic.page_index.fast_page_count"
+        ) as fast_count:
+            fast_count.return_value = 3
+            self.assertEqual(count_pages(self.pdf_files[:2]), [3, 1])
+
+    def test_count_while_validating(self):
+        counter = PageCounter()
+        results = list(validate_pipelined(self.pdf_files, 2, count=counter.count))
+        # We do not count the pages of invalid booklets.
+        self.assertEqual([r.pages for r in results], [1, 1, None])
+        counter.save()
+        with mock.patch(
+            "tum_exam_scripts.logic.page_index.fast_page_count"
+        ) as fast_count:
+            self.assertEqual(count_pages(self.pdf_files[:2]), [1, 1])
+        fast_count.assert_not_called()
+
+    def test_failed_count_does_not_stop_the_run(self):
+        with mock.patch(
+            "tum_exam_scripts.logic.page_index.fast_page_count"
+        ) as fast_count, IppStub() as ipp, IppBackend(ipp.uri) as backend:
+            fast_count.side_effect = TypeError("unsupported operand type(s)")
+            report = print_pdf_files("followmeppd", self.pdf_files, backend=backend)
+        self.assertEqual(len(report.sent), 2)
+        results = list(
+            validate_pipelined(self.pdf_files, 2, count=mock.Mock(side_effect=OSError))
+        )
+        self.assertEqual([r.valid for r in results], [True, True, False])
+        self.assertEqual([r.pages for r in results], [None, None, None])
+
+    def test_print_run_does_not_count_up_front(self):
+        events: List[PrintEvent] = []
+        with mock.patch(
+            "tum_exam_scripts.logic.page_index.count_pages"
+        ) as up_front, IppStub() as ipp, IppBackend(ipp.uri) as backend:
+            report = print_pdf_files(
+                "followmeppd", self.pdf_files, backend=backend, listener=events.append
+            )
+        up_front.assert_not_called()
+        self.assertEqual(len(report.sent), 2)
+        self.assertEqual(
+            [e.result.pages for e in events if isinstance(e, BookletValidated)],
+            [1, 1, None],
+        )
+
+    def test_progress_starts_with_the_index(self):
+        count_pages(self.pdf_files)
+        totals: List[Dict[Path, Optional[int]]] = []
+
+        def _listener(event: PrintEvent) -> None:
+            if isinstance(event, StageStarted):
+                totals.append(dict(event.pages or {}))
+
+        with IppStub() as ipp, IppBackend(ipp.uri) as backend:
+            print_pdf_files(
+                "followmeppd", self.pdf_files, backend=backend, listener=_listener
+            )
+        self.assertEqual(totals[0], {self.pdf_files[0]: 1, self.pdf_files[1]: 1})
+
+    def test_broken_index_is_ignored(self):
+        self.directory.joinpath(PAGE_INDEX_FILE_NAME).write_text("{")
+        self.assertEqual(count_pages(self.pdf_files), [1, 1, None])
+
+    def test_scan_without_xref(self):
+        pdf_file = self.directory.joinpath("E0004-book.pdf")
+        pdf_file.write_bytes(
+            b"%PDF-1.4\n1 0 obj << /Type /Page >> endobj\n"
+            b"2 0 obj << /Type/Page/Parent 3 0 R >> endobj\n"
+            b"3 0 obj << /Type /Pages /Count 2 >> endobj\n%%EOF\n"
+        )
+        self.assertEqual(fast_page_count(pdf_file), 2)
+
+
+if __name__ == "__main__":
+    main()
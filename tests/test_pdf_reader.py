@@ -0,0 +1,149 @@
+"""
+Test.
+"""
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from tum_exam_scripts.enums import ValidationLevel
+from tum_exam_scripts.logic.validation import is_full_pdf, validate_pipelined
+from tum_exam_scripts.utils.pdf_objects import Name, Parser, Ref, Stream, serialize
+from tum_exam_scripts.utils.pdf_reader import (
+    PdfDocument,
+    fast_page_count,
+    page_count,
+    verify_structure,
+)
+from tum_exam_scripts.utils.pdf_writer import PdfWriter
+
+_EXAMS_BROKEN = Path("tests", "rsc", "exams_broken")
+
+
+def write_pdf(
+    pdf_file: Path, pages: int, xref_stream: bool = False, declared: int = -1
+) -> None:
+    with pdf_file.open("wb") as fout:
+        writer = PdfWriter(fout, xref_stream=xref_stream)
+        catalog, tree = writer.allocate(), writer.allocate()
+        kids = []
+        for i in range(pages):
+            content = writer.write(Stream({}, b"BT /F1 12 Tf (Page %d) Tj ET" % i))
+            kids.append(
+                writer.write(
+                    {
+                        "Type": Name("Page"),
+                        "Parent": tree,
+                        "MediaBox": [0, 0, 595, 842],
+                        "Contents": content,
+                    }
+                )
+            )
+        writer.write(
+            {
+                "Type": Name("Pages"),
+                "Kids": kids,
+                "Count": pages if declared < 0 else declared,
+            },
+            tree,
+        )
+        writer.write({"Type": Name("Catalog"), "Pages": tree}, catalog)
+        writer.finish(catalog)
+
+
+class PdfObjectsTest(TestCase):
+    """
+    PDF Objects Test
+    """
+
+    def test_parse(self):
+        value, _ = Parser(
+            b"<< /A#20B (x\\(y\\)\\101) /C [1 -2.5 <414> 3 0 R true null] >>"
+        ).parse(0)
+        self.assertEqual(
+            value, {"A B": b"x(y)A", "C": [1, -2.5, b"A@", Ref(3), True, None]}
+        )
+
+    def test_serialize_roundtrip(self):
+        value = {"Name": Name("A B"), "List": [1, 2.5, b"(a)\\", Ref(7, 1), False]}
+        self.assertEqual(Parser(serialize(value)).parse(0)[0], value)
+
+
+class PdfReaderTest(TestCase):
+    """
+    PDF Reader Test
+    """
+
+    def setUp(self) -> None:
+        self._temporary_directory = TemporaryDirectory()
+        self.directory = Path(self._temporary_directory.name)
+
+    def tearDown(self) -> None:
+        self._temporary_directory.cleanup()
+
+    def test_fixtures_with_object_streams(self):
+        report = verify_structure(_EXAMS_BROKEN.joinpath("E0001-book.pdf"))
+        self.assertTrue(report.valid)
+        self.assertEqual(report.pages, 1)
+        self.assertFalse(
+            verify_structure(_EXAMS_BROKEN.joinpath("E0003-book.pdf")).valid
+        )
+
+    def test_xref_table_and_stream(self):
+        for xref_stream in (False, True):
+            pdf_file = self.directory.joinpath(f"{xref_stream}.pdf")
+            write_pdf(pdf_file, 12, xref_stream)
+            self.assertEqual(page_count(pdf_file), 12)
+            self.assertTrue(verify_structure(pdf_file).valid)
+
+    def test_truncated_but_padded(self):
+        pdf_file = self.directory.joinpath("E0001-book.pdf")
+        data = _EXAMS_BROKEN.joinpath("E0001-book.pdf").read_bytes()
+        pdf_file.write_bytes(data[: len(data) // 2] + bytes(len(data) // 2))
+        self.assertTrue(is_full_pdf(pdf_file))
+        self.assertFalse(verify_structure(pdf_file).valid)
+
+    def test_corrupted_xref(self):
+        pdf_file = self.directory.joinpath("E0001-book.pdf")
+        write_pdf(pdf_file, 3)
+        with PdfDocument.open(pdf_file) as document:
+            offset = document.xref[4].first
+        data = pdf_file.read_bytes()
+        pdf_file.write_bytes(
+            data.replace(b"%010d 00000 n" % offset, b"%010d 00000 n" % (offset + 3))
+        )
+        report = verify_structure(pdf_file)
+        self.assertEqual(report.problems, ["the xref entry of object 4 is wrong"])
+
+    def test_wrong_page_count(self):
+        pdf_file = self.directory.joinpath("E0001-book.pdf")
+        write_pdf(pdf_file, 3, declared=4)
+        self.assertEqual(
+            verify_structure(pdf_file).problems,
+            ["the page tree declares 4 pages but has 3"],
+        )
+
+    def test_malformed_xref_stream(self):
+        pdf_file = self.directory.joinpath("E0001-book.pdf")
+        write_pdf(pdf_file, 2, xref_stream=True)
+        data = pdf_file.read_bytes()
+        self.assertIn(b"/Size 8", data)
+        pdf_file.write_bytes(data.replace(b"/Size 8", b"/Size /X"))
+        self.assertEqual(
+            verify_structure(pdf_file).problems, ["Invalid /Index in the xref stream"]
+        )
+        self.assertEqual(fast_page_count(pdf_file), 2)
+
+    def test_structure_level_in_pipeline(self):
+        self.test_truncated_but_padded()
+        pdf_files = sorted(_EXAMS_BROKEN.glob("*-book.pdf")) + [
+            self.directory.joinpath("E0001-book.pdf")
+        ]
+        results = list(
+            validate_pipelined(pdf_files, workers=2, level=ValidationLevel.STRUCTURE)
+        )
+        self.assertEqual([r.valid for r in results], [True, True, False, False])
+        self.assertIsNotNone(results[-1].problem)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Test.
+"""
+from os.path import join
+from pathlib import Path
+from shutil import copy, copytree
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main, mock
+
+from tum_exam_scripts.logic.backends import (
+    BOOKLET_OPTIONS,
+    SEAT_PLAN_OPTIONS,
+    job_attributes,
+    lp_arguments,
+)
+from tum_exam_scripts.logic.profiles import (
+    BUILTIN_PROFILES,
+    ProfileError,
+    find_documents,
+    load_profiles,
+)
+from tum_exam_scripts.pdf_commands import app
+from typer.testing import CliRunner
+
+_BOOKLET = join("tests", "rsc", "exams", "E0001-book.pdf")
+
+
+class ProfilesTest(TestCase):
+    """
+    Profiles Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+        self.profiles_file = self.directory.joinpath("profiles.toml")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_builtin(self):
+        self.assertEqual(
+            list(BUILTIN_PROFILES),
+            ["seat-plan", "room-plan", "attendee-list", "booklet"],
+        )
+        self.assertEqual(BUILTIN_PROFILES["booklet"].options, BOOKLET_OPTIONS)
+        self.assertEqual(BUILTIN_PROFILES["seat-plan"].options.copies, 3)
+
+    def test_profiles_file(self):
+        self.profiles_file.write_text(
+            "[profiles.seat-plan]\n"
+            "copies = 5\n"
+            "[profiles.booklet-a4]\n"
+            'extends = "booklet"\n'
+            'options = ["PageSize=A4", "Staple=True"]\n'
+            'patterns = ["*-book-a4.pdf"]\n'
+        )
+        profiles = load_profiles(self.profiles_file)
+        self.assertEqual(profiles["seat-plan"].options.copies, 5)
+        self.assertEqual(
+            profiles["seat-plan"].options.options, SEAT_PLAN_OPTIONS.options
+        )
+        a4 = profiles["booklet-a4"].options.options
+        self.assertEqual(a4[0], "PageSize=A4")
+        self.assertEqual(a4[1:-1], BOOKLET_OPTIONS.options[1:])
+        self.assertEqual(a4[-1], "Staple=True")
+        self.assertEqual(list(profiles)[-1], "booklet-a4")
+
+    def test_broken_profiles_file(self):
+        for content in (
+            "[profiles.x]\ncolor = true\n",
+            '[profiles.x]\nextends = "unknown"\n',
+            "[profiles.seat-plan]\ncopies = 0\n",
+            '[profiles.seat-plan]\noptions = "PageSize=A4"\n',
+            "[profiles.seat-plan\n",
+        ):
+            self.profiles_file.write_text(content)
+            with self.assertRaises(ProfileError, msg=content):
+                load_profiles(self.profiles_file)
+
+    def test_templates_are_compiled_once(self):
+        options = BOOKLET_OPTIONS._replace(copies=2)
+        self.assertIs(lp_arguments(options), lp_arguments(options))
+        self.assertEqual(lp_arguments(options)[:2], ("-n", "2"))
+        self.assertIs(job_attributes(options), job_attributes(options))
+
+    def test_find_documents(self):
+        lists = self.directory.joinpath("endterm_lists")
+        lists.mkdir()
+        for name in ("E0010-book.pdf", "E0002-book.pdf", "notes.pdf"):
+            self.directory.joinpath(name).touch()
+        for name in ("seatplan-a3.pdf", "roomplan.pdf", "attendeelist.pdf"):
+            lists.joinpath(name).touch()
+        documents = find_documents(
+            self.directory, BUILTIN_PROFILES, ["booklet", "seat-plan"]
+        )
+        self.assertEqual(
+            {k: [p.name for p in v] for k, v in documents.items()},
+            {
+                "booklet": ["E0002-book.pdf", "E0010-book.pdf"],
+                "seat-plan": ["seatplan-a3.pdf"],
+            },
+        )
+
+
+class PrintAllTest(TestCase):
+    """
+    Print All Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.export = join(self.tmp.name, "export")
+        copytree(join("tests", "rsc", "exams"), self.export)
+        lists = Path(self.export, "endterm_lists")
+        lists.mkdir()
+        for name in ("seatplan-a3.pdf", "roomplan.pdf", "attendeelist.pdf"):
+            copy(_BOOKLET, lists.joinpath(name))
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    @staticmethod
+    def _jobs(mock_check_output):
+        return [
+            (Path(c.args[0][-1]).name, c.args[0][2:4])
+            for c in mock_check_output.call_args_list
+        ]
+
+    @mock.patch("typer.confirm")
+    @mock.patch("subprocess.check_output")
+    def test_print_all(self, mock_check_output, mock_typer):
+        mock_typer.return_value = True
+        mock_check_output.return_value = b""
+        profiles_file = Path(self.tmp.name, "profiles.toml")
+        profiles_file.write_text("[profiles.room-plan]\ncopies = 5\n")
+
+        result = CliRunner().invoke(
+            app, ["print-all", "-j", "1", "--profiles", str(profiles_file), self.export]
+        )
+        self.assertEqual(result.exit_code, 0, result.stdout)
+        mock_typer.assert_called_once()
+        self.assertIn("booklet            2 documents, 1 copy each", result.stdout)
+        self.assertIn("room-plan          1 documents, 5 copies each", result.stdout)
+        self.assertEqual(
+            self._jobs(mock_check_output),
+            [
+                ("seatplan-a3.pdf", ["-n", "3"]),
+                ("roomplan.pdf", ["-n", "5"]),
+                ("attendeelist.pdf", ["-o", "PageSize=A4"]),
+                ("E0001-book.pdf", ["-o", "PageSize=A3"]),
+                ("E0002-book.pdf", ["-o", "PageSize=A3"]),
+            ],
+        )
+
+    @mock.patch("typer.confirm")
+    @mock.patch("subprocess.check_output")
+    def test_only_and_unknown_profile(self, mock_check_output, mock_typer):
+        mock_typer.return_value = True
+        mock_check_output.return_value = b""
+        result = CliRunner().invoke(
+            app, ["print-all", "--only", "seat-plan", self.export]
+        )
+        self.assertEqual(result.exit_code, 0, result.stdout)
+        self.assertEqual(
+            self._jobs(mock_check_output), [("seatplan-a3.pdf", ["-n", "3"])]
+        )
+        result = CliRunner().invoke(app, ["print-all", "--only", "poster", self.export])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("There is no profile poster", result.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Test.
+"""
+from os.path import join
+from pathlib import Path
+from re import fullmatch
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from unittest import TestCase, main
+
+from tum_exam_scripts.main import app
+from tum_exam_scripts.utils.profiling import Profiler
+from typer.testing import CliRunner
+
+
+def _busy(seconds: float) -> int:
+    end = perf_counter() + seconds
+    count = 0
+    while perf_counter() < end:
+        count += 1
+    return count
+
+
+class ProfilerTest(TestCase):
+    """
+    Profiler Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_report_and_stacks(self):
+        profiler = Profiler(Path(self.tmp.name), interval=0.001)
+        profiler.start()
+        _busy(0.1)
+        report_file, stacks_file = profiler.stop()
+        report = report_file.read_text()
+        self.assertIn("function calls", report)
+        self.assertIn("_busy", report)
+        self.assertNotIn("Peak memory", report)
+        lines = stacks_file.read_text().splitlines()
+        for line in lines:
+            self.assertIsNotNone(fullmatch(r"\S.* \d+", line), line)
+        self.assertTrue(
+            any(
+                l.startswith("MainThread;") and "_busy (test_profiling.py" in l
+                for l in lines
+            )
+        )
+        self.assertFalse(any(l.startswith("profiler;") for l in lines))
+
+    def test_memory(self):
+        profiler = Profiler(Path(self.tmp.name), memory=True)
+        profiler.start()
+        data = [bytearray(1024) for _ in range(1024)]
+        report_file, _ = profiler.stop()
+        self.assertEqual(len(data), 1024)
+        report = report_file.read_text()
+        self.assertIn("Peak memory", report)
+        self.assertIn("test_profiling.py", report.split("Peak memory")[1])
+
+    def test_command(self):
+        exams = join(self.tmp.name, "exams")
+        copytree(join("tests", "rsc", "exams"), exams)
+        logs = Path(self.tmp.name, "logs")
+        result = CliRunner(mix_stderr=False).invoke(
+            app,
+            [
+                "--log-file",
+                str(logs.joinpath("log.jsonl")),
+                "--profile",
+                "pdf",
+                "manifest",
+                exams,
+            ],
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("We wrote the profile to", result.stderr)
+        self.assertEqual(
+            sorted(p.suffix for p in logs.glob("tum-exam-scripts-profile-*")),
+            [".collapsed", ".txt"],
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Test.
+"""
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Dict, Optional
+from unittest import TestCase, main
+
+from tum_exam_scripts.logic.progress import PageProgress
+
+
+class PageProgressTest(TestCase):
+    """
+    Page Progress Test
+    """
+
+    def setUp(self) -> None:
+        self._temporary_directory = TemporaryDirectory()
+        directory = Path(self._temporary_directory.name)
+        self.pdf_files = [directory.joinpath(f"E000{i}-book.pdf") for i in range(3)]
+        for pdf_file, size in zip(self.pdf_files, (1000, 1000, 2000)):
+            pdf_file.write_bytes(bytes(size))
+
+    def tearDown(self) -> None:
+        self._temporary_directory.cleanup()
+
+    def test_total_is_estimated_from_the_sizes(self):
+        pages: Dict[Path, Optional[int]] = {}
+        with PageProgress("Submission", self.pdf_files, pages) as progress:
+            self.assertIsNone(progress._bar.total)
+            pages[self.pdf_files[0]] = 4
+            progress.counted(self.pdf_files[0], 4)
+            self.assertEqual(progress._bar.total, 16)
+            pages[self.pdf_files[1]] = 6
+            progress.update(self.pdf_files[1])
+            self.assertEqual(progress._bar.total, 20)
+            pages[self.pdf_files[2]] = 10
+            progress.counted(self.pdf_files[2], 10)
+            self.assertEqual(progress._bar.total, 20)
+
+    def test_total_of_known_pages(self):
+        pages: Dict[Path, Optional[int]] = {f: 3 for f in self.pdf_files}
+        with PageProgress("Submission", self.pdf_files, pages) as progress:
+            self.assertEqual(progress._bar.total, 9)
+
+    def test_invalid_booklet_adds_no_pages(self):
+        pages: Dict[Path, Optional[int]] = {self.pdf_files[0]: 4}
+        with PageProgress("Submission", self.pdf_files[:2], pages) as progress:
+            self.assertEqual(progress._bar.total, 8)
+            progress.update(self.pdf_files[1])
+            self.assertEqual(progress._bar.total, 4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Test.
+"""
+from os.path import join
+from pathlib import Path
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main, mock
+
+from tum_exam_scripts.logic.scheduling import (
+    assignment,
+    describe_plan,
+    interleave,
+    plan_queues,
+)
+from tum_exam_scripts.pdf_commands import app
+from typer.testing import CliRunner
+
+
+class SchedulingTest(TestCase):
+    """
+    Scheduling Test
+    """
+
+    def setUp(self) -> None:
+        self.pdf_files = [Path(f"E{i:04}-book.pdf") for i in range(6)]
+
+    def test_longest_processing_time_first(self):
+        plans = plan_queues(self.pdf_files, [10, 9, 8, 7, 6, 5], ["a", "b"])
+        self.assertEqual([p.pages for p in plans], [23, 22])
+        self.assertEqual(
+            [p.booklets for p in plans],
+            [
+                [self.pdf_files[0], self.pdf_files[3], self.pdf_files[4]],
+                [self.pdf_files[1], self.pdf_files[2], self.pdf_files[5]],
+            ],
+        )
+
+    def test_unknown_pages_are_spread(self):
+        plans = plan_queues(self.pdf_files, [None] * 6, ["a", "b", "c"])
+        self.assertEqual([len(p.booklets) for p in plans], [2, 2, 2])
+
+    def test_interleave(self):
+        plans = plan_queues(self.pdf_files[:5], [1] * 5, ["a", "b"])
+        self.assertEqual(
+            interleave(plans),
+            [self.pdf_files[i] for i in (0, 1, 2, 3, 4)],
+        )
+        self.assertEqual(assignment(plans)[self.pdf_files[3]], "b")
+
+    def test_describe_plan(self):
+        plans = plan_queues(self.pdf_files, [60, 60, 60, 60, 60, 60], ["a", "bb"])
+        self.assertEqual(
+            describe_plan(plans, 60.0),
+            [
+                "a       3 booklets      180 pages  ~0h03m",
+                "bb      3 booklets      180 pages  ~0h03m",
+                "All printers should be done in about 0h03m.",
+            ],
+        )
+
+
+class SendAllSchedulingTest(TestCase):
+    """
+    Send All Scheduling Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.exams = join(self.tmp.name, "exams")
+        copytree(join("tests", "rsc", "exams"), self.exams)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    @mock.patch("typer.confirm")
+    @mock.patch("subprocess.check_output")
+    def test_send_all_to_two_printers(self, mock_check_output, mock_typer):
+        mock_typer.return_value = True
+        mock_check_output.return_value = b""
+
+        result = CliRunner().invoke(
+            app,
+            ["send-all-booklets", "-d", "left", "-d", "right", self.exams],
+        )
+        self.assertEqual(result.exit_code, 0, result.stdout)
+        self.assertIn("left       1 booklets        1 pages  ~0h00m", result.stdout)
+        queues = sorted(c.args[0][1] for c in mock_check_output.call_args_list)
+        self.assertEqual(queues, ["-dleft", "-dright"])
+
+    @mock.patch("typer.confirm")
+    def test_batch_size_with_two_printers(self, mock_typer):
+        mock_typer.return_value = True
+
+        result = CliRunner().invoke(
+            app,
+            ["send-all-booklets", "-d", "left", "-d", "right", "-b", "5", self.exams],
+        )
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn(
+            "You cannot use a batch size with several drivers!", result.stdout
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,9 @@
 Test.
 """
 from os.path import join
+from shutil import copytree
+from subprocess import CalledProcessError
+from tempfile import TemporaryDirectory
 from unittest import TestCase, main, mock
 
 from tum_exam_scripts.pdf_commands import app
@@ -17,19 +20,75 @@ class SendAllTest(TestCase):
     def setUpClass(cls) -> None:
         cls.runner = CliRunner()
 
+    def setUp(self) -> None:
+        # The commands write into the exam directory, so we work on a copy.
+        self.tmp = TemporaryDirectory()
+        self.rsc = join(self.tmp.name, "rsc")
+        copytree(join("tests", "rsc"), self.rsc)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
     @mock.patch("typer.confirm")
-    def test_send_all_broken_pdf(self, mock_typer):
+    @mock.patch("subprocess.check_output")
+    def test_send_all_broken_pdf(self, mock_check_output, mock_typer):
         mock_typer.return_value = True
+        mock_check_output.return_value = b""
 
         result = self.runner.invoke(
             app,
             [
                 "send-all-booklets",
-                join("tests", "rsc", "exams_broken"),
+                join(self.rsc, "exams_broken"),
             ],
         )
         self.assertEqual(result.exit_code, 1)
         self.assertIn("0003-book.pdf is not a valid PDF", result.stdout)
+        self.assertIn("We did not send 1 booklets", result.stdout)
+        self.assertEqual(mock_check_output.call_count, 2)
+        self.assertNotIn("Done!", result.stdout)
+
+    @mock.patch("typer.confirm")
+    @mock.patch("subprocess.check_output")
+    def test_send_all_broken_pdf_strict(self, mock_check_output, mock_typer):
+        mock_typer.return_value = True
+
+        result = self.runner.invoke(
+            app,
+            [
+                "send-all-booklets",
+                "--strict",
+                join(self.rsc, "exams_broken"),
+            ],
+        )
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("0003-book.pdf is not a valid PDF", result.stdout)
+        mock_check_output.assert_not_called()
+
+    @mock.patch("typer.confirm")
+    @mock.patch("subprocess.check_output")
+    def test_send_all_truncated_pdf_structure(self, mock_check_output, mock_typer):
+        mock_typer.return_value = True
+        mock_check_output.return_value = b""
+        booklet = join(self.rsc, "exams", "E0002-book.pdf")
+        with open(booklet, "r+b") as fout:
+            size = fout.seek(0, 2)
+            fout.seek(size // 2)
+            fout.write(bytes(size - size // 2))
+
+        result = self.runner.invoke(
+            app,
+            [
+                "send-all-booklets",
+                "--no-cache",
+                "--validation-level",
+                "structure",
+                join(self.rsc, "exams"),
+            ],
+        )
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("0002-book.pdf is not a valid PDF: No startxref", result.stdout)
+        self.assertEqual(mock_check_output.call_count, 1)
 
     @mock.patch("typer.confirm")
     def test_send_all_empty_folder(self, mock_typer):
@@ -39,7 +98,7 @@ class SendAllTest(TestCase):
             app,
             [
                 "send-all-booklets",
-                join("tests", "rsc"),
+                join(self.rsc),
             ],
         )
         self.assertEqual(result.exit_code, 1)
@@ -53,27 +112,27 @@ class SendAllTest(TestCase):
             app,
             [
                 "send-all-booklets",
-                join("tests", "rsc", "exams"),
+                join(self.rsc, "exams"),
             ],
         )
         self.assertEqual(result.exit_code, 0)
         self.assertIn("Please enable printing first", result.stdout)
 
     @mock.patch("typer.confirm")
-    @mock.patch("subprocess.check_call")
+    @mock.patch("subprocess.check_output")
     def test_send_all(
         self,
-        mock_check_call,
+        mock_check_output,
         mock_typer,
     ):
         mock_typer.return_value = True
-        mock_check_call.return_value = 0
+        mock_check_output.return_value = b""
 
         result = self.runner.invoke(
             app,
             [
                 "send-all-booklets",
-                join("tests", "rsc", "exams"),
+                join(self.rsc, "exams"),
             ],
         )
         self.assertEqual(result.exit_code, 0)
@@ -81,27 +140,66 @@ class SendAllTest(TestCase):
         self.assertIn("Done!", result.stdout)
 
     @mock.patch("typer.confirm")
-    @mock.patch("subprocess.check_call")
+    @mock.patch("subprocess.check_output")
+    @mock.patch("tum_exam_scripts.logic.submission.sleep")
     def test_send_all_call_error(
         self,
-        mock_check_call,
+        mock_sleep,
+        mock_check_output,
         mock_typer,
     ):
         mock_typer.return_value = True
-        mock_check_call.return_value = 1
+        mock_check_output.side_effect = CalledProcessError(
+            1, "lp", b"lp: Unable to connect to server: Connection refused\n"
+        )
 
         result = self.runner.invoke(
             app,
             [
                 "send-all-booklets",
-                join("tests", "rsc", "exams"),
+                join(self.rsc, "exams"),
             ],
         )
         self.assertEqual(result.exit_code, 1)
         self.assertIn("We found 2 booklets.", result.stdout)
         self.assertIn("Something went wrong when sending", result.stdout)
         self.assertIn("E0001-book.pdf to the server", result.stdout)
+        self.assertIn("We could not send 2 of 2 booklets.", result.stdout)
         self.assertNotIn("Done!", result.stdout)
+        # Every booklet is tried once and retried three times.
+        self.assertEqual(mock_check_output.call_count, 8)
+        self.assertEqual(mock_sleep.call_count, 6)
+
+    @mock.patch("typer.confirm")
+    @mock.patch("subprocess.check_output")
+    def test_resume(self, mock_check_output, mock_typer):
+        mock_typer.return_value = True
+        mock_check_output.side_effect = [b""] + [CalledProcessError(1, "lp")] * 4
+
+        result = self.runner.invoke(
+            app,
+            ["send-all-booklets", "--retries", "0", join(self.rsc, "exams")],
+        )
+        self.assertEqual(result.exit_code, 1)
+        self.assertEqual(mock_check_output.call_count, 2)
+
+        mock_check_output.reset_mock(side_effect=True)
+        mock_check_output.return_value = b""
+        result = self.runner.invoke(
+            app,
+            ["send-all-booklets", "--resume", join(self.rsc, "exams")],
+        )
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("We skip 1 booklets that we already sent.", result.stdout)
+        mock_check_output.assert_called_once()
+
+        result = self.runner.invoke(
+            app,
+            ["send-all-booklets", "--resume", join(self.rsc, "exams")],
+        )
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("We skip 2 booklets that we already sent.", result.stdout)
+        mock_check_output.assert_called_once()
 
 
 if __name__ == "__main__":
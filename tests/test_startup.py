@@ -0,0 +1,80 @@
+"""
+Test.
+"""
+import subprocess
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+_HEAVY_MODULES = [
+    "helium",
+    "selenium",
+    "keyring",
+    "tqdm",
+    "sqlite3",
+    "pkg_resources",
+    "tum_exam_scripts.logic.pdf_printing",
+    "tum_exam_scripts.logic.backends",
+    "tum_exam_scripts.utils.pdf_reader",
+    "tum_exam_scripts.utils.profiling",
+    "cProfile",
+]
+
+_SCRIPT = """
+import sys
+from typer.testing import CliRunner
+from tum_exam_scripts.main import app
+result = CliRunner().invoke(app, sys.argv[1:])
+assert result.exit_code == 0, result.output
+print(" ".join(m for m in {modules!r} if m in sys.modules))
+"""
+
+_IMPORT_SCRIPT = """
+import sys
+import {module}
+print(" ".join(m for m in {modules!r} if m in sys.modules))
+"""
+
+
+class StartupTest(TestCase):
+    """
+    Startup Test
+    """
+
+    def _loaded_heavy_modules(self, *args: str) -> str:
+        return self._run(_SCRIPT.format(modules=_HEAVY_MODULES), *args)
+
+    def _run(self, script: str, *args: str) -> str:
+        with TemporaryDirectory() as directory:
+            output = subprocess.check_output(
+                [sys.executable, "-c", script, *args],
+                cwd=directory,
+                env={"PYTHONPATH": str(Path.cwd())},
+                text=True,
+            )
+            self.assertEqual(list(Path(directory).iterdir()), [])
+        return output.splitlines()[-1]
+
+    def test_version_is_cheap(self):
+        self.assertEqual(self._loaded_heavy_modules("--version"), "")
+
+    def test_help_is_cheap(self):
+        self.assertEqual(self._loaded_heavy_modules("pdf", "--help"), "")
+        self.assertEqual(
+            self._loaded_heavy_modules("pdf", "send-all-booklets", "--help"), ""
+        )
+        self.assertEqual(
+            self._loaded_heavy_modules("pdf", "send-attendee-list", "--help"), ""
+        )
+
+    def test_console_is_cheap(self):
+        # Every command imports the console, e.g., to report duplicates or to check the printing rights.
+        script = _IMPORT_SCRIPT.format(
+            module="tum_exam_scripts.console", modules=_HEAVY_MODULES
+        )
+        self.assertEqual(self._run(script), "")
+
+
+if __name__ == "__main__":
+    main()
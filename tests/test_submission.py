@@ -0,0 +1,122 @@
+"""
+Test.
+"""
+from pathlib import Path
+from threading import Lock
+from time import sleep
+from typing import Dict, Optional
+from unittest import TestCase, main, mock
+
+from tum_exam_scripts.logic.backends import (
+    BOOKLET_OPTIONS,
+    PrintOptions,
+    SubmissionBackend,
+    SubmissionError,
+)
+from tum_exam_scripts.logic.submission import RetryPolicy, SubmissionEngine
+
+
+class _FlakyBackend(SubmissionBackend):
+    """
+    Fails the first `failures` attempts per file and records the number of parallel jobs.
+    """
+
+    def __init__(self, failures: int = 0, transient: bool = True) -> None:
+        self.failures = failures
+        self.transient = transient
+        self.attempts: Dict[Path, int] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = Lock()
+
+    def submit(
+        self, pdf_file: Path, queue: str, options: PrintOptions
+    ) -> Optional[str]:
+        with self._lock:
+            self.attempts[pdf_file] = self.attempts.get(pdf_file, 0) + 1
+            attempt = self.attempts[pdf_file]
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        sleep(0.01)
+        with self._lock:
+            self.in_flight -= 1
+        if attempt <= self.failures:
+            raise SubmissionError("Printer is busy", transient=self.transient)
+        return f"{queue}-{pdf_file.name}"
+
+
+class SubmissionEngineTest(TestCase):
+    """
+    Submission Engine Test
+    """
+
+    def setUp(self) -> None:
+        self.pdf_files = [Path(f"E{i:04}-book.pdf") for i in range(12)]
+
+    def _submit_all(self, backend: SubmissionBackend, **kwargs):
+        with SubmissionEngine(backend, **kwargs) as engine:
+            for pdf_file in self.pdf_files:
+                engine.submit(pdf_file, "followmeppd", BOOKLET_OPTIONS)
+            return engine.join()
+
+    def test_bounded_in_flight(self):
+        backend = _FlakyBackend()
+        results = self._submit_all(backend, max_in_flight=3)
+        self.assertEqual([r.pdf_file for r in results], self.pdf_files)
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual(results[0].job_id, "followmeppd-E0000-book.pdf")
+        self.assertLessEqual(backend.max_in_flight, 3)
+
+    @mock.patch("tum_exam_scripts.logic.submission.sleep")
+    def test_transient_failures_are_retried(self, mock_sleep):
+        backend = _FlakyBackend(failures=2)
+        results = self._submit_all(backend, retry_policy=RetryPolicy(retries=2))
+        self.assertTrue(all(r.ok for r in results))
+        self.assertTrue(all(r.attempts == 3 for r in results))
+        self.assertEqual(mock_sleep.call_count, 2 * len(self.pdf_files))
+
+    @mock.patch("tum_exam_scripts.logic.submission.sleep")
+    def test_failures_are_collected(self, mock_sleep):
+        backend = _FlakyBackend(failures=5)
+        results = self._submit_all(backend, retry_policy=RetryPolicy(retries=2))
+        self.assertFalse(any(r.ok for r in results))
+        self.assertEqual(len(results), len(self.pdf_files))
+
+    @mock.patch("tum_exam_scripts.logic.submission.sleep")
+    def test_permanent_failures_are_not_retried(self, mock_sleep):
+        backend = _FlakyBackend(failures=1, transient=False)
+        results = self._submit_all(backend)
+        self.assertTrue(all(r.attempts == 1 and not r.ok for r in results))
+        mock_sleep.assert_not_called()
+
+    def test_crashed_jobs_are_reported(self):
+        backend = mock.Mock(spec=SubmissionBackend)
+        backend.submit.side_effect = RuntimeError("Boom")
+        reported = []
+        results = self._submit_all(backend, on_result=reported.append)
+        self.assertEqual(len(reported), len(self.pdf_files))
+        self.assertFalse(any(r.ok for r in reported + results))
+        self.assertIn("Boom", str(results[0].error))
+
+    def test_slot_is_released_if_waiting_fails(self):
+        backpressure = mock.Mock()
+        backpressure.wait.side_effect = [RuntimeError("lpstat failed"), None]
+        with SubmissionEngine(
+            _FlakyBackend(), max_in_flight=1, backpressure=backpressure
+        ) as engine:
+            with self.assertRaises(RuntimeError):
+                engine.submit(self.pdf_files[0], "followmeppd", BOOKLET_OPTIONS)
+            engine.submit(self.pdf_files[1], "followmeppd", BOOKLET_OPTIONS)
+            results = engine.join()
+        self.assertEqual([r.pdf_file for r in results], self.pdf_files[1:2])
+
+    def test_backoff_grows_and_is_capped(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=8.0)
+        for attempt, upper in ((1, 1.0), (2, 2.0), (3, 4.0), (6, 8.0)):
+            delay = policy.delay(attempt)
+            self.assertGreaterEqual(delay, upper / 2)
+            self.assertLessEqual(delay, upper)
+
+
+if __name__ == "__main__":
+    main()
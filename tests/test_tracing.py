@@ -0,0 +1,129 @@
+"""
+Test.
+"""
+import json
+from os.path import join
+from pathlib import Path
+from shutil import copytree
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main, mock
+
+from tum_exam_scripts.main import app
+from tum_exam_scripts.utils.command import run_command
+from tum_exam_scripts.utils.tracing import configure_tracing, shutdown_tracing, span
+from typer.testing import CliRunner
+
+
+class TracingTest(TestCase):
+    """
+    Tracing Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+        self.trace_file = self.directory.joinpath("trace.jsonl")
+        self.metrics_file = self.directory.joinpath("metrics.prom")
+
+    def tearDown(self) -> None:
+        shutdown_tracing()
+        self.tmp.cleanup()
+
+    def _spans(self):
+        return [json.loads(line) for line in self.trace_file.read_text().splitlines()]
+
+    def test_spans_and_metrics(self):
+        configure_tracing(self.trace_file, self.metrics_file)
+        for size in (100, 200):
+            with span("validation.file", bytes=size, file=Path("a.pdf")) as current:
+                current.set(pages=4)
+        with self.assertRaises(ValueError), span("submission"):
+            raise ValueError()
+        self.assertFalse(self.metrics_file.exists())
+        shutdown_tracing()
+
+        spans = self._spans()
+        self.assertEqual(
+            [s["name"] for s in spans],
+            ["validation.file", "validation.file", "submission"],
+        )
+        self.assertEqual(
+            spans[0]["attributes"], {"bytes": 100, "file": "a.pdf", "pages": 4}
+        )
+        self.assertEqual(spans[2]["error"], "ValueError")
+        metrics = self.metrics_file.read_text()
+        self.assertIn(
+            'tum_exam_scripts_span_seconds_count{span="validation.file"} 2', metrics
+        )
+        self.assertIn(
+            'tum_exam_scripts_span_bytes_total{span="validation.file"} 300', metrics
+        )
+        self.assertIn(
+            'tum_exam_scripts_span_pages_total{span="validation.file"} 8', metrics
+        )
+        self.assertIn(
+            'tum_exam_scripts_span_errors_total{span="submission"} 1', metrics
+        )
+
+    def test_disabled(self):
+        with span("discovery") as current:
+            current.set(files=3)
+        self.assertGreaterEqual(current.duration, 0)
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    @mock.patch("subprocess.check_call")
+    def test_done_is_logged_after_the_command(self, mock_check_call):
+        def _check_call(_):
+            self.assertFalse(any("exited" in line for line in logs.output))
+            return 0
+
+        mock_check_call.side_effect = _check_call
+        with self.assertLogs("tum_exam_scripts.utils.command") as logs:
+            self.assertEqual(run_command(["lp", "x.pdf"]), 0)
+        self.assertIn("lp x.pdf exited with code 0", logs.output[-1])
+
+    @mock.patch("typer.confirm")
+    @mock.patch("subprocess.check_output")
+    def test_send_all(self, mock_check_output, mock_typer):
+        mock_typer.return_value = True
+        mock_check_output.return_value = b""
+        exams = join(self.tmp.name, "exams")
+        copytree(join("tests", "rsc", "exams"), exams)
+
+        result = CliRunner().invoke(
+            app,
+            [
+                "--log-file",
+                str(self.directory.joinpath("log.jsonl")),
+                "--trace-file",
+                str(self.trace_file),
+                "--metrics-file",
+                str(self.metrics_file),
+                "pdf",
+                "send-all-booklets",
+                "--no-cache",
+                exams,
+            ],
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+
+        names = [s["name"] for s in self._spans()]
+        for name in ("discovery", "validation", "submission"):
+            self.assertEqual(names.count(name), 1, name)
+        # With one queue, we count the pages while we validate the booklets.
+        self.assertNotIn("page_count", names)
+        self.assertEqual(names.count("validation.file"), 2)
+        self.assertEqual(names.count("submission.job"), 2)
+        self.assertEqual(names.count("command"), 2)
+        submission = next(s for s in self._spans() if s["name"] == "submission")
+        self.assertEqual(submission["attributes"]["files"], 2)
+        self.assertGreater(submission["attributes"]["pages"], 0)
+        self.assertGreater(submission["attributes"]["bytes"], 0)
+        self.assertIn(
+            'tum_exam_scripts_span_files_total{span="submission"} 2',
+            self.metrics_file.read_text(),
+        )
+
+
+if __name__ == "__main__":
+    main()
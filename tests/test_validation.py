@@ -0,0 +1,55 @@
+"""
+Test.
+"""
+from pathlib import Path
+from unittest import TestCase, main
+
+from tum_exam_scripts.logic.validation import validate_all, validate_pipelined
+
+_EXAMS_BROKEN = Path("tests", "rsc", "exams_broken")
+
+
+class ValidationTest(TestCase):
+    """
+    Validation Test
+    """
+
+    def setUp(self) -> None:
+        self.pdf_files = sorted(_EXAMS_BROKEN.glob("*-book.pdf")) * 20
+
+    def test_pipelined_keeps_order(self):
+        results = list(validate_pipelined(self.pdf_files, workers=4, queue_size=3))
+        self.assertEqual([r.pdf_file for r in results], self.pdf_files)
+        self.assertEqual(
+            [r.valid for r in results],
+            [True, True, False] * 20,
+        )
+
+    def test_validate_all_matches_pipelined(self):
+        self.assertEqual(
+            list(validate_all(self.pdf_files, workers=4)),
+            list(validate_pipelined(self.pdf_files, workers=4)),
+        )
+
+    def test_missing_file_is_invalid(self):
+        results = list(validate_pipelined([_EXAMS_BROKEN.joinpath("E9999-book.pdf")]))
+        self.assertFalse(results[0].valid)
+
+    def test_consumer_can_stop_early(self):
+        results = validate_pipelined(self.pdf_files, workers=2, queue_size=1)
+        self.assertTrue(next(results).valid)
+        results.close()
+
+    def test_discovery_errors_are_raised(self):
+        def _broken_discovery():
+            yield self.pdf_files[0]
+            raise OSError("Directory vanished")
+
+        results = validate_pipelined(_broken_discovery())
+        self.assertTrue(next(results).valid)
+        with self.assertRaises(OSError):
+            next(results)
+
+
+if __name__ == "__main__":
+    main()
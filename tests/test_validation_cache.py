@@ -0,0 +1,83 @@
+"""
+Test.
+"""
+from os import utime
+from pathlib import Path
+from shutil import copy
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main, mock
+
+from tum_exam_scripts.logic.validation import validate_pipelined
+from tum_exam_scripts.logic.validation_cache import ValidationCache
+
+_EXAMS_BROKEN = Path("tests", "rsc", "exams_broken")
+
+
+class ValidationCacheTest(TestCase):
+    """
+    Validation Cache Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+        self.database = self.directory.joinpath("cache", "validation.sqlite3")
+        self.pdf_files = []
+        for pdf_file in sorted(_EXAMS_BROKEN.glob("*-book.pdf")):
+            copy(pdf_file, self.directory)
+            self.pdf_files.append(self.directory.joinpath(pdf_file.name))
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _validate(self, **kwargs):
+        with ValidationCache(self.database, **kwargs) as cache:
+            results = list(validate_pipelined(self.pdf_files, cache=cache))
+        return [r.valid for r in results], cache
+
+    def test_unchanged_booklets_are_not_read_again(self):
+        first, cache = self._validate()
+        self.assertEqual(first, [True, True, False])
+        self.assertEqual(cache.misses, 3)
+        with mock.patch("tum_exam_scripts.logic.validation.is_full_pdf") as check:
+            second, cache = self._validate()
+        check.assert_not_called()
+        self.assertEqual(second, first)
+        self.assertEqual(cache.hits, 3)
+
+    def test_changed_booklet_is_validated_again(self):
+        self._validate()
+        self.pdf_files[2].write_bytes(self.pdf_files[0].read_bytes())
+        results, cache = self._validate()
+        self.assertEqual(results, [True, True, True])
+        self.assertEqual(cache.misses, 1)
+
+    def _corrupt_keeping_size_and_mtime(self, pdf_file: Path) -> None:
+        stat = pdf_file.stat()
+        data = bytearray(pdf_file.read_bytes())
+        data[-100] ^= 0xFF
+        pdf_file.write_bytes(bytes(data))
+        utime(pdf_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    def test_identity_without_hash(self):
+        self._validate()
+        self._corrupt_keeping_size_and_mtime(self.pdf_files[0])
+        _, cache = self._validate()
+        self.assertEqual(cache.hits, 3)
+
+    def test_hash_contents(self):
+        self._validate(hash_contents=True)
+        self._corrupt_keeping_size_and_mtime(self.pdf_files[0])
+        _, cache = self._validate(hash_contents=True)
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 1)
+
+    def test_eviction(self):
+        self._validate(max_entries=2)
+        _, cache = self._validate(max_entries=2)
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Test.
+"""
+from pathlib import Path
+from shutil import copy
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import sleep
+from unittest import TestCase, main, mock, skipUnless
+
+from tum_exam_scripts.logic.journal import SubmissionJournal
+from tum_exam_scripts.logic.submission import SubmissionResult
+from tum_exam_scripts.logic.watch import BookletWatcher
+from tum_exam_scripts.pdf_commands import app
+from tum_exam_scripts.utils.inotify import Inotify
+from typer.testing import CliRunner
+
+_EXAMS = Path("tests", "rsc", "exams")
+
+
+def _has_inotify() -> bool:
+    try:
+        Inotify().close()
+    except OSError:
+        return False
+    return True
+
+
+class WatchTest(TestCase):
+    """
+    Watch Test
+    """
+
+    def setUp(self) -> None:
+        self.tmp = TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _download(self, name: str) -> None:
+        """
+        Write the first half of a booklet, wait, and then write all of it, like a slow download.
+        """
+        content = _EXAMS.joinpath(name).read_bytes()
+        target = self.directory.joinpath(name)
+        target.write_bytes(content[: len(content) // 2])
+        sleep(0.3)
+        target.write_bytes(content)
+
+    def _watch(self, use_inotify: bool) -> list:
+        watcher = BookletWatcher(
+            self.directory,
+            settle=0.1,
+            interval=0.05,
+            idle_timeout=0.6,
+            use_inotify=use_inotify,
+        )
+        downloads = Thread(
+            target=lambda: [
+                self._download(n) for n in ("E0002-book.pdf", "E0001-book.pdf")
+            ]
+        )
+        with watcher:
+            self.assertEqual(watcher.uses_inotify, use_inotify)
+            downloads.start()
+            found = list(watcher)
+        downloads.join()
+        return [f.name for f in found]
+
+    def test_polling(self):
+        self.assertEqual(self._watch(False), ["E0002-book.pdf", "E0001-book.pdf"])
+
+    @skipUnless(_has_inotify(), "inotify is not available")
+    def test_inotify(self):
+        self.assertEqual(self._watch(True), ["E0002-book.pdf", "E0001-book.pdf"])
+
+    def test_skips_sent_booklets(self):
+        for pdf_file in _EXAMS.glob("*-book.pdf"):
+            copy(pdf_file, self.directory)
+        with SubmissionJournal(self.directory) as journal:
+            journal.record(
+                SubmissionResult(
+                    self.directory.joinpath("E0001-book.pdf"),
+                    "followmeppd",
+                    "followmeppd-1",
+                    1,
+                )
+            )
+            with BookletWatcher(
+                self.directory,
+                settle=0,
+                interval=0.01,
+                journal=journal,
+                idle_timeout=0.1,
+                use_inotify=False,
+            ) as watcher:
+                found = list(watcher)
+        self.assertEqual(found, [self.directory.joinpath("E0002-book.pdf")])
+
+    def test_stop(self):
+        with BookletWatcher(self.directory, interval=0.01) as watcher:
+            watcher.stop()
+            self.assertEqual(list(watcher), [])
+
+    @mock.patch("subprocess.run")
+    @mock.patch("subprocess.check_output")
+    @mock.patch("typer.confirm")
+    def test_command(self, mock_typer, mock_check_output, mock_run):
+        mock_typer.return_value = True
+        mock_check_output.return_value = b"request id is followmeppd-1 (1 file(s))"
+        mock_run.return_value.stdout = b""
+        for pdf_file in _EXAMS.glob("*-book.pdf"):
+            copy(pdf_file, self.directory)
+        arguments = [
+            "watch",
+            "--settle",
+            "0",
+            "--interval",
+            "0.05",
+            "--idle-timeout",
+            "0.2",
+            str(self.directory),
+        ]
+        result = CliRunner().invoke(app, arguments)
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Done!", result.stdout)
+        self.assertEqual(mock_check_output.call_count, 2)
+
+        # We already sent both booklets
+        result = CliRunner().invoke(app, arguments)
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(mock_check_output.call_count, 2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+An in-process web server that stands in for the printing page of ucentral in the tests.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from threading import Lock, Thread
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import parse_qs, urlsplit
+
+_PATH = "/cgi-bin/index.cgi"
+ENABLE_PRINTING = "Diesen Rechner zum Drucken freischalten"
+
+_START = """<html><body>
+<a href="index.cgi?page=help">Help</a>
+<a href="index.cgi?page=login">Login</a>
+</body></html>"""
+
+_LOGIN = """<html><body>
+<a href="index.cgi?page=login">Login</a>
+<p>{message}</p>
+<form action="index.cgi" method="post">
+<input type="hidden" name="action" value="login">
+User: <input type="text" name="user">
+Password: <input type="password" name="pass">
+<input type="submit" value="Login">
+</form>
+</body></html>"""
+
+_HOME = """<html><body>
+<form action="index.cgi" method="post"><input type="hidden" name="action" value="logout">
+<button type="submit">Logout</button></form>
+<a href="index.cgi?page=xerox">Xerox&nbsp;Printing</a>
+</body></html>"""
+
+_XEROX = """<html><body>
+<form action="index.cgi" method="get"><input type="hidden" name="page" value="xerox">
+<input type="submit" value="Laden"></form>
+<form action="index.cgi?page=xerox" method="post">
+<input type="hidden" name="token" value="{token}">
+<input type="submit" name="action" value="Diesen Rechner zum Drucken freischalten"{disabled}>
+</form>
+</body></html>"""
+
+
+class UcentralStub:
+    """
+    Mimics the pages we click through: the start page, the login form, the start page after the login,
+    and the Xerox printing page with the button that enables printing.
+    A login sets a session cookie and redirects to the start page, like ucentral.
+    The button is disabled while we can print; `presses` counts how often it was pressed, and
+    `presses_needed` how often it has to be pressed to enable printing.
+    """
+
+    def __init__(self, user_name: str = "ga12abc", password: str = "secret") -> None:
+        self.user_name = user_name
+        self.password = password
+        self.enabled = False
+        self.presses = 0
+        self.presses_needed = 1
+        self.requests: List[str] = []
+        self._sessions: Set[str] = set()
+        self._session_ids = count(1)
+        self._lock = Lock()
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                self._answer(None)
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                self._answer(parse_qs(self.rfile.read(length).decode("utf-8")))
+
+            def _answer(self, form: Optional[Dict[str, List[str]]]) -> None:
+                split = urlsplit(self.path)
+                if split.path != _PATH:
+                    self.send_error(404)
+                    return
+                cookie = self.headers.get("Cookie", "")
+                session = next(
+                    (
+                        c.split("=", 1)[1]
+                        for c in cookie.split("; ")
+                        if c.startswith("session=")
+                    ),
+                    None,
+                )
+                query = {k: v[0] for k, v in parse_qs(split.query).items()}
+                fields = {k: v[0] for k, v in (form or {}).items()}
+                status, headers, body = stub.handle(
+                    self.command, query, fields, session
+                )
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                data = body.encode("utf-8")
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._thread = Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}{_PATH}"
+
+    def handle(
+        self,
+        method: str,
+        query: Dict[str, str],
+        fields: Dict[str, str],
+        session: Optional[str],
+    ) -> Any:
+        with self._lock:
+            page = query.get("page", "")
+            action = fields.get("action", "")
+            self.requests.append(f"{method} {page} {action}".strip())
+            logged_in = session in self._sessions
+            if action == "login":
+                if (fields.get("user"), fields.get("pass")) != (
+                    self.user_name,
+                    self.password,
+                ):
+                    return 200, {}, _LOGIN.format(message="Login failed")
+                new_session = str(next(self._session_ids))
+                self._sessions.add(new_session)
+                return (
+                    303,
+                    {
+                        "Location": "index.cgi",
+                        "Set-Cookie": f"session={new_session}; Path=/",
+                    },
+                    "",
+                )
+            if page == "login":
+                return 200, {}, _LOGIN.format(message="")
+            if not logged_in:
+                return 200, {}, _START
+            if page == "xerox":
+                if action == ENABLE_PRINTING and fields.get("token") == "42":
+                    self.presses += 1
+                    self.enabled = self.presses >= self.presses_needed
+                disabled = " disabled" if self.enabled else ""
+                return 200, {}, _XEROX.format(token=42, disabled=disabled)
+            return 200, {}, _HOME
+
+    def __enter__(self) -> "UcentralStub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -2,16 +2,33 @@
 """
 Main module.
 """
-from pkg_resources import get_distribution, DistributionNotFound
+from typing import Any
+
+# Change here if project is renamed and does not equal the package name
+_DIST_NAME = "tum-exam-scripts"
 
-try:
-    # Change here if project is renamed and does not equal the package name
-    dist_name = "tum-exam-scripts"
-    __version__ = get_distribution(dist_name).version
-except DistributionNotFound:
-    __version__ = "unknown"
-finally:
-    del get_distribution, DistributionNotFound
 __author__ = "Patrick Stoeckle"
 __copyright__ = "Patrick Stoeckle"
 __license__ = "mit"
+
+
+def __getattr__(name: str) -> Any:
+    # We look the version up on first use; reading the package metadata costs more than the rest of the startup.
+    if name != "__version__":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+
+        try:
+            value = version(_DIST_NAME)
+        except PackageNotFoundError:
+            value = "unknown"
+    except ImportError:  # Python 3.7
+        from pkg_resources import DistributionNotFound, get_distribution
+
+        try:
+            value = get_distribution(_DIST_NAME).version
+        except DistributionNotFound:
+            value = "unknown"
+    globals()["__version__"] = value
+    return value
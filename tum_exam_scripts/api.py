@@ -0,0 +1,349 @@
+"""
+Library API.
+Async functions for the steps of a print run: discover, validate, plan, submit, and status.
+A service can run many print plans in one process with them instead of starting the CLI for every step.
+They run the blocking logic on the default executor of the event loop, never print anything, and never exit;
+they raise exceptions, report the progress as events, and return typed results.
+The callbacks are called on the thread of the event loop, in the order of the events.
+
+Example:
+    booklets = await discover(Path("/path/to/exams"))
+    print_plan = await plan(booklets, ["room1", "room2"])
+    with IppBackend("ipp://localhost:631/printers/{queue}") as backend:
+        report = await submit(print_plan, backend, on_event=print)
+"""
+from asyncio import Queue, get_running_loop
+from datetime import timedelta
+from functools import partial
+from pathlib import Path
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+
+from tum_exam_scripts.defaults import (
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_QUEUE_POLL_INTERVAL,
+    DEFAULT_VALIDATION_WORKERS,
+)
+from tum_exam_scripts.enums import Backend, ValidationLevel
+from tum_exam_scripts.logic.backends import (
+    BOOKLET_OPTIONS,
+    PrintOptions,
+    SubmissionBackend,
+)
+from tum_exam_scripts.logic.backpressure import Backpressure
+from tum_exam_scripts.logic.discovery import ExamRange, discover_booklets
+from tum_exam_scripts.logic.events import (
+    BookletValidated,
+    Listener,
+    PrintEvent,
+    PrintFinished,
+    PrintReport,
+)
+from tum_exam_scripts.logic.job_status import (
+    FAILED,
+    JobStatusSource,
+    StatusSummary,
+    TrackedJob,
+    create_status_source,
+    summarize,
+    tracked_jobs,
+    watch_jobs,
+)
+from tum_exam_scripts.logic.journal import SubmissionJournal
+from tum_exam_scripts.logic.keep_alive import EnablementKeeper
+from tum_exam_scripts.logic.page_index import count_pages
+from tum_exam_scripts.logic.pdf_printing import print_pdf_files
+from tum_exam_scripts.logic.scheduling import (
+    PrinterPlan,
+    assignment,
+    interleave,
+    plan_queues,
+)
+from tum_exam_scripts.logic.submission import RetryPolicy
+from tum_exam_scripts.logic.validation import ValidationResult, validate_all
+from tum_exam_scripts.logic.validation_cache import ValidationCache
+
+_T = TypeVar("_T")
+
+
+class PrintPlan(NamedTuple):
+    """
+    Which booklet goes to which queue with which options, in the order we send them.
+    """
+
+    pdf_files: List[Path]
+    queue_of: Dict[Path, str]
+    options_of: Dict[Path, PrintOptions]
+    pages: Dict[Path, Optional[int]]
+    printers: List[PrinterPlan]
+
+    def duration(self, pages_per_minute: float) -> timedelta:
+        """
+        :param pages_per_minute: The speed of a single printer.
+        :return: When the slowest printer should be done.
+        """
+        return max(
+            (p.duration(pages_per_minute) for p in self.printers),
+            default=timedelta(),
+        )
+
+
+class StatusReport(NamedTuple):
+    """
+    The states of the jobs of a print run.
+    """
+
+    jobs: List[TrackedJob]
+    summary: StatusSummary
+
+    @property
+    def failed(self) -> List[TrackedJob]:
+        return [j for j in self.jobs if self.summary.states.get(j.job_id) == FAILED]
+
+
+async def _run(function: Callable[..., _T], *args: object, **kwargs: object) -> _T:
+    return await get_running_loop().run_in_executor(
+        None, partial(function, *args, **kwargs)
+    )
+
+
+def _relay(callback: Optional[Callable[[_T], None]]) -> Optional[Callable[[_T], None]]:
+    # The logic calls us on its threads; we hand the event to the event loop.
+    if callback is None:
+        return None
+    loop = get_running_loop()
+
+    def _call(item: _T) -> None:
+        loop.call_soon_threadsafe(callback, item)
+
+    return _call
+
+
+async def discover(
+    input_directory: Path,
+    recursive: bool = False,
+    include: Optional[Sequence[ExamRange]] = None,
+    exclude: Optional[Sequence[ExamRange]] = None,
+) -> List[Path]:
+    """
+    :param input_directory:
+    :param recursive: Also look into the subdirectories, e.g., one per room.
+    :param include: Only the exams with a number in one of these ranges, see parse_exam_ranges().
+    :param exclude: Not the exams with a number in one of these ranges.
+    :return: All booklets in natural order.
+    """
+    return await _run(discover_booklets, input_directory, recursive, include, exclude)
+
+
+async def validate(
+    pdf_files: Sequence[Path],
+    workers: int = DEFAULT_VALIDATION_WORKERS,
+    level: ValidationLevel = ValidationLevel.QUICK,
+    cache: Optional[ValidationCache] = None,
+    on_event: Optional[Callable[[BookletValidated], None]] = None,
+) -> List[ValidationResult]:
+    """
+    Check the PDFs without sending them.
+    :param pdf_files:
+    :param workers:
+    :param level: How thoroughly we check the PDFs.
+    :param cache: If given, we skip the booklets that did not change since they were validated.
+    :param on_event: Called for every booklet as soon as it is checked.
+    :return: The results in input order.
+    """
+    relay = _relay(on_event)
+
+    def _validate() -> List[ValidationResult]:
+        results = []
+        for result in validate_all(pdf_files, workers, cache, level):
+            if relay is not None:
+                relay(BookletValidated(result))
+            results.append(result)
+        return results
+
+    return await _run(_validate)
+
+
+async def plan(
+    pdf_files: Sequence[Path],
+    queues: Sequence[str] = ("followmeppd",),
+    options: PrintOptions = BOOKLET_OPTIONS,
+    options_of: Optional[Dict[Path, PrintOptions]] = None,
+    workers: int = DEFAULT_VALIDATION_WORKERS,
+) -> PrintPlan:
+    """
+    Spread the booklets over the queues so that all printers finish at about the same time, see plan_queues().
+    :param pdf_files:
+    :param queues: The printer queues, e.g., one per room.
+    :param options: The print options of the booklets.
+    :param options_of: The print options of every document if they differ; we weigh the pages with the copies.
+    :param workers: The threads that count the pages.
+    :return:
+    :raises ValueError: If there is no queue.
+    """
+    pdf_files = list(pdf_files)
+    options_of = options_of if options_of is not None else {}
+    options_of = {f: options_of.get(f, options) for f in pdf_files}
+    counts = await _run(count_pages, pdf_files, workers)
+    printers = plan_queues(
+        pdf_files,
+        [
+            p * (options_of[f].copies or 1) if p is not None else None
+            for f, p in zip(pdf_files, counts)
+        ],
+        queues,
+    )
+    return PrintPlan(
+        interleave(printers),
+        assignment(printers),
+        options_of,
+        dict(zip(pdf_files, counts)),
+        printers,
+    )
+
+
+async def submit(
+    print_plan: PrintPlan,
+    backend: Optional[SubmissionBackend] = None,
+    strict: bool = False,
+    validation_workers: int = DEFAULT_VALIDATION_WORKERS,
+    validation_level: ValidationLevel = ValidationLevel.QUICK,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    retry_policy: RetryPolicy = RetryPolicy(),
+    journal: Optional[SubmissionJournal] = None,
+    cache: Optional[ValidationCache] = None,
+    backpressure: Optional[Backpressure] = None,
+    enablement: Optional[EnablementKeeper] = None,
+    on_event: Optional[Listener] = None,
+) -> PrintReport:
+    """
+    Validate the booklets of the plan and send the valid ones, see print_pdf_files().
+    :param print_plan:
+    :param backend: The backend that submits the jobs. By default, we call `lp`.
+    :param strict: Send nothing if a booklet is invalid.
+    :param validation_workers:
+    :param validation_level:
+    :param max_in_flight:
+    :param retry_policy:
+    :param journal: If given, we record every submission in the journal.
+    :param cache:
+    :param backpressure:
+    :param enablement:
+    :param on_event: Called with every event of the run, see events.
+    :return: What happened to every booklet; check PrintReport.ok.
+    """
+    if len(print_plan.pdf_files) == 0:
+        return PrintReport([], [])
+    return await _run(
+        print_pdf_files,
+        print_plan.queue_of[print_plan.pdf_files[0]],
+        print_plan.pdf_files,
+        strict=strict,
+        validation_workers=validation_workers,
+        backend=backend,
+        max_in_flight=max_in_flight,
+        retry_policy=retry_policy,
+        journal=journal,
+        cache=cache,
+        validation_level=validation_level,
+        queue_of=print_plan.queue_of,
+        options_of=print_plan.options_of,
+        backpressure=backpressure,
+        enablement=enablement,
+        listener=_relay(on_event),
+        pages=print_plan.pages,
+    )
+
+
+async def events(
+    print_plan: PrintPlan,
+    backend: Optional[SubmissionBackend] = None,
+    strict: bool = False,
+    validation_workers: int = DEFAULT_VALIDATION_WORKERS,
+    validation_level: ValidationLevel = ValidationLevel.QUICK,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    retry_policy: RetryPolicy = RetryPolicy(),
+    journal: Optional[SubmissionJournal] = None,
+    cache: Optional[ValidationCache] = None,
+    backpressure: Optional[Backpressure] = None,
+    enablement: Optional[EnablementKeeper] = None,
+) -> AsyncIterator[PrintEvent]:
+    """
+    Like submit(), but yield the events; the last one is PrintFinished with the report.
+    If you stop iterating early, we still wait until the run is over, as we cannot take back the jobs we sent.
+    :return:
+    """
+    # None marks the end of the run.
+    pending: "Queue[Optional[PrintEvent]]" = Queue()
+    run = get_running_loop().create_task(
+        submit(
+            print_plan,
+            backend,
+            strict,
+            validation_workers,
+            validation_level,
+            max_in_flight,
+            retry_policy,
+            journal,
+            cache,
+            backpressure,
+            enablement,
+            pending.put_nowait,
+        )
+    )
+    # The events are handed to the event loop before the run is done, so the marker comes last.
+    run.add_done_callback(lambda _: pending.put_nowait(None))
+    try:
+        while True:
+            event = await pending.get()
+            if event is None:
+                yield PrintFinished(run.result())
+                return
+            yield event
+    finally:
+        await run
+
+
+async def status(
+    input_directory: Path,
+    source: Optional[JobStatusSource] = None,
+    wait: bool = False,
+    interval: float = DEFAULT_QUEUE_POLL_INTERVAL,
+    timeout: Optional[float] = None,
+    on_summary: Optional[Callable[[StatusSummary], None]] = None,
+) -> StatusReport:
+    """
+    The states of the jobs in the journal of the directory.
+    :param input_directory: The directory that we sent the booklets from.
+    :param source: How we ask the printing system, by default with lpstat.
+    :param wait: Poll until all jobs are completed or failed, otherwise poll once.
+    :param interval: The seconds between two polls.
+    :param timeout: Give up waiting after so many seconds, None waits forever.
+    :param on_summary: Called after every poll.
+    :return: Without jobs in the journal, an empty report.
+    :raises JobStatusError: If we cannot ask the printing system.
+    """
+    jobs = tracked_jobs(SubmissionJournal(input_directory))
+    if len(jobs) == 0:
+        return StatusReport([], summarize([], {}, {}))
+    pdf_files = [j.pdf_file for j in jobs if j.pdf_file.is_file()]
+    pages = dict(zip(pdf_files, await _run(count_pages, pdf_files)))
+    relay = _relay(on_summary)
+    if source is None:
+        with create_status_source(Backend.LP) as lpstat:
+            summary = await _run(
+                watch_jobs, lpstat, jobs, pages, wait, interval, timeout, relay
+            )
+    else:
+        summary = await _run(
+            watch_jobs, source, jobs, pages, wait, interval, timeout, relay
+        )
+    return StatusReport(jobs, summary)
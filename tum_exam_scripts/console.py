@@ -0,0 +1,345 @@
+"""
+Console output of the commands.
+The logic only tells a listener what happens or returns what it did; here we show it with progress bars and messages
+and turn failures into exit codes.
+The commands import this module when they run, so that the CLI starts fast.
+It imports the printing logic only in the functions that need it, so the light commands stay light, too.
+"""
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Type
+
+from click import echo, pause, prompt
+from click.exceptions import Exit
+
+from tum_exam_scripts.logic.events import (
+    SUBMISSION,
+    VALIDATION,
+    BatchFinished,
+    BookletFinished,
+    BookletValidated,
+    JobQueued,
+    PrintEvent,
+    QueueDrained,
+    QueueHeld,
+    QueuesUnwatched,
+    RenewalFailed,
+    StageFinished,
+    StageStarted,
+)
+from tum_exam_scripts.utils.command import confirm_printing_rights, error_echo
+
+if TYPE_CHECKING:
+    from tum_exam_scripts.logic.backends import PrintOptions, SubmissionBackend
+    from tum_exam_scripts.logic.compaction import Compactor
+    from tum_exam_scripts.logic.journal import SubmissionJournal
+    from tum_exam_scripts.logic.keep_alive import EnablementKeeper
+    from tum_exam_scripts.logic.manifest import BookletSelection
+    from tum_exam_scripts.logic.progress import PageProgress
+    from tum_exam_scripts.logic.validation import ValidationResult
+
+
+class ConsoleListener:
+    """
+    Shows a print run: a progress bar per stage, the jobs we send, and the invalid booklets.
+    In the strict mode, we report the invalid booklets once the validation is done; otherwise, as we find them.
+    """
+
+    def __init__(self, strict: bool = False) -> None:
+        self.strict = strict
+        self._bars: Dict[str, "PageProgress"] = {}
+        self._invalid: List["ValidationResult"] = []
+
+    def __call__(self, event: PrintEvent) -> None:
+        if isinstance(event, StageStarted):
+            from tum_exam_scripts.logic.progress import PageProgress
+
+            if event.stage == VALIDATION and self.strict:
+                echo("Check whether PDFs are corrupt")
+            self._bars[event.stage] = PageProgress(
+                event.stage.capitalize(),
+                event.pdf_files,
+                event.pages,
+                position=len(self._bars),
+            )
+        elif isinstance(event, StageFinished):
+            bar = self._bars.pop(event.stage, None)
+            if bar is not None:
+                bar.close()
+            if event.stage == VALIDATION:
+                for result in self._invalid:
+                    report_invalid(result)
+                self._invalid = []
+        elif isinstance(event, BookletValidated):
+            if SUBMISSION in self._bars:
+                self._bars[SUBMISSION].counted(
+                    event.result.pdf_file, event.result.pages
+                )
+            self._update(VALIDATION, event.result.pdf_file)
+            if not event.result.valid:
+                if self.strict:
+                    self._invalid.append(event.result)
+                else:
+                    report_invalid(event.result)
+                    # The booklet is done for the submission, too.
+                    self._update(SUBMISSION, event.result.pdf_file)
+        elif isinstance(event, JobQueued):
+            if len(event.pdf_files) > 1:
+                echo(
+                    f"Sending the documents {event.pdf_files[0]} to {event.pdf_files[-1].name} "
+                    "as one job to the printing server ..."
+                )
+            else:
+                echo(
+                    f"Sending document {event.pdf_files[0]} to the printing server ..."
+                )
+        elif isinstance(event, BookletFinished):
+            self._update(SUBMISSION, event.result.pdf_file)
+        elif isinstance(event, QueueHeld):
+            echo(
+                f"{event.queue} has {event.jobs} pending jobs, we wait until it drains ..."
+            )
+        elif isinstance(event, QueueDrained):
+            echo(f"{event.queue} drained after {event.seconds:.0f}s, we go on.")
+        elif isinstance(event, QueuesUnwatched):
+            echo(
+                f"We cannot see how full the print queues are ({event.problem}), so we send all jobs at once."
+            )
+        elif isinstance(event, RenewalFailed):
+            echo(
+                f"We could not renew the printing enablement ({event.problem}), we try again in {event.retry_in:.0f} seconds."
+            )
+        elif isinstance(event, BatchFinished):
+            pause(f"We finished batch {event.number}")
+
+    def _update(self, stage: str, pdf_file: Path) -> None:
+        if stage in self._bars:
+            self._bars[stage].update(pdf_file)
+
+    def close(self) -> None:
+        for bar in self._bars.values():
+            bar.close()
+        self._bars = {}
+
+    def __enter__(self) -> "ConsoleListener":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def send_pdf_files(
+    driver_name: str,
+    pdf_files: Iterable[Path],
+    batch_size: Optional[int] = None,
+    strict: bool = False,
+    compactor: Optional["Compactor"] = None,
+    **kwargs: Any,
+) -> None:
+    """
+    Send all PDF files to the server and show the progress, see print_pdf_files().
+    With a batch size, we wait for a key press after every batch.
+    Invalid booklets and booklets that could not be sent are reported at the end.
+    :param driver_name:
+    :param pdf_files:
+    :param batch_size:
+    :param strict:
+    :param compactor: We show how much the compactor saved at the end.
+    :param kwargs: See print_pdf_files().
+    :return:
+    :raises Exit: If a booklet is invalid or could not be sent, or if a print queue stalled.
+    """
+    from tum_exam_scripts.logic.backpressure import QueueStalledError
+    from tum_exam_scripts.logic.pdf_printing import print_pdf_files
+
+    with ConsoleListener(strict) as listener:
+        try:
+            report = print_pdf_files(
+                driver_name,
+                pdf_files,
+                batch_size,
+                strict,
+                compactor=compactor,
+                listener=listener,
+                **kwargs,
+            )
+        except QueueStalledError as e:
+            error_echo(f"We stopped sending: {e}.")
+            error_echo(
+                "Check the printer, e.g., with lpstat -o, before you send the remaining booklets."
+            )
+            raise Exit(1)
+    if strict and len(report.invalid) > 0:
+        raise Exit(1)
+    failed = report.failed
+    for result in failed:
+        error_echo(
+            f"Something went wrong when sending {result.pdf_file} to the server: {result.error}"
+        )
+        if result.error is not None and result.error.hint is not None:
+            error_echo(result.error.hint)
+    if len(failed) > 0:
+        error_echo(
+            f"We could not send {len(failed)} of {len(report.results)} booklets."
+        )
+    if len(report.invalid) > 0:
+        error_echo(
+            f"We did not send {len(report.invalid)} booklets because they are not valid PDFs:"
+        )
+        for validation in report.invalid:
+            error_echo(f"  {validation.pdf_file}")
+    if compactor is not None:
+        echo(compactor.summary())
+    if not report.ok:
+        raise Exit(1)
+    echo("Done!")
+
+
+def check_printing_rights(
+    user_name: Optional[str], url: str
+) -> Optional["EnablementKeeper"]:
+    """
+    Enable printing from this machine, or ask the user whether they did if we do not know their user name.
+    :param user_name: The informatics account.
+    :param url:
+    :return: A keeper that renews the enablement while we send the jobs, None if the user enabled printing manually.
+    :raises Exit: If we could not enable printing.
+    """
+    if user_name is None:
+        confirm_printing_rights()
+        return None
+    from tum_exam_scripts.logic.keep_alive import create_enablement_keeper
+    from tum_exam_scripts.utils.enablement import EnablementError
+
+    keeper = create_enablement_keeper(user_name, url)
+    try:
+        enabled = keeper.renew()
+    except EnablementError as e:
+        error_echo(f"We could not enable printing: {e}")
+        raise Exit(1)
+    echo(
+        "We enabled printing from this machine."
+        if enabled
+        else "We can already print from this machine."
+    )
+    return keeper
+
+
+def send_document(
+    backend: "SubmissionBackend", pdf_file: Path, queue: str, options: "PrintOptions"
+) -> None:
+    """
+    Send a single document to the server and exit on failure.
+    :param backend:
+    :param pdf_file:
+    :param queue:
+    :param options:
+    :return:
+    :raises Exit: If the server did not accept the document.
+    """
+    from tum_exam_scripts.logic.backends import SubmissionError
+
+    echo(f"Sending document {pdf_file} to the printing server ...")
+    try:
+        job_id = backend.submit(pdf_file, queue, options)
+    except SubmissionError as e:
+        error_echo(f"Something went wrong when sending {pdf_file} to the server")
+        error_echo(e.hint if e.hint is not None else str(e))
+        raise Exit(1)
+    if job_id is not None:
+        echo(f"The job ID is {job_id}")
+
+
+def install_driver(
+    queues: Iterable[str],
+    user_password: Optional[str] = None,
+    offline: bool = False,
+    refresh: bool = False,
+    force: bool = False,
+    expected_sha256: Optional[str] = None,
+) -> None:
+    """
+    Set up the missing queues and show which queues are available, see provision_queues().
+    :param queues:
+    :param user_password: The password for sudo; we ask for it if we need it and you did not pass it.
+    :param offline:
+    :param refresh:
+    :param force:
+    :param expected_sha256:
+    :return:
+    :raises Exit: If we could not set up the queues.
+    """
+
+    from tum_exam_scripts.logic.drivers import DriverError, provision_queues
+
+    def _ask_password() -> str:
+        if user_password is not None:
+            return user_password
+        return str(prompt("Your user password", hide_input=True))
+
+    try:
+        result = provision_queues(
+            queues, _ask_password, offline, refresh, force, expected_sha256
+        )
+    except DriverError as e:
+        error_echo("Installation went wrong.")
+        error_echo(str(e))
+        raise Exit(1)
+    for queue in result.available:
+        echo(f"The printing service is already available under {queue}")
+    if len(result.configured) > 0:
+        echo("The Linux driver was successfully installed!")
+    for queue in result.configured:
+        echo(f"The printing service is available under {queue}")
+
+
+def skip_sent_booklets(
+    journal: "SubmissionJournal", pdf_files: List[Path]
+) -> List[Path]:
+    """
+    Remove the booklets that the journal confirms as sent.
+    :param journal:
+    :param pdf_files:
+    :return:
+    """
+    sent = set(journal.already_sent(pdf_files))
+    if len(sent) > 0:
+        echo(f"We skip {len(sent)} booklets that we already sent.")
+    return [f for f in pdf_files if f not in sent]
+
+
+def report_selection(selection: "BookletSelection") -> None:
+    """
+    Show which booklets the manifest made us skip, see skip_unchanged_booklets().
+    :param selection:
+    :return:
+    """
+    report_duplicates(selection.duplicates)
+    if len(selection.duplicates) > 0:
+        skipped = sum(len(group) - 1 for group in selection.duplicates)
+        echo(f"We send only the first of identical booklets and skip {skipped}.")
+    for pdf_file in selection.changed:
+        echo(f"{pdf_file} changed since the last print run.")
+    if len(selection.unchanged) > 0:
+        echo(
+            f"We skip {len(selection.unchanged)} booklets that did not change since the last print run."
+        )
+
+
+def report_duplicates(duplicates: List[List[Path]]) -> None:
+    for group in duplicates:
+        error_echo(f"The booklets {', '.join(str(f) for f in group)} are identical.")
+
+
+def report_invalid(result: "ValidationResult") -> None:
+    if result.problem is None:
+        error_echo(f"The PDF file {result.pdf_file} is not a valid PDF.")
+    else:
+        error_echo(
+            f"The PDF file {result.pdf_file} is not a valid PDF: {result.problem}."
+        )
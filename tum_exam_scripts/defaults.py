@@ -0,0 +1,21 @@
+"""
+Default values.
+They live in their own module, so that the CLI can show them without importing the logic.
+"""
+
+DEFAULT_IPP_URI = "ipp://localhost:631/printers/{queue}"
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_RETRIES = 3
+DEFAULT_VALIDATION_WORKERS = 8
+DEFAULT_PAGES_PER_MINUTE = 45
+DEFAULT_MAX_QUEUED_JOBS = 50
+DEFAULT_MAX_QUEUED_MEGABYTES = 200
+DEFAULT_QUEUE_POLL_INTERVAL = 5.0
+DEFAULT_MAX_QUEUE_WAIT_MINUTES = 30
+DEFAULT_WATCH_INTERVAL = 1.0
+DEFAULT_SETTLE_SECONDS = 2.0
+DEFAULT_MIN_SAVING_PERCENT = 10.0
+DEFAULT_UCENTRAL_URL = "https://ucentral.in.tum.de/cgi-bin/index.cgi"
+DEFAULT_HTTP_TIMEOUT = 10.0
+DEFAULT_RENEW_INTERVAL = 600.0
+DEFAULT_RENEW_RETRY_INTERVAL = 30.0
@@ -4,3 +4,26 @@ from enum import Enum
 class Browser(Enum):
     CHROME = "chrome"
     FIREFOX = "firefox"
+
+
+class Backend(Enum):
+    LP = "lp"
+    IPP = "ipp"
+
+
+class ValidationLevel(Enum):
+    QUICK = "quick"
+    STRUCTURE = "structure"
+
+
+class LogLevel(Enum):
+    DEBUG = "debug"
+    INFO = "info"
+    WARNING = "warning"
+    ERROR = "error"
+
+
+class EnablementMode(Enum):
+    AUTO = "auto"
+    HTTP = "http"
+    BROWSER = "browser"
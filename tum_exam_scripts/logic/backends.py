@@ -0,0 +1,336 @@
+"""
+Submission backends.
+A backend takes a PDF file, the print queue, and the print options, and hands the job to the printing system.
+"""
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from getpass import getuser
+from http.client import HTTPException
+from logging import getLogger
+from pathlib import Path
+from threading import Lock, local
+from types import TracebackType
+from typing import List, NamedTuple, Optional, Tuple, Type
+from urllib.parse import urlsplit
+
+from tum_exam_scripts.defaults import DEFAULT_IPP_URI
+from tum_exam_scripts.enums import Backend
+from tum_exam_scripts.utils.command import run_command_output
+from tum_exam_scripts.utils.ipp import (
+    BOOLEAN,
+    ENUM,
+    INTEGER,
+    JOB_ATTRIBUTES_TAG,
+    MIME_MEDIA_TYPE,
+    NAME_WITHOUT_LANGUAGE,
+    PRINT_JOB,
+    Attribute,
+    AttributeGroup,
+    IppClient,
+    IppError,
+    RequestMaybeSent,
+    operation_attributes,
+)
+
+_LOGGER = getLogger(__name__)
+
+_REQUEST_ID = re.compile(r"request id is (\S+)")
+# What lp prints if CUPS is down or busy; every other failure, e.g., an unknown queue, fails again.
+_TRANSIENT_LP_ERROR = re.compile(
+    r"unable to connect|connection (refused|reset|timed out)|service unavailable|busy|try again",
+    re.IGNORECASE,
+)
+
+
+class PrintOptions(NamedTuple):
+    """
+    The options of a print job in the `lp -o` notation.
+    """
+
+    options: Tuple[str, ...]
+    copies: Optional[int] = None
+
+
+BOOKLET_OPTIONS = PrintOptions(
+    (
+        "PageSize=A3",
+        "JCLBanner=False",
+        "JCLColorCorrection=BlackWhite",
+        "Duplex=DuplexNoTumble",
+        "XRFold=BiFoldStaple",
+        "landscape",
+        "JCLPrintQuality=Enhanced",
+    )
+)
+ATTENDEE_LIST_OPTIONS = PrintOptions(
+    (
+        "PageSize=A4",
+        "JCLBanner=False",
+        "JCLColorCorrection=PressMatch",
+        "Duplex=None",
+        "JCLPrintQuality=Enhanced",
+        "InputSlot=ManualFeed",
+        "MediaType=Labels",
+    )
+)
+SEAT_PLAN_OPTIONS = PrintOptions(
+    (
+        "PageSize=A3",
+        "JCLBanner=False",
+        "JCLColorCorrection=BlackWhite",
+        "Duplex=None",
+        "JCLPrintQuality=Enhanced",
+    )
+)
+ROOM_PLAN_OPTIONS = PrintOptions(
+    (
+        "PageSize=A3",
+        "JCLBanner=False",
+        "JCLColorCorrection=PressMatch",
+        "Duplex=None",
+        "JCLPrintQuality=Enhanced",
+    )
+)
+
+
+class SubmissionError(Exception):
+    """
+    The printing system did not accept a job.
+    """
+
+    def __init__(self, message: str, transient: bool, hint: Optional[str] = None):
+        super().__init__(message)
+        self.transient = transient
+        self.hint = hint
+
+
+class SubmissionBackend(ABC):
+    """
+    Hands print jobs to the printing system.
+    """
+
+    @abstractmethod
+    def submit(
+        self, pdf_file: Path, queue: str, options: PrintOptions
+    ) -> Optional[str]:
+        """
+        Submit a PDF file to a print queue.
+        :param pdf_file:
+        :param queue:
+        :param options:
+        :return: The job ID if the printing system reported one.
+        :raises SubmissionError: If the job was not accepted.
+        """
+
+    def close(self) -> None:
+        """
+        Release open connections.
+        """
+
+    def __enter__(self) -> "SubmissionBackend":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class LpBackend(SubmissionBackend):
+    """
+    Calls `lp` once per job and reads the job ID from its output.
+    """
+
+    def submit(
+        self, pdf_file: Path, queue: str, options: PrintOptions
+    ) -> Optional[str]:
+        command = lp_command(pdf_file, queue, options)
+        try:
+            res, output = run_command_output(command)
+        except OSError as e:
+            raise SubmissionError(f"Could not call lp: {e}", transient=False)
+        if res != 0:
+            message = output.strip()
+            raise SubmissionError(
+                f"lp exited with status {res}" + (f": {message}" if message else ""),
+                transient=_TRANSIENT_LP_ERROR.search(output) is not None,
+                hint=f"Please open a shell and call {' '.join(command)}",
+            )
+        return lp_job_id(output)
+
+
+def lp_job_id(output: str) -> Optional[str]:
+    """
+    The job ID in the output of `lp`, e.g., followmeppd-42 in "request id is followmeppd-42 (1 file(s))".
+    :param output:
+    :return: None if lp did not report one.
+    """
+    match = _REQUEST_ID.search(output)
+    return match.group(1) if match is not None else None
+
+
+def lp_command(pdf_file: Path, queue: str, options: PrintOptions) -> List[str]:
+    """
+    Build the `lp` call for a job.
+    :param pdf_file:
+    :param queue:
+    :param options:
+    :return:
+    """
+    return ["lp", "-d" + queue, *lp_arguments(options), str(pdf_file)]
+
+
+@lru_cache(maxsize=None)
+def lp_arguments(options: PrintOptions) -> Tuple[str, ...]:
+    """
+    The `lp` arguments of the print options.
+    We translate every set of options, e.g., of a print profile, only once.
+    :param options:
+    :return:
+    """
+    arguments: List[str] = []
+    if options.copies is not None:
+        arguments += ["-n", str(options.copies)]
+    for option in options.options:
+        arguments += ["-o", option]
+    return tuple(arguments)
+
+
+class IppBackend(SubmissionBackend):
+    """
+    Sends Print-Job requests to CUPS over kept-alive IPP connections.
+    Every thread that submits jobs gets its own connection.
+    """
+
+    def __init__(
+        self,
+        uri_template: str = DEFAULT_IPP_URI,
+        user_name: Optional[str] = None,
+        timeout: float = 60.0,
+    ) -> None:
+        """
+        :param uri_template: The printer URI with a {queue} placeholder.
+        :param user_name: The user that owns the jobs, by default the current user.
+        :param timeout: Seconds to wait for CUPS on a socket operation.
+        """
+        self._uri_template = uri_template
+        self._user_name = user_name if user_name is not None else getuser()
+        self._timeout = timeout
+        self._local = local()
+        self._clients: List[IppClient] = []
+        self._lock = Lock()
+
+    @property
+    def _client(self) -> IppClient:
+        client: Optional[IppClient] = getattr(self._local, "client", None)
+        if client is None:
+            client = IppClient(self._uri_template.format(queue="queue"), self._timeout)
+            self._local.client = client
+            with self._lock:
+                self._clients.append(client)
+        return client
+
+    def submit(
+        self, pdf_file: Path, queue: str, options: PrintOptions
+    ) -> Optional[str]:
+        printer_uri = self._uri_template.format(queue=queue)
+        _LOGGER.info(f"Print-Job {pdf_file} on {printer_uri}")
+        try:
+            return self._print_job(pdf_file, queue, printer_uri, options)
+        except IppError as e:
+            raise SubmissionError(str(e), transient=e.is_server_error)
+        except FileNotFoundError as e:
+            raise SubmissionError(str(e), transient=False)
+        except RequestMaybeSent as e:
+            # CUPS may have accepted the job, so we must not send it again on our own.
+            raise SubmissionError(
+                f"{e}, the job may have been printed",
+                transient=False,
+                hint=f"Check with lpstat whether {pdf_file.name} is in the queue before you send it again.",
+            )
+        except (HTTPException, OSError) as e:
+            # We did not send the job, so trying again is safe.
+            raise SubmissionError(
+                f"Connection to {printer_uri} failed: {e}", transient=True
+            )
+
+    def _print_job(
+        self, pdf_file: Path, queue: str, printer_uri: str, options: PrintOptions
+    ) -> Optional[str]:
+        response = self._client.request(
+            urlsplit(printer_uri).path or "/",
+            PRINT_JOB,
+            [
+                operation_attributes(
+                    printer_uri,
+                    self._user_name,
+                    [
+                        Attribute(NAME_WITHOUT_LANGUAGE, "job-name", (pdf_file.name,)),
+                        Attribute(
+                            MIME_MEDIA_TYPE, "document-format", ("application/pdf",)
+                        ),
+                    ],
+                ),
+                job_attributes(options),
+            ],
+            pdf_file,
+        )
+        group = response.group(JOB_ATTRIBUTES_TAG)
+        job_id = group.get("job-id") if group is not None else None
+        if job_id is None or not isinstance(job_id.values[0], int):
+            return None
+        return f"{queue}-{job_id.values[0]}"
+
+    def close(self) -> None:
+        with self._lock:
+            for client in self._clients:
+                client.close()
+            self._clients.clear()
+
+
+# orientation-requested
+_LANDSCAPE = 4
+
+
+@lru_cache(maxsize=None)
+def job_attributes(options: PrintOptions) -> AttributeGroup:
+    """
+    Translate the `lp` options into IPP job template attributes.
+    Like `lp`, we pass the PPD options as name attributes and let CUPS map them.
+    We translate every set of options only once, so the callers must not change the result.
+    :param options:
+    :return:
+    """
+    attributes = []
+    if options.copies is not None:
+        attributes.append(Attribute(INTEGER, "copies", (options.copies,)))
+    for option in options.options:
+        if option == "landscape":
+            attributes.append(Attribute(ENUM, "orientation-requested", (_LANDSCAPE,)))
+            continue
+        name, separator, value = option.partition("=")
+        if not separator:
+            attributes.append(Attribute(BOOLEAN, name, (True,)))
+        elif value.isdigit():
+            attributes.append(Attribute(INTEGER, name, (int(value),)))
+        else:
+            attributes.append(Attribute(NAME_WITHOUT_LANGUAGE, name, (value,)))
+    return AttributeGroup(JOB_ATTRIBUTES_TAG, attributes)
+
+
+def create_backend(
+    backend: Backend, ipp_uri: str = DEFAULT_IPP_URI
+) -> SubmissionBackend:
+    """
+    Create the backend the user selected.
+    :param backend:
+    :param ipp_uri:
+    :return:
+    """
+    if backend == Backend.IPP:
+        return IppBackend(ipp_uri)
+    return LpBackend()
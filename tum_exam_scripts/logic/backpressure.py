@@ -0,0 +1,354 @@
+"""
+Backpressure from the print queues.
+If we hand a thousand jobs to CUPS at once, the FollowMe server times out and drops some of them.
+So we watch how many jobs and bytes are still pending in the queues and hold new submissions while a queue is
+too full, until it has drained to half of the limit. Thus, the queue stays full enough to keep the server busy.
+If a queue does not drain at all, e.g., because the printer is jammed, we give up after a while.
+"""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from getpass import getuser
+from http.client import HTTPException
+from logging import getLogger
+from threading import Lock
+from time import monotonic, sleep
+from types import TracebackType
+from typing import Dict, Iterator, NamedTuple, Optional, Sequence, Type
+from urllib.parse import urlsplit
+
+from tum_exam_scripts.defaults import (
+    DEFAULT_IPP_URI,
+    DEFAULT_MAX_QUEUED_JOBS,
+    DEFAULT_MAX_QUEUED_MEGABYTES,
+    DEFAULT_MAX_QUEUE_WAIT_MINUTES,
+    DEFAULT_QUEUE_POLL_INTERVAL,
+)
+from tum_exam_scripts.enums import Backend
+from tum_exam_scripts.logic.events import (
+    Listener,
+    PrintEvent,
+    QueueDrained,
+    QueueHeld,
+    QueuesUnwatched,
+)
+from tum_exam_scripts.utils.command import query_command
+from tum_exam_scripts.utils.ipp import (
+    GET_JOBS,
+    JOB_ATTRIBUTES_TAG,
+    KEYWORD,
+    Attribute,
+    IppClient,
+    IppError,
+    operation_attributes,
+)
+from tum_exam_scripts.utils.tracing import span
+
+_LOGGER = getLogger(__name__)
+
+# We resume sending when the queue has drained to this share of the limits.
+RESUME_RATIO = 0.5
+
+
+class QueueDepth(NamedTuple):
+    """
+    The jobs that are still pending in a print queue.
+    """
+
+    jobs: int = 0
+    bytes: int = 0
+
+    def add(self, jobs: int, size: int) -> "QueueDepth":
+        return QueueDepth(self.jobs + jobs, self.bytes + size)
+
+
+class QueueMonitorError(Exception):
+    """
+    We could not ask the printing system for its queues.
+    """
+
+
+class QueueStalledError(Exception):
+    """
+    A full print queue did not drain within the maximum wait.
+    """
+
+
+class QueueMonitor(ABC):
+    """
+    Asks the printing system how many jobs are pending.
+    """
+
+    @abstractmethod
+    def depths(self, queues: Sequence[str]) -> Dict[str, QueueDepth]:
+        """
+        The pending jobs of several queues with as few calls as possible.
+        :param queues:
+        :return: The depth of every queue.
+        :raises QueueMonitorError:
+        """
+
+    def close(self) -> None:
+        """
+        Release open connections.
+        """
+
+    def __enter__(self) -> "QueueMonitor":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class LpstatMonitor(QueueMonitor):
+    """
+    Calls `lpstat -o` once for all queues.
+    """
+
+    def depths(self, queues: Sequence[str]) -> Dict[str, QueueDepth]:
+        try:
+            output = query_command(["lpstat", "-o"])
+        except OSError as e:
+            raise QueueMonitorError(f"lpstat failed: {e}")
+        return parse_lpstat(output, queues)
+
+
+def parse_lpstat(output: str, queues: Sequence[str]) -> Dict[str, QueueDepth]:
+    """
+    Sum up the jobs and their sizes per queue in the output of `lpstat -o`, e.g.,
+
+        followmeppd-42          agent           1048576   Sat 18 Oct 2026 09:12:01 CEST
+
+    :param output:
+    :param queues:
+    :return:
+    """
+    depths = {queue: QueueDepth() for queue in queues}
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) < 3 or not fields[2].isdigit():
+            continue
+        queue, _, number = fields[0].rpartition("-")
+        if queue in depths and number.isdigit():
+            depths[queue] = depths[queue].add(1, int(fields[2]))
+    return depths
+
+
+class IppMonitor(QueueMonitor):
+    """
+    Sends Get-Jobs requests over a kept-alive IPP connection.
+    """
+
+    def __init__(
+        self, uri_template: str = DEFAULT_IPP_URI, user_name: Optional[str] = None
+    ) -> None:
+        self._uri_template = uri_template
+        self._user_name = user_name if user_name is not None else getuser()
+        self._client = IppClient(uri_template.format(queue="queue"))
+
+    def depths(self, queues: Sequence[str]) -> Dict[str, QueueDepth]:
+        return {queue: self._depth(queue) for queue in queues}
+
+    def _depth(self, queue: str) -> QueueDepth:
+        printer_uri = self._uri_template.format(queue=queue)
+        try:
+            response = self._client.request(
+                urlsplit(printer_uri).path or "/",
+                GET_JOBS,
+                [
+                    operation_attributes(
+                        printer_uri,
+                        self._user_name,
+                        [
+                            Attribute(KEYWORD, "which-jobs", ("not-completed",)),
+                            Attribute(
+                                KEYWORD,
+                                "requested-attributes",
+                                ("job-id", "job-k-octets"),
+                            ),
+                        ],
+                    )
+                ],
+            )
+        except (IppError, HTTPException, OSError) as e:
+            raise QueueMonitorError(f"Get-Jobs on {printer_uri} failed: {e}")
+        depth = QueueDepth()
+        for job in response.groups_with_tag(JOB_ATTRIBUTES_TAG):
+            k_octets = job.get("job-k-octets")
+            size = k_octets.values[0] if k_octets is not None else 0
+            depth = depth.add(1, size * 1024 if isinstance(size, int) else 0)
+        return depth
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class Backpressure:
+    """
+    Holds new submissions while a queue is over the limits.
+    We do not poll for every job: we add the jobs we submit to the last known depth
+    and only ask the printing system again when this estimate reaches a limit.
+    One poll refreshes all queues we send to.
+    If we cannot watch the queues, we warn once and do not hold anything.
+    While print_pdf_files() runs, it tells its listener when we hold a queue, see reporting().
+    """
+
+    def __init__(
+        self,
+        monitor: Optional[QueueMonitor],
+        max_jobs: int = DEFAULT_MAX_QUEUED_JOBS,
+        max_bytes: int = DEFAULT_MAX_QUEUED_MEGABYTES * 2**20,
+        poll_interval: float = DEFAULT_QUEUE_POLL_INTERVAL,
+        max_wait: float = DEFAULT_MAX_QUEUE_WAIT_MINUTES * 60.0,
+    ) -> None:
+        """
+        :param monitor: None never holds.
+        :param max_jobs: 0 does not limit the jobs.
+        :param max_bytes: 0 does not limit the bytes.
+        :param poll_interval: How long we wait before we look again at a full queue.
+        :param max_wait: How many seconds we wait for a full queue to drain, 0 waits forever.
+        """
+        self._monitor = monitor if max_jobs > 0 or max_bytes > 0 else None
+        self._max_jobs = max_jobs
+        self._max_bytes = max_bytes
+        self._poll_interval = poll_interval
+        self._max_wait = max_wait
+        self._estimates: Dict[str, QueueDepth] = {}
+        self._lock = Lock()
+        self._listener: Optional[Listener] = None
+
+    @contextmanager
+    def reporting(self, listener: Listener) -> Iterator[None]:
+        """
+        Tell the listener when we hold a queue or stop watching the queues.
+        :param listener:
+        :return:
+        """
+        self._listener = listener
+        try:
+            yield
+        finally:
+            self._listener = None
+
+    def _notify(self, event: PrintEvent) -> None:
+        if self._listener is not None:
+            self._listener(event)
+
+    def wait(self, queue: str, size: int) -> None:
+        """
+        Block until the queue can take another job and count the job.
+        :param queue:
+        :param size: The size of the job in bytes.
+        :return:
+        :raises QueueStalledError: If the queue did not drain within the maximum wait.
+        """
+        with self._lock:
+            if self._monitor is None:
+                return
+            estimate = self._estimates.get(queue)
+            if estimate is None or self._over(estimate, size):
+                estimate = self._poll(queue)
+                if estimate is not None and self._over(estimate, size):
+                    estimate = self._hold(queue, estimate)
+            if estimate is not None:
+                self._estimates[queue] = estimate.add(1, size)
+
+    def _over(self, depth: QueueDepth, size: int) -> bool:
+        return (self._max_jobs > 0 and depth.jobs >= self._max_jobs) or (
+            self._max_bytes > 0 and depth.bytes + size > self._max_bytes
+        )
+
+    def _drained(self, depth: QueueDepth) -> bool:
+        return (
+            self._max_jobs == 0 or depth.jobs <= self._max_jobs * RESUME_RATIO
+        ) and (self._max_bytes == 0 or depth.bytes <= self._max_bytes * RESUME_RATIO)
+
+    def _hold(self, queue: str, depth: QueueDepth) -> Optional[QueueDepth]:
+        _LOGGER.info(
+            f"{queue} has {depth.jobs} pending jobs with {depth.bytes} bytes, we wait until it drains",
+            extra={
+                "queue": queue,
+                "pending_jobs": depth.jobs,
+                "pending_bytes": depth.bytes,
+            },
+        )
+        self._notify(QueueHeld(queue, depth.jobs, depth.bytes))
+        deadline = monotonic() + self._max_wait if self._max_wait > 0 else None
+        current: Optional[QueueDepth] = depth
+        with span("backpressure.wait", queue=queue) as waiting:
+            polls = 0
+            while current is not None and not self._drained(current):
+                if deadline is not None and monotonic() >= deadline:
+                    waiting.set(polls=polls)
+                    raise QueueStalledError(
+                        f"{queue} still has {current.jobs} pending jobs after {self._max_wait / 60:.0f} minutes"
+                    )
+                sleep(self._poll_interval)
+                current = self._poll(queue)
+                polls += 1
+            waiting.set(polls=polls)
+        _LOGGER.info(
+            f"{queue} drained after {waiting.duration:.1f}s",
+            extra={"queue": queue, "duration": round(waiting.duration, 3)},
+        )
+        self._notify(QueueDrained(queue, waiting.duration))
+        return current
+
+    def _poll(self, queue: str) -> Optional[QueueDepth]:
+        assert self._monitor is not None
+        queues = list(dict.fromkeys([*self._estimates, queue]))
+        try:
+            self._estimates.update(self._monitor.depths(queues))
+        except QueueMonitorError as e:
+            _LOGGER.warning(f"We stop watching the print queues: {e}")
+            self._notify(QueuesUnwatched(str(e)))
+            self._monitor.close()
+            self._monitor = None
+            return None
+        return self._estimates.get(queue, QueueDepth())
+
+    def close(self) -> None:
+        """
+        Release the connections of the monitor.
+        """
+        if self._monitor is not None:
+            self._monitor.close()
+
+    def __enter__(self) -> "Backpressure":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def create_backpressure(
+    backend: Backend,
+    ipp_uri: str = DEFAULT_IPP_URI,
+    max_jobs: int = DEFAULT_MAX_QUEUED_JOBS,
+    max_megabytes: int = DEFAULT_MAX_QUEUED_MEGABYTES,
+    max_wait_minutes: int = DEFAULT_MAX_QUEUE_WAIT_MINUTES,
+) -> Backpressure:
+    """
+    Watch the queues the same way the backend submits the jobs.
+    :param backend:
+    :param ipp_uri:
+    :param max_jobs: 0 does not limit the jobs.
+    :param max_megabytes: 0 does not limit the bytes.
+    :param max_wait_minutes: 0 waits forever for a full queue.
+    :return:
+    """
+    monitor: Optional[QueueMonitor] = None
+    if max_jobs > 0 or max_megabytes > 0:
+        monitor = IppMonitor(ipp_uri) if backend == Backend.IPP else LpstatMonitor()
+    return Backpressure(
+        monitor, max_jobs, max_megabytes * 2**20, max_wait=max_wait_minutes * 60.0
+    )
@@ -0,0 +1,180 @@
+"""
+Compaction of the booklets before we send them.
+Some booklets carry uncompressed content streams or the same font and image several times,
+and every byte goes over the VPN to the printing server. So we write copies with compressed streams
+and without duplicated objects into the spool area and send the copies, if they are considerably smaller.
+"""
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
+from logging import getLogger
+from os.path import getsize
+from pathlib import Path
+from threading import Lock
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from tum_exam_scripts.defaults import DEFAULT_MIN_SAVING_PERCENT
+from tum_exam_scripts.logic.spool import SpoolArea
+from tum_exam_scripts.logic.validation import DEFAULT_VALIDATION_WORKERS, run_pipelined
+from tum_exam_scripts.utils.pdf_merge import compact_pdf
+from tum_exam_scripts.utils.pdf_objects import PdfSyntaxError
+from tum_exam_scripts.utils.tracing import span
+
+_LOGGER = getLogger(__name__)
+
+_MEGABYTE = 2**20
+
+
+class CompactionResult(NamedTuple):
+    """
+    The outcome of compacting a single booklet.
+    """
+
+    pdf_file: Path
+    copy: Optional[Path]
+    original_bytes: int
+    compacted_bytes: int
+    problem: Optional[str] = None
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.compacted_bytes if self.copy else 0
+
+
+def compact_booklet(pdf_file: Path, copy: Path, min_saving: float) -> CompactionResult:
+    """
+    Write the compacted copy and keep it if it saves enough. We run in a worker process.
+    :param pdf_file:
+    :param copy:
+    :param min_saving: The share of the bytes the copy has to save, e.g., 0.1.
+    :return:
+    """
+    original_bytes = getsize(pdf_file)
+    try:
+        compact_pdf(pdf_file, copy)
+        compacted_bytes = getsize(copy)
+    except (OSError, PdfSyntaxError, RecursionError) as e:
+        _remove(copy)
+        return CompactionResult(
+            pdf_file, None, original_bytes, original_bytes, str(e) or type(e).__name__
+        )
+    if original_bytes - compacted_bytes < min_saving * original_bytes:
+        _remove(copy)
+        return CompactionResult(pdf_file, None, original_bytes, compacted_bytes)
+    return CompactionResult(pdf_file, copy, original_bytes, compacted_bytes)
+
+
+def _remove(path: Path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class Compactor:
+    """
+    Compacts the booklets on a process pool while they pass through the pipeline, and adds the copies to the spool area.
+    """
+
+    def __init__(
+        self,
+        spool: SpoolArea,
+        processes: Executor,
+        workers: int = DEFAULT_VALIDATION_WORKERS,
+        min_saving_percent: float = DEFAULT_MIN_SAVING_PERCENT,
+    ) -> None:
+        self.spool = spool
+        self._processes = processes
+        self._workers = workers
+        self._min_saving = min_saving_percent / 100
+        self._lock = Lock()
+        self.compacted = 0
+        self.skipped = 0
+        self.original_bytes = 0
+        self.saved_bytes = 0
+
+    def compact(self, pdf_files: Iterable[Path]) -> Iterator[Path]:
+        """
+        Compact the booklets and yield them in input order as soon as their copy is ready.
+        We yield the booklets themselves; spool.source() knows the copies.
+        :param pdf_files:
+        :return:
+        """
+        threads = ThreadPoolExecutor(
+            max_workers=self._workers, thread_name_prefix="compaction"
+        )
+        try:
+            with span("compaction") as current:
+                for pdf_file in run_pipelined(pdf_files, self._compact, threads):
+                    yield pdf_file
+                current.set(
+                    compacted=self.compacted,
+                    skipped=self.skipped,
+                    saved_bytes=self.saved_bytes,
+                )
+        finally:
+            threads.shutdown(wait=False)
+
+    def _compact(self, pdf_file: Path) -> Path:
+        copy = self.spool.new_path(pdf_file.name)
+        with span("compaction.file", file=pdf_file) as current:
+            result = self._processes.submit(
+                compact_booklet, pdf_file, copy, self._min_saving
+            ).result()
+            current.set(bytes=result.original_bytes, saved_bytes=result.saved_bytes)
+        if result.problem is not None:
+            _LOGGER.warning(f"We send {pdf_file} as it is: {result.problem}")
+        with self._lock:
+            self.original_bytes += result.original_bytes
+            if result.copy is not None:
+                self.compacted += 1
+                self.saved_bytes += result.saved_bytes
+            else:
+                self.skipped += 1
+        if result.copy is not None:
+            _LOGGER.info(
+                f"{pdf_file} shrank from {result.original_bytes} to {result.compacted_bytes} bytes"
+            )
+            self.spool.add_copy(pdf_file, result.copy)
+        return pdf_file
+
+    def summary(self) -> str:
+        """
+        The bytes we saved, for the user.
+        :return:
+        """
+        share = self.saved_bytes / self.original_bytes if self.original_bytes else 0.0
+        return (
+            f"We compressed {self.compacted} of {self.compacted + self.skipped} booklets "
+            f"and sent {self.saved_bytes / _MEGABYTE:.1f} MB ({share:.0%}) less."
+        )
+
+
+@contextmanager
+def open_compactor(
+    enabled: bool,
+    spool: Optional[SpoolArea],
+    workers: int = DEFAULT_VALIDATION_WORKERS,
+    min_saving_percent: float = DEFAULT_MIN_SAVING_PERCENT,
+) -> Iterator[Optional[Compactor]]:
+    """
+    Start the process pool of the compaction.
+    We spawn the processes, forking a process with running threads is not safe.
+    :param enabled: If false, we yield None.
+    :param spool: Where we write the copies, we need one to compact.
+    :param workers:
+    :param min_saving_percent: We only send a copy if it is so many percent smaller than the booklet.
+    :return:
+    """
+    if not enabled or spool is None:
+        yield None
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_context
+
+    processes = ProcessPoolExecutor(
+        max_workers=workers, mp_context=get_context("spawn")
+    )
+    try:
+        yield Compactor(spool, processes, workers, min_saving_percent)
+    finally:
+        processes.shutdown(wait=False)
@@ -0,0 +1,136 @@
+"""
+Booklet discovery.
+"""
+import re
+from logging import getLogger
+from os import scandir
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+_LOGGER = getLogger(__name__)
+
+BOOKLET_SUFFIX = "-book.pdf"
+_DIGITS = re.compile(r"(\d+)")
+_RANGE = re.compile(r"^\s*[A-Za-z]*(\d+)?\s*(-\s*[A-Za-z]*(\d+)?)?\s*$")
+
+
+class ExamRange(NamedTuple):
+    """
+    The exam numbers from first to last, both included. None means open.
+    """
+
+    first: Optional[int]
+    last: Optional[int]
+
+    def __contains__(self, number: object) -> bool:
+        if not isinstance(number, int):
+            return False
+        return (self.first is None or self.first <= number) and (
+            self.last is None or number <= self.last
+        )
+
+
+def parse_exam_ranges(text: str) -> List[ExamRange]:
+    """
+    Parse a comma-separated list of exam numbers and ranges, e.g., `1-120,250,E0300-`.
+    :param text:
+    :return:
+    :raises ValueError: If the text is not a list of ranges.
+    """
+    ranges = []
+    for part in text.split(","):
+        match = _RANGE.match(part)
+        if match is None or match.group(1) is None and match.group(3) is None:
+            raise ValueError(f"{part.strip()!r} is not an exam number or range")
+        first = int(match.group(1)) if match.group(1) is not None else None
+        if match.group(2) is None:
+            ranges.append(ExamRange(first, first))
+            continue
+        last = int(match.group(3)) if match.group(3) is not None else None
+        if first is not None and last is not None and last < first:
+            raise ValueError(f"{part.strip()!r} is an empty range")
+        ranges.append(ExamRange(first, last))
+    return ranges
+
+
+def exam_number(pdf_file: Path) -> Optional[int]:
+    """
+    The number of an exam, e.g., 12 for E0012-book.pdf.
+    :param pdf_file:
+    :return: None if the name has no number.
+    """
+    numbers = _DIGITS.findall(pdf_file.name[: -len(BOOKLET_SUFFIX)])
+    return int(numbers[-1]) if len(numbers) > 0 else None
+
+
+def natural_key(pdf_file: Path) -> Tuple[Tuple[Union[int, str], ...], ...]:
+    """
+    Sort numbers by their value, so E2000 comes before E10000, also in the names of the room directories.
+    :param pdf_file:
+    :return:
+    """
+    return tuple(
+        tuple(int(t) if t.isdigit() else t.casefold() for t in _DIGITS.split(part))
+        for part in pdf_file.parts
+    ) + ((pdf_file.name,),)
+
+
+def iter_booklets(
+    directory: Path,
+    recursive: bool = False,
+    include: Optional[Sequence[ExamRange]] = None,
+    exclude: Optional[Sequence[ExamRange]] = None,
+) -> Iterator[Path]:
+    """
+    Yield the booklets in the order the file system lists them, while we still read the directory.
+    We skip hidden files and directories.
+    :param directory:
+    :param recursive: Also look into the subdirectories, e.g., one per room.
+    :param include: Only yield the exams with a number in one of these ranges.
+    :param exclude: Skip the exams with a number in one of these ranges.
+    :return:
+    """
+    pending = [directory]
+    while len(pending) > 0:
+        current = pending.pop()
+        subdirectories = []
+        with scandir(current) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.name.endswith(BOOKLET_SUFFIX) and entry.is_file():
+                    pdf_file = Path(entry.path)
+                    if _selected(exam_number(pdf_file), include, exclude):
+                        yield pdf_file
+                elif recursive and entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(Path(entry.path))
+        pending.extend(sorted(subdirectories, key=natural_key, reverse=True))
+
+
+def discover_booklets(
+    directory: Path,
+    recursive: bool = False,
+    include: Optional[Sequence[ExamRange]] = None,
+    exclude: Optional[Sequence[ExamRange]] = None,
+) -> List[Path]:
+    """
+    All booklets in natural order, see iter_booklets.
+    :param directory:
+    :param recursive:
+    :param include:
+    :param exclude:
+    :return:
+    """
+    return sorted(
+        iter_booklets(directory, recursive, include, exclude), key=natural_key
+    )
+
+
+def _selected(
+    number: Optional[int],
+    include: Optional[Sequence[ExamRange]],
+    exclude: Optional[Sequence[ExamRange]],
+) -> bool:
+    if include is not None and not any(number in r for r in include):
+        return False
+    return exclude is None or not any(number in r for r in exclude)
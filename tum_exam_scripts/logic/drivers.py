@@ -0,0 +1,272 @@
+"""
+Printer driver provisioning.
+We keep the PPD file of the FollowMe printers in our cache directory, together with its SHA-256,
+and only download it again if the cached copy is missing or does not match.
+We ask lpstat which queues are already set up and configure the missing ones with a single sudo call.
+"""
+from logging import getLogger
+from os import replace
+from pathlib import Path
+from shlex import quote
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from tum_exam_scripts.utils.command import query_command, sudo_run
+from tum_exam_scripts.utils.files import file_hash, file_size, user_cache_directory
+from tum_exam_scripts.utils.tracing import span
+
+_LOGGER = getLogger(__name__)
+
+PPD_URL = (
+    "https://wiki.in.tum.de/foswiki/pub/Informatik/Benutzerwiki/XeroxDrucker/x2UNIV.ppd"
+)
+PPD_FILE_NAME = "x2UNIV.ppd"
+FOLLOWME_URI = "ipps://print.in.tum.de/printers/followme"
+_PPD_MAGIC = b"*PPD-Adobe"
+_DOWNLOAD_TIMEOUT = 60.0
+
+
+class DriverError(Exception):
+    """
+    We could not get a valid PPD file or could not configure the queues.
+    """
+
+
+class ProvisioningResult(NamedTuple):
+    """
+    What provision_queues() did.
+    """
+
+    # The queues we configured.
+    configured: List[str]
+    # The queues that were already configured, so we left them alone.
+    available: List[str]
+
+
+class QueueState(NamedTuple):
+    """
+    What lpstat reports about a printer queue.
+    """
+
+    name: str
+    device: Optional[str]
+    enabled: bool
+    accepting: bool
+
+    def configured(self, device: str = FOLLOWME_URI) -> bool:
+        """
+        :param device:
+        :return: Whether the queue sends to the device, is enabled, and accepts jobs.
+        """
+        return self.device == device and self.enabled and self.accepting
+
+
+class PpdCache:
+    """
+    The PPD file in the cache directory, and its SHA-256 next to it.
+    We write both atomically, so a cancelled download never leaves a torn PPD file that we would install later.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, url: str = PPD_URL) -> None:
+        """
+        :param directory: By default, the cache directory of the user.
+        :param url: Where we download the PPD file from.
+        """
+        directory = directory if directory is not None else user_cache_directory()
+        self.path = directory.joinpath(PPD_FILE_NAME)
+        self.checksum_path = directory.joinpath(PPD_FILE_NAME + ".sha256")
+        self.url = url
+
+    def cached(self, expected: Optional[str] = None) -> Optional[Path]:
+        """
+        :param expected: The SHA-256 the PPD file must have, if you know it.
+        :return: The cached PPD file if it matches the checksum we stored with it, and the expected one.
+        """
+        try:
+            stored = self.checksum_path.read_text(encoding="utf-8").strip()
+            actual = file_hash(self.path)
+        except OSError:
+            return None
+        if actual != stored:
+            _LOGGER.warning(f"The cached PPD file {self.path} is corrupted")
+            return None
+        if expected is not None and actual != expected.lower():
+            _LOGGER.warning(
+                f"The cached PPD file {self.path} has the SHA-256 {actual}, not {expected}"
+            )
+            return None
+        return self.path
+
+    def download(self, expected: Optional[str] = None) -> Path:
+        """
+        Download the PPD file into the cache.
+        :param expected:
+        :return:
+        :raises DriverError: If the download fails or is not a PPD file with the expected checksum.
+        """
+        _LOGGER.info("Download PPD file")
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with span("driver.download") as current:
+                try:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    with urlopen(self.url, timeout=_DOWNLOAD_TIMEOUT) as response:
+                        temporary.write_bytes(response.read())
+                except (URLError, OSError) as e:
+                    raise DriverError(f"We cannot download {self.url}: {e}") from e
+                current.set(bytes=file_size(temporary))
+            with temporary.open("rb") as fin:
+                if fin.read(len(_PPD_MAGIC)) != _PPD_MAGIC:
+                    raise DriverError(f"{self.url} is not a PPD file")
+            actual = file_hash(temporary)
+            if expected is not None and actual != expected.lower():
+                raise DriverError(
+                    f"{self.url} has the SHA-256 {actual}, not {expected}"
+                )
+            replace(temporary, self.path)
+            self.checksum_path.write_text(actual + "\n", encoding="utf-8")
+        finally:
+            if temporary.exists():
+                temporary.unlink()
+        _LOGGER.info("Success!")
+        return self.path
+
+    def get(
+        self,
+        offline: bool = False,
+        refresh: bool = False,
+        expected: Optional[str] = None,
+    ) -> Path:
+        """
+        :param offline: Never download, only use the cached PPD file.
+        :param refresh: Download the PPD file even if the cached one is fine.
+        :param expected:
+        :return: A PPD file with a verified checksum.
+        :raises DriverError:
+        """
+        cached = None if refresh and not offline else self.cached(expected)
+        if cached is not None:
+            _LOGGER.info(f"Use the cached PPD file {cached}")
+            return cached
+        if offline:
+            raise DriverError(
+                f"There is no valid PPD file in {self.path.parent}, "
+                "please install the driver once while you are online"
+            )
+        return self.download(expected)
+
+
+def parse_lpstat_queues(output: str) -> Dict[str, QueueState]:
+    """
+    The queues in the output of `lpstat -p -v -a`, e.g.,
+    printer followmeppd is idle.  enabled since Sat 18 Oct 2026 09:00:00 CEST
+    device for followmeppd: ipps://print.in.tum.de/printers/followme
+    followmeppd accepting requests since Sat 18 Oct 2026 09:00:00 CEST
+    :param output:
+    :return:
+    """
+    devices: Dict[str, str] = {}
+    enabled: Dict[str, bool] = {}
+    accepting: Dict[str, bool] = {}
+    for line in output.splitlines():
+        words = line.split()
+        if len(words) >= 4 and words[:2] == ["device", "for"]:
+            devices[words[2].rstrip(":")] = words[3]
+        elif len(words) >= 3 and words[0] == "printer":
+            enabled[words[1]] = "disabled" not in words[2:]
+        elif len(words) >= 3 and words[1:3] == ["accepting", "requests"]:
+            accepting[words[0]] = True
+        elif len(words) >= 4 and words[1:4] == ["not", "accepting", "requests"]:
+            accepting[words[0]] = False
+    names = set(devices) | set(enabled) | set(accepting)
+    return {
+        n: QueueState(n, devices.get(n), enabled.get(n, False), accepting.get(n, False))
+        for n in names
+    }
+
+
+def query_queues() -> Dict[str, QueueState]:
+    """
+    Calls `lpstat -p -v -a` once for all queues.
+    :return: The queues that CUPS knows, or none if we cannot ask it.
+    """
+    try:
+        return parse_lpstat_queues(query_command(["lpstat", "-p", "-v", "-a"]))
+    except OSError as e:
+        # lpstat also fails if there is no queue at all.
+        _LOGGER.info(f"lpstat failed, we configure all queues: {e}")
+        return {}
+
+
+def provisioning_script(queues: Sequence[str], ppd_file: Path) -> str:
+    """
+    The shell script that configures the queues; it stops at the first command that fails.
+    :param queues:
+    :param ppd_file:
+    :return:
+    """
+    commands = []
+    for queue in queues:
+        commands += [
+            [
+                "lpadmin",
+                "-E",
+                "-p",
+                queue,
+                "-v",
+                FOLLOWME_URI,
+                "-P",
+                str(ppd_file),
+                "-D",
+                "Xerox-Followme",
+                "-L",
+                "TUM",
+            ],
+            ["cupsenable", queue],
+            ["cupsaccept", queue],
+        ]
+    return " && ".join(" ".join(quote(a) for a in c) for c in commands)
+
+
+def provision_queues(
+    queues: Iterable[str],
+    ask_password: Callable[[], str],
+    offline: bool = False,
+    refresh: bool = False,
+    force: bool = False,
+    expected_sha256: Optional[str] = None,
+    cache: Optional[PpdCache] = None,
+) -> ProvisioningResult:
+    """
+    Make the queues available with the driver of the FollowMe printers.
+    Running it again is cheap: we skip the queues that are already configured and only ask for the password if there is work to do.
+    :param queues: The names of the queues, e.g., one per room.
+    :param ask_password: Returns the password for sudo; we only call it if we configure a queue.
+    :param offline: Install the cached PPD file, never download it.
+    :param refresh: Download the PPD file even if the cached one is fine.
+    :param force: Configure the queues even if lpstat reports them as configured.
+    :param expected_sha256: The SHA-256 the PPD file must have.
+    :param cache:
+    :return:
+    :raises DriverError: If we could not get the PPD file or sudo failed.
+    """
+    queues = list(dict.fromkeys(queues))
+    with span("driver.install", queues=len(queues)) as current:
+        states = {} if force else query_queues()
+        missing = [q for q in queues if q not in states or not states[q].configured()]
+        available = [q for q in queues if q not in missing]
+        current.set(configured=len(missing))
+        if not missing:
+            return ProvisioningResult([], available)
+        ppd_file = (cache if cache is not None else PpdCache()).get(
+            offline, refresh, expected_sha256
+        )
+        command = ["sh", "-c", provisioning_script(missing, ppd_file)]
+        returncode = sudo_run(command, ask_password())
+        if returncode != 0:
+            raise DriverError(
+                f"sudo exited with code {returncode}. "
+                f"Please open a shell and call 'sudo {' '.join(quote(c) for c in command)}'"
+            )
+    return ProvisioningResult(missing, available)
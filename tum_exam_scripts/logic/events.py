@@ -0,0 +1,156 @@
+"""
+Events and results of a print run.
+print_pdf_files() tells a listener what happens while it runs instead of printing it,
+so the console and the library API show the same run in their own way.
+The listener is called on the thread that runs print_pdf_files(), except for BookletFinished,
+which comes from the submission threads, and RenewalFailed, which comes from the keep-alive thread;
+the calls never overlap.
+"""
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple, Optional, Union
+
+if TYPE_CHECKING:
+    from tum_exam_scripts.logic.submission import SubmissionResult
+    from tum_exam_scripts.logic.validation import ValidationResult
+
+VALIDATION = "validation"
+SUBMISSION = "submission"
+
+
+class StageStarted(NamedTuple):
+    """
+    We start to validate or to submit the booklets.
+    In the default mode, both stages run at the same time; in the strict mode, the validation finishes first.
+    """
+
+    stage: str
+    # Empty if we discover the booklets while we send them.
+    pdf_files: List[Path]
+    # The page count of every booklet, None if we do not know the booklets in advance.
+    pages: Optional[Dict[Path, Optional[int]]]
+
+
+class StageFinished(NamedTuple):
+    """
+    A stage is over, also if it failed.
+    """
+
+    stage: str
+
+
+class BookletValidated(NamedTuple):
+    """
+    We checked a booklet; invalid booklets are not sent.
+    """
+
+    result: "ValidationResult"
+
+
+class JobQueued(NamedTuple):
+    """
+    We hand a job to the submission engine: one booklet, or several booklets that we merged into one job.
+    """
+
+    pdf_files: List[Path]
+    queue: str
+
+
+class BookletFinished(NamedTuple):
+    """
+    A booklet was sent, or we gave up on it.
+    """
+
+    result: "SubmissionResult"
+
+
+class QueueHeld(NamedTuple):
+    """
+    A print queue is too full, so we hold new jobs until it has drained, see Backpressure.
+    """
+
+    queue: str
+    # The pending jobs and their bytes in the queue.
+    jobs: int
+    bytes: int
+
+
+class QueueDrained(NamedTuple):
+    """
+    A queue that we held has drained, and we send jobs to it again.
+    """
+
+    queue: str
+    seconds: float
+
+
+class QueuesUnwatched(NamedTuple):
+    """
+    We cannot see how full the print queues are, so we send all jobs without holding them.
+    """
+
+    problem: str
+
+
+class RenewalFailed(NamedTuple):
+    """
+    We could not renew the printing enablement in the background, see EnablementKeeper.
+    The jobs go on, and we try again after retry_in seconds.
+    """
+
+    problem: str
+    retry_in: float
+
+
+class BatchFinished(NamedTuple):
+    """
+    All jobs of a batch are done. The next batch starts when the listener returns.
+    """
+
+    number: int
+
+
+class PrintReport(NamedTuple):
+    """
+    What happened to the booklets of a print run.
+    """
+
+    # One result per booklet that we tried to send, in the order we submitted them.
+    results: List["SubmissionResult"]
+    # The booklets we did not send because they are not valid PDFs.
+    invalid: List["ValidationResult"]
+
+    @property
+    def sent(self) -> List[Path]:
+        return [r.pdf_file for r in self.results if r.ok]
+
+    @property
+    def failed(self) -> List["SubmissionResult"]:
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def ok(self) -> bool:
+        return len(self.invalid) == 0 and all(r.ok for r in self.results)
+
+
+class PrintFinished(NamedTuple):
+    """
+    The last event of a print run in the library API.
+    """
+
+    report: PrintReport
+
+
+PrintEvent = Union[
+    StageStarted,
+    StageFinished,
+    BookletValidated,
+    JobQueued,
+    BookletFinished,
+    QueueHeld,
+    QueueDrained,
+    QueuesUnwatched,
+    RenewalFailed,
+    BatchFinished,
+    PrintFinished,
+]
+Listener = Callable[[PrintEvent], None]
@@ -0,0 +1,315 @@
+"""
+Job status.
+We take the job IDs of the booklets from the journal of an exam directory and ask the printing system
+for all of them with one call per poll, instead of one call per job.
+"""
+import re
+from abc import ABC, abstractmethod
+from datetime import datetime
+from getpass import getuser
+from http.client import HTTPException
+from logging import getLogger
+from pathlib import Path
+from time import monotonic, sleep
+from types import TracebackType
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Type
+from urllib.parse import urlsplit
+
+from tum_exam_scripts.defaults import DEFAULT_IPP_URI
+from tum_exam_scripts.enums import Backend
+from tum_exam_scripts.logic.journal import STATUS_SENT, SubmissionJournal
+from tum_exam_scripts.utils.command import query_command
+from tum_exam_scripts.utils.ipp import (
+    GET_JOBS,
+    JOB_ATTRIBUTES_TAG,
+    KEYWORD,
+    Attribute,
+    IppClient,
+    IppError,
+    operation_attributes,
+)
+from tum_exam_scripts.utils.tracing import span
+
+_LOGGER = getLogger(__name__)
+
+PENDING = "pending"
+PROCESSING = "processing"
+COMPLETED = "completed"
+FAILED = "failed"
+JOB_STATES = (PENDING, PROCESSING, COMPLETED, FAILED)
+
+# The values of the IPP job-state attribute, RFC 8011 section 5.3.7
+_IPP_JOB_STATES = {
+    3: PENDING,
+    4: PENDING,
+    5: PROCESSING,
+    6: PROCESSING,
+    7: FAILED,
+    8: FAILED,
+    9: COMPLETED,
+}
+_NOW_PRINTING = re.compile(r"now printing (\S+?)\.(?:\s|$)")
+
+
+class JobStatusError(Exception):
+    """
+    We could not ask the printing system for the jobs.
+    """
+
+
+class TrackedJob(NamedTuple):
+    """
+    A job that we submitted, according to the journal.
+    """
+
+    job_id: str
+    pdf_file: Path
+    submitted: Optional[datetime]
+
+
+class StatusSummary(NamedTuple):
+    """
+    The states of all tracked jobs at one poll.
+    """
+
+    states: Dict[str, str]
+    pages_per_minute: float
+
+    def count(self, state: str) -> int:
+        return sum(1 for s in self.states.values() if s == state)
+
+    @property
+    def done(self) -> bool:
+        return all(s in (COMPLETED, FAILED) for s in self.states.values())
+
+    def __str__(self) -> str:
+        counts = "  ".join(f"{self.count(s)} {s}" for s in JOB_STATES)
+        return f"{counts}  {self.pages_per_minute:.0f} pages/min"
+
+
+class JobStatusSource(ABC):
+    """
+    Asks the printing system for the state of jobs.
+    """
+
+    @abstractmethod
+    def states(self, job_ids: Sequence[str]) -> Dict[str, str]:
+        """
+        The states of all jobs with as few calls as possible.
+        Jobs the printing system does not know anymore are completed, it removed them from its history.
+        :param job_ids: The IDs in the form queue-number, e.g., followmeppd-42.
+        :return: One of JOB_STATES per job.
+        :raises JobStatusError:
+        """
+
+    def close(self) -> None:
+        """
+        Release open connections.
+        """
+
+    def __enter__(self) -> "JobStatusSource":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class LpstatStatus(JobStatusSource):
+    """
+    Calls `lpstat -o -p` once per poll.
+    lpstat only lists the jobs that are not completed yet, so it cannot tell canceled jobs from printed ones.
+    """
+
+    def states(self, job_ids: Sequence[str]) -> Dict[str, str]:
+        try:
+            output = query_command(["lpstat", "-o", "-p"])
+        except OSError as e:
+            raise JobStatusError(f"lpstat failed: {e}")
+        return parse_lpstat_states(output, job_ids)
+
+
+def parse_lpstat_states(output: str, job_ids: Sequence[str]) -> Dict[str, str]:
+    """
+    The states of the jobs in the output of `lpstat -o -p`, e.g.,
+
+        followmeppd-42          agent           1048576   Sat 18 Oct 2026 09:12:01 CEST
+        printer followmeppd now printing followmeppd-41.  enabled since Sat 18 Oct 2026 09:00:00 CEST
+
+    :param output:
+    :param job_ids:
+    :return:
+    """
+    listed = set()
+    printing = set()
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) == 0:
+            continue
+        if fields[0] == "printer":
+            match = _NOW_PRINTING.search(line)
+            if match is not None:
+                printing.add(match.group(1))
+        else:
+            listed.add(fields[0])
+    return {
+        job_id: PROCESSING
+        if job_id in printing
+        else PENDING
+        if job_id in listed
+        else COMPLETED
+        for job_id in job_ids
+    }
+
+
+class IppStatus(JobStatusSource):
+    """
+    Sends one Get-Jobs request per queue and poll over a kept-alive IPP connection.
+    Unlike lpstat, IPP reports canceled and aborted jobs, which we count as failed.
+    """
+
+    def __init__(
+        self, uri_template: str = DEFAULT_IPP_URI, user_name: Optional[str] = None
+    ) -> None:
+        self._uri_template = uri_template
+        self._user_name = user_name if user_name is not None else getuser()
+        self._client = IppClient(uri_template.format(queue="queue"))
+
+    def states(self, job_ids: Sequence[str]) -> Dict[str, str]:
+        known: Dict[str, str] = {}
+        for queue in dict.fromkeys(j.rpartition("-")[0] for j in job_ids):
+            known.update(self._queue_states(queue))
+        return {job_id: known.get(job_id, COMPLETED) for job_id in job_ids}
+
+    def _queue_states(self, queue: str) -> Dict[str, str]:
+        printer_uri = self._uri_template.format(queue=queue)
+        try:
+            response = self._client.request(
+                urlsplit(printer_uri).path or "/",
+                GET_JOBS,
+                [
+                    operation_attributes(
+                        printer_uri,
+                        self._user_name,
+                        [
+                            Attribute(KEYWORD, "which-jobs", ("all",)),
+                            Attribute(
+                                KEYWORD,
+                                "requested-attributes",
+                                ("job-id", "job-state"),
+                            ),
+                        ],
+                    )
+                ],
+            )
+        except (IppError, HTTPException, OSError) as e:
+            raise JobStatusError(f"Get-Jobs on {printer_uri} failed: {e}")
+        states = {}
+        for job in response.groups_with_tag(JOB_ATTRIBUTES_TAG):
+            job_id = job.get("job-id")
+            job_state = job.get("job-state")
+            if job_id is None or job_state is None:
+                continue
+            number, state = job_id.values[0], job_state.values[0]
+            if isinstance(number, int) and isinstance(state, int):
+                states[f"{queue}-{number}"] = _IPP_JOB_STATES.get(state, PENDING)
+        return states
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def create_status_source(
+    backend: Backend, ipp_uri: str = DEFAULT_IPP_URI
+) -> JobStatusSource:
+    """
+    Ask the printing system the same way the backend submits the jobs.
+    :param backend:
+    :param ipp_uri:
+    :return:
+    """
+    if backend == Backend.IPP:
+        return IppStatus(ipp_uri)
+    return LpstatStatus()
+
+
+def tracked_jobs(journal: SubmissionJournal) -> List[TrackedJob]:
+    """
+    The jobs of the latest submission of every booklet in the journal.
+    :param journal:
+    :return: The jobs in the order of the journal.
+    """
+    jobs = []
+    for entry in journal.load().values():
+        if entry.status != STATUS_SENT or entry.job_id is None:
+            continue
+        try:
+            submitted: Optional[datetime] = datetime.fromisoformat(entry.time)
+        except ValueError:
+            submitted = None
+        jobs.append(
+            TrackedJob(entry.job_id, journal.directory.joinpath(entry.path), submitted)
+        )
+    return jobs
+
+
+def summarize(
+    jobs: Sequence[TrackedJob],
+    states: Dict[str, str],
+    pages: Dict[Path, Optional[int]],
+    now: Optional[datetime] = None,
+) -> StatusSummary:
+    """
+    Count the jobs per state and compute the pages per minute since the first submission.
+    :param jobs:
+    :param states:
+    :param pages:
+    :param now:
+    :return:
+    """
+    now = now if now is not None else datetime.now()
+    starts = [j.submitted for j in jobs if j.submitted is not None]
+    minutes = (now - min(starts)).total_seconds() / 60 if len(starts) > 0 else 0.0
+    completed = sum(
+        pages.get(j.pdf_file) or 0 for j in jobs if states.get(j.job_id) == COMPLETED
+    )
+    return StatusSummary(states, completed / minutes if minutes > 0 else 0.0)
+
+
+def watch_jobs(
+    source: JobStatusSource,
+    jobs: Sequence[TrackedJob],
+    pages: Dict[Path, Optional[int]],
+    wait: bool = False,
+    interval: float = 5.0,
+    timeout: Optional[float] = None,
+    on_summary: Optional[Callable[[StatusSummary], None]] = None,
+) -> StatusSummary:
+    """
+    Poll the states of the jobs.
+    :param source:
+    :param jobs:
+    :param pages: The page count of every booklet for the pages per minute.
+    :param wait: Poll until all jobs are completed or failed, otherwise poll once.
+    :param interval: The seconds between two polls.
+    :param timeout: Give up waiting after so many seconds, None waits forever.
+    :param on_summary: Called after every poll.
+    :return: The summary of the last poll; it is not done if we timed out.
+    :raises JobStatusError:
+    """
+    job_ids = [j.job_id for j in jobs]
+    deadline = monotonic() + timeout if timeout is not None else None
+    while True:
+        with span("status.poll", files=len(job_ids)):
+            summary = summarize(jobs, source.states(job_ids), pages)
+        if on_summary is not None:
+            on_summary(summary)
+        if not wait or summary.done:
+            return summary
+        if deadline is not None and monotonic() + interval > deadline:
+            return summary
+        sleep(interval)
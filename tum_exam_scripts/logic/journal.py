@@ -0,0 +1,215 @@
+"""
+Submission journal.
+An append-only JSON-lines file in the exam directory that records every booklet we submitted.
+It allows us to resume an interrupted print run.
+"""
+from datetime import datetime
+from json import JSONDecodeError, dumps, loads
+from logging import getLogger
+from os import fsync, path
+from pathlib import Path
+from queue import Empty, Queue
+from threading import Lock, Thread
+from types import TracebackType
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Type
+
+from tum_exam_scripts.logic.submission import SubmissionResult
+from tum_exam_scripts.utils.files import file_hash
+
+_LOGGER = getLogger(__name__)
+
+JOURNAL_FILE_NAME = ".tum-exam-scripts-journal.jsonl"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+
+class JournalEntry(NamedTuple):
+    """
+    One submission of one booklet.
+    """
+
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: Optional[str]
+    job_id: Optional[str]
+    status: str
+    time: str
+
+
+class SubmissionJournal:
+    """
+    Appends the submissions to the journal of a directory.
+
+    record() only puts the entry into a queue.
+    A writer thread hashes the sent booklets, appends everything that is queued in one write, and fsyncs once per write,
+    so the submission threads never wait for the disk.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.path = directory.joinpath(JOURNAL_FILE_NAME)
+        self._queue: "Queue[Optional[JournalEntry]]" = Queue()
+        self._writer: Optional[Thread] = None
+        self._lock = Lock()
+
+    def load(self) -> Dict[str, JournalEntry]:
+        """
+        Read the journal.
+        :return: The latest entry per booklet.
+        """
+        entries: Dict[str, JournalEntry] = {}
+        if not self.path.exists():
+            return entries
+        with self.path.open(encoding="utf-8") as fin:
+            for line in fin:
+                try:
+                    entry = JournalEntry(**loads(line))
+                except (JSONDecodeError, TypeError):
+                    # A torn write from a crash, we ignore it.
+                    _LOGGER.warning(f"Ignoring broken journal line in {self.path}")
+                    continue
+                entries[entry.path] = entry
+        return entries
+
+    def already_sent(self, pdf_files: Iterable[Path]) -> List[Path]:
+        """
+        Return the booklets that the journal confirms as sent and that did not change since.
+        :param pdf_files:
+        :return:
+        """
+        entries = self.load()
+        return [f for f in pdf_files if self._confirmed(entries, f)]
+
+    def not_sent(self, pdf_files: Iterable[Path]) -> Iterator[Path]:
+        """
+        Like already_sent, but yield the other booklets as they come, e.g., while we discover them.
+        :param pdf_files:
+        :return:
+        """
+        entries = self.load()
+        for pdf_file in pdf_files:
+            if self._confirmed(entries, pdf_file):
+                _LOGGER.info(f"Skipping {pdf_file}, we already sent it")
+            else:
+                yield pdf_file
+
+    def _confirmed(self, entries: Dict[str, JournalEntry], pdf_file: Path) -> bool:
+        entry = entries.get(self._key(pdf_file))
+        if entry is None or entry.status != STATUS_SENT:
+            return False
+        try:
+            stat = pdf_file.stat()
+            if stat.st_size != entry.size:
+                return False
+            return stat.st_mtime_ns == entry.mtime_ns or (
+                entry.sha256 is not None and entry.sha256 == file_hash(pdf_file)
+            )
+        except OSError:
+            return False
+
+    def record(self, result: SubmissionResult) -> None:
+        """
+        Queue a submission result for the journal.
+        Call this from the submission threads; we only stat the booklet, the writer thread hashes it.
+        If the booklet is gone, we still record the job, but we will never confirm it as sent.
+        :param result:
+        :return:
+        """
+        try:
+            stat = result.pdf_file.stat()
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        except OSError as e:
+            _LOGGER.warning(f"Cannot stat {result.pdf_file} for the journal: {e}")
+            size, mtime_ns = -1, -1
+        self._start()
+        self._queue.put(
+            JournalEntry(
+                self._key(result.pdf_file),
+                size,
+                mtime_ns,
+                None,
+                result.job_id,
+                STATUS_SENT if result.ok else STATUS_FAILED,
+                datetime.now().isoformat(timespec="seconds"),
+            )
+        )
+
+    def _key(self, pdf_file: Path) -> str:
+        return path.relpath(pdf_file, self.directory)
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._writer is None:
+                self._writer = Thread(target=self._write, name="journal", daemon=True)
+                self._writer.start()
+
+    def _write(self) -> None:
+        try:
+            fout = self.path.open("a", encoding="utf-8")
+        except OSError as e:
+            _LOGGER.error(f"Cannot write the journal {self.path}: {e}")
+            while self._queue.get() is not None:
+                pass
+            return
+        with fout:
+            if _ends_with_torn_line(self.path):
+                fout.write("\n")
+            while True:
+                batch = [self._queue.get()]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except Empty:
+                        break
+                entries = [self._hashed(e) for e in batch if e is not None]
+                if entries:
+                    fout.write("".join(dumps(e._asdict()) + "\n" for e in entries))
+                    fout.flush()
+                    fsync(fout.fileno())
+                if len(entries) < len(batch):
+                    return
+
+    def _hashed(self, entry: JournalEntry) -> JournalEntry:
+        # The hash confirms a booklet that was copied or touched since, see _confirmed().
+        if entry.status != STATUS_SENT or entry.size < 0:
+            return entry
+        pdf_file = self.directory.joinpath(entry.path)
+        try:
+            sha256 = file_hash(pdf_file)
+            stat = pdf_file.stat()
+        except OSError:
+            return entry
+        if stat.st_size != entry.size or stat.st_mtime_ns != entry.mtime_ns:
+            # The booklet changed after we sent it, so the hash is not the one of the job.
+            return entry
+        return entry._replace(sha256=sha256)
+
+    def close(self) -> None:
+        """
+        Write the queued entries and stop the writer.
+        """
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+
+    def __enter__(self) -> "SubmissionJournal":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def _ends_with_torn_line(journal: Path) -> bool:
+    with journal.open("rb") as fin:
+        if fin.seek(0, 2) == 0:
+            return False
+        fin.seek(-1, 2)
+        return fin.read(1) != b"\n"
@@ -0,0 +1,142 @@
+"""
+Printing enablement keep-alive.
+The enablement on the printing page lapses after a while, and the printing server silently drops the jobs that arrive later.
+A long print run therefore renews the enablement in the background with the login flow of open-printing-page.
+The submission threads wait while a renewal is in flight, so no job arrives between the lapse and the renewal.
+"""
+from contextlib import contextmanager
+from logging import getLogger
+from os import environ
+from threading import Event, Thread
+from types import TracebackType
+from typing import Callable, Iterator, Optional, Type
+
+from tum_exam_scripts.defaults import (
+    DEFAULT_RENEW_INTERVAL,
+    DEFAULT_RENEW_RETRY_INTERVAL,
+    DEFAULT_UCENTRAL_URL,
+)
+from tum_exam_scripts.logic.events import Listener, RenewalFailed
+from tum_exam_scripts.utils.enablement import EnablementError, enable_printing
+from tum_exam_scripts.utils.tracing import span
+
+_LOGGER = getLogger(__name__)
+
+PASSWORD_VARIABLE = "TUM_EXAM_SCRIPTS_PASSWORD"
+
+
+class EnablementKeeper:
+    """
+    Renews the enablement every interval seconds while we are inside its context.
+    If a renewal fails, we warn, let the jobs pass, and try again after retry_interval seconds.
+    While print_pdf_files() runs, it tells its listener about failed renewals, see reporting().
+    """
+
+    def __init__(
+        self,
+        renew: Callable[[], bool],
+        interval: float = DEFAULT_RENEW_INTERVAL,
+        retry_interval: float = DEFAULT_RENEW_RETRY_INTERVAL,
+    ) -> None:
+        """
+        :param renew: Enables printing and returns whether printing was enabled before, see enable_printing().
+        :param interval:
+        :param retry_interval:
+        """
+        self._renew = renew
+        self._interval = interval
+        self._retry_interval = retry_interval
+        self._ready = Event()
+        self._ready.set()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+        self.renewals = 0
+        self.failures = 0
+        self._listener: Optional[Listener] = None
+
+    @contextmanager
+    def reporting(self, listener: Listener) -> Iterator[None]:
+        """
+        Tell the listener when a renewal in the background fails.
+        :param listener:
+        :return:
+        """
+        self._listener = listener
+        try:
+            yield
+        finally:
+            self._listener = None
+
+    def renew(self) -> bool:
+        """
+        Renew the enablement now; the submission threads wait meanwhile.
+        :return: False if printing was still enabled.
+        :raises EnablementError:
+        """
+        self._ready.clear()
+        try:
+            with span("enablement.renewal") as current:
+                enabled = self._renew()
+                current.set(enabled=enabled)
+        finally:
+            self._ready.set()
+        self.renewals += 1
+        return enabled
+
+    def wait(self) -> None:
+        """
+        Block while a renewal is in flight. Call this before every submission.
+        """
+        self._ready.wait()
+
+    def _run(self) -> None:
+        delay = self._interval
+        while not self._stop.wait(delay):
+            try:
+                if self.renew():
+                    _LOGGER.warning("The printing enablement had lapsed, we renewed it")
+                delay = self._interval
+            except EnablementError as e:
+                self.failures += 1
+                _LOGGER.warning(f"We could not renew the printing enablement: {e}")
+                if self._listener is not None:
+                    self._listener(RenewalFailed(str(e), self._retry_interval))
+                delay = self._retry_interval
+
+    def __enter__(self) -> "EnablementKeeper":
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name="keep-alive", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def create_enablement_keeper(
+    user_name: str,
+    url: str = DEFAULT_UCENTRAL_URL,
+    interval: float = DEFAULT_RENEW_INTERVAL,
+) -> EnablementKeeper:
+    """
+    A keeper that enables printing from this machine for the user; call renew() to enable it right away.
+    We take the password from the environment variable TUM_EXAM_SCRIPTS_PASSWORD or the password manager.
+    :param user_name: The informatics account.
+    :param url:
+    :param interval: How often the keeper renews the enablement.
+    :return:
+    """
+    password = environ.get(PASSWORD_VARIABLE)
+    if password is None:
+        from tum_exam_scripts.utils.password_handling import get_password_from_keyring
+
+        password = get_password_from_keyring(user_name)
+    return EnablementKeeper(lambda: enable_printing(user_name, password, url), interval)
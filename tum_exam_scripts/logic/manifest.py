@@ -0,0 +1,249 @@
+"""
+Booklet manifest.
+A JSON file in the exam directory with the size and the hash of every booklet we printed.
+We use it to find byte-identical booklets, e.g., a booklet that we downloaded twice,
+and to send only the booklets that changed since the last print run, e.g., after a late fix of the exam.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from json import JSONDecodeError, dumps, loads
+from logging import getLogger
+from os import path, replace
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from tum_exam_scripts.logic.journal import SubmissionJournal
+from tum_exam_scripts.logic.validation import DEFAULT_VALIDATION_WORKERS
+from tum_exam_scripts.utils.files import fast_file_hash
+from tum_exam_scripts.utils.tracing import span
+
+_LOGGER = getLogger(__name__)
+
+MANIFEST_FILE_NAME = ".tum-exam-scripts-manifest.json"
+HASH_ALGORITHM = "blake2b"
+
+
+class ManifestEntry(NamedTuple):
+    """
+    The state of one booklet.
+    """
+
+    size: int
+    mtime_ns: int
+    digest: str
+
+
+class ManifestChanges(NamedTuple):
+    """
+    The differences between the booklets and a manifest.
+    """
+
+    added: List[Path]
+    changed: List[Path]
+    unchanged: List[Path]
+    removed: List[str]
+
+
+class BookletSelection(NamedTuple):
+    """
+    The booklets that skip_unchanged_booklets() keeps, and why it skips the others.
+    """
+
+    # The booklets to send.
+    pdf_files: List[Path]
+    # The entries of all booklets that we could hash.
+    entries: Dict[Path, ManifestEntry]
+    # The groups of identical booklets; we keep the first of every group.
+    duplicates: List[List[Path]]
+    # The booklets that changed since the last print run; we send them.
+    changed: List[Path]
+    # The booklets that did not change since the last print run; we skip them.
+    unchanged: List[Path]
+
+
+class Manifest:
+    """
+    The manifest of one directory, keyed by the path of the booklet relative to the directory.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.path = directory.joinpath(MANIFEST_FILE_NAME)
+        self.entries: Dict[str, ManifestEntry] = {}
+        try:
+            content = loads(self.path.read_text(encoding="utf-8"))
+            if content.get("algorithm") == HASH_ALGORITHM:
+                self.entries = {
+                    key: ManifestEntry(**entry)
+                    for key, entry in content["booklets"].items()
+                }
+            else:
+                _LOGGER.warning(f"Ignoring the manifest {self.path} of another hash")
+        except FileNotFoundError:
+            pass
+        except (OSError, JSONDecodeError, ValueError, TypeError, KeyError) as e:
+            _LOGGER.warning(f"Ignoring the broken manifest {self.path}: {e}")
+
+    @property
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def key(self, pdf_file: Path) -> str:
+        return path.relpath(pdf_file, self.directory)
+
+    def get(self, pdf_file: Path) -> Optional[ManifestEntry]:
+        return self.entries.get(self.key(pdf_file))
+
+    def put(self, pdf_file: Path, entry: ManifestEntry) -> None:
+        self.entries[self.key(pdf_file)] = entry
+
+    def save(self) -> None:
+        """
+        Write the manifest. We replace the file atomically, so a crash never leaves a torn manifest.
+        """
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        content = {
+            "algorithm": HASH_ALGORITHM,
+            "booklets": {k: e._asdict() for k, e in self.entries.items()},
+        }
+        try:
+            temporary.write_text(
+                dumps(content, indent=1, sort_keys=True), encoding="utf-8"
+            )
+            replace(temporary, self.path)
+        except OSError as e:
+            _LOGGER.warning(f"Cannot write the manifest {self.path}: {e}")
+
+
+def _hash(pdf_file: Path) -> Optional[ManifestEntry]:
+    try:
+        stat = pdf_file.stat()
+        return ManifestEntry(stat.st_size, stat.st_mtime_ns, fast_file_hash(pdf_file))
+    except OSError as e:
+        _LOGGER.warning(f"Cannot hash {pdf_file}: {e}")
+        return None
+
+
+def hash_booklets(
+    pdf_files: Sequence[Path],
+    manifest: Optional[Manifest] = None,
+    workers: int = DEFAULT_VALIDATION_WORKERS,
+) -> Dict[Path, ManifestEntry]:
+    """
+    Hash the booklets in parallel.
+    We take the hash from the manifest if the size and the modification time of a booklet did not change.
+    :param pdf_files:
+    :param manifest:
+    :param workers:
+    :return: The entry of every booklet in input order, without the booklets we cannot read.
+    """
+    known: Dict[Path, ManifestEntry] = {}
+    missing: List[Path] = []
+    for pdf_file in pdf_files:
+        entry = manifest.get(pdf_file) if manifest is not None else None
+        try:
+            stat = pdf_file.stat()
+        except OSError:
+            entry = None
+        else:
+            if entry is not None and (entry.size, entry.mtime_ns) != (
+                stat.st_size,
+                stat.st_mtime_ns,
+            ):
+                entry = None
+        if entry is not None:
+            known[pdf_file] = entry
+        else:
+            missing.append(pdf_file)
+    with span("manifest.hash", files=len(missing)) as current:
+        if len(missing) > 0:
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="hash"
+            ) as executor:
+                for pdf_file, hashed in zip(missing, executor.map(_hash, missing)):
+                    if hashed is not None:
+                        known[pdf_file] = hashed
+        current.set(bytes=sum(known[f].size for f in missing if f in known))
+    return {f: known[f] for f in pdf_files if f in known}
+
+
+def find_duplicates(entries: Dict[Path, ManifestEntry]) -> List[List[Path]]:
+    """
+    Group the byte-identical booklets.
+    :param entries:
+    :return: The groups with more than one booklet, each in input order.
+    """
+    by_digest: Dict[Tuple[int, str], List[Path]] = {}
+    for pdf_file, entry in entries.items():
+        by_digest.setdefault((entry.size, entry.digest), []).append(pdf_file)
+    return [group for group in by_digest.values() if len(group) > 1]
+
+
+def compare(manifest: Manifest, entries: Dict[Path, ManifestEntry]) -> ManifestChanges:
+    """
+    Compare the booklets with the manifest.
+    :param manifest:
+    :param entries:
+    :return:
+    """
+    changes = ManifestChanges([], [], [], [])
+    for pdf_file, entry in entries.items():
+        previous = manifest.get(pdf_file)
+        if previous is None:
+            changes.added.append(pdf_file)
+        elif previous.digest != entry.digest:
+            changes.changed.append(pdf_file)
+        else:
+            changes.unchanged.append(pdf_file)
+    keys = {manifest.key(f) for f in entries}
+    changes.removed.extend(k for k in sorted(manifest.entries) if k not in keys)
+    return changes
+
+
+def skip_unchanged_booklets(
+    manifest: Manifest,
+    pdf_files: List[Path],
+    workers: int = DEFAULT_VALIDATION_WORKERS,
+) -> BookletSelection:
+    """
+    Remove the duplicates and the booklets that did not change since the manifest.
+    Of identical booklets, we keep the first one in the order we send them.
+    :param manifest: The manifest of the last print run.
+    :param pdf_files:
+    :param workers:
+    :return:
+    """
+    entries = hash_booklets(pdf_files, manifest, workers)
+    duplicates = find_duplicates(entries)
+    skipped = {f for group in duplicates for f in group[1:]}
+    pdf_files = [f for f in pdf_files if f not in skipped]
+    if not manifest.exists:
+        return BookletSelection(pdf_files, entries, duplicates, [], [])
+    changes = compare(manifest, {f: entries[f] for f in pdf_files if f in entries})
+    unchanged = set(changes.unchanged)
+    return BookletSelection(
+        [f for f in pdf_files if f not in unchanged],
+        entries,
+        duplicates,
+        changes.changed,
+        changes.unchanged,
+    )
+
+
+def record_sent_booklets(
+    manifest: Manifest,
+    journal: SubmissionJournal,
+    entries: Dict[Path, ManifestEntry],
+) -> None:
+    """
+    Add the booklets that the journal confirms as sent to the manifest and write it,
+    so that the next print run skips them unless they change.
+    :param manifest:
+    :param journal: A closed journal, so that it contains all submissions.
+    :param entries: The entries of the booklets before we sent them.
+    :return:
+    """
+    sent = journal.already_sent(list(entries))
+    for pdf_file in sent:
+        manifest.put(pdf_file, entries[pdf_file])
+    if len(sent) > 0:
+        manifest.save()
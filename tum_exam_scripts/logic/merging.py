@@ -0,0 +1,215 @@
+"""
+Merged print jobs.
+Every job costs time at the FollowMe release station, so we merge consecutive booklets into one job.
+Every booklet starts on a fresh sheet, and the job attribute job-pages-per-set (PWG 5100.7) tells the printer
+to fold and staple every booklet on its own. As this only works if all booklets of a job have the same page count,
+we only merge consecutive booklets with the same page count, which is the usual case for an exam.
+"""
+from getpass import getuser
+from http.client import HTTPException
+from logging import getLogger
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from urllib.parse import urlsplit
+
+from tum_exam_scripts.defaults import DEFAULT_IPP_URI
+from tum_exam_scripts.logic.backends import PrintOptions
+from tum_exam_scripts.logic.spool import SpoolArea
+from tum_exam_scripts.utils.files import file_size
+from tum_exam_scripts.utils.ipp import (
+    GET_PRINTER_ATTRIBUTES,
+    KEYWORD,
+    PRINTER_ATTRIBUTES_TAG,
+    Attribute,
+    IppClient,
+    IppError,
+    operation_attributes,
+)
+from tum_exam_scripts.utils.pdf_merge import merge_pdfs
+from tum_exam_scripts.utils.tracing import span
+
+_LOGGER = getLogger(__name__)
+
+PAGES_PER_SET = "job-pages-per-set"
+_PAGES_PER_SET_SUPPORTED = "job-pages-per-set-supported"
+_ONE_SIDED = ("Duplex=None", "sides=one-sided")
+
+
+def sheet_pages(options: PrintOptions) -> int:
+    """
+    The number of pages on one sheet, so that we know how many blank pages start the next booklet on a fresh sheet.
+    :param options:
+    :return: 2 for duplex printing, otherwise 1.
+    """
+    for option in options.options:
+        if option.startswith(("Duplex=", "sides=")) and option not in _ONE_SIDED:
+            return 2
+    return 1
+
+
+def pages_per_set_options(options: PrintOptions, pages: int) -> PrintOptions:
+    """
+    The options of a merged job, whose printer finishes every `pages` pages on their own.
+    :param options:
+    :param pages:
+    :return:
+    """
+    return options._replace(options=options.options + (f"{PAGES_PER_SET}={pages}",))
+
+
+def supports_pages_per_set(
+    queue: str, ipp_uri: str = DEFAULT_IPP_URI, user_name: Optional[str] = None
+) -> bool:
+    """
+    Ask CUPS whether the printer finishes sets of pages, i.e., whether it staples every booklet of a merged job.
+    :param queue:
+    :param ipp_uri:
+    :param user_name:
+    :return: False if the printer does not support it or we cannot ask.
+    """
+    printer_uri = ipp_uri.format(queue=queue)
+    client = IppClient(printer_uri)
+    try:
+        response = client.request(
+            urlsplit(printer_uri).path or "/",
+            GET_PRINTER_ATTRIBUTES,
+            [
+                operation_attributes(
+                    printer_uri,
+                    user_name if user_name is not None else getuser(),
+                    [
+                        Attribute(
+                            KEYWORD,
+                            "requested-attributes",
+                            (_PAGES_PER_SET_SUPPORTED,),
+                        )
+                    ],
+                )
+            ],
+        )
+    except (IppError, HTTPException, OSError) as e:
+        _LOGGER.info(f"Get-Printer-Attributes on {printer_uri} failed: {e}")
+        return False
+    finally:
+        client.close()
+    group = response.group(PRINTER_ATTRIBUTES_TAG)
+    supported = group.get(_PAGES_PER_SET_SUPPORTED) if group is not None else None
+    return supported is not None and supported.values[0] is True
+
+
+class BookletMerger:
+    """
+    Merges groups of booklets into PDFs in the spool area.
+    """
+
+    def __init__(self, count: int, options: PrintOptions, spool: SpoolArea) -> None:
+        """
+        :param count: The maximal number of booklets per job.
+        :param options: The print options of the booklets.
+        :param spool: Where we write the merged PDFs.
+        """
+        self.count = count
+        self.sheet_pages = sheet_pages(options)
+        self.spool = spool
+
+    def groups(
+        self,
+        pdf_files: Iterable[Path],
+        pages: Dict[Path, Optional[int]],
+        queue_of: Callable[[Path], str],
+    ) -> Iterator[List[Path]]:
+        """
+        Group consecutive booklets with the same page count and queue, at most count per group.
+        We yield a group as soon as it is full, so we do not wait for the next booklet.
+        :param pdf_files:
+        :param pages:
+        :param queue_of:
+        :return:
+        """
+        group: List[Path] = []
+        key: Optional[Tuple[str, int]] = None
+        for pdf_file in pdf_files:
+            count = pages.get(pdf_file)
+            file_key = (
+                (queue_of(pdf_file), -(-count // self.sheet_pages))
+                if count is not None
+                else None
+            )
+            if len(group) > 0 and (file_key is None or file_key != key):
+                yield group
+                group = []
+            if file_key is None:
+                yield [pdf_file]
+                continue
+            key = file_key
+            group.append(pdf_file)
+            if len(group) == self.count:
+                yield group
+                group = []
+        if len(group) > 0:
+            yield group
+
+    def merge(self, booklets: Sequence[Path]) -> Tuple[Path, int]:
+        """
+        Write the booklets into one PDF; we write the objects that all booklets share, e.g., the fonts, only once.
+        :param booklets:
+        :return: The merged PDF and the number of pages per booklet in it.
+        :raises PdfSyntaxError: If we cannot read a booklet.
+        :raises ValueError: If the booklets do not have the same number of sheets after all.
+        """
+        merged = self.spool.new_path(f"{booklets[0].stem}-to-{booklets[-1].name}")
+        with span("merge", files=len(booklets)) as current:
+            counts = merge_pdfs(
+                [self.spool.source(b) for b in booklets],
+                merged,
+                self.sheet_pages,
+                deduplicate=True,
+            )
+            current.set(bytes=file_size(merged))
+        if len(set(counts)) != 1:
+            merged.unlink()
+            raise ValueError(f"The booklets have {counts} pages")
+        self.spool.add_job(merged, booklets)
+        return merged, counts[0]
+
+
+class StaplingUnsupportedError(Exception):
+    """
+    A printer cannot staple every booklet of a merged job on its own.
+    """
+
+
+def create_merger(
+    count: int,
+    options: PrintOptions,
+    queues: Sequence[str],
+    spool: Optional[SpoolArea],
+    ipp_uri: str = DEFAULT_IPP_URI,
+) -> Optional[BookletMerger]:
+    """
+    Merge the booklets if the printers can staple every booklet of a merged job.
+    :param count: The number of booklets per job, 1 does not merge.
+    :param options:
+    :param queues: The queues we send the booklets to.
+    :param spool: Where we write the merged PDFs, we need one to merge.
+    :param ipp_uri:
+    :return: None if we do not merge; we send one job per booklet then.
+    :raises StaplingUnsupportedError: If a printer cannot staple the booklets of a merged job.
+    """
+    if count < 2 or spool is None:
+        return None
+    unsupported = [q for q in queues if not supports_pages_per_set(q, ipp_uri)]
+    if len(unsupported) > 0:
+        raise StaplingUnsupportedError(
+            f"The printer {', '.join(unsupported)} cannot staple every booklet of a merged job"
+        )
+    return BookletMerger(count, options, spool)
@@ -0,0 +1,175 @@
+"""
+Page index.
+A small JSON file in the exam directory with the page count of every booklet,
+so we only open the booklets once to plan and report the progress in pages.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from json import JSONDecodeError, dumps, loads
+from logging import getLogger
+from os import replace, stat_result
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from tum_exam_scripts.logic.validation import DEFAULT_VALIDATION_WORKERS
+from tum_exam_scripts.utils.pdf_reader import fast_page_count
+
+_LOGGER = getLogger(__name__)
+
+PAGE_INDEX_FILE_NAME = ".tum-exam-scripts-pages.json"
+
+
+class PageIndex:
+    """
+    The page counts of the booklets in one directory, keyed by file name, size, and mtime.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.path = directory.joinpath(PAGE_INDEX_FILE_NAME)
+        self._entries: Dict[str, Dict[str, int]] = {}
+        self._changed = False
+        try:
+            self._entries = loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            pass
+        except (OSError, JSONDecodeError, ValueError) as e:
+            _LOGGER.warning(f"Ignoring the broken page index {self.path}: {e}")
+
+    def get(self, pdf_file: Path, stat: stat_result) -> Optional[int]:
+        """
+        :param pdf_file:
+        :param stat:
+        :return: The page count if the booklet did not change since we counted it.
+        """
+        entry = self._entries.get(pdf_file.name)
+        if (
+            isinstance(entry, dict)
+            and entry.get("size") == stat.st_size
+            and entry.get("mtime_ns") == stat.st_mtime_ns
+        ):
+            return entry.get("pages")
+        return None
+
+    def put(self, pdf_file: Path, stat: stat_result, pages: int) -> None:
+        self._entries[pdf_file.name] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "pages": pages,
+        }
+        self._changed = True
+
+    def save(self) -> None:
+        """
+        Write the index if it changed. We replace the file atomically, so a crash never leaves a torn index.
+        """
+        if not self._changed:
+            return
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        try:
+            temporary.write_text(dumps(self._entries, sort_keys=True), encoding="utf-8")
+            replace(temporary, self.path)
+            self._changed = False
+        except OSError as e:
+            _LOGGER.warning(f"Cannot write the page index {self.path}: {e}")
+
+
+class PageCounter:
+    """
+    Counts the pages of one booklet at a time, e.g., on the validation workers while we send the booklets,
+    using and updating the page indices of their directories. count() may be called from several threads.
+    """
+
+    def __init__(self) -> None:
+        self._indices: Dict[Path, PageIndex] = {}
+        self._lock = Lock()
+
+    def count(self, pdf_file: Path) -> Optional[int]:
+        """
+        :param pdf_file:
+        :return: The page count, None if we could not count the pages.
+        """
+        try:
+            stat = pdf_file.stat()
+        except OSError:
+            return None
+        index, pages = self._lookup(pdf_file, stat)
+        if pages is not None:
+            return pages
+        pages = _count(pdf_file)
+        if pages is not None:
+            with self._lock:
+                index.put(pdf_file, stat, pages)
+        return pages
+
+    def cached(self, pdf_file: Path) -> Optional[int]:
+        """
+        :param pdf_file:
+        :return: The page count in the page index, None if the booklet is not in it or changed.
+        """
+        try:
+            stat = pdf_file.stat()
+        except OSError:
+            return None
+        return self._lookup(pdf_file, stat)[1]
+
+    def _lookup(
+        self, pdf_file: Path, stat: stat_result
+    ) -> Tuple[PageIndex, Optional[int]]:
+        with self._lock:
+            index = self._indices.get(pdf_file.parent)
+            if index is None:
+                index = self._indices[pdf_file.parent] = PageIndex(pdf_file.parent)
+            return index, index.get(pdf_file, stat)
+
+    def save(self) -> None:
+        """
+        Write the indices that changed.
+        """
+        with self._lock:
+            for index in self._indices.values():
+                index.save()
+
+
+def _count(pdf_file: Path) -> Optional[int]:
+    try:
+        return fast_page_count(pdf_file)
+    except Exception as e:
+        # A booklet that we cannot count must not stop the print run.
+        _LOGGER.warning(f"Cannot count the pages of {pdf_file}: {e!r}")
+        return None
+
+
+def count_pages(
+    pdf_files: Sequence[Path], workers: int = DEFAULT_VALIDATION_WORKERS
+) -> List[Optional[int]]:
+    """
+    Count the pages of the booklets, using and updating the page index of their directories.
+    The booklets that are not in an index are counted in parallel.
+    :param pdf_files:
+    :param workers:
+    :return: The page counts in input order, None if we could not count the pages of a booklet.
+    """
+    indices: Dict[Path, PageIndex] = {}
+    pages: List[Optional[int]] = [None] * len(pdf_files)
+    missing: Dict[int, stat_result] = {}
+    for i, pdf_file in enumerate(pdf_files):
+        index = indices.get(pdf_file.parent)
+        if index is None:
+            index = indices[pdf_file.parent] = PageIndex(pdf_file.parent)
+        try:
+            stat = pdf_file.stat()
+        except OSError:
+            continue
+        pages[i] = index.get(pdf_file, stat)
+        if pages[i] is None:
+            missing[i] = stat
+    if len(missing) > 0:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            counted = executor.map(_count, [pdf_files[i] for i in missing])
+            for (i, stat), count in zip(missing.items(), counted):
+                pages[i] = count
+                if count is not None:
+                    indices[pdf_files[i].parent].put(pdf_files[i], stat, count)
+    for index in indices.values():
+        index.save()
+    return pages
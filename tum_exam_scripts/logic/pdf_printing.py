@@ -1,148 +1,330 @@
 """
 PDF utils.
 """
+from contextlib import ExitStack
 from logging import getLogger
-from os import remove
-from os.path import getsize
 from pathlib import Path
-from tempfile import gettempdir
-from typing import List, Optional
-from urllib.request import urlretrieve
+from threading import Lock
+from typing import Dict, Iterable, Iterator, List, Optional
 
-from click import echo, pause
-from click.exceptions import Exit
-from tqdm import tqdm
-
-from tum_exam_scripts.utils.command import call_command, error_echo, sudo_call
+from tum_exam_scripts.enums import ValidationLevel
+from tum_exam_scripts.logic.backends import (
+    ATTENDEE_LIST_OPTIONS,
+    BOOKLET_OPTIONS,
+    LpBackend,
+    PrintOptions,
+    SubmissionBackend,
+)
+from tum_exam_scripts.logic.backpressure import Backpressure
+from tum_exam_scripts.logic.compaction import Compactor
+from tum_exam_scripts.logic.events import (
+    SUBMISSION,
+    VALIDATION,
+    BatchFinished,
+    BookletFinished,
+    BookletValidated,
+    JobQueued,
+    Listener,
+    PrintEvent,
+    PrintReport,
+    StageFinished,
+    StageStarted,
+)
+from tum_exam_scripts.logic.journal import SubmissionJournal
+from tum_exam_scripts.logic.keep_alive import EnablementKeeper
+from tum_exam_scripts.logic.merging import BookletMerger, pages_per_set_options
+from tum_exam_scripts.logic.page_index import PageCounter
+from tum_exam_scripts.logic.spool import SpoolArea
+from tum_exam_scripts.logic.submission import (
+    DEFAULT_MAX_IN_FLIGHT,
+    RetryPolicy,
+    SubmissionEngine,
+    SubmissionResult,
+)
+from tum_exam_scripts.logic.validation import (
+    DEFAULT_VALIDATION_WORKERS,
+    ValidationResult,
+    is_full_pdf,  # NOTE: Keep for backwards compatibility
+    validate_all,
+    validate_pipelined,
+)
+from tum_exam_scripts.logic.validation_cache import ValidationCache
+from tum_exam_scripts.utils.files import file_size
+from tum_exam_scripts.utils.tracing import span
 
 _LOGGER = getLogger(__name__)
 
 
-def is_full_pdf(current_file: Path) -> bool:
-    """
-    Check whether a file is a valid PDF.
-    :param current_file:
-    :return:
-    """
-    size = getsize(current_file)
-    if size < 1024:
-        return False
-    with current_file.open("rb") as fin:
-        # start content
-        fin.seek(0)
-        start_content = fin.read(1024).decode("ascii", "ignore")
-        fin.seek(-1024, 2)
-        end_content = fin.read().decode("ascii", "ignore")
-    start_flag = False
-    # %PDF
-    if start_content.count("%PDF") > 0:
-        start_flag = True
-
-    if end_content.count("%%EOF") and start_flag > 0:
-        return True
-    eof: str = bytes([0]).decode("ascii")
-    if end_content.endswith(eof) and start_flag:
-        return True
-    return False
-
-
-def send_pdf_files(
-    driver_name: str, pdf_files: List[Path], batch_size: Optional[int] = None
-) -> None:
+def print_pdf_files(
+    driver_name: str,
+    pdf_files: Iterable[Path],
+    batch_size: Optional[int] = None,
+    strict: bool = False,
+    validation_workers: int = DEFAULT_VALIDATION_WORKERS,
+    backend: Optional[SubmissionBackend] = None,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    retry_policy: RetryPolicy = RetryPolicy(),
+    journal: Optional[SubmissionJournal] = None,
+    cache: Optional[ValidationCache] = None,
+    validation_level: ValidationLevel = ValidationLevel.QUICK,
+    queue_of: Optional[Dict[Path, str]] = None,
+    options: PrintOptions = BOOKLET_OPTIONS,
+    options_of: Optional[Dict[Path, PrintOptions]] = None,
+    backpressure: Optional[Backpressure] = None,
+    merger: Optional[BookletMerger] = None,
+    compactor: Optional[Compactor] = None,
+    enablement: Optional[EnablementKeeper] = None,
+    listener: Optional[Listener] = None,
+    pages: Optional[Dict[Path, Optional[int]]] = None,
+) -> PrintReport:
     """
     Send all PDF files to the server.
-    :param batch_size:
+    In the default mode, we validate the PDFs in the background and send each booklet as soon as it is known to be valid.
+    Invalid booklets are skipped.
+    In the strict mode, we validate all PDFs before we send the first one and do not send anything if a PDF is corrupt.
+    We keep up to max_in_flight jobs in flight and retry transient failures.
+    With backpressure, we hold new jobs while the print queue is too full.
+    With a merger, we send groups of booklets with the same page count as one job.
+    With a compactor, we send smaller copies of the valid booklets.
+    With an enablement keeper, we renew the printing enablement while we send the jobs.
+    Unless you pass the pages, we take them from the page index or count them on the validation workers,
+    so the first job does not wait for the whole directory; the progress estimates the pages that we did not count yet.
+    We do not print anything; the listener learns what happens, see events.
+    :param batch_size: Wait for the jobs after every batch_size booklets, see BatchFinished.
     :param driver_name:
-    :param pdf_files:
-    :return:
+    :param pdf_files: A list, or an iterator if we discover the booklets while we send them.
+        Then, we do not know the pages in advance, and we cannot use the strict mode.
+    :param strict:
+    :param validation_workers:
+    :param backend: The backend that submits the jobs. By default, we call `lp`.
+    :param max_in_flight:
+    :param retry_policy:
+    :param journal: If given, we record every submission in the journal.
+    :param cache: If given, we do not validate booklets again that did not change since the last run.
+    :param validation_level: How thoroughly we check the PDFs.
+    :param queue_of: The queue of every booklet if we spread them over several printers, otherwise we use driver_name.
+    :param options: The print options of the booklets.
+    :param options_of: The print options of every document if they differ, e.g., if we print the seat plans, too.
+    :param backpressure: If given, we wait before we submit a job while its queue is too full.
+    :param merger: If given, we merge consecutive booklets into one job. It needs a list of the booklets and one set of options.
+    :param compactor: If given, we send compressed copies of the booklets that are considerably smaller.
+    :param enablement: If given, we renew the printing enablement in the background and pause the jobs meanwhile.
+    :param listener: Called with every event, on the calling thread or a submission thread, but never at the same time.
+    :param pages: The page count of every booklet if you counted them already, e.g., to spread them over several queues.
+    :return: The booklets we sent, could not send, or did not send because they are invalid.
+        In the strict mode, we send nothing if a booklet is invalid.
+    :raises QueueStalledError: If a full print queue did not drain within the maximum wait of the backpressure.
     """
-    echo("Check whether PDFs are corrupt")
-    for pdf_file in tqdm(pdf_files):
-        if not is_full_pdf(pdf_file):
-            error_echo(f"The PDF file {pdf_file} is not a valid PDF.")
-            raise Exit(1)
-    batch_no = 0
-    for i, pdf_file in enumerate(tqdm(pdf_files)):
-        echo(f"Sending document {pdf_file} to the printing server ...")
-        current_command = [
-            "lp",
-            "-d" + driver_name,
-            "-o",
-            "PageSize=A3",
-            "-o",
-            "JCLBanner=False",
-            "-o",
-            "JCLColorCorrection=BlackWhite",
-            "-o",
-            "Duplex=DuplexNoTumble",
-            "-o",
-            "XRFold=BiFoldStaple",
-            "-o",
-            "landscape",
-            "-o",
-            "JCLPrintQuality=Enhanced",
-            str(pdf_file),
-        ]
-        call_command(pdf_file, current_command)
-        if batch_size is not None and ((i + 1) % batch_size) == 0:
-            pause(f"We finished batch {batch_no}")
-            batch_no += 1
-
-    echo("Done!")
+    if backend is None:
+        backend = LpBackend()
+    spool: Optional[SpoolArea] = None
+    if merger is not None:
+        spool = merger.spool
+    elif compactor is not None:
+        spool = compactor.spool
+    known_files: List[Path] = []
+    # We add the pages that we count while we validate the booklets.
+    pages = dict(pages) if pages is not None else {}
+    progress_pages: Optional[Dict[Path, Optional[int]]] = None
+    counter = PageCounter()
+    if isinstance(pdf_files, list):
+        known_files = pdf_files
+        # The page index knows the booklets of earlier runs, which gives the progress a total right away.
+        for pdf_file in known_files:
+            if pages.get(pdf_file) is None:
+                cached = counter.cached(pdf_file)
+                if cached is not None:
+                    pages[pdf_file] = cached
+        progress_pages = pages
+    elif strict:
+        raise ValueError("The strict mode needs a list of the booklets")
+
+    def _count(pdf_file: Path) -> Optional[int]:
+        return pages[pdf_file] if pdf_file in pages else counter.count(pdf_file)
+
+    if merger is not None and (batch_size is not None or options_of is not None):
+        raise ValueError("We cannot merge booklets in batches or with several options")
+    lock = Lock()
+
+    def _notify(event: PrintEvent) -> None:
+        if listener is not None:
+            with lock:
+                listener(event)
+
+    invalid: List[ValidationResult] = []
+    if strict:
+        _notify(StageStarted(VALIDATION, known_files, progress_pages))
+        try:
+            with span("validation", level=validation_level.value) as current:
+                for validation in validate_all(
+                    known_files, validation_workers, cache, validation_level, _count
+                ):
+                    if validation.pages is not None:
+                        pages[validation.pdf_file] = validation.pages
+                    _notify(BookletValidated(validation))
+                    if not validation.valid:
+                        invalid.append(validation)
+                current.set(**_totals(known_files, pages), invalid=len(invalid))
+        finally:
+            _notify(StageFinished(VALIDATION))
+            counter.save()
+        if len(invalid) > 0:
+            return PrintReport([], invalid)
+
+    def _on_result(result: SubmissionResult) -> None:
+        for booklet_result in _expand(result):
+            if journal is not None:
+                journal.record(booklet_result)
+            _notify(BookletFinished(booklet_result))
+        if spool is not None:
+            spool.release(result.pdf_file)
+
+    def _expand(result: SubmissionResult) -> List[SubmissionResult]:
+        return spool.expand(result) if spool is not None else [result]
+
+    stages = [SUBMISSION] if strict else [SUBMISSION, VALIDATION]
+    for stage in reversed(stages):
+        _notify(StageStarted(stage, known_files, progress_pages))
+    try:
+        with ExitStack() as stack:
+            submission = stack.enter_context(span("submission"))
+            if enablement is not None:
+                stack.enter_context(enablement.reporting(_notify))
+                stack.enter_context(enablement)
+            if backpressure is not None:
+                stack.enter_context(backpressure.reporting(_notify))
+            engine = stack.enter_context(
+                SubmissionEngine(
+                    backend,
+                    max_in_flight,
+                    retry_policy,
+                    _on_result,
+                    backpressure,
+                    enablement,
+                )
+            )
+            valid_files: Iterable[Path] = pdf_files
+            if not strict:
+                valid_files = _skip_invalid(
+                    validate_pipelined(
+                        pdf_files,
+                        validation_workers,
+                        cache=cache,
+                        level=validation_level,
+                        count=_count,
+                    ),
+                    pages,
+                    invalid,
+                    _notify,
+                )
+            if compactor is not None:
+                valid_files = compactor.compact(valid_files)
+            if merger is not None:
+                for group in merger.groups(
+                    valid_files,
+                    pages,
+                    lambda f: driver_name if queue_of is None else queue_of[f],
+                ):
+                    _submit_group(
+                        engine, merger, group, driver_name, queue_of, options, _notify
+                    )
+            else:
+                batch_no = 0
+                for i, pdf_file in enumerate(valid_files):
+                    queue = driver_name if queue_of is None else queue_of[pdf_file]
+                    _notify(JobQueued([pdf_file], queue))
+                    engine.submit(
+                        pdf_file if spool is None else spool.source(pdf_file),
+                        queue,
+                        options if options_of is None else options_of[pdf_file],
+                    )
+                    if batch_size is not None and ((i + 1) % batch_size) == 0:
+                        engine.join()
+                        _notify(BatchFinished(batch_no))
+                        batch_no += 1
+            results = [r for job in engine.join() for r in _expand(job)]
+            submission.set(
+                **_totals([r.pdf_file for r in results if r.ok], pages),
+                failed=sum(1 for r in results if not r.ok),
+            )
+    finally:
+        for stage in stages:
+            _notify(StageFinished(stage))
+        counter.save()
+    return PrintReport(results, invalid)
+
+
+def _submit_group(
+    engine: SubmissionEngine,
+    merger: BookletMerger,
+    group: List[Path],
+    driver_name: str,
+    queue_of: Optional[Dict[Path, str]],
+    options: PrintOptions,
+    notify: Listener,
+) -> None:
+    queue = driver_name if queue_of is None else queue_of[group[0]]
+    if len(group) > 1:
+        try:
+            merged, pages = merger.merge(group)
+        except (OSError, ValueError) as e:
+            # PdfSyntaxError is a ValueError, too.
+            _LOGGER.warning(f"We send {len(group)} booklets one by one: {e}")
+        else:
+            notify(JobQueued(group, queue))
+            engine.submit(merged, queue, pages_per_set_options(options, pages))
+            return
+    for pdf_file in group:
+        notify(JobQueued([pdf_file], queue))
+        engine.submit(merger.spool.source(pdf_file), queue, options)
+
+
+def _skip_invalid(
+    results: Iterable[ValidationResult],
+    pages: Dict[Path, Optional[int]],
+    invalid: List[ValidationResult],
+    notify: Listener,
+) -> Iterator[Path]:
+    # The span includes the time the consumer spends with the valid booklets, as the stages overlap.
+    with span("validation") as current:
+        validated = []
+        for result in results:
+            validated.append(result.pdf_file)
+            if result.pages is not None:
+                pages[result.pdf_file] = result.pages
+            notify(BookletValidated(result))
+            if result.valid:
+                yield result.pdf_file
+            else:
+                invalid.append(result)
+        current.set(**_totals(validated, pages), invalid=len(invalid))
+
+
+def _totals(pdf_files: List[Path], pages: Dict[Path, Optional[int]]) -> Dict[str, int]:
+    return {
+        "files": len(pdf_files),
+        "pages": sum(pages.get(f) or 0 for f in pdf_files),
+        "bytes": sum(file_size(f) for f in pdf_files),
+    }
+
+
+# The wrappers below print like the commands; new code should use the logic or console directly.
 
 
 def install_linux_driver_internal(driver_name: str, user_password: str) -> None:
-    tempdir = Path(gettempdir())
-    local_file = tempdir.joinpath("x2UNIV.ppd")
-    _LOGGER.info("Download PPD file")
-    urlretrieve(
-        "https://wiki.in.tum.de/foswiki/pub/Informatik/Benutzerwiki/XeroxDrucker/x2UNIV.ppd",
-        str(local_file),
-    )
-    _LOGGER.info("Success!")
-    sudo_call(
-        [
-            "lpadmin",
-            "-E",
-            "-p",
-            driver_name,
-            "-v",
-            "ipps://print.in.tum.de/printers/followme",
-            "-P",
-            str(local_file),
-            "-D",
-            "Xerox-Followme",
-            "-L",
-            "TUM",
-        ],
-        user_password,
-    )
-    echo("The Linux driver was successfully installed!")
-    remove(local_file)
-    sudo_call(["cupsenable", driver_name], user_password)
-    sudo_call(["cupsaccept", driver_name], user_password)
-    echo(f"The printing service is available under {driver_name}")
-
-
-def send_attendee_list_internal(attend_list: Path, driver_name: str) -> None:
-    echo(f"Sending document {attend_list} to the printing server ...")
-    current_command = [
-        "lp",
-        "-d" + driver_name,
-        "-o",
-        "PageSize=A4",
-        "-o",
-        "JCLBanner=False",
-        "-o",
-        "JCLColorCorrection=PressMatch",
-        "-o",
-        "Duplex=None",
-        "-o",
-        "JCLPrintQuality=Enhanced",
-        "-o",
-        "InputSlot=ManualFeed",
-        "-o",
-        "MediaType=Labels",
-        str(attend_list),
-    ]
-    call_command(attend_list, current_command)
+    from tum_exam_scripts.console import install_driver
+
+    install_driver([driver_name], user_password)
+
+
+def send_attendee_list_internal(
+    attend_list: Path,
+    driver_name: str,
+    backend: Optional[SubmissionBackend] = None,
+    options: PrintOptions = ATTENDEE_LIST_OPTIONS,
+) -> None:
+    from tum_exam_scripts.console import send_document
+
+    if backend is None:
+        backend = LpBackend()
+    send_document(backend, attend_list, driver_name, options)
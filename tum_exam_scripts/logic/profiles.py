@@ -0,0 +1,251 @@
+"""
+Print profiles.
+A profile bundles the print options of a kind of document with the names of its files in a TUMExam export.
+Besides the built-in profiles, users can override them and add their own in a TOML file:
+
+    [profiles.seat-plan]
+    copies = 5
+
+    [profiles.booklet-a4]
+    extends = "booklet"
+    options = ["PageSize=A4", "XRFold=None"]
+    patterns = ["*-book-a4.pdf"]
+    description = "The booklets of the make-up exam in A4"
+
+The options of a profile that extends another one replace the options of the other one with the same name.
+"""
+import sys
+from fnmatch import fnmatchcase
+from logging import getLogger
+from os import scandir
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from tum_exam_scripts.logic.backends import (
+    ATTENDEE_LIST_OPTIONS,
+    BOOKLET_OPTIONS,
+    ROOM_PLAN_OPTIONS,
+    SEAT_PLAN_OPTIONS,
+    PrintOptions,
+)
+from tum_exam_scripts.logic.discovery import natural_key
+from tum_exam_scripts.utils.files import user_config_directory
+
+_LOGGER = getLogger(__name__)
+
+PROFILES_FILE_NAME = "profiles.toml"
+BOOKLET = "booklet"
+ATTENDEE_LIST = "attendee-list"
+SEAT_PLAN = "seat-plan"
+ROOM_PLAN = "room-plan"
+
+
+class ProfileError(ValueError):
+    """
+    The profiles file is broken.
+    """
+
+
+class PrintProfile(NamedTuple):
+    """
+    How we print a kind of document.
+    """
+
+    name: str
+    options: PrintOptions
+    patterns: Tuple[str, ...] = ()
+    description: str = ""
+
+    def matches(self, pdf_file: Path) -> bool:
+        return any(fnmatchcase(pdf_file.name, p) for p in self.patterns)
+
+
+BUILTIN_PROFILES: Dict[str, PrintProfile] = {
+    p.name: p
+    for p in (
+        PrintProfile(
+            SEAT_PLAN,
+            SEAT_PLAN_OPTIONS._replace(copies=3),
+            ("seatplan-a3.pdf",),
+            "The seat plans in A3 for the doors of the lecture hall",
+        ),
+        PrintProfile(
+            ROOM_PLAN,
+            ROOM_PLAN_OPTIONS._replace(copies=3),
+            ("roomplan.pdf",),
+            "The room plans in A3 for the doors of the lecture hall",
+        ),
+        PrintProfile(
+            ATTENDEE_LIST,
+            ATTENDEE_LIST_OPTIONS,
+            ("attendeelist.pdf",),
+            "The attendee list on labels",
+        ),
+        PrintProfile(
+            BOOKLET,
+            BOOKLET_OPTIONS,
+            ("*-book.pdf",),
+            "The exam booklets in A3, folded and stapled",
+        ),
+    )
+}
+
+
+def default_profiles_file() -> Path:
+    """
+    The profiles file we read if the user does not pass one.
+    :return:
+    """
+    return user_config_directory().joinpath(PROFILES_FILE_NAME)
+
+
+def load_profiles(profiles_file: Optional[Path] = None) -> Dict[str, PrintProfile]:
+    """
+    The built-in profiles with the changes and additions of the profiles file.
+    :param profiles_file: If None, we read the default profiles file if it exists.
+    :return: The profiles in the order of the built-in profiles, followed by the new ones.
+    :raises ProfileError: If the profiles file is broken.
+    """
+    if profiles_file is None:
+        profiles_file = default_profiles_file()
+        if not profiles_file.is_file():
+            return dict(BUILTIN_PROFILES)
+    try:
+        with profiles_file.open("rb") as fin:
+            document = _toml_load(fin)
+    except OSError as e:
+        raise ProfileError(f"Cannot read {profiles_file}: {e}")
+    tables = document.get("profiles", {})
+    if not isinstance(tables, dict):
+        raise ProfileError(f"{profiles_file}: 'profiles' must be a table")
+    profiles = dict(BUILTIN_PROFILES)
+    for name, table in tables.items():
+        if not isinstance(table, dict):
+            raise ProfileError(f"{profiles_file}: profiles.{name} must be a table")
+        profiles[name] = _profile(profiles_file, name, table, profiles)
+    return profiles
+
+
+def _profile(
+    profiles_file: Path,
+    name: str,
+    table: Dict[str, Any],
+    profiles: Mapping[str, PrintProfile],
+) -> PrintProfile:
+    unknown = set(table) - {"extends", "options", "copies", "patterns", "description"}
+    if len(unknown) > 0:
+        raise ProfileError(
+            f"{profiles_file}: profiles.{name} has unknown keys {', '.join(sorted(unknown))}"
+        )
+    base_name = table.get("extends", name if name in profiles else None)
+    if base_name is not None and base_name not in profiles:
+        raise ProfileError(
+            f"{profiles_file}: profiles.{name} extends the unknown profile {base_name}"
+        )
+    base = (
+        profiles[base_name]
+        if base_name is not None
+        else PrintProfile(name, PrintOptions(()))
+    )
+    options = _strings(profiles_file, name, table, "options")
+    patterns = _strings(profiles_file, name, table, "patterns")
+    copies = table.get("copies", base.options.copies)
+    if copies is not None and (
+        not isinstance(copies, int) or isinstance(copies, bool) or copies < 1
+    ):
+        raise ProfileError(
+            f"{profiles_file}: profiles.{name}.copies must be a positive number"
+        )
+    description = table.get("description", base.description)
+    return PrintProfile(
+        name,
+        PrintOptions(_merge(base.options.options, options or ()), copies),
+        tuple(patterns) if patterns is not None else base.patterns,
+        str(description),
+    )
+
+
+def _strings(
+    profiles_file: Path, name: str, table: Dict[str, Any], key: str
+) -> Optional[List[str]]:
+    value = table.get(key)
+    if value is None:
+        return None
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ProfileError(
+            f"{profiles_file}: profiles.{name}.{key} must be a list of strings"
+        )
+    return value
+
+
+def _merge(options: Sequence[str], changes: Sequence[str]) -> Tuple[str, ...]:
+    """
+    Replace the options with the same name, e.g., PageSize=A4 replaces PageSize=A3, and append the others.
+    """
+    merged = {o.partition("=")[0]: o for o in options}
+    for change in changes:
+        merged[change.partition("=")[0]] = change
+    return tuple(merged.values())
+
+
+def _toml_load(fin: Any) -> Dict[str, Any]:
+    if sys.version_info >= (3, 11):
+        import tomllib
+
+        parse_error = tomllib.TOMLDecodeError
+        load = tomllib.load
+    else:
+        try:
+            import tomli
+        except ImportError:
+            raise ProfileError(
+                "Reading profiles needs Python 3.11 or the package tomli, please call `pip install tomli`"
+            )
+        parse_error = tomli.TOMLDecodeError
+        load = tomli.load
+    try:
+        document: Dict[str, Any] = load(fin)
+    except parse_error as e:
+        raise ProfileError(f"{getattr(fin, 'name', 'The profiles file')}: {e}")
+    return document
+
+
+def find_documents(
+    directory: Path, profiles: Mapping[str, PrintProfile], names: Sequence[str]
+) -> Dict[str, List[Path]]:
+    """
+    Find the documents of the profiles in a TUMExam export, including its subdirectories, e.g., endterm_lists.
+    A document belongs to the first of the profiles whose patterns match its name.
+    :param directory:
+    :param profiles:
+    :param names: The profiles we look for, in this order.
+    :return: The documents per profile in natural order.
+    """
+    documents: Dict[str, List[Path]] = {name: [] for name in names}
+    for pdf_file in _walk(directory):
+        for name in names:
+            if profiles[name].matches(pdf_file):
+                documents[name].append(pdf_file)
+                break
+    return {name: sorted(files, key=natural_key) for name, files in documents.items()}
+
+
+def _walk(directory: Path) -> Iterator[Path]:
+    with scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk(Path(entry.path))
+            elif entry.is_file():
+                yield Path(entry.path)
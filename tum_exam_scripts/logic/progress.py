@@ -0,0 +1,146 @@
+"""
+Progress in pages and bytes.
+"""
+from pathlib import Path
+from threading import Lock
+from time import monotonic
+from types import TracebackType
+from typing import Dict, Optional, Sequence, Set, Type
+
+from tqdm import tqdm
+
+from tum_exam_scripts.utils.files import file_size
+
+
+class PageProgress:
+    """
+    A progress bar that counts pages, so the rate and the ETA do not depend on the mix of short and long booklets.
+    The postfix shows the bytes done and the throughput in pages per minute.
+    Until we know the pages of every booklet, we estimate the total from the file sizes of the booklets that we counted.
+    If we do not know the booklets in advance, because we discover them while we send them,
+    we count booklets instead and do not know the total.
+    update() may be called from several threads.
+    """
+
+    def __init__(
+        self,
+        description: str,
+        pdf_files: Sequence[Path],
+        pages: Optional[Dict[Path, Optional[int]]],
+        position: int = 0,
+    ) -> None:
+        self._pages = pages
+        self._sizes = {f: file_size(f) for f in pdf_files}
+        self._total_bytes = sum(self._sizes.values())
+        self._bytes = 0
+        self._done_pages = 0
+        self._start = monotonic()
+        self._lock = Lock()
+        # The booklets whose pages we do not know yet, and what we know about the others to estimate them.
+        self._uncounted: Set[Path] = set()
+        self._uncounted_bytes = 0
+        self._counted = 0
+        self._counted_pages = 0
+        self._counted_bytes = 0
+        if pages is not None:
+            for pdf_file, size in self._sizes.items():
+                self._uncounted.add(pdf_file)
+                self._uncounted_bytes += size
+                self._account(pdf_file, pages.get(pdf_file), done=False)
+        self._unit = "page" if pages is not None else "booklet"
+        self._bar = tqdm(
+            total=self._estimate(),
+            unit=self._unit,
+            desc=description,
+            position=position,
+        )
+
+    def counted(self, pdf_file: Path, pages: Optional[int]) -> None:
+        """
+        Learn the page count of a booklet, which refines the total.
+        :param pdf_file:
+        :param pages:
+        :return:
+        """
+        if self._pages is None:
+            return
+        with self._lock:
+            self._account(pdf_file, pages, done=False)
+            self._bar.total = self._estimate()
+            self._bar.refresh()
+
+    def update(self, pdf_file: Path) -> None:
+        """
+        Mark a booklet as done.
+        :param pdf_file:
+        :return:
+        """
+        pages = 1
+        if self._pages is not None:
+            pages = self._pages.get(pdf_file) or 0
+        size = self._sizes[pdf_file] if pdf_file in self._sizes else file_size(pdf_file)
+        with self._lock:
+            self._bytes += size
+            self._done_pages += pages
+            if self._pages is not None:
+                self._account(pdf_file, self._pages.get(pdf_file), done=True)
+                self._bar.total = self._estimate()
+            minutes = (monotonic() - self._start) / 60
+            rate = self._done_pages / minutes if minutes > 0 else 0.0
+            done = _megabytes(self._bytes)
+            if self._total_bytes > 0:
+                done += f"/{_megabytes(self._total_bytes)}"
+            self._bar.set_postfix_str(
+                f"{done}, {rate:.0f} {self._unit}s/min", refresh=False
+            )
+            self._bar.update(pages)
+
+    def _account(self, pdf_file: Path, pages: Optional[int], done: bool) -> None:
+        if pdf_file not in self._uncounted or (pages is None and not done):
+            return
+        self._uncounted.discard(pdf_file)
+        self._uncounted_bytes -= self._sizes[pdf_file]
+        # A booklet that is done without a page count, e.g., an invalid one, adds no pages.
+        if pages is not None:
+            self._counted += 1
+            self._counted_pages += pages
+            self._counted_bytes += self._sizes[pdf_file]
+
+    def _estimate(self) -> Optional[int]:
+        """
+        The pages we counted plus an estimate of the others from their file sizes,
+        or from the number of booklets if we cannot read the sizes.
+        """
+        if self._pages is None or self._counted == 0:
+            return None
+        if not self._uncounted:
+            total = self._counted_pages
+        elif self._counted_bytes > 0:
+            total = round(
+                self._counted_pages
+                + self._uncounted_bytes * self._counted_pages / self._counted_bytes
+            )
+        else:
+            total = round(
+                self._counted_pages
+                + len(self._uncounted) * self._counted_pages / self._counted
+            )
+        return max(total, self._done_pages) or None
+
+    def close(self) -> None:
+        self._bar.close()
+
+    def __enter__(self) -> "PageProgress":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def _megabytes(size: int) -> str:
+    return f"{size / 2**20:.1f} MB"
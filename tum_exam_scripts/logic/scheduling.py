@@ -0,0 +1,104 @@
+"""
+Distribution of the booklets over several printers.
+"""
+from datetime import timedelta
+from heapq import heapify, heapreplace
+from logging import getLogger
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from tum_exam_scripts.defaults import DEFAULT_PAGES_PER_MINUTE
+
+_LOGGER = getLogger(__name__)
+
+
+class PrinterPlan(NamedTuple):
+    """
+    The booklets that one printer queue gets, in the order we send them.
+    """
+
+    queue: str
+    booklets: List[Path]
+    pages: int
+
+    def duration(self, pages_per_minute: float) -> timedelta:
+        return timedelta(minutes=self.pages / pages_per_minute)
+
+
+def plan_queues(
+    pdf_files: Sequence[Path], pages: Sequence[Optional[int]], queues: Sequence[str]
+) -> List[PrinterPlan]:
+    """
+    Split the booklets over the queues so that all printers finish at about the same time.
+    We use the longest-processing-time-first rule: we take the booklets from the longest to the shortest
+    and give each one to the queue with the fewest pages so far.
+    Ties are broken by the input order, so the plan is deterministic, and within a queue,
+    the booklets keep their input order.
+    Booklets whose pages we could not count are spread evenly as if they were empty;
+    they usually fail the validation anyway.
+    :param pdf_files:
+    :param pages:
+    :param queues:
+    :return: One plan per queue, in the order of the queues.
+    """
+    if len(queues) == 0:
+        raise ValueError("We need at least one queue")
+    loads = [(0, 0, i) for i in range(len(queues))]
+    heapify(loads)
+    assigned: List[List[int]] = [[] for _ in queues]
+    order = sorted(range(len(pdf_files)), key=lambda i: (-(pages[i] or 0), i))
+    for i in order:
+        load, count, queue = loads[0]
+        assigned[queue].append(i)
+        heapreplace(loads, (load + (pages[i] or 0), count + 1, queue))
+    return [
+        PrinterPlan(
+            queue,
+            [pdf_files[i] for i in sorted(indices)],
+            sum(pages[i] or 0 for i in indices),
+        )
+        for queue, indices in zip(queues, assigned)
+    ]
+
+
+def interleave(plans: Sequence[PrinterPlan]) -> List[Path]:
+    """
+    The order in which we submit the booklets: the first booklet of every queue, then the second one, etc.
+    So all printers start at once.
+    :param plans:
+    :return:
+    """
+    longest = max((len(p.booklets) for p in plans), default=0)
+    return [p.booklets[i] for i in range(longest) for p in plans if i < len(p.booklets)]
+
+
+def assignment(plans: Sequence[PrinterPlan]) -> Dict[Path, str]:
+    """
+    Map every booklet to its queue.
+    :param plans:
+    :return:
+    """
+    return {b: p.queue for p in plans for b in p.booklets}
+
+
+def describe_plan(plans: Sequence[PrinterPlan], pages_per_minute: float) -> List[str]:
+    """
+    How many booklets and pages every printer gets and when it will be done.
+    :param plans:
+    :param pages_per_minute: The speed of a single printer.
+    :return: One line per printer and a line with the total.
+    """
+    width = max(len(p.queue) for p in plans)
+    lines = [
+        f"{plan.queue:{width}}  {len(plan.booklets):5} booklets  {plan.pages:7} pages  "
+        f"~{_format_duration(plan.duration(pages_per_minute))}"
+        for plan in plans
+    ]
+    total = max(p.duration(pages_per_minute) for p in plans)
+    lines.append(f"All printers should be done in about {_format_duration(total)}.")
+    return lines
+
+
+def _format_duration(duration: timedelta) -> str:
+    minutes = round(duration.total_seconds() / 60)
+    return f"{minutes // 60}h{minutes % 60:02}m"
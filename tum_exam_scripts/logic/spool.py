@@ -0,0 +1,114 @@
+"""
+Spool area.
+A temporary directory with the files we send instead of the booklets, e.g., compressed copies or merged jobs.
+We map the results of their jobs back to the booklets, so the journal and the progress stay per booklet.
+"""
+from contextlib import contextmanager
+from logging import getLogger
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from tum_exam_scripts.logic.submission import SubmissionResult
+
+_LOGGER = getLogger(__name__)
+
+
+class SpoolArea:
+    """
+    The spool files of one run.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._copies: Dict[Path, Path] = {}
+        self._booklets: Dict[Path, List[Path]] = {}
+        self._names = 0
+        self._lock = Lock()
+
+    def new_path(self, name: str) -> Path:
+        """
+        A new file in the spool area; the number avoids clashes between booklets of different directories.
+        :param name:
+        :return:
+        """
+        with self._lock:
+            self._names += 1
+            return self.directory.joinpath(f"{self._names:05}-{name}")
+
+    def add_copy(self, booklet: Path, copy: Path) -> None:
+        """
+        We send the copy instead of the booklet.
+        :param booklet:
+        :param copy:
+        :return:
+        """
+        with self._lock:
+            self._copies[booklet] = copy
+            self._booklets[copy] = [booklet]
+
+    def add_job(self, job_file: Path, booklets: Sequence[Path]) -> None:
+        """
+        The job file contains all booklets, e.g., a merged job.
+        :param job_file:
+        :param booklets:
+        :return:
+        """
+        with self._lock:
+            self._booklets[job_file] = list(booklets)
+
+    def source(self, booklet: Path) -> Path:
+        """
+        The file we read when we send or merge the booklet.
+        :param booklet:
+        :return: The copy if there is one, otherwise the booklet.
+        """
+        with self._lock:
+            return self._copies.get(booklet, booklet)
+
+    def expand(self, result: SubmissionResult) -> List[SubmissionResult]:
+        """
+        The results of the booklets in a job.
+        :param result: The result of a job, with a spool file or a booklet.
+        :return:
+        """
+        with self._lock:
+            booklets = self._booklets.get(result.pdf_file)
+        if booklets is None:
+            return [result]
+        return [result._replace(pdf_file=b) for b in booklets]
+
+    def release(self, job_file: Path) -> None:
+        """
+        Remove a job file and the copies of its booklets, we do not need them anymore.
+        :param job_file:
+        :return:
+        """
+        with self._lock:
+            booklets = self._booklets.get(job_file, [])
+            spool_files = [job_file] + [
+                self._copies[b] for b in booklets if b in self._copies
+            ]
+        for spool_file in spool_files:
+            if spool_file.parent != self.directory:
+                continue
+            try:
+                spool_file.unlink()
+            except FileNotFoundError:
+                pass
+
+
+@contextmanager
+def open_spool_area(enabled: bool = True) -> Iterator[Optional[SpoolArea]]:
+    """
+    Create a spool area in the temporary directory and remove it with all files at the end.
+    :param enabled: If false, we yield None.
+    :return:
+    """
+    if not enabled:
+        yield None
+        return
+    with TemporaryDirectory(prefix="tum-exam-scripts-") as directory:
+        _LOGGER.info(f"Spooling to {directory}")
+        yield SpoolArea(Path(directory))
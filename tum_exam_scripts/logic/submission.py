@@ -0,0 +1,220 @@
+"""
+Concurrent job submission.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from logging import getLogger
+from pathlib import Path
+from random import uniform
+from threading import BoundedSemaphore
+from time import sleep
+from types import TracebackType
+from typing import TYPE_CHECKING, Callable, List, NamedTuple, Optional, Tuple, Type
+
+from tum_exam_scripts.defaults import DEFAULT_MAX_IN_FLIGHT, DEFAULT_RETRIES
+from tum_exam_scripts.logic.backends import (
+    PrintOptions,
+    SubmissionBackend,
+    SubmissionError,
+)
+from tum_exam_scripts.utils.files import file_size
+from tum_exam_scripts.utils.tracing import span
+
+if TYPE_CHECKING:
+    from tum_exam_scripts.logic.backpressure import Backpressure
+    from tum_exam_scripts.logic.keep_alive import EnablementKeeper
+
+_LOGGER = getLogger(__name__)
+
+
+class RetryPolicy(NamedTuple):
+    """
+    How often and how long we wait before we retry a transient failure.
+    """
+
+    retries: int = DEFAULT_RETRIES
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+
+    def delay(self, attempt: int) -> float:
+        """
+        Exponential backoff with jitter: the delay doubles with every attempt and half of it is random,
+        so that parallel jobs that failed together do not retry in lockstep.
+        :param attempt: The number of the failed attempt, starting with 1.
+        :return:
+        """
+        delay = min(self.max_delay, self.base_delay * 2.0 ** (attempt - 1))
+        return delay / 2 + uniform(0, delay / 2)
+
+
+class SubmissionResult(NamedTuple):
+    """
+    The outcome of submitting a single job.
+    """
+
+    pdf_file: Path
+    queue: str
+    job_id: Optional[str]
+    attempts: int
+    error: Optional[SubmissionError] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class SubmissionEngine:
+    """
+    Submits jobs on a thread pool and keeps at most ``max_in_flight`` jobs in flight.
+    submit() blocks until a slot is free, so the caller does not run ahead of the printing system.
+    With backpressure, submit() also blocks while the print queue is too full.
+    With an enablement keeper, every attempt waits while the keeper renews the printing enablement.
+    Failed jobs do not stop the engine; they are part of the results.
+    """
+
+    def __init__(
+        self,
+        backend: SubmissionBackend,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        retry_policy: RetryPolicy = RetryPolicy(),
+        on_result: Optional[Callable[[SubmissionResult], None]] = None,
+        backpressure: Optional["Backpressure"] = None,
+        enablement: Optional["EnablementKeeper"] = None,
+    ) -> None:
+        self._backend = backend
+        self._backpressure = backpressure
+        self._enablement = enablement
+        self._retry_policy = retry_policy
+        self._on_result = on_result
+        self._slots = BoundedSemaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_in_flight, thread_name_prefix="submission"
+        )
+        self._futures: List[Tuple["Future[SubmissionResult]", Path, str]] = []
+
+    def submit(self, pdf_file: Path, queue: str, options: PrintOptions) -> None:
+        """
+        Submit a job as soon as there is a free slot and the queue can take it.
+        :param pdf_file:
+        :param queue:
+        :param options:
+        :return:
+        """
+        self._slots.acquire()
+        try:
+            if self._backpressure is not None:
+                self._backpressure.wait(queue, file_size(pdf_file))
+            future = self._executor.submit(self._run, pdf_file, queue, options)
+        except BaseException:
+            self._slots.release()
+            raise
+        # From here on, _done releases the slot.
+        future.add_done_callback(partial(self._done, pdf_file, queue))
+        self._futures.append((future, pdf_file, queue))
+
+    def _run(
+        self, pdf_file: Path, queue: str, options: PrintOptions
+    ) -> SubmissionResult:
+        with span(
+            "submission.job", file=pdf_file, queue=queue, bytes=file_size(pdf_file)
+        ) as current:
+            result = self._attempt(pdf_file, queue, options)
+            current.set(attempts=result.attempts, job_id=result.job_id)
+            if result.error is not None:
+                current.error = type(result.error).__name__
+        fields = {
+            "job_id": result.job_id,
+            "file": str(pdf_file),
+            "queue": queue,
+            "attempts": result.attempts,
+            "duration": round(current.duration, 3),
+            "outcome": "sent" if result.ok else "failed",
+        }
+        if result.ok:
+            _LOGGER.info(f"{pdf_file} is job {result.job_id}", extra=fields)
+        else:
+            _LOGGER.error(
+                f"Giving up on {pdf_file} after {result.attempts} attempts: {result.error}",
+                extra=fields,
+            )
+        return result
+
+    def _attempt(
+        self, pdf_file: Path, queue: str, options: PrintOptions
+    ) -> SubmissionResult:
+        attempt = 0
+        while True:
+            attempt += 1
+            if self._enablement is not None:
+                self._enablement.wait()
+            try:
+                job_id = self._backend.submit(pdf_file, queue, options)
+                return SubmissionResult(pdf_file, queue, job_id, attempt)
+            except SubmissionError as e:
+                if not e.transient or attempt > self._retry_policy.retries:
+                    return SubmissionResult(pdf_file, queue, None, attempt, e)
+                delay = self._retry_policy.delay(attempt)
+                _LOGGER.warning(
+                    f"Sending {pdf_file} failed ({e}), retry in {delay:.1f}s",
+                    extra={
+                        "file": str(pdf_file),
+                        "queue": queue,
+                        "attempt": attempt,
+                        "outcome": "retry",
+                    },
+                )
+                sleep(delay)
+
+    def _done(
+        self, pdf_file: Path, queue: str, future: "Future[SubmissionResult]"
+    ) -> None:
+        self._slots.release()
+        if future.exception() is not None:
+            _LOGGER.error(f"Sending {pdf_file} crashed: {future.exception()!r}")
+        if self._on_result is not None:
+            self._on_result(_outcome(future, pdf_file, queue))
+
+    def join(self) -> List[SubmissionResult]:
+        """
+        Wait for all submitted jobs.
+        :return: The results in submission order.
+        """
+        return [
+            _outcome(future, pdf_file, queue)
+            for future, pdf_file, queue in self._futures
+        ]
+
+    def close(self) -> None:
+        """
+        Wait for all submitted jobs and stop the threads.
+        """
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "SubmissionEngine":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def _outcome(
+    future: "Future[SubmissionResult]", pdf_file: Path, queue: str
+) -> SubmissionResult:
+    """
+    The result of a finished job, or a failed one if the job crashed.
+    :param future:
+    :param pdf_file:
+    :param queue:
+    :return:
+    """
+    error = future.exception()
+    if error is None:
+        return future.result()
+    return SubmissionResult(
+        pdf_file, queue, None, 1, SubmissionError(str(error), transient=False)
+    )
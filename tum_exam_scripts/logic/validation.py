@@ -0,0 +1,282 @@
+"""
+PDF validation.
+"""
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from logging import getLogger
+from os.path import getsize
+from pathlib import Path
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from tum_exam_scripts.defaults import DEFAULT_VALIDATION_WORKERS
+from tum_exam_scripts.enums import ValidationLevel
+from tum_exam_scripts.utils.pdf_reader import verify_structure
+from tum_exam_scripts.utils.tracing import span
+
+if TYPE_CHECKING:
+    from tum_exam_scripts.logic.validation_cache import ValidationCache
+
+_LOGGER = getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 32
+_POLL_INTERVAL = 0.1
+_CHECK_NAMES = {
+    ValidationLevel.QUICK: "is_full_pdf",
+    ValidationLevel.STRUCTURE: "structure",
+}
+
+
+class ValidationResult(NamedTuple):
+    """
+    The outcome of validating a single PDF.
+    """
+
+    pdf_file: Path
+    valid: bool
+    problem: Optional[str] = None
+    # The page count if we counted the pages of a valid booklet while we validated it.
+    pages: Optional[int] = None
+
+
+def is_full_pdf(current_file: Path) -> bool:
+    """
+    Check whether a file is a valid PDF.
+    :param current_file:
+    :return:
+    """
+    size = getsize(current_file)
+    if size < 1024:
+        return False
+    with current_file.open("rb") as fin:
+        # start content
+        fin.seek(0)
+        start_content = fin.read(1024).decode("ascii", "ignore")
+        fin.seek(-1024, 2)
+        end_content = fin.read().decode("ascii", "ignore")
+    start_flag = False
+    # %PDF
+    if start_content.count("%PDF") > 0:
+        start_flag = True
+
+    if end_content.count("%%EOF") and start_flag > 0:
+        return True
+    eof: str = bytes([0]).decode("ascii")
+    if end_content.endswith(eof) and start_flag:
+        return True
+    return False
+
+
+def _check(pdf_file: Path, level: ValidationLevel) -> ValidationResult:
+    if level == ValidationLevel.STRUCTURE:
+        report = verify_structure(pdf_file)
+        return ValidationResult(
+            pdf_file, report.valid, "; ".join(report.problems) or None
+        )
+    return ValidationResult(pdf_file, is_full_pdf(pdf_file))
+
+
+def _run_check(
+    pdf_file: Path, level: ValidationLevel, processes: Optional[Executor]
+) -> ValidationResult:
+    if processes is None:
+        return _check(pdf_file, level)
+    return processes.submit(_check, pdf_file, level).result()
+
+
+def _validate(
+    pdf_file: Path,
+    cache: Optional["ValidationCache"],
+    level: ValidationLevel = ValidationLevel.QUICK,
+    processes: Optional[Executor] = None,
+    count: Optional[Callable[[Path], Optional[int]]] = None,
+) -> ValidationResult:
+    with span("validation.file", file=pdf_file, level=level.value) as current:
+        try:
+            stat = pdf_file.stat()
+            current.set(bytes=stat.st_size)
+            valid = None
+            if cache is not None:
+                valid = cache.get(pdf_file, stat, _CHECK_NAMES[level])
+            current.set(cached=valid is not None)
+            if valid is not None:
+                result = ValidationResult(pdf_file, valid)
+            else:
+                result = _run_check(pdf_file, level, processes)
+                if cache is not None:
+                    cache.put(pdf_file, stat, _CHECK_NAMES[level], result.valid)
+        except OSError as e:
+            _LOGGER.warning(f"Could not read {pdf_file}: {e}")
+            result = ValidationResult(pdf_file, False, str(e))
+        current.set(valid=result.valid)
+        if count is not None and result.valid:
+            # The page count only feeds the progress bar, so a booklet that we cannot count is still valid.
+            try:
+                result = result._replace(pages=count(pdf_file))
+            except Exception as e:
+                _LOGGER.warning(f"Cannot count the pages of {pdf_file}: {e!r}")
+        return result
+
+
+@contextmanager
+def _pools(
+    workers: int, level: ValidationLevel
+) -> Iterator[Tuple[ThreadPoolExecutor, Optional[Executor]]]:
+    """
+    The quick check only reads two kilobytes and runs on threads.
+    The structural check parses the file, so the threads hand it to a process pool of the same size.
+    We spawn the processes, forking a process with running threads is not safe.
+    """
+    threads = ThreadPoolExecutor(max_workers=workers)
+    processes: Optional[Executor] = None
+    if level == ValidationLevel.STRUCTURE:
+        from concurrent.futures import ProcessPoolExecutor
+        from multiprocessing import get_context
+
+        processes = ProcessPoolExecutor(
+            max_workers=workers, mp_context=get_context("spawn")
+        )
+    try:
+        yield threads, processes
+    finally:
+        threads.shutdown(wait=False)
+        if processes is not None:
+            processes.shutdown(wait=False)
+
+
+def validate_all(
+    pdf_files: Iterable[Path],
+    workers: int = DEFAULT_VALIDATION_WORKERS,
+    cache: Optional["ValidationCache"] = None,
+    level: ValidationLevel = ValidationLevel.QUICK,
+    count: Optional[Callable[[Path], Optional[int]]] = None,
+) -> Iterator[ValidationResult]:
+    """
+    Validate all PDFs in parallel and yield the results in input order.
+    Unlike validate_pipelined, all files are handed to the pool at once.
+    :param pdf_files:
+    :param workers:
+    :param cache: If given, we skip the booklets that did not change since they were validated.
+    :param level: How thoroughly we check the PDFs.
+    :param count: If given, we count the pages of the valid booklets with it on the workers, see ValidationResult.pages.
+    :return:
+    """
+    with _pools(workers, level) as (threads, processes):
+        yield from threads.map(
+            partial(
+                _validate, cache=cache, level=level, processes=processes, count=count
+            ),
+            pdf_files,
+        )
+
+
+_T = TypeVar("_T")
+_QueueItem = Union[None, BaseException, Tuple[Path, "Future[Any]"]]
+
+
+def validate_pipelined(
+    pdf_files: Iterable[Path],
+    workers: int = DEFAULT_VALIDATION_WORKERS,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    cache: Optional["ValidationCache"] = None,
+    level: ValidationLevel = ValidationLevel.QUICK,
+    count: Optional[Callable[[Path], Optional[int]]] = None,
+) -> Iterator[ValidationResult]:
+    """
+    Validate the PDFs on a thread pool and yield the results in input order.
+
+    A feeder thread hands the files to the pool and puts the pending results into a bounded queue.
+    The consumer gets each result as soon as it is known, while the pool keeps at most
+    ``queue_size`` files ahead of it.
+    :param pdf_files:
+    :param workers:
+    :param queue_size:
+    :param cache: If given, we skip the booklets that did not change since they were validated.
+    :param level: How thoroughly we check the PDFs.
+    :param count: See validate_all().
+    :return:
+    """
+    with _pools(workers, level) as (threads, processes):
+        yield from run_pipelined(
+            pdf_files,
+            partial(
+                _validate, cache=cache, level=level, processes=processes, count=count
+            ),
+            threads,
+            queue_size,
+        )
+
+
+def run_pipelined(
+    pdf_files: Iterable[Path],
+    work: Callable[[Path], _T],
+    executor: ThreadPoolExecutor,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+) -> Iterator[_T]:
+    """
+    Run the work on every file on the executor and yield the results in input order, see validate_pipelined.
+    :param pdf_files:
+    :param work:
+    :param executor:
+    :param queue_size:
+    :return:
+    """
+    pending: "Queue[_QueueItem]" = Queue(maxsize=queue_size)
+    stop = Event()
+
+    def _put(item: _QueueItem) -> bool:
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _feed() -> None:
+        try:
+            for pdf_file in pdf_files:
+                if not _put((pdf_file, executor.submit(work, pdf_file))):
+                    return
+        except BaseException as e:
+            _put(e)
+            return
+        _put(None)
+
+    feeder = Thread(target=_feed, name="pdf-validation-feeder", daemon=True)
+    feeder.start()
+    try:
+        while True:
+            item = pending.get()
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item[1].result()
+    finally:
+        stop.set()
+        _drain(pending)
+        feeder.join()
+
+
+def _drain(pending: "Queue[_QueueItem]") -> None:
+    while True:
+        try:
+            item = pending.get_nowait()
+        except Empty:
+            return
+        if isinstance(item, tuple):
+            item[1].cancel()
@@ -0,0 +1,179 @@
+"""
+Validation cache.
+We remember the validation result of every booklet in a small SQLite database, keyed by the identity of the file.
+If a booklet did not change since the last run, we do not have to open it again.
+"""
+from contextlib import contextmanager
+from logging import getLogger
+from os import stat_result
+from pathlib import Path
+from sqlite3 import Connection, Error, connect
+from threading import Lock
+from time import time
+from types import TracebackType
+from typing import Iterator, List, Optional, Tuple, Type
+
+from tum_exam_scripts.utils.files import file_hash, user_cache_directory
+
+_LOGGER = getLogger(__name__)
+
+CACHE_FILE_NAME = "validation.sqlite3"
+DEFAULT_MAX_ENTRIES = 50_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS validation (
+    path TEXT NOT NULL,
+    check_name TEXT NOT NULL,
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT,
+    valid INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (path, check_name)
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS validation_last_used ON validation (last_used)"
+
+_Row = Tuple[str, str, int, int, int, int, Optional[str], int, float]
+
+
+class ValidationCache:
+    """
+    Caches validation results keyed by path, device, inode, size, and mtime.
+    With hash_contents, we also compare the SHA-256 of the file, which costs a read of the file but no parsing.
+
+    Lookups go to the database, new results are buffered and written when the cache is closed.
+    The cache keeps at most max_entries results and evicts the least recently used ones.
+    """
+
+    def __init__(
+        self,
+        database: Path,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        hash_contents: bool = False,
+    ) -> None:
+        database.parent.mkdir(parents=True, exist_ok=True)
+        self._connection: Connection = connect(
+            str(database), check_same_thread=False, timeout=10
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(_SCHEMA)
+        self._connection.execute(_INDEX)
+        self._max_entries = max_entries
+        self._hash_contents = hash_contents
+        self._pending: List[_Row] = []
+        self._used: List[Tuple[float, str, str]] = []
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, pdf_file: Path, stat: stat_result, check_name: str) -> Optional[bool]:
+        """
+        Return the cached result if the file did not change.
+        :param pdf_file:
+        :param stat: The stat of the file, taken before it is validated.
+        :param check_name: The name of the check, so that different checks do not share results.
+        :return:
+        """
+        key = str(pdf_file.absolute())
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT device, inode, size, mtime_ns, sha256, valid FROM validation "
+                "WHERE path = ? AND check_name = ?",
+                (key, check_name),
+            ).fetchone()
+        hit = row is not None and tuple(row[:4]) == _identity(stat)
+        if hit and self._hash_contents:
+            hit = row[4] == file_hash(pdf_file)
+        with self._lock:
+            if not hit:
+                self.misses += 1
+                return None
+            self._used.append((time(), key, check_name))
+            self.hits += 1
+        return bool(row[5])
+
+    def put(
+        self, pdf_file: Path, stat: stat_result, check_name: str, valid: bool
+    ) -> None:
+        """
+        Remember a validation result.
+        :param pdf_file:
+        :param stat: The stat of the file, taken before it was validated.
+        :param check_name:
+        :param valid:
+        :return:
+        """
+        sha = file_hash(pdf_file) if self._hash_contents else None
+        row = (str(pdf_file.absolute()), check_name) + _identity(stat)
+        with self._lock:
+            self._pending.append(row + (sha, int(valid), time()))
+
+    def close(self) -> None:
+        """
+        Write the buffered results, evict old entries, and close the database.
+        """
+        with self._lock:
+            try:
+                with self._connection:
+                    self._connection.executemany(
+                        "INSERT OR REPLACE INTO validation VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        self._pending,
+                    )
+                    self._connection.executemany(
+                        "UPDATE validation SET last_used = ? WHERE path = ? AND check_name = ?",
+                        self._used,
+                    )
+                    self._connection.execute(
+                        "DELETE FROM validation WHERE rowid IN ("
+                        "SELECT rowid FROM validation ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                        (self._max_entries,),
+                    )
+            except Error as e:
+                _LOGGER.warning(f"Cannot update the validation cache: {e}")
+            self._pending.clear()
+            self._used.clear()
+            self._connection.close()
+        _LOGGER.info(f"Validation cache: {self.hits} hits, {self.misses} misses")
+
+    def __enter__(self) -> "ValidationCache":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def _identity(stat: stat_result) -> Tuple[int, int, int, int]:
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+@contextmanager
+def open_validation_cache(
+    enabled: bool = True, hash_contents: bool = False
+) -> Iterator[Optional[ValidationCache]]:
+    """
+    Open the cache in the user cache directory.
+    :param enabled: If false, we yield None.
+    :param hash_contents:
+    :return: None if the cache is disabled or cannot be opened; we validate without a cache then.
+    """
+    if not enabled:
+        yield None
+        return
+    database = user_cache_directory().joinpath(CACHE_FILE_NAME)
+    try:
+        cache = ValidationCache(database, hash_contents=hash_contents)
+    except (Error, OSError) as e:
+        _LOGGER.warning(f"Cannot open the validation cache {database}: {e}")
+        yield None
+        return
+    with cache:
+        yield cache
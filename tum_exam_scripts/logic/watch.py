@@ -0,0 +1,217 @@
+"""
+Watching an export folder while it is still downloading.
+We yield every booklet as soon as it is complete, so that we print the first booklets while the last ones
+are still on their way.
+"""
+from logging import getLogger
+from os import stat_result
+from pathlib import Path
+from threading import Event
+from time import monotonic, time
+from types import TracebackType
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+from tum_exam_scripts.defaults import DEFAULT_SETTLE_SECONDS, DEFAULT_WATCH_INTERVAL
+from tum_exam_scripts.logic.discovery import BOOKLET_SUFFIX, iter_booklets, natural_key
+from tum_exam_scripts.logic.journal import SubmissionJournal
+from tum_exam_scripts.logic.validation import is_full_pdf
+from tum_exam_scripts.utils.inotify import (
+    IN_CLOSE_WRITE,
+    IN_CREATE,
+    IN_MOVED_TO,
+    Inotify,
+)
+
+_LOGGER = getLogger(__name__)
+
+_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# The size and the modification time, if one of them changes, the file changed.
+_Version = Tuple[int, int]
+
+
+class _Candidate(NamedTuple):
+    """
+    A booklet that is not complete yet, as far as we know.
+    """
+
+    version: _Version
+    since: float
+    checked: bool = False
+
+
+def _version(stat: stat_result) -> _Version:
+    return stat.st_size, stat.st_mtime_ns
+
+
+class BookletWatcher:
+    """
+    Yields the booklets in a directory once they are complete, until stop() is called.
+    A booklet is complete if it did not change for `settle` seconds and is a full PDF.
+    We learn about new files from inotify on Linux and look at the directory every `interval` seconds otherwise,
+    e.g., on network drives, where inotify does not see the changes of other machines.
+    We skip the booklets that the journal confirms as sent and yield every booklet only once, unless it changes.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        recursive: bool = False,
+        settle: float = DEFAULT_SETTLE_SECONDS,
+        interval: float = DEFAULT_WATCH_INTERVAL,
+        journal: Optional[SubmissionJournal] = None,
+        idle_timeout: Optional[float] = None,
+        use_inotify: bool = True,
+    ) -> None:
+        """
+        :param directory:
+        :param recursive: Also watch the subdirectories.
+        :param settle:
+        :param interval:
+        :param journal:
+        :param idle_timeout: Stop after so many seconds without a new or changed booklet, None watches until stop().
+        :param use_inotify: False always looks at the directory every interval.
+        """
+        self.directory = directory
+        self._recursive = recursive
+        self._settle = settle
+        self._interval = interval
+        self._journal = journal
+        self._idle_timeout = idle_timeout
+        self._stop = Event()
+        self._candidates: Dict[Path, _Candidate] = {}
+        self._handled: Dict[Path, _Version] = {}
+        self._last_activity = monotonic()
+        self._inotify: Optional[Inotify] = None
+        if use_inotify:
+            try:
+                self._inotify = Inotify()
+            except OSError as e:
+                _LOGGER.info(f"We look at {directory} regularly, inotify failed: {e}")
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._inotify is not None
+
+    def stop(self) -> None:
+        """
+        Stop watching; the iterator ends after the current interval. We may be called from a signal handler.
+        """
+        self._stop.set()
+
+    def __iter__(self) -> Iterator[Path]:
+        self._scan(self.directory, watch=True, initial=True)
+        while not self._stop.is_set():
+            if self._inotify is not None:
+                self._read_events()
+            elif not self._stop.wait(self._interval):
+                self._scan(self.directory)
+            yield from self._complete()
+            idle = monotonic() - self._last_activity
+            if self._idle_timeout is not None and idle > self._idle_timeout:
+                _LOGGER.info(f"No new booklets for {idle:.0f}s, we stop watching")
+                return
+
+    def _scan(
+        self, directory: Path, watch: bool = False, initial: bool = False
+    ) -> None:
+        if watch and self._inotify is not None:
+            # We watch before we look, so we do not miss files that arrive in between.
+            self._watch(directory)
+        booklets = list(iter_booklets(directory, self._recursive))
+        if initial and self._journal is not None:
+            sent = self._journal.already_sent(booklets)
+            for pdf_file in sent:
+                self._handled[pdf_file] = _version(pdf_file.stat())
+            if len(sent) > 0:
+                _LOGGER.info(f"Skipping {len(sent)} booklets that we already sent")
+        for pdf_file in sorted(booklets, key=natural_key):
+            self._note(pdf_file)
+
+    def _watch(self, directory: Path) -> None:
+        assert self._inotify is not None
+        self._inotify.add_watch(directory, _MASK)
+        if self._recursive:
+            for subdirectory in directory.iterdir():
+                if subdirectory.is_dir() and not subdirectory.name.startswith("."):
+                    self._watch(subdirectory)
+
+    def _read_events(self) -> None:
+        assert self._inotify is not None
+        for event in self._inotify.read(self._interval):
+            if event.path is None:
+                _LOGGER.warning("We missed some changes, we look at everything again")
+                self._scan(self.directory)
+            elif event.path.name.startswith("."):
+                continue
+            elif event.is_dir:
+                if self._recursive:
+                    self._scan(event.path, watch=True)
+            elif event.path.name.endswith(BOOKLET_SUFFIX):
+                self._note(event.path)
+
+    def _note(self, pdf_file: Path) -> None:
+        try:
+            stat = pdf_file.stat()
+        except OSError:
+            return
+        version = _version(stat)
+        if self._handled.get(pdf_file) == version:
+            return
+        candidate = self._candidates.get(pdf_file)
+        if candidate is None or candidate.version != version:
+            # A file that nobody touched for a while, e.g., before we started, has settled already.
+            age = max(0.0, time() - stat.st_mtime)
+            self._candidates[pdf_file] = _Candidate(version, monotonic() - age)
+            self._last_activity = monotonic()
+
+    def _complete(self) -> List[Path]:
+        """
+        The candidates that settled and are full PDFs, in natural order.
+        """
+        now = monotonic()
+        complete = []
+        for pdf_file, candidate in list(self._candidates.items()):
+            try:
+                version = _version(pdf_file.stat())
+            except OSError:
+                del self._candidates[pdf_file]
+                continue
+            if version != candidate.version:
+                self._candidates[pdf_file] = _Candidate(version, now)
+                self._last_activity = now
+            elif not candidate.checked and now - candidate.since >= self._settle:
+                try:
+                    full = is_full_pdf(pdf_file)
+                except OSError:
+                    del self._candidates[pdf_file]
+                    continue
+                if full:
+                    del self._candidates[pdf_file]
+                    self._handled[pdf_file] = version
+                    complete.append(pdf_file)
+                else:
+                    # We look again when it changes.
+                    self._candidates[pdf_file] = candidate._replace(checked=True)
+        if len(complete) > 0 and self._journal is not None:
+            sent = set(self._journal.already_sent(complete))
+            complete = [f for f in complete if f not in sent]
+        if len(complete) > 0:
+            self._last_activity = now
+        return sorted(complete, key=natural_key)
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def __enter__(self) -> "BookletWatcher":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
@@ -1,37 +1,35 @@
 """
 Main.
 """
-from logging import INFO, basicConfig, getLogger
-from typing import Optional
+from logging import getLevelName, getLogger
+from pathlib import Path
+from typing import List, Optional
 
-from tum_exam_scripts import __version__
-from tum_exam_scripts.enums import Browser
-from tum_exam_scripts.logic.pdf_printing import install_linux_driver_internal
+from tum_exam_scripts.defaults import DEFAULT_UCENTRAL_URL
+from tum_exam_scripts.enums import Browser, EnablementMode, LogLevel
 from tum_exam_scripts.pdf_commands import app as pdf_commands_app
-from tum_exam_scripts.shared import DRIVER_OPTION
-from tum_exam_scripts.utils.password_handling import (
-    get_password_from_keyring,
-    store_password,
+from tum_exam_scripts.utils.files import user_log_directory
+from tum_exam_scripts.utils.logs import (
+    DEFAULT_LOG_BACKUPS,
+    DEFAULT_LOG_MAX_MEGABYTES,
+    LOG_FILE_NAME,
+    configure_logging,
+    stop_logging,
 )
-from tum_exam_scripts.utils.website import open_website_internal
-from typer import Argument, Exit, Option, Typer, echo
+from tum_exam_scripts.utils.tracing import configure_tracing, shutdown_tracing
+from typer import Argument, Context, Exit, Option, Typer, echo
 
 _USER_ARGUMENT = Argument(
     None,
     help="The username for your informatics account, i.e., the first letters of your lastname.",
 )
 _LOGGER = getLogger(__name__)
-basicConfig(
-    format="%(levelname)s: %(asctime)s: %(name)s: %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-    level=INFO,
-    filename="tum-exam-scripts.log",
-    filemode="a",
-)
 
 
 def _version_callback(value: bool) -> None:
     if value:
+        from tum_exam_scripts import __version__
+
         echo(f"tum-exam-scripts {__version__}")
         raise Exit()
 
@@ -41,6 +39,7 @@ app = Typer()
 
 @app.callback()
 def _call_back(
+    ctx: Context,
     _: bool = Option(
         None,
         "--version",
@@ -49,31 +48,133 @@ def _call_back(
         expose_value=False,
         is_eager=True,
         help="Version",
-    )
+    ),
+    trace_file: Optional[Path] = Option(
+        None,
+        "--trace-file",
+        envvar="TUM_EXAM_SCRIPTS_TRACE_FILE",
+        dir_okay=False,
+        help="Append the duration, bytes, and pages of every step, e.g., the validation and every print job, "
+        "as JSON lines to this file.",
+    ),
+    metrics_file: Optional[Path] = Option(
+        None,
+        "--metrics-file",
+        envvar="TUM_EXAM_SCRIPTS_METRICS_FILE",
+        dir_okay=False,
+        help="Write the totals per step in the Prometheus text format to this file when the command finishes, "
+        "e.g., for the textfile collector of the node exporter.",
+    ),
+    log_file: Optional[Path] = Option(
+        None,
+        "--log-file",
+        envvar="TUM_EXAM_SCRIPTS_LOG_FILE",
+        dir_okay=False,
+        help=f"The JSON log file. By default, we write to {LOG_FILE_NAME} in the log directory of your user, "
+        "e.g., ~/.local/state/tum-exam-scripts on Linux and ~/Library/Logs/tum-exam-scripts on macOS.",
+    ),
+    log_level: LogLevel = Option(LogLevel.INFO.value, "--log-level"),
+    log_max_size: int = Option(
+        DEFAULT_LOG_MAX_MEGABYTES,
+        "--log-max-size",
+        min=0,
+        help="We start a new log file when the current one reaches this size in megabytes. 0 never rotates.",
+    ),
+    log_backups: int = Option(
+        DEFAULT_LOG_BACKUPS,
+        "--log-backups",
+        min=0,
+        help="How many rotated log files we keep.",
+    ),
+    profile: bool = Option(
+        False,
+        "--profile",
+        help="Profile the command with cProfile and write a report and the stacks of all threads "
+        "in the collapsed format of flamegraph.pl next to the log file.",
+    ),
+    profile_memory: bool = Option(
+        False,
+        "--profile-memory",
+        help="Like --profile, and also report where we allocated the most memory. This slows the command down.",
+    ),
 ) -> None:
     """
     A collection of useful commands to print TUMExams. You can find the source code under https://gitlab.lrz.de/i4/software/tum-exam-scripts
     """
+    # Not at import time, and the file is only opened with the first record,
+    # so `--version`, `--help`, and importing the package do not touch the log file.
+    if log_file is None:
+        log_file = user_log_directory() / LOG_FILE_NAME
+    configure_logging(
+        log_file,
+        getLevelName(log_level.value.upper()),
+        log_max_size,
+        log_backups,
+    )
+    ctx.call_on_close(stop_logging)
+    if trace_file is not None or metrics_file is not None:
+        configure_tracing(trace_file, metrics_file)
+        ctx.call_on_close(shutdown_tracing)
+    if profile or profile_memory:
+        from tum_exam_scripts.utils.profiling import start_profiling
+
+        profiler = start_profiling(log_file.parent, profile_memory)
+
+        def _stop_profiling() -> None:
+            report_file, stacks_file = profiler.stop()
+            if report_file.exists():
+                echo(
+                    f"We wrote the profile to {report_file} and {stacks_file}", err=True
+                )
+
+        # Registered last, so we stop profiling first and can still log where the profile is.
+        ctx.call_on_close(_stop_profiling)
 
 
 @app.command()
 def install_linux_driver(
-    driver_name: str = DRIVER_OPTION,
-    user_password: str = Option(
+    driver_names: List[str] = Option(
+        ["followmeppd"],
+        "--driver-name",
+        "-d",
+        help="Name of the driver. Repeat the option to set up several queues, e.g., one per room.",
+    ),
+    user_password: Optional[str] = Option(
         None,
         "--password",
         "-p",
-        help="Your user password. NOTE: The user should have 'sudo' privileges.",
-        hide_input=True,
-        prompt=True,
+        help="Your user password. NOTE: The user should have 'sudo' privileges. We only ask for it if a queue needs to be set up.",
+    ),
+    offline: bool = Option(
+        False,
+        "--offline",
+        help="Install the PPD file we downloaded before instead of downloading it.",
+    ),
+    refresh: bool = Option(
+        False,
+        "--refresh",
+        help="Download the PPD file again, even if the cached one is fine.",
+    ),
+    force: bool = Option(
+        False,
+        "--force",
+        help="Set up the queues again, even if they are already set up.",
+    ),
+    sha256: Optional[str] = Option(
+        None,
+        "--sha256",
+        help="The SHA-256 the PPD file must have. We refuse to install any other PPD file.",
     ),
 ) -> None:
     """
     This snippet downloads the Linux driver for the printers and makes them available under $driver_name
     This is needed as the macOS driver cannot handle the booklets.
     Please change the command on mac for printing the exams from `-dfollowme` to `-dfollowmepdd`!!!
+    We keep the driver in the cache directory and skip the queues that are already set up, so you can run it again at any time.
     """
-    install_linux_driver_internal(driver_name, user_password)
+    from tum_exam_scripts.console import install_driver
+
+    install_driver(driver_names, user_password, offline, refresh, force, sha256)
 
 
 @app.command()
@@ -98,6 +199,8 @@ def store_password_in_password_manager(
     """
     Stores the password in the password manager.
     """
+    from tum_exam_scripts.utils.password_handling import store_password
+
     store_password(force, password, user_name)
 
 
@@ -113,14 +216,46 @@ def open_printing_page(
         "-p",
         help="The password for your informatics account. If you do not pass a password, we will use the password stored in the password manager.",
     ),
+    mode: EnablementMode = Option(
+        EnablementMode.AUTO.value,
+        "--mode",
+        "-m",
+        help="How we enable printing: 'http' logs in and presses the button with plain HTTP requests, "
+        "which needs neither a browser nor a display, 'browser' starts the browser, "
+        "and 'auto' starts the browser only if 'http' fails.",
+    ),
+    url: str = Option(
+        DEFAULT_UCENTRAL_URL, "--url", help="The start page of ucentral."
+    ),
 ) -> None:
     """
-    Open the page we need to send the PDFs to the FollowMe printer.
+    Open the page we need to send the PDFs to the FollowMe printer and enable printing from this machine.
 
     """
+    from tum_exam_scripts.utils.password_handling import get_password_from_keyring
+
     if password is None:
         password = get_password_from_keyring(user_name)
-    open_website_internal(user_name, password, browser)
+    if mode != EnablementMode.BROWSER:
+        from tum_exam_scripts.utils.command import error_echo
+        from tum_exam_scripts.utils.enablement import EnablementError, enable_printing
+
+        try:
+            if enable_printing(user_name, password, url):
+                echo("This machine can print now.")
+            else:
+                echo("We can already print from this machine")
+            return
+        except EnablementError as e:
+            if mode == EnablementMode.HTTP:
+                error_echo(f"We could not enable printing: {e}")
+                raise Exit(1)
+            echo(
+                f"We could not enable printing without a browser ({e}), so we start {browser.value}."
+            )
+    from tum_exam_scripts.utils.website import open_website_internal
+
+    open_website_internal(user_name, password, browser, url)
 
 
 app.add_typer(pdf_commands_app, name="pdf")
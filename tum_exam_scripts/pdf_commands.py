@@ -1,20 +1,50 @@
 """
 PDF commands.
+The commands import the logic when they run, so that the CLI starts fast.
 """
+import sys
+from itertools import chain
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
 from click import echo
 from click.exceptions import Exit
 
-from tum_exam_scripts.logic.pdf_printing import (
-    send_attendee_list_internal,
-    send_pdf_files,
+from tum_exam_scripts.defaults import (
+    DEFAULT_MIN_SAVING_PERCENT,
+    DEFAULT_QUEUE_POLL_INTERVAL,
+    DEFAULT_SETTLE_SECONDS,
+    DEFAULT_VALIDATION_WORKERS,
+    DEFAULT_WATCH_INTERVAL,
 )
-from tum_exam_scripts.shared import DRIVER_OPTION
-from tum_exam_scripts.utils.command import call_command, confirm_printing_rights
+from tum_exam_scripts.enums import Backend, ValidationLevel
+from tum_exam_scripts.shared import (
+    BACKEND_OPTION,
+    CACHE_OPTION,
+    DRIVER_NAMES_OPTION,
+    DRIVER_OPTION,
+    ENABLE_AS_OPTION,
+    IPP_URI_OPTION,
+    MAX_IN_FLIGHT_OPTION,
+    MAX_QUEUED_JOBS_OPTION,
+    MAX_QUEUED_MEGABYTES_OPTION,
+    MAX_QUEUE_WAIT_OPTION,
+    PAGES_PER_MINUTE_OPTION,
+    PROFILES_OPTION,
+    RESUME_OPTION,
+    RETRIES_OPTION,
+    STRICT_OPTION,
+    UCENTRAL_URL_OPTION,
+    VALIDATION_LEVEL_OPTION,
+    VALIDATION_WORKERS_OPTION,
+)
+from tum_exam_scripts.utils.tracing import span
 from typer import Argument, Option, Typer
 
+if TYPE_CHECKING:
+    from tum_exam_scripts.logic.keep_alive import EnablementKeeper
+    from tum_exam_scripts.logic.profiles import PrintProfile
+
 app = Typer()
 
 
@@ -27,7 +57,7 @@ def _call_back() -> None:
 
 @app.command()
 def send_all_booklets(
-    driver_name: str = DRIVER_OPTION,
+    driver_name: List[str] = DRIVER_NAMES_OPTION,
     input_directory: Path = Argument(
         ".",
         exists=True,
@@ -42,9 +72,86 @@ def send_all_booklets(
         help="If you add a batch size, the process will stop after so many exams and wait for you to continue."
         "You can you this so start all jobs on a printer, then send the next batch, and start these exams on another printer.",
     ),
+    pages_per_minute: float = PAGES_PER_MINUTE_OPTION,
+    strict: bool = STRICT_OPTION,
+    validation_workers: int = VALIDATION_WORKERS_OPTION,
+    validation_level: ValidationLevel = VALIDATION_LEVEL_OPTION,
+    backend: Backend = BACKEND_OPTION,
+    ipp_uri: str = IPP_URI_OPTION,
+    max_in_flight: int = MAX_IN_FLIGHT_OPTION,
+    retries: int = RETRIES_OPTION,
+    max_queued_jobs: int = MAX_QUEUED_JOBS_OPTION,
+    max_queued_megabytes: int = MAX_QUEUED_MEGABYTES_OPTION,
+    max_queue_wait: int = MAX_QUEUE_WAIT_OPTION,
+    resume: bool = RESUME_OPTION,
+    profiles_file: Optional[Path] = PROFILES_OPTION,
+    cache: bool = CACHE_OPTION,
+    cache_hash: bool = Option(
+        False,
+        "--cache-hash",
+        is_flag=True,
+        help="Only use a cached validation result if the SHA-256 of the booklet did not change either.",
+    ),
+    recursive: bool = Option(
+        False,
+        "--recursive",
+        "-r",
+        is_flag=True,
+        help="Also send the booklets in the subdirectories, e.g., one directory per room.",
+    ),
+    exams: Optional[str] = Option(
+        None,
+        "--exams",
+        help="Only send these exams, e.g., '1-120,250,300-' for the exams E0001 to E0120, E0250, and from E0300 on.",
+    ),
+    exclude_exams: Optional[str] = Option(
+        None,
+        "--exclude-exams",
+        help="Do not send these exams, in the notation of --exams.",
+    ),
+    stream: bool = Option(
+        False,
+        "--stream",
+        is_flag=True,
+        help="Validate and send the booklets while we still read the directory, in the order of the file system. "
+        "Without this flag, we first read the whole directory and send the booklets ordered by their exam number.",
+    ),
+    merge: int = Option(
+        1,
+        "--merge",
+        min=1,
+        help="Send so many consecutive booklets with the same page count as one job, so you release fewer jobs at the printer. "
+        "Every booklet starts on a fresh sheet and is stapled on its own. "
+        "If the printer cannot staple every booklet of a job, we send one job per booklet.",
+    ),
+    compress: bool = Option(
+        False,
+        "--compress",
+        is_flag=True,
+        help="Send copies of the booklets with compressed streams and without duplicated objects, e.g., fonts, "
+        "if they are considerably smaller. This saves time on a slow connection to the printing server.",
+    ),
+    min_saving: float = Option(
+        DEFAULT_MIN_SAVING_PERCENT,
+        "--min-saving",
+        min=0,
+        max=100,
+        help="With --compress, we only send a copy if it is at least so many percent smaller than the booklet.",
+    ),
+    manifest: bool = Option(
+        False,
+        "--manifest",
+        is_flag=True,
+        help="Hash the booklets, send only the first of identical booklets, and only the booklets that changed "
+        "since the last print run with this flag. We keep the hashes in .tum-exam-scripts-manifest.json in the input directory.",
+    ),
+    enable_as: Optional[str] = ENABLE_AS_OPTION,
+    ucentral_url: str = UCENTRAL_URL_OPTION,
 ) -> None:
     """
     Send all booklets to the printing server.
+    We record every submission in the file .tum-exam-scripts-journal.jsonl in the input directory.
+    If you pass several drivers, we split the booklets by page count so that all printers finish at about the same time.
 
     Example:
         tum-exam-scripts send-all-booklets /path/to/exams/
@@ -53,13 +160,270 @@ def send_all_booklets(
         if batch_size < 2:
             echo(f"{batch_size} is not a valid batch size!")
             raise Exit(1)
-    confirm_printing_rights()
-    pdf_files = sorted(input_directory.glob("*-book.pdf"))
+        if len(driver_name) > 1:
+            echo("You cannot use a batch size with several drivers!")
+            raise Exit(1)
+    _check_drivers(driver_name, pages_per_minute, validation_workers)
+    if stream and (strict or len(driver_name) > 1):
+        echo("You cannot stream the booklets in the strict mode or to several drivers!")
+        raise Exit(1)
+    if merge > 1 and (stream or batch_size is not None):
+        echo("You cannot merge the booklets with --stream or a batch size!")
+        raise Exit(1)
+    if manifest and stream:
+        echo("You cannot use the manifest with --stream!")
+        raise Exit(1)
+    from tum_exam_scripts.logic.discovery import (
+        discover_booklets,
+        iter_booklets,
+        parse_exam_ranges,
+    )
+
+    try:
+        include = parse_exam_ranges(exams) if exams is not None else None
+        exclude = (
+            parse_exam_ranges(exclude_exams) if exclude_exams is not None else None
+        )
+    except ValueError as e:
+        echo(f"{e}!")
+        raise Exit(1)
+    _check_submission_options(max_in_flight, retries)
+    booklet = _load_profiles(profiles_file)["booklet"]
+    enablement = _check_printing_rights(enable_as, ucentral_url)
+    from tum_exam_scripts.logic.backends import create_backend
+    from tum_exam_scripts.logic.backpressure import create_backpressure
+    from tum_exam_scripts.logic.compaction import open_compactor
+    from tum_exam_scripts.logic.journal import SubmissionJournal
+    from tum_exam_scripts.logic.manifest import (
+        Manifest,
+        ManifestEntry,
+        record_sent_booklets,
+        skip_unchanged_booklets,
+    )
+    from tum_exam_scripts.logic.merging import StaplingUnsupportedError, create_merger
+    from tum_exam_scripts.logic.page_index import count_pages
+    from tum_exam_scripts.console import (
+        report_selection,
+        send_pdf_files,
+        skip_sent_booklets,
+    )
+    from tum_exam_scripts.logic.spool import open_spool_area
+    from tum_exam_scripts.logic.submission import RetryPolicy
+    from tum_exam_scripts.logic.validation_cache import open_validation_cache
+
+    pdf_files: Iterable[Path]
+    if stream:
+        booklets = iter_booklets(input_directory, recursive, include, exclude)
+        first = next(booklets, None)
+        if first is None:
+            echo(f"We did not find any booklets. Please check {input_directory}")
+            raise Exit(1)
+        pdf_files = chain([first], booklets)
+    else:
+        with span("discovery", directory=input_directory) as current:
+            pdf_files = discover_booklets(input_directory, recursive, include, exclude)
+            current.set(files=len(pdf_files))
+        if len(pdf_files) == 0:
+            echo(f"We did not find any booklets. Please check {input_directory}")
+            raise Exit(1)
+        echo(f"We found {len(pdf_files)} booklets.")
+    booklet_manifest: Optional[Manifest] = None
+    entries: Dict[Path, ManifestEntry] = {}
+    if manifest and isinstance(pdf_files, list):
+        booklet_manifest = Manifest(input_directory)
+        selection = skip_unchanged_booklets(
+            booklet_manifest, pdf_files, validation_workers
+        )
+        report_selection(selection)
+        pdf_files, entries = selection.pdf_files, selection.entries
+        if len(pdf_files) == 0:
+            echo("Done!")
+            return
+    with SubmissionJournal(input_directory) as journal:
+        if resume and isinstance(pdf_files, list):
+            pdf_files = skip_sent_booklets(journal, pdf_files)
+            if len(pdf_files) == 0:
+                echo("Done!")
+                return
+        elif resume:
+            pdf_files = journal.not_sent(pdf_files)
+        queue_of = None
+        pages = None
+        if isinstance(pdf_files, list) and len(driver_name) > 1:
+            counts = count_pages(pdf_files, validation_workers)
+            pages = dict(zip(pdf_files, counts))
+            pdf_files, queue_of = _spread_over_queues(
+                pdf_files,
+                counts,
+                driver_name,
+                pages_per_minute,
+            )
+        with create_backend(
+            backend, ipp_uri
+        ) as submission_backend, create_backpressure(
+            backend, ipp_uri, max_queued_jobs, max_queued_megabytes, max_queue_wait
+        ) as backpressure, open_validation_cache(
+            cache, cache_hash
+        ) as validation_cache, open_spool_area(
+            merge > 1 or compress
+        ) as spool, open_compactor(
+            compress, spool, validation_workers, min_saving
+        ) as compactor:
+            try:
+                merger = create_merger(
+                    merge, booklet.options, driver_name, spool, ipp_uri
+                )
+            except StaplingUnsupportedError as e:
+                echo(f"{e}, so we send one job per booklet.")
+                merger = None
+            try:
+                send_pdf_files(
+                    driver_name[0],
+                    pdf_files,
+                    batch_size,
+                    strict,
+                    validation_workers=validation_workers,
+                    backend=submission_backend,
+                    max_in_flight=max_in_flight,
+                    retry_policy=RetryPolicy(retries),
+                    journal=journal,
+                    cache=validation_cache,
+                    validation_level=validation_level,
+                    queue_of=queue_of,
+                    options=booklet.options,
+                    backpressure=backpressure,
+                    enablement=enablement,
+                    merger=merger,
+                    compactor=compactor,
+                    pages=pages,
+                )
+            finally:
+                if booklet_manifest is not None:
+                    journal.close()
+                    record_sent_booklets(booklet_manifest, journal, entries)
+
+
+@app.command()
+def print_all(
+    export_directory: Path = Argument(
+        ".",
+        exists=True,
+        resolve_path=True,
+        help="The folder of the TUMExam export with the booklets and the endterm_lists folder.",
+        file_okay=False,
+    ),
+    driver_name: List[str] = DRIVER_NAMES_OPTION,
+    only: List[str] = Option(
+        [],
+        "--only",
+        help="Only print the documents of this profile. Repeat the option for several profiles.",
+    ),
+    profiles_file: Optional[Path] = PROFILES_OPTION,
+    pages_per_minute: float = PAGES_PER_MINUTE_OPTION,
+    strict: bool = STRICT_OPTION,
+    validation_workers: int = VALIDATION_WORKERS_OPTION,
+    validation_level: ValidationLevel = VALIDATION_LEVEL_OPTION,
+    backend: Backend = BACKEND_OPTION,
+    ipp_uri: str = IPP_URI_OPTION,
+    max_in_flight: int = MAX_IN_FLIGHT_OPTION,
+    retries: int = RETRIES_OPTION,
+    max_queued_jobs: int = MAX_QUEUED_JOBS_OPTION,
+    max_queued_megabytes: int = MAX_QUEUED_MEGABYTES_OPTION,
+    max_queue_wait: int = MAX_QUEUE_WAIT_OPTION,
+    resume: bool = RESUME_OPTION,
+    cache: bool = CACHE_OPTION,
+    enable_as: Optional[str] = ENABLE_AS_OPTION,
+    ucentral_url: str = UCENTRAL_URL_OPTION,
+) -> None:
+    """
+    Print everything of an exam in one go: the seat plans, the room plans, the attendee list, and all booklets.
+    We show what we found, ask only once whether you enabled printing, and then validate and send all documents in one pipeline.
+    Every kind of document is printed with its profile; you can change the profiles and add your own with --profiles.
+    We record every submission in the file .tum-exam-scripts-journal.jsonl in the export folder.
+
+    Example:
+        tum-exam-scripts pdf print-all /path/to/export/
+    """
+    _check_drivers(driver_name, pages_per_minute, validation_workers)
+    _check_submission_options(max_in_flight, retries)
+    profiles = _load_profiles(profiles_file)
+    names = list(dict.fromkeys(only)) if len(only) > 0 else list(profiles)
+    unknown = [n for n in names if n not in profiles]
+    if len(unknown) > 0:
+        echo(
+            f"There is no profile {', '.join(unknown)}! We know {', '.join(profiles)}."
+        )
+        raise Exit(1)
+    from tum_exam_scripts.logic.backends import create_backend
+    from tum_exam_scripts.logic.backpressure import create_backpressure
+    from tum_exam_scripts.logic.journal import SubmissionJournal
+    from tum_exam_scripts.logic.page_index import count_pages
+    from tum_exam_scripts.console import send_pdf_files, skip_sent_booklets
+    from tum_exam_scripts.logic.profiles import find_documents
+    from tum_exam_scripts.logic.submission import RetryPolicy
+    from tum_exam_scripts.logic.validation_cache import open_validation_cache
+
+    with span("discovery", directory=export_directory) as current:
+        documents = find_documents(export_directory, profiles, names)
+        pdf_files = [f for name in names for f in documents[name]]
+        current.set(files=len(pdf_files))
     if len(pdf_files) == 0:
-        echo(f"We did not find any booklets. Please check {input_directory}")
+        echo(f"We did not find any documents. Please check {export_directory}")
         raise Exit(1)
-    echo(f"We found {len(pdf_files)} booklets.")
-    send_pdf_files(driver_name, pdf_files, batch_size)
+    width = max(len(name) for name in names)
+    for name in names:
+        if len(documents[name]) > 0:
+            copies = profiles[name].options.copies or 1
+            echo(
+                f"{name:{width}}  {len(documents[name]):5} documents, "
+                f"{copies} {'copy' if copies == 1 else 'copies'} each"
+            )
+    enablement = _check_printing_rights(enable_as, ucentral_url)
+    options_of = {f: profiles[name].options for name in names for f in documents[name]}
+    with SubmissionJournal(export_directory) as journal:
+        if resume:
+            pdf_files = skip_sent_booklets(journal, pdf_files)
+            if len(pdf_files) == 0:
+                echo("Done!")
+                return
+        queue_of = None
+        pages = None
+        if len(driver_name) > 1:
+            counts = count_pages(pdf_files, validation_workers)
+            pages = dict(zip(pdf_files, counts))
+            pdf_files, queue_of = _spread_over_queues(
+                pdf_files,
+                [
+                    p * (options_of[f].copies or 1) if p is not None else None
+                    for f, p in zip(pdf_files, counts)
+                ],
+                driver_name,
+                pages_per_minute,
+            )
+        with create_backend(
+            backend, ipp_uri
+        ) as submission_backend, create_backpressure(
+            backend, ipp_uri, max_queued_jobs, max_queued_megabytes, max_queue_wait
+        ) as backpressure, open_validation_cache(
+            cache
+        ) as validation_cache:
+            send_pdf_files(
+                driver_name[0],
+                pdf_files,
+                strict=strict,
+                validation_workers=validation_workers,
+                backend=submission_backend,
+                max_in_flight=max_in_flight,
+                retry_policy=RetryPolicy(retries),
+                journal=journal,
+                cache=validation_cache,
+                validation_level=validation_level,
+                queue_of=queue_of,
+                options_of=options_of,
+                backpressure=backpressure,
+                enablement=enablement,
+                pages=pages,
+            )
 
 
 @app.command()
@@ -72,6 +436,19 @@ def send_specific_booklets(
         dir_okay=False,
     ),
     driver_name: str = DRIVER_OPTION,
+    strict: bool = STRICT_OPTION,
+    validation_level: ValidationLevel = VALIDATION_LEVEL_OPTION,
+    backend: Backend = BACKEND_OPTION,
+    ipp_uri: str = IPP_URI_OPTION,
+    max_in_flight: int = MAX_IN_FLIGHT_OPTION,
+    retries: int = RETRIES_OPTION,
+    max_queued_jobs: int = MAX_QUEUED_JOBS_OPTION,
+    max_queued_megabytes: int = MAX_QUEUED_MEGABYTES_OPTION,
+    max_queue_wait: int = MAX_QUEUE_WAIT_OPTION,
+    profiles_file: Optional[Path] = PROFILES_OPTION,
+    cache: bool = CACHE_OPTION,
+    enable_as: Optional[str] = ENABLE_AS_OPTION,
+    ucentral_url: str = UCENTRAL_URL_OPTION,
 ) -> None:
     """
     Send only specific PDFs to the server. You can pass multiple files.
@@ -79,8 +456,158 @@ def send_specific_booklets(
     Example:
         tum-exam-scripts send-specific-booklets /path/to/E0007-book.pdf /path/to/E0009-book.pdf
     """
-    confirm_printing_rights()
-    send_pdf_files(driver_name, pdf_file)
+    _check_submission_options(max_in_flight, retries)
+    booklet = _load_profiles(profiles_file)["booklet"]
+    enablement = _check_printing_rights(enable_as, ucentral_url)
+    from tum_exam_scripts.logic.backends import create_backend
+    from tum_exam_scripts.logic.backpressure import create_backpressure
+    from tum_exam_scripts.console import send_pdf_files
+    from tum_exam_scripts.logic.submission import RetryPolicy
+    from tum_exam_scripts.logic.validation_cache import open_validation_cache
+
+    with create_backend(backend, ipp_uri) as submission_backend, create_backpressure(
+        backend, ipp_uri, max_queued_jobs, max_queued_megabytes, max_queue_wait
+    ) as backpressure, open_validation_cache(cache) as validation_cache:
+        send_pdf_files(
+            driver_name,
+            pdf_file,
+            strict=strict,
+            backend=submission_backend,
+            max_in_flight=max_in_flight,
+            retry_policy=RetryPolicy(retries),
+            cache=validation_cache,
+            validation_level=validation_level,
+            options=booklet.options,
+            backpressure=backpressure,
+            enablement=enablement,
+        )
+
+
+@app.command()
+def watch(
+    input_directory: Path = Argument(
+        ".",
+        exists=True,
+        resolve_path=True,
+        help="The directory that the booklets from the TUMExam website are downloaded to.",
+        file_okay=False,
+    ),
+    driver_name: str = DRIVER_OPTION,
+    recursive: bool = Option(
+        False,
+        "--recursive",
+        "-r",
+        is_flag=True,
+        help="Also watch the subdirectories, e.g., one directory per room.",
+    ),
+    settle: float = Option(
+        DEFAULT_SETTLE_SECONDS,
+        "--settle",
+        help="We only send a booklet once it did not change for so many seconds and is a complete PDF.",
+    ),
+    interval: float = Option(
+        DEFAULT_WATCH_INTERVAL,
+        "--interval",
+        help="The seconds between two looks at the directory.",
+    ),
+    poll: bool = Option(
+        False,
+        "--poll",
+        is_flag=True,
+        help="Look at the directory every interval instead of asking the kernel for changes. "
+        "Use this on network drives, where we do not learn about the files that other machines write.",
+    ),
+    idle_timeout: Optional[float] = Option(
+        None,
+        "--idle-timeout",
+        help="Stop after so many seconds without a new booklet. By default, we watch until you press Ctrl-C.",
+    ),
+    validation_workers: int = VALIDATION_WORKERS_OPTION,
+    validation_level: ValidationLevel = VALIDATION_LEVEL_OPTION,
+    backend: Backend = BACKEND_OPTION,
+    ipp_uri: str = IPP_URI_OPTION,
+    max_in_flight: int = MAX_IN_FLIGHT_OPTION,
+    retries: int = RETRIES_OPTION,
+    max_queued_jobs: int = MAX_QUEUED_JOBS_OPTION,
+    max_queued_megabytes: int = MAX_QUEUED_MEGABYTES_OPTION,
+    max_queue_wait: int = MAX_QUEUE_WAIT_OPTION,
+    profiles_file: Optional[Path] = PROFILES_OPTION,
+    cache: bool = CACHE_OPTION,
+    enable_as: Optional[str] = ENABLE_AS_OPTION,
+    ucentral_url: str = UCENTRAL_URL_OPTION,
+) -> None:
+    """
+    Send the booklets while they are still downloading: we send every booklet as soon as it is complete.
+    We skip the booklets that the journal .tum-exam-scripts-journal.jsonl in the directory confirms as sent,
+    so you can stop and start watching again. Press Ctrl-C to stop watching, we still send the booklets that we found.
+
+    Example:
+        tum-exam-scripts pdf watch /path/to/downloads/
+    """
+    if interval <= 0:
+        echo(f"{interval} is not a valid interval!")
+        raise Exit(1)
+    if settle < 0:
+        echo(f"{settle} is not a valid settle time!")
+        raise Exit(1)
+    if validation_workers < 1:
+        echo(f"{validation_workers} is not a valid number of validation workers!")
+        raise Exit(1)
+    _check_submission_options(max_in_flight, retries)
+    booklet = _load_profiles(profiles_file)["booklet"]
+    enablement = _check_printing_rights(enable_as, ucentral_url)
+    import signal
+
+    from tum_exam_scripts.logic.backends import create_backend
+    from tum_exam_scripts.logic.backpressure import create_backpressure
+    from tum_exam_scripts.logic.journal import SubmissionJournal
+    from tum_exam_scripts.console import send_pdf_files
+    from tum_exam_scripts.logic.submission import RetryPolicy
+    from tum_exam_scripts.logic.validation_cache import open_validation_cache
+    from tum_exam_scripts.logic.watch import BookletWatcher
+
+    with SubmissionJournal(input_directory) as journal, BookletWatcher(
+        input_directory,
+        recursive,
+        settle,
+        interval,
+        journal,
+        idle_timeout,
+        use_inotify=not poll,
+    ) as watcher:
+
+        def _stop(signum: int, frame: object) -> None:
+            # A second Ctrl-C interrupts us right away.
+            signal.signal(signal.SIGINT, previous)
+            echo("We stop watching and send the remaining booklets.")
+            watcher.stop()
+
+        previous = signal.signal(signal.SIGINT, _stop)
+        echo(f"We watch {input_directory} for new booklets. Press Ctrl-C to stop.")
+        try:
+            with create_backend(
+                backend, ipp_uri
+            ) as submission_backend, create_backpressure(
+                backend, ipp_uri, max_queued_jobs, max_queued_megabytes, max_queue_wait
+            ) as backpressure, open_validation_cache(
+                cache
+            ) as validation_cache:
+                send_pdf_files(
+                    driver_name,
+                    watcher,
+                    validation_workers=validation_workers,
+                    backend=submission_backend,
+                    max_in_flight=max_in_flight,
+                    retry_policy=RetryPolicy(retries),
+                    journal=journal,
+                    cache=validation_cache,
+                    validation_level=validation_level,
+                    options=booklet.options,
+                    backpressure=backpressure,
+                    enablement=enablement,
+                )
+        finally:
+            signal.signal(signal.SIGINT, previous)
 
 
 @app.command()
@@ -93,6 +620,11 @@ def send_attendee_list(
         dir_okay=False,
     ),
     driver_name: str = DRIVER_OPTION,
+    backend: Backend = BACKEND_OPTION,
+    ipp_uri: str = IPP_URI_OPTION,
+    profiles_file: Optional[Path] = PROFILES_OPTION,
+    enable_as: Optional[str] = ENABLE_AS_OPTION,
+    ucentral_url: str = UCENTRAL_URL_OPTION,
 ) -> None:
     """
     Send the attendee list to the server.
@@ -100,8 +632,15 @@ def send_attendee_list(
     Example:
         tum-exam-scripts send-attendee-list /path/to/attendeelist.pdf
     """
-    confirm_printing_rights()
-    send_attendee_list_internal(attend_list, driver_name)
+    profile = _load_profiles(profiles_file)["attendee-list"]
+    _check_printing_rights(enable_as, ucentral_url)
+    from tum_exam_scripts.logic.backends import create_backend
+    from tum_exam_scripts.logic.pdf_printing import send_attendee_list_internal
+
+    with create_backend(backend, ipp_uri) as submission_backend:
+        send_attendee_list_internal(
+            attend_list, driver_name, submission_backend, profile.options
+        )
 
 
 @app.command()
@@ -114,33 +653,31 @@ def send_seat_plan(
         dir_okay=False,
     ),
     driver_name: str = DRIVER_OPTION,
-    versions: int = Option(
-        3, "--number-of-copies", "-n", help="The number of copies you want to print."
+    versions: Optional[int] = Option(
+        None,
+        "--number-of-copies",
+        "-n",
+        min=1,
+        help="The number of copies you want to print. By default, we use the copies of the profile, i.e., 3.",
     ),
+    backend: Backend = BACKEND_OPTION,
+    ipp_uri: str = IPP_URI_OPTION,
+    profiles_file: Optional[Path] = PROFILES_OPTION,
+    enable_as: Optional[str] = ENABLE_AS_OPTION,
+    ucentral_url: str = UCENTRAL_URL_OPTION,
 ) -> None:
     """
     Print the seat plans in A3. You have to put them at the doors of the lecture hall.
     """
-    confirm_printing_rights()
-    echo(f"Sending document {seat_plan} to the printing server ...")
-    current_command = [
-        "lp",
-        "-d" + driver_name,
-        "-n",
-        str(versions),
-        "-o",
-        "PageSize=A3",
-        "-o",
-        "JCLBanner=False",
-        "-o",
-        "JCLColorCorrection=BlackWhite",
-        "-o",
-        "Duplex=None",
-        "-o",
-        "JCLPrintQuality=Enhanced",
-        str(seat_plan),
-    ]
-    call_command(seat_plan, current_command)
+    options = _load_profiles(profiles_file)["seat-plan"].options
+    if versions is not None:
+        options = options._replace(copies=versions)
+    _check_printing_rights(enable_as, ucentral_url)
+    from tum_exam_scripts.console import send_document
+    from tum_exam_scripts.logic.backends import create_backend
+
+    with create_backend(backend, ipp_uri) as submission_backend:
+        send_document(submission_backend, seat_plan, driver_name, options)
 
 
 @app.command()
@@ -153,30 +690,254 @@ def send_room_layout(
         dir_okay=False,
     ),
     driver_name: str = DRIVER_OPTION,
-    versions: int = Option(
-        3, "--number-of-copies", "-n", help="The number of copies you want to print."
+    versions: Optional[int] = Option(
+        None,
+        "--number-of-copies",
+        "-n",
+        min=1,
+        help="The number of copies you want to print. By default, we use the copies of the profile, i.e., 3.",
     ),
+    backend: Backend = BACKEND_OPTION,
+    ipp_uri: str = IPP_URI_OPTION,
+    profiles_file: Optional[Path] = PROFILES_OPTION,
+    enable_as: Optional[str] = ENABLE_AS_OPTION,
+    ucentral_url: str = UCENTRAL_URL_OPTION,
 ) -> None:
     """
     Print the room plans in A3. You have to put them at the doors of the lecture hall.
     """
-    confirm_printing_rights()
-    echo(f"Sending document {room_plan} to the printing server ...")
-    current_command = [
-        "lp",
-        "-d" + driver_name,
-        "-n",
-        str(versions),
-        "-o",
-        "PageSize=A3",
-        "-o",
-        "JCLBanner=False",
-        "-o",
-        "JCLColorCorrection=PressMatch",
-        "-o",
-        "Duplex=None",
-        "-o",
-        "JCLPrintQuality=Enhanced",
-        str(room_plan),
-    ]
-    call_command(room_plan, current_command)
+    options = _load_profiles(profiles_file)["room-plan"].options
+    if versions is not None:
+        options = options._replace(copies=versions)
+    _check_printing_rights(enable_as, ucentral_url)
+    from tum_exam_scripts.console import send_document
+    from tum_exam_scripts.logic.backends import create_backend
+
+    with create_backend(backend, ipp_uri) as submission_backend:
+        send_document(submission_backend, room_plan, driver_name, options)
+
+
+@app.command()
+def status(
+    input_directory: Path = Argument(
+        ".",
+        exists=True,
+        resolve_path=True,
+        help="The directory that we sent the booklets from.",
+        file_okay=False,
+    ),
+    backend: Backend = BACKEND_OPTION,
+    ipp_uri: str = IPP_URI_OPTION,
+    wait: bool = Option(
+        False,
+        "--wait",
+        is_flag=True,
+        help="Wait until all jobs are printed or failed.",
+    ),
+    interval: float = Option(
+        DEFAULT_QUEUE_POLL_INTERVAL,
+        "--interval",
+        help="The seconds between two looks at the print queues.",
+    ),
+    timeout: Optional[float] = Option(
+        None,
+        "--timeout",
+        help="Stop waiting after so many seconds. By default, we wait until all jobs are done.",
+    ),
+) -> None:
+    """
+    Show which of the sent booklets are pending, processing, completed, or failed.
+    We take the job IDs from the journal .tum-exam-scripts-journal.jsonl in the directory
+    and ask the printing system for all jobs at once.
+    With the 'lp' backend, canceled jobs count as completed, as lpstat does not list them; the 'ipp' backend reports them as failed.
+
+    Example:
+        tum-exam-scripts pdf status --wait /path/to/exams/
+    """
+    if interval <= 0:
+        echo(f"{interval} is not a valid interval!")
+        raise Exit(1)
+    import asyncio
+
+    from tum_exam_scripts import api
+    from tum_exam_scripts.logic.job_status import (
+        JobStatusError,
+        StatusSummary,
+        create_status_source,
+    )
+    from tum_exam_scripts.utils.command import error_echo
+
+    live = wait and sys.stdout.isatty()
+
+    def _show(summary: StatusSummary) -> None:
+        if live:
+            echo(f"\r{summary}", nl=False)
+        else:
+            echo(str(summary))
+
+    with create_status_source(backend, ipp_uri) as source:
+        try:
+            report = asyncio.run(
+                api.status(input_directory, source, wait, interval, timeout, _show)
+            )
+        except JobStatusError as e:
+            if live:
+                echo()
+            error_echo(f"We cannot see the jobs: {e}")
+            raise Exit(1)
+    if len(report.jobs) == 0:
+        echo(f"We did not find any job IDs in the journal of {input_directory}.")
+        raise Exit(1)
+    if live:
+        echo()
+    for job in report.failed:
+        error_echo(f"The job {job.job_id} of {job.pdf_file} failed.")
+    if wait and not report.summary.done:
+        error_echo(f"We stopped waiting after {timeout:g} seconds.")
+        raise Exit(1)
+    if len(report.failed) > 0:
+        raise Exit(1)
+
+
+@app.command()
+def manifest(
+    input_directory: Path = Argument(
+        ".",
+        exists=True,
+        resolve_path=True,
+        help="The directory with the booklets.",
+        file_okay=False,
+    ),
+    recursive: bool = Option(
+        False,
+        "--recursive",
+        "-r",
+        is_flag=True,
+        help="Also hash the booklets in the subdirectories.",
+    ),
+    workers: int = Option(
+        DEFAULT_VALIDATION_WORKERS,
+        "--workers",
+        "-w",
+        min=1,
+        help="The number of threads that hash the booklets in parallel.",
+    ),
+    check: bool = Option(
+        False,
+        "--check",
+        is_flag=True,
+        help="Only compare the booklets with the manifest and fail if they differ, without writing it.",
+    ),
+) -> None:
+    """
+    Hash all booklets and write the manifest .tum-exam-scripts-manifest.json in the directory.
+    We report identical booklets, e.g., a booklet you downloaded twice, and the booklets that changed since the last manifest.
+    send-all-booklets --manifest uses the manifest to send only the booklets that changed.
+
+    Example:
+        tum-exam-scripts pdf manifest --check /path/to/exams/
+    """
+    from tum_exam_scripts.logic.discovery import discover_booklets
+    from tum_exam_scripts.console import report_duplicates
+    from tum_exam_scripts.logic.manifest import (
+        Manifest,
+        compare,
+        find_duplicates,
+        hash_booklets,
+    )
+    from tum_exam_scripts.utils.command import error_echo
+
+    pdf_files = discover_booklets(input_directory, recursive)
+    if len(pdf_files) == 0:
+        echo(f"We did not find any booklets. Please check {input_directory}")
+        raise Exit(1)
+    booklet_manifest = Manifest(input_directory)
+    entries = hash_booklets(pdf_files, booklet_manifest, workers)
+    for pdf_file in pdf_files:
+        if pdf_file not in entries:
+            error_echo(f"We cannot read {pdf_file}.")
+    duplicates = find_duplicates(entries)
+    report_duplicates(duplicates)
+    changes = compare(booklet_manifest, entries)
+    if booklet_manifest.exists:
+        for pdf_file in changes.added:
+            echo(f"{pdf_file} is new.")
+        for pdf_file in changes.changed:
+            echo(f"{pdf_file} changed.")
+        for key in changes.removed:
+            echo(f"{key} is gone.")
+        echo(
+            f"{len(changes.unchanged)} booklets did not change, {len(changes.changed)} changed, "
+            f"{len(changes.added)} are new, and {len(changes.removed)} are gone."
+        )
+    differs = len(changes.added) + len(changes.changed) + len(changes.removed) > 0
+    if not check:
+        booklet_manifest.entries = {}
+        for pdf_file, entry in entries.items():
+            booklet_manifest.put(pdf_file, entry)
+        booklet_manifest.save()
+        echo(
+            f"We wrote the hashes of {len(entries)} booklets to {booklet_manifest.path}."
+        )
+    if len(duplicates) > 0 or len(entries) < len(pdf_files) or (check and differs):
+        raise Exit(1)
+
+
+def _check_printing_rights(
+    enable_as: Optional[str], ucentral_url: str
+) -> Optional["EnablementKeeper"]:
+    from tum_exam_scripts.console import check_printing_rights
+
+    return check_printing_rights(enable_as, ucentral_url)
+
+
+def _load_profiles(profiles_file: Optional[Path]) -> Dict[str, "PrintProfile"]:
+    from tum_exam_scripts.logic.profiles import ProfileError, load_profiles
+
+    try:
+        return load_profiles(profiles_file)
+    except ProfileError as e:
+        echo(f"{e}!")
+        raise Exit(1)
+
+
+def _spread_over_queues(
+    pdf_files: List[Path],
+    pages: List[Optional[int]],
+    driver_name: List[str],
+    pages_per_minute: float,
+) -> Tuple[List[Path], Dict[Path, str]]:
+    from tum_exam_scripts.logic.scheduling import (
+        assignment,
+        describe_plan,
+        interleave,
+        plan_queues,
+    )
+
+    plans = plan_queues(pdf_files, pages, driver_name)
+    for line in describe_plan(plans, pages_per_minute):
+        echo(line)
+    return interleave(plans), assignment(plans)
+
+
+def _check_drivers(
+    driver_name: List[str], pages_per_minute: float, validation_workers: int
+) -> None:
+    if len(set(driver_name)) < len(driver_name):
+        echo("You passed the same driver twice!")
+        raise Exit(1)
+    if pages_per_minute <= 0:
+        echo(f"{pages_per_minute} is not a valid printing speed!")
+        raise Exit(1)
+    if validation_workers < 1:
+        echo(f"{validation_workers} is not a valid number of validation workers!")
+        raise Exit(1)
+
+
+def _check_submission_options(max_in_flight: int, retries: int) -> None:
+    if max_in_flight < 1:
+        echo(f"{max_in_flight} is not a valid number of parallel jobs!")
+        raise Exit(1)
+    if retries < 0:
+        echo(f"{retries} is not a valid number of retries!")
+        raise Exit(1)
@@ -2,6 +2,125 @@
 Shared Options.
 """
 
+from tum_exam_scripts.defaults import (
+    DEFAULT_IPP_URI,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_MAX_QUEUED_JOBS,
+    DEFAULT_MAX_QUEUED_MEGABYTES,
+    DEFAULT_MAX_QUEUE_WAIT_MINUTES,
+    DEFAULT_PAGES_PER_MINUTE,
+    DEFAULT_RETRIES,
+    DEFAULT_UCENTRAL_URL,
+    DEFAULT_VALIDATION_WORKERS,
+)
+from tum_exam_scripts.enums import Backend, ValidationLevel
 from typer import Option
 
 DRIVER_OPTION = Option("followmeppd", "--driver-name", "-d", help="Name of the driver")
+DRIVER_NAMES_OPTION = Option(
+    ["followmeppd"],
+    "--driver-name",
+    "-d",
+    help="Name of the driver. Repeat the option to spread the booklets over several printer queues.",
+)
+STRICT_OPTION = Option(
+    False,
+    "--strict",
+    is_flag=True,
+    help="Validate all PDFs before sending the first one and send nothing if a PDF is corrupt. "
+    "Without this flag, we send every booklet as soon as it is validated and report the corrupt ones at the end.",
+)
+VALIDATION_WORKERS_OPTION = Option(
+    DEFAULT_VALIDATION_WORKERS,
+    "--validation-workers",
+    "-w",
+    help="The number of threads that validate the PDFs in parallel.",
+)
+VALIDATION_LEVEL_OPTION = Option(
+    ValidationLevel.QUICK.value,
+    "--validation-level",
+    help="How thoroughly we check the PDFs: 'quick' looks for the PDF header and trailer, "
+    "'structure' also checks the cross-reference table and the page tree, which finds truncated and corrupted files.",
+)
+BACKEND_OPTION = Option(
+    Backend.LP.value,
+    "--backend",
+    help="How we submit the jobs: 'lp' calls the lp command once per job, "
+    "'ipp' sends the jobs to CUPS over a single IPP connection.",
+)
+IPP_URI_OPTION = Option(
+    DEFAULT_IPP_URI,
+    "--ipp-uri",
+    help="The IPP URI of the print queue for the 'ipp' backend. {queue} is replaced by the driver name.",
+)
+MAX_IN_FLIGHT_OPTION = Option(
+    DEFAULT_MAX_IN_FLIGHT,
+    "--jobs",
+    "-j",
+    help="The number of jobs we submit in parallel.",
+)
+MAX_QUEUED_JOBS_OPTION = Option(
+    DEFAULT_MAX_QUEUED_JOBS,
+    "--max-queued-jobs",
+    min=0,
+    help="We hold new jobs while so many jobs are pending in the print queue, until half of them are gone. "
+    "0 does not limit the number of jobs.",
+)
+MAX_QUEUED_MEGABYTES_OPTION = Option(
+    DEFAULT_MAX_QUEUED_MEGABYTES,
+    "--max-queued-megabytes",
+    min=0,
+    help="We hold new jobs while the pending jobs in the print queue are larger, until half of them are gone. "
+    "0 does not limit the size.",
+)
+MAX_QUEUE_WAIT_OPTION = Option(
+    DEFAULT_MAX_QUEUE_WAIT_MINUTES,
+    "--max-queue-wait",
+    min=0,
+    help="We give up if a full print queue does not drain within so many minutes. 0 waits forever.",
+)
+RETRIES_OPTION = Option(
+    DEFAULT_RETRIES,
+    "--retries",
+    help="How often we retry a job that failed for a transient reason, e.g., a busy printing server.",
+)
+PAGES_PER_MINUTE_OPTION = Option(
+    DEFAULT_PAGES_PER_MINUTE,
+    "--pages-per-minute",
+    help="The speed of a single printer, we use it to estimate when the printers are done.",
+)
+RESUME_OPTION = Option(
+    False,
+    "--resume",
+    is_flag=True,
+    help="Skip the booklets that the journal of a previous run confirms as sent and that did not change since.",
+)
+PROFILES_OPTION = Option(
+    None,
+    "--profiles",
+    envvar="TUM_EXAM_SCRIPTS_PROFILES",
+    exists=True,
+    dir_okay=False,
+    help="A TOML file that changes the print profiles or adds new ones. "
+    "By default, we read profiles.toml in the configuration directory of your user if it exists, "
+    "e.g., ~/.config/tum-exam-scripts on Linux.",
+)
+CACHE_OPTION = Option(
+    True,
+    "--cache/--no-cache",
+    help="Remember the validation results in the user cache directory and skip booklets that did not change since the last run.",
+)
+ENABLE_AS_OPTION = Option(
+    None,
+    "--enable-as",
+    envvar="TUM_EXAM_SCRIPTS_USER",
+    help="Your informatics user name. We enable printing from this machine and renew the enablement while we send the jobs, "
+    "instead of asking whether you enabled printing. We take the password from TUM_EXAM_SCRIPTS_PASSWORD or the password manager.",
+)
+UCENTRAL_URL_OPTION = Option(
+    DEFAULT_UCENTRAL_URL,
+    "--ucentral-url",
+    envvar="TUM_EXAM_SCRIPTS_UCENTRAL_URL",
+    hidden=True,
+    help="The start page of ucentral for --enable-as.",
+)
@@ -3,9 +3,9 @@ Utils.
 """
 import subprocess  # NOTE: Keep for mock/testing
 from logging import getLogger
-from pathlib import Path
+from os import environ
 from subprocess import PIPE, Popen
-from typing import List, Sequence
+from typing import List, Sequence, Tuple
 
 from click import echo, style
 from click.exceptions import Exit
@@ -13,6 +13,8 @@ from click.exceptions import Exit
 import typer  # NOTE: Keep for mock/testing
 from typer.colors import RED
 
+from tum_exam_scripts.utils.tracing import span
+
 _LOGGER = getLogger(__name__)
 
 
@@ -25,21 +27,74 @@ def error_echo(s: str) -> None:
     echo(style(s, fg=RED), err=True)
 
 
-def call_command(current_file: Path, current_command: Sequence[str]) -> None:
+def run_command(current_command: Sequence[str]) -> int:
+    """
+    Call a command and return its exit code.
+    :param current_command:
+    :return:
+    """
+    _LOGGER.debug(f"Calling {' '.join(current_command)}")
+    with span("command", program=current_command[0]) as current:
+        try:
+            res = subprocess.check_call(current_command)
+        except subprocess.CalledProcessError as e:
+            res = e.returncode
+        current.set(returncode=res)
+    _log_done(current_command, res, current.duration)
+    return res
+
+
+def run_command_output(current_command: Sequence[str]) -> Tuple[int, str]:
+    """
+    Call a command and return its exit code and what it printed, e.g., the job ID that lp reports.
+    The output includes the error messages, so callers can tell why the command failed.
+    :param current_command:
+    :return:
+    """
+    _LOGGER.debug(f"Calling {' '.join(current_command)}")
+    with span("command", program=current_command[0]) as current:
+        try:
+            output = subprocess.check_output(current_command, stderr=subprocess.STDOUT)
+            res = 0
+        except subprocess.CalledProcessError as e:
+            output = e.output or b""
+            res = e.returncode
+        current.set(returncode=res)
+    _log_done(current_command, res, current.duration)
+    return res, output.decode("utf-8", "replace")
+
+
+def query_command(current_command: Sequence[str]) -> str:
     """
-    Call a command and exits on failure.
-    :param current_file:
+    Call a command that only reports something, e.g., lpstat, and return what it printed.
+    We do not log these calls, as we poll them.
     :param current_command:
     :return:
+    :raises OSError: If the command is missing or failed.
     """
-    _LOGGER.info("Calling ...")
-    _LOGGER.info(" ".join(current_command))
-    _LOGGER.info("Done!")
-    res = subprocess.check_call(current_command)
-    if res != 0:
-        error_echo(f"Something went wrong when sending {current_file} to the server")
-        error_echo(f"Please open a shell and call {' '.join(current_command)}")
-        raise Exit(1)
+    try:
+        result = subprocess.run(
+            current_command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+            # We parse the output, so it must not be translated.
+            env={**environ, "LC_ALL": "C"},
+        )
+    except subprocess.CalledProcessError as e:
+        raise OSError(f"{current_command[0]} exited with code {e.returncode}")
+    return result.stdout.decode("utf-8", "replace")
+
+
+def _log_done(command: Sequence[str], returncode: int, duration: float) -> None:
+    _LOGGER.info(
+        f"{' '.join(command)} exited with code {returncode} after {duration:.3f}s",
+        extra={
+            "command": command[0],
+            "returncode": returncode,
+            "duration": round(duration, 3),
+        },
+    )
 
 
 def confirm_printing_rights() -> None:
@@ -53,22 +108,23 @@ def confirm_printing_rights() -> None:
         raise Exit
 
 
-def sudo_call(command: List[str], password: str) -> None:
+def sudo_run(command: List[str], password: str) -> int:
     """
-    Sudo call.
+    Call a command with sudo and return its exit code.
+    :param command:
+    :param password: We pass it to sudo on stdin.
+    :return:
     """
     changed_command = ["sudo", "-S"] + command
-    _LOGGER.info("Calling ...")
-    _LOGGER.info(" ".join(changed_command))
-    _LOGGER.info("Done!")
-    proc = Popen(
-        changed_command,
-        stdin=PIPE,
-        stdout=PIPE,
-        stderr=PIPE,
-    )
-    proc.communicate(password.encode())
-    if proc.returncode != 0:
-        error_echo("Installation went wrong.")
-        error_echo(f"Please open a shell and call 'sudo {' '.join(command)}'")
-        raise Exit(1)
+    _LOGGER.debug(f"Calling {' '.join(changed_command)}")
+    with span("sudo", program=command[0]) as current:
+        proc = Popen(
+            changed_command,
+            stdin=PIPE,
+            stdout=PIPE,
+            stderr=PIPE,
+        )
+        proc.communicate(password.encode())
+        current.set(returncode=proc.returncode)
+    _log_done(changed_command, proc.returncode, current.duration)
+    return proc.returncode
@@ -0,0 +1,285 @@
+"""
+Printing enablement over plain HTTP.
+We do what the browser does on the printing page, i.e., log in to ucentral and press "Diesen Rechner zum Drucken freischalten",
+with a cookie jar and form posts. This needs neither a browser nor a display and takes a few requests.
+"""
+from html.parser import HTMLParser
+from http.client import HTTPException
+from http.cookiejar import CookieJar
+from logging import getLogger
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode, urljoin
+from urllib.request import HTTPCookieProcessor, OpenerDirector, Request, build_opener
+
+from tum_exam_scripts.defaults import DEFAULT_HTTP_TIMEOUT, DEFAULT_UCENTRAL_URL
+from tum_exam_scripts.utils.tracing import span
+
+_LOGGER = getLogger(__name__)
+
+LOGIN = "Login"
+LOGOUT = "Logout"
+XEROX_PRINTING = "Xerox Printing"
+ENABLE_PRINTING = "Diesen Rechner zum Drucken freischalten"
+_TEXT_TYPES = ("text", "email", "")
+_FIELD_TYPES = ("hidden", "text", "email", "password", "number", "")
+_SUBMIT_TYPES = ("submit", "image")
+
+
+class EnablementError(Exception):
+    """
+    We could not enable printing, e.g., because the login failed or the page changed.
+    """
+
+
+class Control(NamedTuple):
+    """
+    A submit button of a form or a link.
+    """
+
+    label: str
+    name: Optional[str]
+    value: str
+    disabled: bool
+    form: Optional[int]
+    href: Optional[str] = None
+
+
+class Form(NamedTuple):
+    """
+    A form with its fields, without the submit buttons.
+    """
+
+    action: str
+    method: str
+    fields: List[Tuple[str, str]]
+    types: Dict[str, str]
+
+
+class Page(HTMLParser):
+    """
+    The forms and the links of an HTML page, which is all we need to click through the printing page.
+    """
+
+    def __init__(self, url: str, html: str) -> None:
+        super().__init__(convert_charrefs=True)
+        self.url = url
+        self.forms: List[Form] = []
+        self.controls: List[Control] = []
+        self._form: Optional[int] = None
+        # The open <a> or <button> and its text
+        self._open: Optional[Tuple[str, Dict[str, Optional[str]], List[str]]] = None
+        self.feed(html)
+        self.close()
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        attributes = dict(attrs)
+        if tag == "form":
+            self.forms.append(
+                Form(
+                    urljoin(self.url, attributes.get("action") or self.url),
+                    (attributes.get("method") or "get").lower(),
+                    [],
+                    {},
+                )
+            )
+            self._form = len(self.forms) - 1
+        elif tag == "input":
+            self._input(attributes)
+        elif tag in ("a", "button"):
+            self._open = (tag, attributes, [])
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "form":
+            self._form = None
+        elif self._open is not None and tag == self._open[0]:
+            _, attributes, text = self._open
+            label = " ".join("".join(text).split())
+            if tag == "a" and attributes.get("href"):
+                self.controls.append(
+                    Control(label, None, "", False, None, attributes["href"])
+                )
+            elif tag == "button" and (attributes.get("type") or "submit") == "submit":
+                self.controls.append(self._button(label, attributes))
+            self._open = None
+
+    def handle_data(self, data: str) -> None:
+        if self._open is not None:
+            self._open[2].append(data)
+
+    def _input(self, attributes: Dict[str, Optional[str]]) -> None:
+        kind = (attributes.get("type") or "").lower()
+        if kind in _SUBMIT_TYPES:
+            label = attributes.get("value") or attributes.get("alt") or ""
+            self.controls.append(self._button(label, attributes))
+        elif self._form is not None and attributes.get("name") and kind in _FIELD_TYPES:
+            name = attributes["name"] or ""
+            self.forms[self._form].fields.append((name, attributes.get("value") or ""))
+            self.forms[self._form].types[name] = kind
+
+    def _button(self, label: str, attributes: Dict[str, Optional[str]]) -> Control:
+        return Control(
+            label,
+            attributes.get("name"),
+            attributes.get("value") or "",
+            "disabled" in attributes,
+            self._form,
+        )
+
+    def find(self, label: str, in_form: bool = False) -> Optional[Control]:
+        """
+        :param label: The text of a link or a button.
+        :param in_form: Only look for the buttons of a form.
+        :return: The first link or button with this text.
+        """
+        return next(
+            (
+                c
+                for c in self.controls
+                if c.label == label and (not in_form or c.form is not None)
+            ),
+            None,
+        )
+
+    def require(self, label: str, in_form: bool = False) -> Control:
+        """
+        :param label:
+        :param in_form:
+        :return: See find().
+        :raises EnablementError: If there is no such link or button.
+        """
+        control = self.find(label, in_form)
+        if control is None:
+            raise EnablementError(f"There is no {label!r} on {self.url}")
+        return control
+
+
+class PrintingPageSession:
+    """
+    A session on the printing page.
+    """
+
+    def __init__(
+        self, url: str = DEFAULT_UCENTRAL_URL, timeout: float = DEFAULT_HTTP_TIMEOUT
+    ) -> None:
+        self.url = url
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self._opener: OpenerDirector = build_opener(HTTPCookieProcessor(self.cookies))
+
+    def open(self, url: str, data: Optional[Dict[str, str]] = None) -> Page:
+        """
+        GET a page, or POST the data. We follow redirects.
+        :param url:
+        :param data:
+        :return:
+        :raises EnablementError: If the server does not answer or fails.
+        """
+        body = urlencode(data).encode("utf-8") if data is not None else None
+        request = Request(url, body, method="POST" if body is not None else "GET")
+        try:
+            with self._opener.open(request, timeout=self.timeout) as response:
+                charset = response.headers.get_content_charset() or "utf-8"
+                return Page(
+                    response.geturl(), response.read().decode(charset, "replace")
+                )
+        except HTTPError as e:
+            raise EnablementError(f"{url} answered {e.code} {e.reason}") from e
+        except (URLError, HTTPException, OSError) as e:
+            raise EnablementError(f"We cannot reach {url}: {e}") from e
+
+    def click(
+        self, page: Page, control: Control, values: Optional[Dict[str, str]] = None
+    ) -> Page:
+        """
+        Follow a link or submit the form of a button.
+        :param page:
+        :param control: A link or a button of the page.
+        :param values: The values of the form fields we change.
+        :return:
+        :raises EnablementError:
+        """
+        if control.href is not None:
+            return self.open(urljoin(page.url, control.href))
+        if control.form is None:
+            raise EnablementError(
+                f"The button {control.label!r} on {page.url} has no form"
+            )
+        form = page.forms[control.form]
+        fields = dict(form.fields)
+        fields.update(values or {})
+        if control.name:
+            fields[control.name] = control.value
+        if form.method == "post":
+            return self.open(form.action, fields)
+        return self.open(f"{form.action.split('?')[0]}?{urlencode(fields)}")
+
+    def log_in(self, user_name: str, password: str) -> Page:
+        """
+        :param user_name:
+        :param password:
+        :return: The start page after the login.
+        :raises EnablementError: If the login fails.
+        """
+        page = self.open(self.url)
+        if page.find(LOGOUT) is not None:
+            return page
+        page = self.click(page, page.require(LOGIN))
+        control = page.find(LOGIN, in_form=True)
+        if control is None or control.form is None:
+            raise EnablementError(f"There is no login form on {page.url}")
+        types = page.forms[control.form].types
+        user_field = next((n for n, t in types.items() if t in _TEXT_TYPES), None)
+        password_field = next((n for n, t in types.items() if t == "password"), None)
+        if user_field is None or password_field is None:
+            raise EnablementError(f"There is no login form on {page.url}")
+        page = self.click(
+            page, control, {user_field: user_name, password_field: password}
+        )
+        if page.find(LOGOUT) is None:
+            raise EnablementError(
+                "The login failed, please check your user name and password"
+            )
+        return page
+
+    def enable(self, page: Page) -> bool:
+        """
+        Press the button that enables printing from this machine.
+        :param page: The start page after the login.
+        :return: False if we could already print from this machine.
+        :raises EnablementError:
+        """
+        page = self.click(page, page.require(XEROX_PRINTING))
+        button = page.find(ENABLE_PRINTING, in_form=True)
+        if button is None or button.disabled:
+            return False
+        for _ in range(2):
+            # The browser mode presses the button twice, too.
+            page = self.click(page, button)
+            button = page.find(ENABLE_PRINTING, in_form=True)
+            if button is None or button.disabled:
+                return True
+        raise EnablementError(f"{page.url} did not enable printing")
+
+
+def enable_printing(
+    user_name: str,
+    password: str,
+    url: str = DEFAULT_UCENTRAL_URL,
+    timeout: float = DEFAULT_HTTP_TIMEOUT,
+) -> bool:
+    """
+    Log in to ucentral and enable printing from this machine.
+    :param user_name:
+    :param password:
+    :param url: The start page of ucentral.
+    :param timeout: The seconds we wait for every request.
+    :return: False if we could already print from this machine.
+    :raises EnablementError: If we could not enable printing.
+    """
+    session = PrintingPageSession(url, timeout)
+    with span("enablement", mode="http") as current:
+        enabled = session.enable(session.log_in(user_name, password))
+        current.set(enabled=enabled)
+    _LOGGER.info("Enabled printing" if enabled else "Printing was already enabled")
+    return enabled
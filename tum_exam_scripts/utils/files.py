@@ -0,0 +1,100 @@
+"""
+File helpers.
+"""
+from hashlib import blake2b, sha256
+from os import environ
+from pathlib import Path
+from sys import platform
+
+_CHUNK_SIZE = 1 << 20
+
+CACHE_DIRECTORY_VARIABLE = "TUM_EXAM_SCRIPTS_CACHE_DIR"
+
+
+def file_hash(current_file: Path) -> str:
+    """
+    The SHA-256 of a file.
+    :param current_file:
+    :return:
+    """
+    digest = sha256()
+    with current_file.open("rb") as fin:
+        for chunk in iter(lambda: fin.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fast_file_hash(current_file: Path) -> str:
+    """
+    The BLAKE2b of a file, which is faster than SHA-256 without hardware support.
+    We read into one buffer, and hashlib releases the GIL while it hashes a chunk, so threads hash files in parallel.
+    :param current_file:
+    :return:
+    """
+    digest = blake2b()
+    buffer = bytearray(_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with current_file.open("rb", buffering=0) as fin:
+        while True:
+            read = fin.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+
+def file_size(current_file: Path) -> int:
+    """
+    The size of a file, or 0 if we cannot read it.
+    :param current_file:
+    :return:
+    """
+    try:
+        return current_file.stat().st_size
+    except OSError:
+        return 0
+
+
+def user_cache_directory() -> Path:
+    """
+    The directory for our caches.
+    You can override it with the environment variable TUM_EXAM_SCRIPTS_CACHE_DIR.
+    :return:
+    """
+    if CACHE_DIRECTORY_VARIABLE in environ:
+        return Path(environ[CACHE_DIRECTORY_VARIABLE])
+    if platform == "darwin":
+        base = Path.home().joinpath("Library", "Caches")
+    elif platform == "win32":
+        base = Path(environ.get("LOCALAPPDATA", Path.home()))
+    else:
+        base = Path(environ.get("XDG_CACHE_HOME", Path.home().joinpath(".cache")))
+    return base.joinpath("tum-exam-scripts")
+
+
+def user_config_directory() -> Path:
+    """
+    The directory for our configuration files.
+    :return:
+    """
+    if platform == "darwin":
+        base = Path.home().joinpath("Library", "Application Support")
+    elif platform == "win32":
+        base = Path(environ.get("APPDATA", Path.home()))
+    else:
+        base = Path(environ.get("XDG_CONFIG_HOME", Path.home().joinpath(".config")))
+    return base.joinpath("tum-exam-scripts")
+
+
+def user_log_directory() -> Path:
+    """
+    The directory for our log files.
+    :return:
+    """
+    if platform == "darwin":
+        return Path.home().joinpath("Library", "Logs", "tum-exam-scripts")
+    if platform == "win32":
+        base = Path(environ.get("LOCALAPPDATA", Path.home()))
+        return base.joinpath("tum-exam-scripts", "Logs")
+    base = Path(environ.get("XDG_STATE_HOME", Path.home().joinpath(".local", "state")))
+    return base.joinpath("tum-exam-scripts")
@@ -0,0 +1,138 @@
+"""
+A minimal binding of the Linux inotify API.
+We only need to learn which files appear in a few directories, so we call libc with ctypes.
+"""
+import ctypes
+import ctypes.util
+import os
+import sys
+from logging import getLogger
+from pathlib import Path
+from select import select
+from struct import Struct
+from types import TracebackType
+from typing import Dict, List, NamedTuple, Optional, Type
+
+_LOGGER = getLogger(__name__)
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+# struct inotify_event without the name that follows it
+_EVENT = Struct("iIII")
+_BUFFER_SIZE = 1 << 16
+
+
+class InotifyEvent(NamedTuple):
+    """
+    Something happened to a file in a watched directory.
+    """
+
+    path: Optional[Path]
+    mask: int
+
+    @property
+    def overflow(self) -> bool:
+        """
+        The kernel dropped events; the path is None, and we have to look at the directories again.
+        """
+        return bool(self.mask & IN_Q_OVERFLOW)
+
+    @property
+    def is_dir(self) -> bool:
+        return bool(self.mask & IN_ISDIR)
+
+
+class Inotify:
+    """
+    Watches directories for changes.
+    """
+
+    def __init__(self) -> None:
+        """
+        :raises OSError: If inotify is not available, e.g., not on Linux or the user has too many watches.
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        self._libc = libc
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            _raise_errno("inotify_init1")
+        self._directories: Dict[int, Path] = {}
+
+    def add_watch(self, directory: Path, mask: int) -> None:
+        """
+        Watch a directory. Watching it again replaces the mask.
+        :param directory:
+        :param mask: The events we want, e.g., IN_CLOSE_WRITE | IN_MOVED_TO.
+        :return:
+        """
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), mask)
+        if wd < 0:
+            _raise_errno(f"inotify_add_watch {directory}")
+        self._directories[wd] = directory
+
+    def read(self, timeout: float) -> List[InotifyEvent]:
+        """
+        Wait for events.
+        :param timeout: Seconds.
+        :return: The events, or an empty list after the timeout.
+        """
+        ready, _, _ = select([self._fd], [], [], timeout)
+        if len(ready) == 0:
+            return []
+        try:
+            data = os.read(self._fd, _BUFFER_SIZE)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_IGNORED:
+                # The directory is gone.
+                self._directories.pop(wd, None)
+                continue
+            if mask & IN_Q_OVERFLOW:
+                events.append(InotifyEvent(None, mask))
+                continue
+            directory = self._directories.get(wd)
+            if directory is not None:
+                events.append(InotifyEvent(directory.joinpath(os.fsdecode(name)), mask))
+        return events
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self) -> "Inotify":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+def _raise_errno(call: str) -> None:
+    errno = ctypes.get_errno()
+    raise OSError(errno, f"{call}: {os.strerror(errno)}")
@@ -0,0 +1,408 @@
+"""
+A minimal IPP/1.1 client.
+We only implement the parts of RFC 8010/8011 that we need to submit PDFs to CUPS.
+"""
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from itertools import count
+from logging import getLogger
+from pathlib import Path
+from select import select
+from struct import pack, unpack_from
+from threading import Lock
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+from urllib.parse import urlsplit
+
+_LOGGER = getLogger(__name__)
+
+IPP_VERSION = (1, 1)
+CONTENT_TYPE = "application/ipp"
+DEFAULT_PORT = 631
+# The ports of the schemes, if the URI does not name one.
+_DEFAULT_PORTS = {"ipp": DEFAULT_PORT, "ipps": DEFAULT_PORT, "http": 80, "https": 443}
+_CHUNK_SIZE = 1 << 16
+
+# Operations
+PRINT_JOB = 0x0002
+GET_JOBS = 0x000A
+GET_PRINTER_ATTRIBUTES = 0x000B
+
+# Delimiter tags
+OPERATION_ATTRIBUTES_TAG = 0x01
+JOB_ATTRIBUTES_TAG = 0x02
+END_OF_ATTRIBUTES_TAG = 0x03
+PRINTER_ATTRIBUTES_TAG = 0x04
+UNSUPPORTED_ATTRIBUTES_TAG = 0x05
+
+# Value tags
+INTEGER = 0x21
+BOOLEAN = 0x22
+ENUM = 0x23
+TEXT_WITHOUT_LANGUAGE = 0x41
+NAME_WITHOUT_LANGUAGE = 0x42
+KEYWORD = 0x44
+URI = 0x45
+CHARSET = 0x47
+NATURAL_LANGUAGE = 0x48
+MIME_MEDIA_TYPE = 0x49
+
+_INTEGER_TAGS = (INTEGER, ENUM)
+
+Value = Union[int, bool, str, bytes]
+
+
+class Attribute(NamedTuple):
+    """
+    An IPP attribute with one or more values of the same type.
+    """
+
+    tag: int
+    name: str
+    values: Tuple[Value, ...]
+
+
+class AttributeGroup(NamedTuple):
+    """
+    A delimited group of attributes, e.g., the operation or the job attributes.
+    """
+
+    tag: int
+    attributes: List[Attribute]
+
+    def get(self, name: str) -> Optional[Attribute]:
+        """
+        Return the first attribute with the given name.
+        :param name:
+        :return:
+        """
+        for attribute in self.attributes:
+            if attribute.name == name:
+                return attribute
+        return None
+
+
+class IppMessage(NamedTuple):
+    """
+    An IPP request or response without the document data.
+    """
+
+    version: Tuple[int, int]
+    operation_or_status: int
+    request_id: int
+    groups: List[AttributeGroup]
+
+    def group(self, tag: int) -> Optional[AttributeGroup]:
+        """
+        Return the first group with the given delimiter tag.
+        :param tag:
+        :return:
+        """
+        for group in self.groups:
+            if group.tag == tag:
+                return group
+        return None
+
+    def groups_with_tag(self, tag: int) -> List[AttributeGroup]:
+        """
+        Return all groups with the given delimiter tag, e.g., one per job in a Get-Jobs response.
+        :param tag:
+        :return:
+        """
+        return [g for g in self.groups if g.tag == tag]
+
+
+class IppError(Exception):
+    """
+    The printer answered with an unsuccessful status code or an invalid message.
+    """
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(f"IPP status 0x{status:04x}: {message}")
+        self.status = status
+
+    @property
+    def is_server_error(self) -> bool:
+        """
+        Server errors (0x05xx) are usually transient, client errors (0x04xx) are not.
+        """
+        return self.status >= 0x0500
+
+
+def _encode_value(tag: int, value: Value) -> bytes:
+    if tag in _INTEGER_TAGS:
+        return pack(">i", int(value))
+    if tag == BOOLEAN:
+        return pack(">b", 1 if value else 0)
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+def encode_message(message: IppMessage) -> bytes:
+    """
+    Encode an IPP message.
+    :param message:
+    :return:
+    """
+    parts = [
+        pack(
+            ">bbhi",
+            message.version[0],
+            message.version[1],
+            message.operation_or_status,
+            message.request_id,
+        )
+    ]
+    for group in message.groups:
+        parts.append(pack(">b", group.tag))
+        for attribute in group.attributes:
+            name = attribute.name.encode("utf-8")
+            for value in attribute.values:
+                encoded = _encode_value(attribute.tag, value)
+                parts.append(pack(">bh", attribute.tag, len(name)))
+                parts.append(name)
+                parts.append(pack(">h", len(encoded)))
+                parts.append(encoded)
+                # Additional values have an empty name
+                name = b""
+    parts.append(pack(">b", END_OF_ATTRIBUTES_TAG))
+    return b"".join(parts)
+
+
+def _decode_value(tag: int, raw: bytes) -> Value:
+    if tag in _INTEGER_TAGS and len(raw) == 4:
+        return int(unpack_from(">i", raw)[0])
+    if tag == BOOLEAN and len(raw) == 1:
+        return raw != b"\x00"
+    if 0x40 <= tag <= 0x5F:
+        return raw.decode("utf-8", "replace")
+    return raw
+
+
+def decode_message(data: bytes) -> Tuple[IppMessage, int]:
+    """
+    Decode an IPP message.
+    :param data:
+    :return: The message and the offset of the document data following it.
+    """
+    if len(data) < 9:
+        raise IppError(0x0400, "Message is too short")
+    major, minor, operation_or_status, request_id = unpack_from(">bbhi", data)
+    offset = 8
+    groups: List[AttributeGroup] = []
+    current: Optional[AttributeGroup] = None
+    while True:
+        if offset >= len(data):
+            raise IppError(0x0400, "Missing end-of-attributes tag")
+        tag = data[offset]
+        offset += 1
+        if tag == END_OF_ATTRIBUTES_TAG:
+            break
+        if tag < 0x10:
+            current = AttributeGroup(tag, [])
+            groups.append(current)
+            continue
+        if current is None:
+            raise IppError(0x0400, "Attribute outside of a group")
+        name_length = unpack_from(">h", data, offset)[0]
+        offset += 2
+        name = data[offset : offset + name_length].decode("utf-8", "replace")
+        offset += name_length
+        value_length = unpack_from(">h", data, offset)[0]
+        offset += 2
+        value = _decode_value(tag, data[offset : offset + value_length])
+        offset += value_length
+        if name_length == 0 and current.attributes:
+            last = current.attributes[-1]
+            current.attributes[-1] = last._replace(values=last.values + (value,))
+        else:
+            current.attributes.append(Attribute(tag, name, (value,)))
+    message = IppMessage((major, minor), operation_or_status, request_id, groups)
+    return message, offset
+
+
+def operation_attributes(
+    printer_uri: str, user_name: str, extra: Sequence[Attribute] = ()
+) -> AttributeGroup:
+    """
+    The operation attributes every request starts with.
+    :param printer_uri:
+    :param user_name:
+    :param extra:
+    :return:
+    """
+    return AttributeGroup(
+        OPERATION_ATTRIBUTES_TAG,
+        [
+            Attribute(CHARSET, "attributes-charset", ("utf-8",)),
+            Attribute(NATURAL_LANGUAGE, "attributes-natural-language", ("en",)),
+            Attribute(URI, "printer-uri", (printer_uri,)),
+            Attribute(NAME_WITHOUT_LANGUAGE, "requesting-user-name", (user_name,)),
+        ]
+        + list(extra),
+    )
+
+
+class RequestMaybeSent(Exception):
+    """
+    The connection failed after we started to send the request, so the server may have processed it.
+    Sending a Print-Job again could print the document twice.
+    """
+
+
+class IppClient:
+    """
+    Sends IPP requests over a single HTTP/1.1 connection that we keep alive between requests.
+    """
+
+    def __init__(self, uri: str, timeout: float = 60.0) -> None:
+        parts = urlsplit(uri)
+        if parts.scheme not in ("ipp", "ipps", "http", "https"):
+            raise ValueError(f"{uri} is not an IPP URI")
+        self._secure = parts.scheme in ("ipps", "https")
+        self._host = parts.hostname or "localhost"
+        self._port = parts.port or _DEFAULT_PORTS[parts.scheme]
+        self._timeout = timeout
+        self._connection: Optional[HTTPConnection] = None
+        self._request_ids = count(1)
+        self._lock = Lock()
+
+    def _connect(self) -> HTTPConnection:
+        if self._connection is not None and _is_stale(self._connection):
+            # The server closed the idle connection; we have not sent anything on it yet.
+            _LOGGER.info("The idle connection was closed, reconnecting")
+            self._disconnect()
+        if self._connection is None:
+            _LOGGER.info(f"Connecting to {self._host}:{self._port}")
+            connection_class = HTTPSConnection if self._secure else HTTPConnection
+            self._connection = connection_class(
+                self._host, self._port, timeout=self._timeout
+            )
+        if self._connection.sock is None:
+            self._connection.connect()
+        return self._connection
+
+    def _disconnect(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def close(self) -> None:
+        """
+        Close the connection.
+        """
+        with self._lock:
+            self._disconnect()
+
+    def request(
+        self,
+        path: str,
+        operation: int,
+        groups: List[AttributeGroup],
+        document: Optional[Path] = None,
+    ) -> IppMessage:
+        """
+        Send a request and return the response.
+        The document is streamed from disk.
+        Before we reuse the connection, we check whether the server closed it while it was idle.
+        If an operation other than Print-Job fails on the connection, we reconnect and send it once more,
+        as it does not change anything on the server.
+        :param path:
+        :param operation:
+        :param groups:
+        :param document:
+        :return:
+        :raises RequestMaybeSent: If a Print-Job failed in any way after we started to send it.
+        :raises OSError: If we could not read the document or connect, i.e., before we sent anything.
+        """
+        with self._lock:
+            request_id = next(self._request_ids)
+            header = encode_message(
+                IppMessage(IPP_VERSION, operation, request_id, groups)
+            )
+            # Everything that can fail before we write a byte happens here.
+            length = len(header)
+            if document is not None:
+                length += document.stat().st_size
+            connection = self._connect()
+            try:
+                return self._send(connection, path, header, length, document)
+            except IppError:
+                # The server answered, so the connection is fine.
+                raise
+            except Exception as e:
+                # We do not know how far the request got, e.g., after a timeout,
+                # so the connection is unusable.
+                self._disconnect()
+                if operation == PRINT_JOB:
+                    raise RequestMaybeSent(
+                        f"The connection failed while we sent the job: {e}"
+                    ) from e
+                if not isinstance(e, (HTTPException, ConnectionError)):
+                    raise
+                _LOGGER.info(f"Connection lost ({e}), reconnecting")
+                return self._send(self._connect(), path, header, length, document)
+
+    def _send(
+        self,
+        connection: HTTPConnection,
+        path: str,
+        header: bytes,
+        length: int,
+        document: Optional[Path],
+    ) -> IppMessage:
+        connection.request(
+            "POST",
+            path,
+            body=_body(header, document),
+            headers={"Content-Type": CONTENT_TYPE, "Content-Length": str(length)},
+        )
+        response = connection.getresponse()
+        data = response.read()
+        if response.status != 200:
+            raise IppError(
+                0x0500 if response.status >= 500 else 0x0400,
+                f"HTTP {response.status} {response.reason}",
+            )
+        message, _ = decode_message(data)
+        if message.operation_or_status >= 0x0100:
+            raise IppError(message.operation_or_status, _status_message(message))
+        return message
+
+
+def _is_stale(connection: HTTPConnection) -> bool:
+    # An idle connection has nothing to read, unless the server closed it.
+    if connection.sock is None:
+        return False
+    try:
+        readable, _, _ = select([connection.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return len(readable) > 0
+
+
+def _body(header: bytes, document: Optional[Path]) -> Iterator[bytes]:
+    yield header
+    if document is not None:
+        with document.open("rb") as fin:
+            while True:
+                chunk = fin.read(_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+
+def _status_message(message: IppMessage) -> str:
+    group = message.group(OPERATION_ATTRIBUTES_TAG)
+    attribute = group.get("status-message") if group is not None else None
+    if attribute is None:
+        return "Request failed"
+    return str(attribute.values[0])
+
+
+def attributes_to_dict(group: AttributeGroup) -> Dict[str, Tuple[Value, ...]]:
+    """
+    Convert an attribute group into a dictionary.
+    :param group:
+    :return:
+    """
+    return {a.name: a.values for a in group.attributes}
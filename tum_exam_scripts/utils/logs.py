@@ -0,0 +1,126 @@
+"""
+Logging setup.
+The threads that validate and submit only put the records into a queue; a listener thread formats them as JSON
+and writes them to a rotating log file, so a slow home directory does not slow down the print jobs.
+"""
+from copy import copy
+from datetime import datetime, timezone
+from io import TextIOWrapper
+from json import dumps
+from logging import INFO, Formatter, LogRecord, getLogger, makeLogRecord
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from queue import SimpleQueue
+from typing import Any, Dict, Optional
+
+_LOGGER = getLogger(__name__)
+
+LOG_FILE_NAME = "tum-exam-scripts.log"
+DEFAULT_LOG_MAX_MEGABYTES = 10
+DEFAULT_LOG_BACKUPS = 5
+
+# Everything else on a record came from `extra`.
+_STANDARD_ATTRIBUTES = frozenset(makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+
+class JsonFormatter(Formatter):
+    """
+    Formats a record as a JSON object on a single line.
+    The fields passed with `extra`, e.g., `extra={"job_id": job_id, "file": pdf_file}`, become keys of the object.
+    """
+
+    def format(self, record: LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info is not None:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return dumps(entry, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: LogRecord) -> LogRecord:
+        # The default formats the record on the calling thread; the listener does that.
+        # We only resolve the message and the traceback, as the arguments may change until the listener gets them.
+        record = copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info is not None:
+            record.exc_text = Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _RotatingFileHandler(RotatingFileHandler):
+    """
+    Creates the directory of the log file with the first record.
+    """
+
+    def _open(self) -> TextIOWrapper:
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+def configure_logging(
+    log_file: Path,
+    level: int = INFO,
+    max_megabytes: int = DEFAULT_LOG_MAX_MEGABYTES,
+    backups: int = DEFAULT_LOG_BACKUPS,
+) -> None:
+    """
+    Send the records of all loggers through a queue to a rotating JSON log file.
+    The file is only created with the first record.
+    :param log_file:
+    :param level:
+    :param max_megabytes: We start a new file when the current one reaches this size; 0 never rotates.
+    :param backups: How many old files we keep.
+    :return:
+    """
+    stop_logging()
+    handler = _RotatingFileHandler(
+        log_file,
+        maxBytes=max_megabytes * 2**20,
+        backupCount=backups,
+        encoding="utf-8",
+        delay=True,
+    )
+    handler.setFormatter(JsonFormatter())
+    queue: "SimpleQueue[LogRecord]" = SimpleQueue()
+    global _listener, _queue_handler
+    _listener = QueueListener(queue, handler)
+    _listener.start()
+    _queue_handler = _QueueHandler(queue)
+    root = getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+
+def stop_logging() -> None:
+    """
+    Write the outstanding records and close the log file.
+    :return:
+    """
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
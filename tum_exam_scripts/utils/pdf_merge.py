@@ -0,0 +1,266 @@
+"""
+PDF merging and compaction.
+Copies the pages of several PDFs into one, document by document and page by page:
+we write every object as soon as we reach it and read the streams from the memory map of the source,
+so we keep at most one source document and the streams of one branch of its object graph in memory.
+We copy the objects that an object refers to before the object itself, so we can write identical objects only once,
+e.g., the same font embedded in every booklet, and we can compress the streams on the way.
+"""
+from hashlib import sha256
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set
+from zlib import decompress
+from zlib import error as ZlibError
+
+from tum_exam_scripts.utils.pdf_objects import (
+    Name,
+    PdfObject,
+    PdfSyntaxError,
+    Ref,
+    Stream,
+    encode_flate,
+    is_flate_encoded,
+    serialize,
+)
+from tum_exam_scripts.utils.pdf_reader import PdfDocument
+from tum_exam_scripts.utils.pdf_writer import PdfWriter
+
+# The page attributes a page inherits from the page tree, ISO 32000-1, section 7.7.3.4
+_INHERITABLE = ("Resources", "MediaBox", "CropBox", "Rotate")
+# The objects we never copy, they belong to the page tree of the source
+_TREE_TYPES = ("Pages", "Catalog")
+_DEFAULT_MEDIA_BOX = [0, 0, 595, 842]
+# We only compress a stream if it gets smaller than its dictionary entry costs.
+_MIN_STREAM_SAVING = 16
+
+
+class _DocumentCopier:
+    """
+    Copies objects of one source document into the writer and renumbers the references.
+    """
+
+    def __init__(
+        self,
+        document: PdfDocument,
+        writer: PdfWriter,
+        written: Optional[Dict[bytes, Ref]],
+        compression_level: Optional[int],
+    ) -> None:
+        """
+        :param document:
+        :param writer:
+        :param written: The objects we wrote by their digest, shared by the copiers of one output; None does not deduplicate.
+        :param compression_level: The zlib level we compress the streams with, None copies them as they are.
+        """
+        self._document = document
+        self._writer = writer
+        self._written = written
+        self._compression_level = compression_level
+        self._numbers: Dict[int, Ref] = {}
+        # The objects we are copying, with their reference if an object they refer to refers back to them
+        self._copying: Dict[int, Optional[Ref]] = {}
+
+    def reserve(self, ref: Ref, new: Ref) -> None:
+        """
+        The object is written by the caller, e.g., a page that gets a new parent.
+        """
+        self._numbers[ref.number] = new
+
+    def copy(self, ref: Ref) -> Ref:
+        """
+        Copy an object and everything it refers to.
+        :param ref: The reference in the source document.
+        :return: The reference in the output.
+        """
+        number = ref.number
+        new = self._numbers.get(number)
+        if new is not None:
+            return new
+        if number in self._copying:
+            # A cycle: we refer to the object before we wrote it, so we cannot deduplicate it.
+            new = self._copying[number]
+            if new is None:
+                new = self._writer.allocate()
+                self._copying[number] = new
+            return new
+        self._copying[number] = None
+        value = self._document.get_object(number)
+        if isinstance(value, dict) and value.get("Type") in _TREE_TYPES:
+            value = None
+        copied = self.remap(value)
+        new = self.write(copied, self._copying.pop(number))
+        self._numbers[number] = new
+        return new
+
+    def remap(self, value: PdfObject) -> PdfObject:
+        """
+        Copy the objects a direct object refers to.
+        :param value:
+        :return: The object with the references of the output.
+        """
+        if isinstance(value, Ref):
+            return self.copy(value)
+        if isinstance(value, dict):
+            return {k: self.remap(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.remap(v) for v in value]
+        if isinstance(value, Stream):
+            dictionary = {k: v for k, v in value.dictionary.items() if k != "Length"}
+            return Stream(self.remap(dictionary), value.raw())
+        return value
+
+    def write(self, value: PdfObject, ref: Optional[Ref] = None) -> Ref:
+        """
+        Write an object unless we already wrote the same object.
+        :param value: An object with the references of the output.
+        :param ref: A reserved reference; we do not deduplicate the object then.
+        :return:
+        """
+        if isinstance(value, Stream) and self._compression_level is not None:
+            value = _compressed(value, self._compression_level)
+        if self._written is None or ref is not None:
+            return self._writer.write(value, ref)
+        digest = _digest(value)
+        written = self._written.get(digest)
+        if written is None:
+            written = self._writer.write(value)
+            self._written[digest] = written
+        return written
+
+
+def _digest(value: PdfObject) -> bytes:
+    if isinstance(value, Stream):
+        return sha256(serialize(value.dictionary) + b"stream" + value.raw()).digest()
+    return sha256(serialize(value)).digest()
+
+
+def _compressed(stream: Stream, level: int) -> Stream:
+    """
+    Compress an uncompressed stream, or compress a Flate stream again if it gets smaller.
+    We keep the predictor of a Flate stream, so we neither decode nor encode the predictor.
+    Streams with other filters, e.g., JPEG images, stay as they are.
+    """
+    dictionary = stream.dictionary
+    raw = stream.raw()
+    if "Filter" not in dictionary:
+        data = encode_flate(raw, level)
+        dictionary = dict(dictionary, Filter=Name("FlateDecode"))
+        dictionary.pop("DecodeParms", None)
+    elif is_flate_encoded(dictionary):
+        try:
+            data = encode_flate(decompress(raw), level)
+        except ZlibError:
+            return stream
+    else:
+        return stream
+    if len(data) + _MIN_STREAM_SAVING > len(raw):
+        return stream
+    return Stream(dictionary, data)
+
+
+def _inherited(
+    document: PdfDocument, page: Dict[str, PdfObject]
+) -> Dict[str, PdfObject]:
+    missing = [key for key in _INHERITABLE if key not in page]
+    inherited: Dict[str, PdfObject] = {}
+    seen: Set[int] = set()
+    parent = page.get("Parent")
+    while missing and isinstance(parent, Ref) and parent.number not in seen:
+        seen.add(parent.number)
+        node = document.resolve(parent)
+        if not isinstance(node, dict):
+            break
+        for key in list(missing):
+            if key in node:
+                inherited[key] = node[key]
+                missing.remove(key)
+        parent = node.get("Parent")
+    return inherited
+
+
+def _padded(pages: int, sheet_pages: int) -> int:
+    return -(-pages // sheet_pages) * sheet_pages
+
+
+def merge_pdfs(
+    pdf_files: Sequence[Path],
+    output: Path,
+    sheet_pages: int = 1,
+    deduplicate: bool = False,
+    compression_level: Optional[int] = None,
+) -> List[int]:
+    """
+    Write the pages of all PDFs into one PDF.
+    We append blank pages to every document until its page count is a multiple of sheet_pages,
+    so that every document starts on a fresh sheet, e.g., 2 for duplex printing.
+    We only copy the pages, not the outline or the forms of the documents, as we only need the copy for printing.
+    :param pdf_files:
+    :param output:
+    :param sheet_pages:
+    :param deduplicate: Write identical objects only once, also across the documents.
+    :param compression_level: Compress the streams with this zlib level, None copies them as they are.
+    :return: The page count of every document in the merged PDF, with the blank pages.
+    :raises PdfSyntaxError: If we cannot read a document.
+    """
+    counts = []
+    written: Optional[Dict[bytes, Ref]] = {} if deduplicate else None
+    with output.open("wb") as fout:
+        writer = PdfWriter(fout)
+        catalog, tree = writer.allocate(), writer.allocate()
+        kids: List[Ref] = []
+        for pdf_file in pdf_files:
+            with PdfDocument.open(pdf_file) as document:
+                copier = _DocumentCopier(document, writer, written, compression_level)
+                source_pages = list(document.iter_pages())
+                # Links may point to later pages, so we number all pages first.
+                new_pages = [writer.allocate() for _ in source_pages]
+                for (page_ref, _), new in zip(source_pages, new_pages):
+                    if page_ref is not None:
+                        copier.reserve(page_ref, new)
+                media_box: PdfObject = _DEFAULT_MEDIA_BOX
+                for (_, page), new in zip(source_pages, new_pages):
+                    attributes = dict(page, **_inherited(document, page))
+                    attributes["Parent"] = tree
+                    media_box = document.resolve(attributes.get("MediaBox"))
+                    copier.write(copier.remap(attributes), new)
+                kids.extend(new_pages)
+                pages = len(source_pages)
+            if pages == 0:
+                raise PdfSyntaxError(f"{pdf_file} has no pages")
+            if not isinstance(media_box, list):
+                media_box = _DEFAULT_MEDIA_BOX
+            for _ in range(_padded(pages, sheet_pages) - pages):
+                kids.append(
+                    writer.write(
+                        {
+                            "Type": Name("Page"),
+                            "Parent": tree,
+                            "MediaBox": _blank_media_box(media_box),
+                            "Resources": {},
+                        }
+                    )
+                )
+            counts.append(_padded(pages, sheet_pages))
+        writer.write({"Type": Name("Pages"), "Kids": kids, "Count": len(kids)}, tree)
+        writer.write({"Type": Name("Catalog"), "Pages": tree}, catalog)
+        writer.finish(catalog)
+    return counts
+
+
+def compact_pdf(pdf_file: Path, output: Path, compression_level: int = 9) -> None:
+    """
+    Write a copy of a PDF for printing with compressed streams and without duplicated objects.
+    :param pdf_file:
+    :param output:
+    :param compression_level:
+    :return:
+    :raises PdfSyntaxError: If we cannot read the document.
+    """
+    merge_pdfs(
+        [pdf_file], output, deduplicate=True, compression_level=compression_level
+    )
+
+
+def _blank_media_box(media_box: List[PdfObject]) -> List[PdfObject]:
+    # The media box of the last page may contain references into the source document.
+    return [v if isinstance(v, (int, float)) else 0 for v in media_box]
@@ -0,0 +1,487 @@
+"""
+PDF objects.
+A small parser and serializer for the PDF object syntax (ISO 32000-1, section 7.3).
+The parser works on any buffer, in particular on a memory map of the file, and only copies the bytes of the objects it parses.
+"""
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from zlib import compress, decompress
+from zlib import error as ZlibError
+
+_WHITESPACE = rb"\x00\t\n\x0c\r "
+_DELIMITERS = rb"()<>\[\]{}/%"
+_SKIP = re.compile(rb"(?:[" + _WHITESPACE + rb"]+|%[^\r\n]*)*")
+_NUMBER = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+_REF = re.compile(
+    rb"(\d+)["
+    + _WHITESPACE
+    + rb"]+(\d+)["
+    + _WHITESPACE
+    + rb"]+R(?=["
+    + _WHITESPACE
+    + _DELIMITERS
+    + rb"]|$)"
+)
+_NAME = re.compile(rb"/([^" + _WHITESPACE + _DELIMITERS + rb"]*)")
+_KEYWORD = re.compile(rb"[A-Za-z]+")
+_HEX_ESCAPE = re.compile(rb"#([0-9A-Fa-f]{2})")
+OBJECT_HEADER = re.compile(
+    rb"(\d+)[" + _WHITESPACE + rb"]+(\d+)[" + _WHITESPACE + rb"]+obj"
+)
+_STREAM = re.compile(rb"stream(?:\r\n|\n|\r)")
+_ENDSTREAM = re.compile(rb"[" + _WHITESPACE + rb"]*endstream")
+_NAME_ESCAPE = re.compile(rb"[^!-~]|[#" + _DELIMITERS + rb"]")
+_STRING_ESCAPES = {
+    ord("n"): b"\n",
+    ord("r"): b"\r",
+    ord("t"): b"\t",
+    ord("b"): b"\b",
+    ord("f"): b"\f",
+    ord("("): b"(",
+    ord(")"): b")",
+    ord("\\"): b"\\",
+}
+
+
+class PdfSyntaxError(ValueError):
+    """
+    The file does not follow the PDF syntax.
+    """
+
+
+class Name(str):
+    """
+    A PDF name, without the leading slash.
+    """
+
+    def __repr__(self) -> str:
+        return f"/{self}"
+
+
+class Ref:
+    """
+    An indirect reference.
+    """
+
+    __slots__ = ("number", "generation")
+
+    def __init__(self, number: int, generation: int = 0) -> None:
+        self.number = number
+        self.generation = generation
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, Ref)
+            and self.number == other.number
+            and self.generation == other.generation
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.number, self.generation))
+
+    def __repr__(self) -> str:
+        return f"{self.number} {self.generation} R"
+
+
+class Stream:
+    """
+    A stream object.
+    The data is either kept in memory or read lazily from the buffer it was parsed from.
+    """
+
+    __slots__ = ("dictionary", "_data", "_buffer", "_start", "_end")
+
+    def __init__(self, dictionary: Dict[str, Any], data: bytes = b"") -> None:
+        self.dictionary = dictionary
+        self._data: Optional[bytes] = data
+        self._buffer: Any = None
+        self._start = 0
+        self._end = 0
+
+    @classmethod
+    def from_buffer(
+        cls, dictionary: Dict[str, Any], buffer: Any, start: int, end: int
+    ) -> "Stream":
+        stream = cls(dictionary)
+        stream._data = None
+        stream._buffer = buffer
+        stream._start = start
+        stream._end = end
+        return stream
+
+    @property
+    def raw_length(self) -> int:
+        if self._data is not None:
+            return len(self._data)
+        return self._end - self._start
+
+    def raw(self) -> bytes:
+        """
+        The (still encoded) data of the stream.
+        """
+        if self._data is not None:
+            return self._data
+        return bytes(self._buffer[self._start : self._end])
+
+    def decoded(self) -> bytes:
+        """
+        The decoded data of the stream.
+        We only support the filters that we need for the structure of the file, i.e., FlateDecode with predictors.
+        """
+        return decode(self.raw(), self.dictionary)
+
+    def __repr__(self) -> str:
+        return f"Stream({self.dictionary!r}, {self.raw_length} bytes)"
+
+
+PdfObject = Any
+
+
+def _filters(dictionary: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    filters = dictionary.get("Filter")
+    parameters = dictionary.get("DecodeParms")
+    if filters is None:
+        return []
+    if not isinstance(filters, list):
+        filters = [filters]
+        parameters = [parameters]
+    elif not isinstance(parameters, list):
+        parameters = [parameters] * len(filters)
+    return [
+        (str(f), p if isinstance(p, dict) else {}) for f, p in zip(filters, parameters)
+    ]
+
+
+def decode(data: bytes, dictionary: Dict[str, Any]) -> bytes:
+    """
+    Apply the filters of a stream dictionary.
+    :param data:
+    :param dictionary:
+    :return:
+    """
+    for name, parameters in _filters(dictionary):
+        if name not in ("FlateDecode", "Fl"):
+            raise PdfSyntaxError(f"Unsupported filter {name}")
+        try:
+            data = decompress(data)
+        except ZlibError as e:
+            raise PdfSyntaxError(f"Broken FlateDecode stream: {e}")
+        predictor = parameters.get("Predictor", 1)
+        if isinstance(predictor, int) and predictor >= 10:
+            data = _png_unpredict(data, parameters)
+        elif predictor != 1:
+            raise PdfSyntaxError(f"Unsupported predictor {predictor}")
+    return data
+
+
+def is_flate_encoded(dictionary: Dict[str, Any]) -> bool:
+    """
+    Whether the stream is compressed with FlateDecode only.
+    :param dictionary:
+    :return:
+    """
+    filters = _filters(dictionary)
+    return len(filters) == 1 and filters[0][0] in ("FlateDecode", "Fl")
+
+
+def encode_flate(data: bytes, level: int = 6) -> bytes:
+    """
+    Compress stream data with FlateDecode.
+    :param data:
+    :param level:
+    :return:
+    """
+    return compress(data, level)
+
+
+def _png_unpredict(data: bytes, parameters: Dict[str, Any]) -> bytes:
+    columns = int(parameters.get("Columns", 1))
+    colors = int(parameters.get("Colors", 1))
+    bits = int(parameters.get("BitsPerComponent", 8))
+    bpp = max(1, colors * bits // 8)
+    row_length = (columns * colors * bits + 7) // 8
+    output = bytearray()
+    previous = bytearray(row_length)
+    for start in range(0, len(data), row_length + 1):
+        kind = data[start]
+        row = bytearray(data[start + 1 : start + 1 + row_length])
+        if len(row) < row_length:
+            row.extend(bytes(row_length - len(row)))
+        if kind == 1:
+            for i in range(bpp, row_length):
+                row[i] = (row[i] + row[i - bpp]) & 0xFF
+        elif kind == 2:
+            for i in range(row_length):
+                row[i] = (row[i] + previous[i]) & 0xFF
+        elif kind == 3:
+            for i in range(row_length):
+                left = row[i - bpp] if i >= bpp else 0
+                row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xFF
+        elif kind == 4:
+            for i in range(row_length):
+                left = row[i - bpp] if i >= bpp else 0
+                up_left = previous[i - bpp] if i >= bpp else 0
+                row[i] = (row[i] + _paeth(left, previous[i], up_left)) & 0xFF
+        elif kind != 0:
+            raise PdfSyntaxError(f"Unknown PNG predictor {kind}")
+        output.extend(row)
+        previous = row
+    return bytes(output)
+
+
+def _paeth(a: int, b: int, c: int) -> int:
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    if pb <= pc:
+        return b
+    return c
+
+
+class Parser:
+    """
+    Parses PDF objects from a buffer.
+    resolve is used to look up indirect stream lengths.
+    """
+
+    def __init__(
+        self, buffer: Any, resolve: Optional[Callable[[Ref], PdfObject]] = None
+    ) -> None:
+        self.buffer = buffer
+        self._resolve = resolve
+
+    def skip(self, pos: int) -> int:
+        """
+        Skip whitespace and comments.
+        :param pos:
+        :return:
+        """
+        match = _SKIP.match(self.buffer, pos)
+        return match.end() if match else pos
+
+    def parse(self, pos: int) -> Tuple[PdfObject, int]:
+        """
+        Parse a direct object.
+        :param pos:
+        :return: The object and the position after it.
+        """
+        buffer = self.buffer
+        pos = self.skip(pos)
+        first = buffer[pos : pos + 1]
+        if first == b"/":
+            match = _NAME.match(buffer, pos)
+            assert match is not None
+            return Name(_unescape_name(match.group(1))), match.end()
+        if first == b"<":
+            if buffer[pos + 1 : pos + 2] == b"<":
+                return self._parse_dictionary(pos + 2)
+            return self._parse_hex_string(pos + 1)
+        if first == b"[":
+            return self._parse_array(pos + 1)
+        if first == b"(":
+            return self._parse_literal_string(pos + 1)
+        if first.isdigit() or first in (b"+", b"-", b"."):
+            if first.isdigit():
+                match = _REF.match(buffer, pos)
+                if match:
+                    return Ref(int(match.group(1)), int(match.group(2))), match.end()
+            match = _NUMBER.match(buffer, pos)
+            if match is None:
+                raise PdfSyntaxError(f"Invalid number at {pos}")
+            token = match.group()
+            if b"." in token:
+                return float(token), match.end()
+            return int(token), match.end()
+        match = _KEYWORD.match(buffer, pos)
+        if match:
+            keyword = match.group()
+            if keyword == b"true":
+                return True, match.end()
+            if keyword == b"false":
+                return False, match.end()
+            if keyword == b"null":
+                return None, match.end()
+        if not first:
+            raise PdfSyntaxError(f"Unexpected end of data at {pos}")
+        raise PdfSyntaxError(f"Unexpected {first!r} at {pos}")
+
+    def _parse_dictionary(self, pos: int) -> Tuple[Dict[str, PdfObject], int]:
+        result: Dict[str, PdfObject] = {}
+        while True:
+            pos = self.skip(pos)
+            if self.buffer[pos : pos + 2] == b">>":
+                return result, pos + 2
+            key, pos = self.parse(pos)
+            if not isinstance(key, Name):
+                raise PdfSyntaxError(f"Dictionary key {key!r} is not a name at {pos}")
+            value, pos = self.parse(pos)
+            result[key] = value
+
+    def _parse_array(self, pos: int) -> Tuple[List[PdfObject], int]:
+        result: List[PdfObject] = []
+        while True:
+            pos = self.skip(pos)
+            if self.buffer[pos : pos + 1] == b"]":
+                return result, pos + 1
+            value, pos = self.parse(pos)
+            result.append(value)
+
+    def _parse_hex_string(self, pos: int) -> Tuple[bytes, int]:
+        end = self.buffer.find(b">", pos)
+        if end < 0:
+            raise PdfSyntaxError(f"Unterminated hex string at {pos}")
+        digits = bytes(
+            c for c in self.buffer[pos:end] if c not in b"\x00\t\n\x0c\r "
+        ).decode("ascii", "replace")
+        if len(digits) % 2 == 1:
+            digits += "0"
+        try:
+            return bytes.fromhex(digits), end + 1
+        except ValueError:
+            raise PdfSyntaxError(f"Invalid hex string at {pos}")
+
+    def _parse_literal_string(self, pos: int) -> Tuple[bytes, int]:
+        buffer = self.buffer
+        output = bytearray()
+        depth = 1
+        size = len(buffer)
+        while pos < size:
+            c = buffer[pos]
+            if c == 0x5C:  # backslash
+                pos += 1
+                escaped = buffer[pos] if pos < size else 0
+                if escaped in _STRING_ESCAPES:
+                    output += _STRING_ESCAPES[escaped]
+                    pos += 1
+                elif 0x30 <= escaped <= 0x37:
+                    end = pos
+                    while end < pos + 3 and end < size and 0x30 <= buffer[end] <= 0x37:
+                        end += 1
+                    output.append(int(bytes(buffer[pos:end]), 8) & 0xFF)
+                    pos = end
+                elif escaped == 0x0D:
+                    pos += 2 if buffer[pos + 1 : pos + 2] == b"\n" else 1
+                elif escaped == 0x0A:
+                    pos += 1
+                else:
+                    pos += 1
+                    output.append(escaped)
+                continue
+            if c == 0x28:
+                depth += 1
+            elif c == 0x29:
+                depth -= 1
+                if depth == 0:
+                    return bytes(output), pos + 1
+            output.append(c)
+            pos += 1
+        raise PdfSyntaxError("Unterminated string")
+
+    def parse_indirect(self, pos: int) -> Tuple[int, int, PdfObject, int]:
+        """
+        Parse an indirect object `n g obj ... endobj`, including streams.
+        :param pos:
+        :return: The object number, the generation, the object, and the position after it.
+        """
+        pos = self.skip(pos)
+        match = OBJECT_HEADER.match(self.buffer, pos)
+        if match is None:
+            raise PdfSyntaxError(f"No object at {pos}")
+        value, pos = self.parse(match.end())
+        if isinstance(value, dict):
+            stream_pos = self.skip(pos)
+            stream = _STREAM.match(self.buffer, stream_pos)
+            if stream is not None:
+                value, pos = self._parse_stream_data(value, stream.end())
+        return int(match.group(1)), int(match.group(2)), value, pos
+
+    def _parse_stream_data(
+        self, dictionary: Dict[str, PdfObject], start: int
+    ) -> Tuple[Stream, int]:
+        length = dictionary.get("Length")
+        if isinstance(length, Ref) and self._resolve is not None:
+            length = self._resolve(length)
+        if isinstance(length, int) and length >= 0:
+            end = _ENDSTREAM.match(self.buffer, start + length)
+            if end is not None:
+                return (
+                    Stream.from_buffer(dictionary, self.buffer, start, start + length),
+                    end.end(),
+                )
+        # The length is missing or wrong, so we look for the end of the stream.
+        end_pos = self.buffer.find(b"endstream", start)
+        if end_pos < 0:
+            raise PdfSyntaxError(f"Unterminated stream at {start}")
+        data_end = end_pos
+        if self.buffer[data_end - 2 : data_end] == b"\r\n":
+            data_end -= 2
+        elif self.buffer[data_end - 1 : data_end] in (b"\n", b"\r"):
+            data_end -= 1
+        return (
+            Stream.from_buffer(dictionary, self.buffer, start, data_end),
+            end_pos + len(b"endstream"),
+        )
+
+
+def _unescape_name(raw: bytes) -> str:
+    if b"#" in raw:
+        raw = _HEX_ESCAPE.sub(lambda m: bytes([int(m.group(1), 16)]), raw)
+    return raw.decode("latin-1")
+
+
+def _escape_name(name: str) -> bytes:
+    return b"/" + _NAME_ESCAPE.sub(
+        lambda m: b"#%02X" % m.group()[0], name.encode("latin-1")
+    )
+
+
+def _escape_string(value: bytes) -> bytes:
+    return (
+        b"("
+        + value.replace(b"\\", b"\\\\")
+        .replace(b"(", b"\\(")
+        .replace(b")", b"\\)")
+        .replace(b"\r", b"\\r")
+        + b")"
+    )
+
+
+def _format_number(value: Union[int, float]) -> bytes:
+    if isinstance(value, int) or value == int(value) and abs(value) < 1e15:
+        return b"%d" % int(value)
+    return (b"%.6f" % value).rstrip(b"0")
+
+
+def serialize(value: PdfObject) -> bytes:
+    """
+    Serialize a direct object.
+    Streams have to be written with serialize_stream.
+    :param value:
+    :return:
+    """
+    if value is None:
+        return b"null"
+    if value is True:
+        return b"true"
+    if value is False:
+        return b"false"
+    if isinstance(value, Name):
+        return _escape_name(value)
+    if isinstance(value, Ref):
+        return b"%d %d R" % (value.number, value.generation)
+    if isinstance(value, (int, float)):
+        return _format_number(value)
+    if isinstance(value, (bytes, bytearray)):
+        return _escape_string(bytes(value))
+    if isinstance(value, str):
+        return _escape_string(value.encode("latin-1"))
+    if isinstance(value, list):
+        return b"[" + b" ".join(serialize(v) for v in value) + b"]"
+    if isinstance(value, dict):
+        return (
+            b"<<"
+            + b"".join(_escape_name(k) + b" " + serialize(v) for k, v in value.items())
+            + b">>"
+        )
+    raise TypeError(f"Cannot serialize {value!r}")
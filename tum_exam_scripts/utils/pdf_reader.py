@@ -0,0 +1,453 @@
+"""
+PDF reader.
+Reads the cross-reference data of a PDF through a memory map and resolves objects on demand,
+so we never copy the file into memory; only the parsed objects and the decoded xref and object streams are copied.
+"""
+import re
+from contextlib import contextmanager
+from mmap import ACCESS_READ, mmap
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from tum_exam_scripts.utils.pdf_objects import (
+    OBJECT_HEADER,
+    Parser,
+    PdfObject,
+    PdfSyntaxError,
+    Ref,
+    Stream,
+)
+
+HEADER_WINDOW = 1024
+TRAILER_WINDOW = 1024
+MAX_REPORTED_PROBLEMS = 5
+
+_STARTXREF = re.compile(rb"startxref\s+(\d+)\s+%%EOF")
+_XREF_ENTRY = re.compile(rb"(\d{10})[ ](\d{5})[ ]([nf])")
+_XREF_SUBSECTION = re.compile(rb"(\d+)[ \t]+(\d+)")
+_TRAILING_PADDING = b"\x00\t\n\x0c\r "
+_PAGE_OBJECT = re.compile(rb"/Type\s*/Page(?![A-Za-z0-9])")
+
+IN_USE = 1
+COMPRESSED = 2
+
+# What parsing raises if a value has the wrong type, e.g., a name where we expect a number.
+_MALFORMED = (
+    TypeError,
+    ValueError,
+    IndexError,
+    KeyError,
+    OverflowError,
+    RecursionError,
+)
+
+
+class XrefEntry(NamedTuple):
+    """
+    A cross-reference entry.
+    For in-use objects, `first` is the offset and `second` the generation.
+    For compressed objects, `first` is the number of the object stream and `second` the index in it.
+    """
+
+    kind: int
+    first: int
+    second: int
+
+
+class PdfDocument:
+    """
+    A PDF on top of a buffer, usually a memory map of the file.
+    Opening the document parses the cross-reference data; objects are parsed when they are resolved.
+    """
+
+    def __init__(self, buffer: Any) -> None:
+        self.buffer = buffer
+        self.size = len(buffer)
+        self.parser = Parser(buffer, self.resolve)
+        self.xref: Dict[int, XrefEntry] = {}
+        self.trailer: Dict[str, PdfObject] = {}
+        self._objects: Dict[int, PdfObject] = {}
+        self._object_streams: Dict[int, Tuple[Parser, Dict[int, int]]] = {}
+        self._resolving: Set[int] = set()
+        if buffer.find(b"%PDF-", 0, HEADER_WINDOW) < 0:
+            raise PdfSyntaxError("No %PDF header")
+        self.startxref = self._find_startxref()
+        self._read_xref(self.startxref)
+
+    @classmethod
+    @contextmanager
+    def open(cls, pdf_file: Path) -> Iterator["PdfDocument"]:
+        """
+        Map the file into memory and open it as a document.
+        :param pdf_file:
+        :return:
+        """
+        with pdf_file.open("rb") as fin:
+            if fin.seek(0, 2) == 0:
+                raise PdfSyntaxError("The file is empty")
+            with mmap(fin.fileno(), 0, access=ACCESS_READ) as buffer:
+                document = cls(buffer)
+                try:
+                    yield document
+                finally:
+                    document.release()
+
+    def release(self) -> None:
+        """
+        Drop all references to the buffer, so that the memory map can be closed.
+        """
+        self._objects.clear()
+        self._object_streams.clear()
+
+    def _find_startxref(self) -> int:
+        # Some tools pad the file, but a file that ends in a long run of padding is truncated.
+        end = self.size
+        while (
+            end > self.size - TRAILER_WINDOW
+            and self.buffer[end - 1] in _TRAILING_PADDING
+        ):
+            end -= 1
+        start = max(0, end - TRAILER_WINDOW)
+        position = self.buffer.rfind(b"startxref", start, end)
+        if position < 0:
+            raise PdfSyntaxError(
+                "No startxref at the end of the file, is it truncated?"
+            )
+        match = _STARTXREF.match(self.buffer, position)
+        if match is None:
+            raise PdfSyntaxError("No %%EOF after startxref, is the file truncated?")
+        offset = int(match.group(1))
+        if offset >= self.size:
+            raise PdfSyntaxError(f"startxref {offset} is beyond the end of the file")
+        return offset
+
+    def _read_xref(self, offset: Optional[int]) -> None:
+        visited: Set[int] = set()
+        while offset is not None:
+            if offset in visited or not 0 <= offset < self.size:
+                raise PdfSyntaxError(f"Invalid xref offset {offset}")
+            visited.add(offset)
+            position = self.parser.skip(offset)
+            if self.buffer[position : position + 4] == b"xref":
+                trailer = self._read_xref_table(position + 4)
+                hybrid = trailer.get("XRefStm")
+                if isinstance(hybrid, int):
+                    self._read_xref_stream(hybrid)
+            else:
+                trailer = self._read_xref_stream(position)
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            previous = trailer.get("Prev")
+            offset = previous if isinstance(previous, int) else None
+        if "Root" not in self.trailer:
+            raise PdfSyntaxError("The trailer has no /Root")
+
+    def _read_xref_table(self, position: int) -> Dict[str, PdfObject]:
+        buffer = self.buffer
+        while True:
+            position = self.parser.skip(position)
+            if buffer[position : position + 7] == b"trailer":
+                trailer, _ = self.parser.parse(position + 7)
+                if not isinstance(trailer, dict):
+                    raise PdfSyntaxError("The trailer is not a dictionary")
+                return trailer
+            match = _XREF_SUBSECTION.match(buffer, position)
+            if match is None:
+                raise PdfSyntaxError(f"Broken xref table at {position}")
+            first, count = int(match.group(1)), int(match.group(2))
+            position = match.end()
+            for number in range(first, first + count):
+                position = self.parser.skip(position)
+                entry = _XREF_ENTRY.match(buffer, position)
+                if entry is None:
+                    raise PdfSyntaxError(f"Broken xref entry at {position}")
+                position = entry.end()
+                if entry.group(3) == b"n" and number not in self.xref:
+                    self.xref[number] = XrefEntry(
+                        IN_USE, int(entry.group(1)), int(entry.group(2))
+                    )
+                else:
+                    self.xref.setdefault(number, XrefEntry(0, 0, 0))
+
+    def _read_xref_stream(self, position: int) -> Dict[str, PdfObject]:
+        _, _, stream, _ = self.parser.parse_indirect(position)
+        if not isinstance(stream, Stream) or stream.dictionary.get("Type") != "XRef":
+            raise PdfSyntaxError(f"No xref stream at {position}")
+        dictionary = stream.dictionary
+        widths = dictionary.get("W")
+        if not (
+            isinstance(widths, list)
+            and len(widths) == 3
+            and all(isinstance(w, int) and w >= 0 for w in widths)
+        ):
+            raise PdfSyntaxError("Invalid /W in the xref stream")
+        index = dictionary.get("Index", [0, dictionary.get("Size", 0)])
+        if not (
+            isinstance(index, list)
+            and len(index) % 2 == 0
+            and all(isinstance(i, int) and i >= 0 for i in index)
+        ):
+            raise PdfSyntaxError("Invalid /Index in the xref stream")
+        data = stream.decoded()
+        row_length = sum(widths)
+        row = 0
+        for first, count in zip(index[0::2], index[1::2]):
+            for number in range(first, first + count):
+                start = row * row_length
+                if start + row_length > len(data):
+                    raise PdfSyntaxError("The xref stream is too short")
+                fields = []
+                for width in widths:
+                    fields.append(int.from_bytes(data[start : start + width], "big"))
+                    start += width
+                kind = fields[0] if widths[0] else IN_USE
+                if number not in self.xref:
+                    if kind in (IN_USE, COMPRESSED):
+                        self.xref[number] = XrefEntry(kind, fields[1], fields[2])
+                    else:
+                        self.xref[number] = XrefEntry(0, 0, 0)
+                row += 1
+        return dictionary
+
+    def get_object(self, number: int) -> PdfObject:
+        """
+        Parse the object with the given number.
+        :param number:
+        :return: None for free or missing objects, as the specification demands.
+        """
+        if number in self._objects:
+            return self._objects[number]
+        entry = self.xref.get(number)
+        if entry is None or entry.kind not in (IN_USE, COMPRESSED):
+            return None
+        if number in self._resolving:
+            raise PdfSyntaxError(f"Object {number} refers to itself")
+        self._resolving.add(number)
+        try:
+            if entry.kind == IN_USE:
+                found, _, value, _ = self.parser.parse_indirect(entry.first)
+                if found != number:
+                    raise PdfSyntaxError(
+                        f"The xref entry of object {number} points to object {found}"
+                    )
+            else:
+                value = self._get_compressed_object(number, entry)
+        finally:
+            self._resolving.discard(number)
+        self._objects[number] = value
+        return value
+
+    def _get_compressed_object(self, number: int, entry: XrefEntry) -> PdfObject:
+        if entry.first not in self._object_streams:
+            stream = self.get_object(entry.first)
+            if (
+                not isinstance(stream, Stream)
+                or stream.dictionary.get("Type") != "ObjStm"
+            ):
+                raise PdfSyntaxError(f"Object {entry.first} is not an object stream")
+            data = stream.decoded()
+            parser = Parser(data, self.resolve)
+            first = stream.dictionary.get("First", 0)
+            length = stream.dictionary.get("N", 0)
+            if not (
+                isinstance(first, int)
+                and 0 <= first <= len(data)
+                and isinstance(length, int)
+                and length >= 0
+            ):
+                raise PdfSyntaxError(
+                    f"Invalid /N or /First in object stream {entry.first}"
+                )
+            offsets: Dict[int, int] = {}
+            position = 0
+            for _ in range(length):
+                contained, position = parser.parse(position)
+                offset, position = parser.parse(position)
+                if not (isinstance(contained, int) and isinstance(offset, int)):
+                    raise PdfSyntaxError(
+                        f"Broken offsets in object stream {entry.first}"
+                    )
+                offsets[contained] = first + offset
+            self._object_streams[entry.first] = (parser, offsets)
+        parser, offsets = self._object_streams[entry.first]
+        if number not in offsets:
+            raise PdfSyntaxError(
+                f"Object {number} is not in object stream {entry.first}"
+            )
+        value, _ = parser.parse(offsets[number])
+        return value
+
+    def resolve(self, value: PdfObject) -> PdfObject:
+        """
+        Follow indirect references.
+        :param value:
+        :return:
+        """
+        while isinstance(value, Ref):
+            value = self.get_object(value.number)
+        return value
+
+    @property
+    def catalog(self) -> Dict[str, PdfObject]:
+        catalog = self.resolve(self.trailer["Root"])
+        if not isinstance(catalog, dict):
+            raise PdfSyntaxError("The document catalog is not a dictionary")
+        return catalog
+
+    def iter_pages(self) -> Iterator[Tuple[Optional[Ref], Dict[str, PdfObject]]]:
+        """
+        Walk the page tree in order.
+        :return: The reference and the dictionary of every page.
+        """
+        root = self.catalog.get("Pages")
+        seen: Set[Ref] = set()
+        stack: List[PdfObject] = [root]
+        while stack:
+            node_ref = stack.pop()
+            if isinstance(node_ref, Ref):
+                if node_ref in seen:
+                    raise PdfSyntaxError(f"The page tree contains {node_ref} twice")
+                seen.add(node_ref)
+            node = self.resolve(node_ref)
+            if not isinstance(node, dict):
+                raise PdfSyntaxError(f"Page tree node {node_ref!r} is not a dictionary")
+            if node.get("Type") == "Pages" or "Kids" in node:
+                kids = self.resolve(node.get("Kids"))
+                if not isinstance(kids, list):
+                    raise PdfSyntaxError(f"Page tree node {node_ref!r} has no /Kids")
+                stack.extend(reversed(kids))
+            else:
+                yield node_ref if isinstance(node_ref, Ref) else None, node
+
+    def page_count(self) -> int:
+        """
+        Count the pages by walking the page tree.
+        :return:
+        """
+        return sum(1 for _ in self.iter_pages())
+
+    def declared_page_count(self) -> Optional[int]:
+        """
+        The /Count of the page tree root, which is cheap but not verified.
+        :return:
+        """
+        pages = self.resolve(self.catalog.get("Pages"))
+        count = self.resolve(pages.get("Count")) if isinstance(pages, dict) else None
+        return count if isinstance(count, int) else None
+
+
+@contextmanager
+def _syntax_errors() -> Iterator[None]:
+    """
+    Report values that the parser cannot handle as syntax errors, so a corrupt file never crashes the caller.
+    :return:
+    """
+    try:
+        yield
+    except PdfSyntaxError:
+        raise
+    except _MALFORMED as e:
+        raise PdfSyntaxError(f"Malformed PDF: {e!r}") from e
+
+
+class StructureReport(NamedTuple):
+    """
+    The outcome of the structural check of a PDF.
+    """
+
+    problems: List[str]
+    pages: Optional[int]
+
+    @property
+    def valid(self) -> bool:
+        return not self.problems
+
+
+def check_structure(document: PdfDocument) -> StructureReport:
+    """
+    Check that every xref entry lands on the object it claims and that the page tree is intact.
+    :param document:
+    :return:
+    """
+    problems: List[str] = []
+    object_streams: Set[int] = set()
+    for number, entry in sorted(document.xref.items()):
+        if entry.kind == IN_USE:
+            if not 0 <= entry.first < document.size:
+                problems.append(f"object {number} is beyond the end of the file")
+                continue
+            match = OBJECT_HEADER.match(
+                document.buffer, document.parser.skip(entry.first)
+            )
+            if match is None or int(match.group(1)) != number:
+                problems.append(f"the xref entry of object {number} is wrong")
+        elif entry.kind == COMPRESSED:
+            object_streams.add(entry.first)
+    for number in sorted(object_streams):
+        stream_entry = document.xref.get(number)
+        if stream_entry is None or stream_entry.kind != IN_USE:
+            problems.append(f"object stream {number} is missing")
+    if problems:
+        return StructureReport(problems[:MAX_REPORTED_PROBLEMS], None)
+    try:
+        pages = document.page_count()
+    except PdfSyntaxError as e:
+        return StructureReport([str(e)], None)
+    declared = document.declared_page_count()
+    if pages == 0:
+        problems.append("the document has no pages")
+    elif declared is not None and declared != pages:
+        problems.append(f"the page tree declares {declared} pages but has {pages}")
+    return StructureReport(problems, pages)
+
+
+def verify_structure(pdf_file: Path) -> StructureReport:
+    """
+    Open a PDF and check its structure.
+    :param pdf_file:
+    :return: A report with the problem if the file is not a valid PDF.
+    """
+    try:
+        with _syntax_errors(), PdfDocument.open(pdf_file) as document:
+            return check_structure(document)
+    except PdfSyntaxError as e:
+        return StructureReport([str(e)], None)
+
+
+def page_count(pdf_file: Path) -> int:
+    """
+    Count the pages of a PDF.
+    :param pdf_file:
+    :return:
+    :raises PdfSyntaxError: If the file is not a valid PDF.
+    """
+    with _syntax_errors(), PdfDocument.open(pdf_file) as document:
+        return document.page_count()
+
+
+def fast_page_count(pdf_file: Path) -> Optional[int]:
+    """
+    Count the pages without walking the page tree.
+    We read the /Count of the page tree root, which only needs the cross-reference data and two objects.
+    If the cross-reference data is broken, we count the /Type /Page objects in the file instead,
+    which misses pages in compressed object streams.
+    :param pdf_file:
+    :return: None if we cannot find any pages.
+    """
+    with pdf_file.open("rb") as fin:
+        if fin.seek(0, 2) == 0:
+            return None
+        with mmap(fin.fileno(), 0, access=ACCESS_READ) as buffer:
+            try:
+                with _syntax_errors():
+                    document = PdfDocument(buffer)
+                    try:
+                        count = document.declared_page_count()
+                    finally:
+                        document.release()
+                if count is not None:
+                    return count
+            except PdfSyntaxError:
+                pass
+            count = sum(1 for _ in _PAGE_OBJECT.finditer(buffer))
+            return count if count > 0 else None
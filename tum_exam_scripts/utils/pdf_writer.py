@@ -0,0 +1,132 @@
+"""
+PDF writer.
+Writes objects to a file one after another, so large documents never have to be kept in memory.
+"""
+from typing import BinaryIO, Dict, Optional
+
+from tum_exam_scripts.utils.pdf_objects import (
+    Name,
+    PdfObject,
+    Ref,
+    Stream,
+    encode_flate,
+    serialize,
+)
+
+PDF_VERSION = "1.5"
+
+
+class PdfWriter:
+    """
+    Writes a PDF to a binary file.
+    Reserve object numbers with allocate(), write the objects with write(), and call finish() with the catalog.
+    The cross-reference data is a classic table or, with xref_stream, a compressed xref stream.
+    """
+
+    def __init__(
+        self, fout: BinaryIO, xref_stream: bool = False, version: str = PDF_VERSION
+    ) -> None:
+        self._fout = fout
+        self._xref_stream = xref_stream
+        self._offsets: Dict[int, int] = {}
+        self._next_number = 1
+        self._position = 0
+        self._write_raw(b"%PDF-" + version.encode("ascii") + b"\n%\xe2\xe3\xcf\xd3\n")
+
+    @property
+    def position(self) -> int:
+        """
+        The number of bytes written so far.
+        """
+        return self._position
+
+    def _write_raw(self, data: bytes) -> None:
+        self._fout.write(data)
+        self._position += len(data)
+
+    def allocate(self) -> Ref:
+        """
+        Reserve an object number.
+        :return:
+        """
+        ref = Ref(self._next_number)
+        self._next_number += 1
+        return ref
+
+    def write(self, value: PdfObject, ref: Optional[Ref] = None) -> Ref:
+        """
+        Write an indirect object.
+        :param value: A direct object or a stream.
+        :param ref: A reserved reference, otherwise we allocate a new one.
+        :return: The reference to the object.
+        """
+        if ref is None:
+            ref = self.allocate()
+        if ref.number in self._offsets:
+            raise ValueError(f"Object {ref.number} was already written")
+        self._offsets[ref.number] = self._position
+        self._write_raw(b"%d 0 obj\n" % ref.number)
+        if isinstance(value, Stream):
+            data = value.raw()
+            dictionary = dict(value.dictionary)
+            dictionary["Length"] = len(data)
+            self._write_raw(serialize(dictionary) + b"\nstream\n")
+            self._write_raw(data)
+            self._write_raw(b"\nendstream")
+        else:
+            self._write_raw(serialize(value))
+        self._write_raw(b"\nendobj\n")
+        return ref
+
+    def finish(self, root: Ref, info: Optional[Ref] = None) -> None:
+        """
+        Write the cross-reference data and the trailer.
+        :param root: The reference to the document catalog.
+        :param info: The reference to the document information dictionary.
+        :return:
+        """
+        trailer: Dict[str, PdfObject] = {"Root": root}
+        if info is not None:
+            trailer["Info"] = info
+        if self._xref_stream:
+            self._finish_with_stream(trailer)
+        else:
+            self._finish_with_table(trailer)
+
+    def _finish_with_table(self, trailer: Dict[str, PdfObject]) -> None:
+        size = self._next_number
+        start = self._position
+        lines = [b"xref\n0 %d\n" % size, b"0000000000 65535 f\r\n"]
+        for number in range(1, size):
+            offset = self._offsets.get(number)
+            if offset is None:
+                lines.append(b"0000000000 00000 f\r\n")
+            else:
+                lines.append(b"%010d 00000 n\r\n" % offset)
+        trailer = dict(trailer, Size=size)
+        lines.append(b"trailer\n" + serialize(trailer) + b"\n")
+        lines.append(b"startxref\n%d\n%%%%EOF\n" % start)
+        self._write_raw(b"".join(lines))
+
+    def _finish_with_stream(self, trailer: Dict[str, PdfObject]) -> None:
+        ref = self.allocate()
+        size = self._next_number
+        start = self._position
+        self._offsets[ref.number] = start
+        rows = [b"\x00\x00\x00\x00\xff\xff"]
+        for number in range(1, size):
+            offset = self._offsets.get(number)
+            if offset is None:
+                rows.append(b"\x00\x00\x00\x00\x00\x00")
+            else:
+                rows.append(b"\x01" + offset.to_bytes(4, "big") + b"\x00")
+        dictionary = dict(
+            trailer,
+            Type=Name("XRef"),
+            Size=size,
+            W=[1, 4, 1],
+            Filter=Name("FlateDecode"),
+        )
+        del self._offsets[ref.number]
+        self.write(Stream(dictionary, encode_flate(b"".join(rows))), ref)
+        self._write_raw(b"startxref\n%d\n%%%%EOF\n" % start)
@@ -0,0 +1,163 @@
+"""
+Profiling.
+With --profile, we run the command under cProfile and write the functions sorted by their cumulative and own time to a report.
+cProfile only sees the thread that enabled it, but the submissions and the validation run in worker threads,
+so we additionally sample the stacks of all threads and write them in the collapsed format of flamegraph.pl,
+which speedscope and inferno read, too. With --profile-memory, the report also lists where we allocated the most memory.
+We only import this module with --profile, so the profiling costs nothing without it.
+"""
+import cProfile
+import sys
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from io import StringIO
+from logging import getLogger
+from os import getpid
+from pathlib import Path
+from pstats import Stats
+from threading import Event, Thread
+from threading import enumerate as enumerate_threads
+from threading import get_ident
+from types import FrameType
+from typing import Counter as CounterType
+from typing import Dict, List, Optional, Tuple
+
+_LOGGER = getLogger(__name__)
+
+PROFILE_PREFIX = "tum-exam-scripts-profile"
+DEFAULT_SAMPLE_INTERVAL = 0.005
+_REPORTED_FUNCTIONS = 40
+_REPORTED_ALLOCATIONS = 25
+_TRACED_FRAMES = 25
+
+
+class Profiler:
+    """
+    Profiles everything between start() and stop().
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        memory: bool = False,
+        interval: float = DEFAULT_SAMPLE_INTERVAL,
+    ) -> None:
+        """
+        :param directory: Where we write the report and the collapsed stacks.
+        :param memory: Trace the memory allocations with tracemalloc, which slows the command down noticeably.
+        :param interval: The seconds between two samples of the stacks.
+        """
+        stem = f"{PROFILE_PREFIX}-{datetime.now():%Y%m%d-%H%M%S}-{getpid()}"
+        self.report_file = directory.joinpath(stem + ".txt")
+        self.stacks_file = directory.joinpath(stem + ".collapsed")
+        self.memory = memory
+        self.samples: CounterType[str] = Counter()
+        self._interval = interval
+        self._profile = cProfile.Profile()
+        self._stop = Event()
+        self._sampler = Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._names: Dict[int, str] = {}
+
+    def start(self) -> None:
+        if self.memory:
+            tracemalloc.start(_TRACED_FRAMES)
+        self._sampler.start()
+        self._profile.enable()
+
+    def stop(self) -> Tuple[Path, Path]:
+        """
+        Stop profiling and write the report and the collapsed stacks.
+        :return: The report and the collapsed stacks; they do not exist if we could not write them.
+        """
+        self._profile.disable()
+        self._stop.set()
+        self._sampler.join()
+        snapshot = None
+        peak = 0
+        if self.memory:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        try:
+            self.report_file.parent.mkdir(parents=True, exist_ok=True)
+            self.report_file.write_text(self.report(snapshot, peak), encoding="utf-8")
+            self.stacks_file.write_text(
+                "".join(f"{s} {n}\n" for s, n in sorted(self.samples.items())),
+                encoding="utf-8",
+            )
+        except OSError as e:
+            _LOGGER.warning(f"Cannot write the profile: {e}")
+        else:
+            _LOGGER.info(f"Wrote the profile to {self.report_file}")
+        return self.report_file, self.stacks_file
+
+    def report(
+        self, snapshot: Optional[tracemalloc.Snapshot] = None, peak: int = 0
+    ) -> str:
+        """
+        :param snapshot: The memory allocations at the end of the command.
+        :param peak: The most memory we traced at once, in bytes.
+        :return: The functions sorted by their cumulative and their own time, and the allocations.
+        """
+        output = StringIO()
+        stats = Stats(self._profile, stream=output)
+        output.write(f"{' '.join(sys.argv)}\n\n")
+        stats.sort_stats("cumulative").print_stats(_REPORTED_FUNCTIONS)
+        stats.sort_stats("tottime").print_stats(_REPORTED_FUNCTIONS)
+        output.write(
+            f"{sum(self.samples.values())} stack samples of all threads, "
+            f"every {self._interval * 1000:.0f} ms, are in {self.stacks_file.name}\n"
+        )
+        if snapshot is not None:
+            output.write(f"\nPeak memory: {peak / 2 ** 20:.1f} MiB\n\n")
+            snapshot = snapshot.filter_traces(
+                [
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                ]
+            )
+            for statistic in snapshot.statistics("lineno")[:_REPORTED_ALLOCATIONS]:
+                output.write(f"{statistic}\n")
+        return output.getvalue()
+
+    def _sample_loop(self) -> None:
+        own = get_ident()
+        while not self._stop.wait(self._interval):
+            self.sample(own)
+
+    def sample(self, ignore: Optional[int] = None) -> None:
+        """
+        Count the current stack of every thread.
+        :param ignore: A thread that we do not sample, i.e., the sampler.
+        :return:
+        """
+        frames = sys._current_frames()
+        if any(i not in self._names for i in frames):
+            self._names = {t.ident: t.name for t in enumerate_threads() if t.ident}
+        for ident, frame in frames.items():
+            if ident != ignore:
+                name = self._names.get(ident, str(ident))
+                self.samples[";".join([name] + _stack(frame))] += 1
+
+
+def _stack(frame: Optional[FrameType]) -> List[str]:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        label = f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+        stack.append(label.replace(";", ":"))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def start_profiling(directory: Path, memory: bool = False) -> Profiler:
+    """
+    :param directory: See Profiler.
+    :param memory: See Profiler.
+    :return: A running profiler; call stop() when the command finishes.
+    """
+    profiler = Profiler(directory, memory)
+    profiler.start()
+    return profiler
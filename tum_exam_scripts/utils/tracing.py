@@ -0,0 +1,216 @@
+"""
+Timing spans.
+A span measures one step, e.g., the validation of all booklets or the submission of a single job,
+and records its duration and what it processed, e.g., bytes and pages.
+The spans go to a JSON-lines trace file and, summed up per step, to a file for the textfile collector of the
+Prometheus node exporter. Without these files, spans only measure the time and cost almost nothing.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from json import dumps
+from logging import getLogger
+from os import replace
+from pathlib import Path
+from threading import Lock, current_thread
+from time import perf_counter, time
+from typing import IO, Any, DefaultDict, Dict, Iterator, Optional
+
+_LOGGER = getLogger(__name__)
+
+METRIC_PREFIX = "tum_exam_scripts"
+# The attributes that we sum up in the metrics.
+_COUNTED_ATTRIBUTES = ("bytes", "pages", "files")
+
+
+class Span:
+    """
+    A finished or running step.
+    """
+
+    def __init__(self, name: str, attributes: Dict[str, Any]) -> None:
+        self.name = name
+        self.attributes = attributes
+        self.start = time()
+        self.duration = 0.0
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> None:
+        """
+        Add attributes, e.g., the number of bytes or pages we processed.
+        :param attributes:
+        :return:
+        """
+        self.attributes.update(attributes)
+
+    def to_json(self) -> str:
+        record = {
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration": round(self.duration, 6),
+            "thread": current_thread().name,
+            "error": self.error,
+            "attributes": {
+                k: v if isinstance(v, (bool, int, float, type(None))) else str(v)
+                for k, v in self.attributes.items()
+            },
+        }
+        return dumps(record)
+
+
+class _Totals:
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.counted: DefaultDict[str, float] = defaultdict(float)
+
+
+class Tracer:
+    """
+    Writes the finished spans. All methods may be called from several threads.
+    """
+
+    def __init__(
+        self, trace_file: Optional[Path] = None, metrics_file: Optional[Path] = None
+    ) -> None:
+        self._trace: Optional[IO[str]] = None
+        if trace_file is not None:
+            self._trace = trace_file.open("a", encoding="utf-8")
+        self._metrics_file = metrics_file
+        self._totals: DefaultDict[str, _Totals] = defaultdict(_Totals)
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._trace is not None or self._metrics_file is not None
+
+    def record(self, span: Span) -> None:
+        """
+        Write a finished span.
+        :param span:
+        :return:
+        """
+        if not self.enabled:
+            return
+        line = span.to_json() if self._trace is not None else ""
+        with self._lock:
+            if self._trace is not None:
+                self._trace.write(line + "\n")
+            totals = self._totals[span.name]
+            totals.count += 1
+            totals.errors += span.error is not None
+            totals.seconds += span.duration
+            for attribute in _COUNTED_ATTRIBUTES:
+                value = span.attributes.get(attribute)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    totals.counted[attribute] += value
+
+    def close(self) -> None:
+        """
+        Close the trace file and write the metrics.
+        :return:
+        """
+        with self._lock:
+            if self._trace is not None:
+                self._trace.close()
+                self._trace = None
+            if self._metrics_file is not None:
+                _write_metrics(self._metrics_file, self._totals)
+                self._metrics_file = None
+
+
+def _write_metrics(metrics_file: Path, totals: Dict[str, _Totals]) -> None:
+    """
+    The node exporter may read the file at any time, so we replace it atomically.
+    """
+    lines = [
+        f"# HELP {METRIC_PREFIX}_span_seconds The time spent in a step.",
+        f"# TYPE {METRIC_PREFIX}_span_seconds summary",
+    ]
+    for name, total in sorted(totals.items()):
+        lines.append(
+            f'{METRIC_PREFIX}_span_seconds_sum{{span="{name}"}} {total.seconds:.6f}'
+        )
+        lines.append(
+            f'{METRIC_PREFIX}_span_seconds_count{{span="{name}"}} {total.count}'
+        )
+    lines += [
+        f"# HELP {METRIC_PREFIX}_span_errors_total The steps that failed.",
+        f"# TYPE {METRIC_PREFIX}_span_errors_total counter",
+    ]
+    for name, total in sorted(totals.items()):
+        lines.append(
+            f'{METRIC_PREFIX}_span_errors_total{{span="{name}"}} {total.errors}'
+        )
+    for attribute in _COUNTED_ATTRIBUTES:
+        lines += [
+            f"# HELP {METRIC_PREFIX}_span_{attribute}_total The {attribute} a step processed.",
+            f"# TYPE {METRIC_PREFIX}_span_{attribute}_total counter",
+        ]
+        for name, total in sorted(totals.items()):
+            if attribute in total.counted:
+                lines.append(
+                    f'{METRIC_PREFIX}_span_{attribute}_total{{span="{name}"}} {total.counted[attribute]:g}'
+                )
+    lines += [
+        f"# HELP {METRIC_PREFIX}_last_run_timestamp_seconds When the last run finished.",
+        f"# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge",
+        f"{METRIC_PREFIX}_last_run_timestamp_seconds {time():.3f}",
+    ]
+    temporary_file = metrics_file.with_name(metrics_file.name + ".tmp")
+    try:
+        temporary_file.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        replace(temporary_file, metrics_file)
+    except OSError as e:
+        _LOGGER.warning(f"Could not write the metrics to {metrics_file}: {e}")
+
+
+_tracer = Tracer()
+
+
+def configure_tracing(
+    trace_file: Optional[Path] = None, metrics_file: Optional[Path] = None
+) -> Tracer:
+    """
+    Start recording the spans of this process.
+    :param trace_file: The JSON-lines file we append the spans to.
+    :param metrics_file: The Prometheus textfile we write when tracing is shut down.
+    :return:
+    """
+    global _tracer
+    _tracer.close()
+    _tracer = Tracer(trace_file, metrics_file)
+    return _tracer
+
+
+def shutdown_tracing() -> None:
+    """
+    Write the outstanding data and stop recording.
+    :return:
+    """
+    configure_tracing()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """
+    Measure a step.
+
+        with span("validation", files=len(pdf_files)) as current:
+            ...
+            current.set(pages=pages)
+
+    :param name:
+    :param attributes:
+    :return:
+    """
+    current = Span(name, attributes)
+    start = perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        current.duration = perf_counter() - start
+        _tracer.record(current)
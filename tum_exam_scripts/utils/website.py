@@ -13,14 +13,16 @@ from helium import (
     wait_until,
     write,
 )
+from tum_exam_scripts.defaults import DEFAULT_UCENTRAL_URL
 from tum_exam_scripts.enums import Browser
 
 
-def open_website_internal(user_name: str, password: str, browser: Browser) -> None:
+def open_website_internal(
+    user_name: str, password: str, browser: Browser, url: str = DEFAULT_UCENTRAL_URL
+) -> None:
     """
     Use selenium to open the printing page.
     """
-    url = "https://ucentral.in.tum.de/cgi-bin/index.cgi"
     if browser == Browser.CHROME:
         start_chrome(url)
     elif browser == Browser.FIREFOX: